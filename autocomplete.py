@@ -0,0 +1,171 @@
+"""
+查询词补全
+按前缀返回文档频率（或查询热度）最高的词项。每次按键都把词汇表中以该前缀
+开头的词项取出来排序太慢：常见前缀（如 "s"）对应几千个词项。
+
+词项保存为有序数组，前缀对应数组中的一段连续范围（二分查找）。范围较小时
+直接在范围内取前 k 个；范围较大的前缀第一次被查询时计算前 k 个补全并缓存，
+相当于只在"重"的字典树节点上缓存前 k 个补全。之后权重上升的词项就地更新
+所在前缀的缓存；缓存中的词项权重下降或被删除时，其他词项可能超过它，该前缀
+的缓存失效，下次查询时重新计算。
+
+加入和删除文档时只记录权重可能变化的词项，下次补全时再批量更新：建立索引
+期间不需要维护补全结构，待更新的词项过多时整体重建。
+"""
+
+import bisect
+import heapq
+from typing import Callable, Dict, Iterable, List, Set, Tuple
+
+# 比任何词项字符都大的哨兵字符，用于计算前缀范围的上界
+_MAX_CHAR = '\U0010ffff'
+
+
+class CompletionIndex:
+    """
+    前缀补全索引：有序词项数组，加上按前缀缓存的前 k 个补全
+
+    词项的权重是文档频率；给出查询热度时为 (查询次数, 文档频率)，先按查询次数
+    排序。补全按权重降序排列，权重相同时按字典序
+    """
+
+    # 前缀范围内的词项不超过该数时直接扫描，不缓存
+    SCAN_LIMIT = 32
+    # 待更新的词项超过词汇表的该比例时整体重建
+    REBUILD_FRACTION = 0.25
+
+    def __init__(self, doc_freqs: Callable[[], Iterable[Tuple[str, int]]], df: Callable[[str], int],
+                 k: int = 10, popularity: Dict[str, int] = None):
+        """
+        Args:
+            doc_freqs: 返回全部 (词项, 文档频率) 的函数（整体重建时调用）
+            df: 返回单个词项文档频率的函数，词项已不存在时返回 0
+            k: 每个前缀缓存的补全数
+            popularity: 可选的 {词项: 查询次数}（如由查询日志统计）
+        """
+        self.k = k
+        self._doc_freqs = doc_freqs
+        self._df = df
+        self.popularity = popularity
+        # 有序词项数组和 {词项: 权重}
+        self.terms: List[str] = []
+        self.weights: Dict[str, object] = {}
+        # 缓存的补全：{前缀: 按权重降序的词项列表}
+        self._top: Dict[str, List[str]] = {}
+        # 权重可能已变化、尚未更新的词项
+        self._dirty: Set[str] = set()
+        self._stale = False
+        self.rebuild()
+
+    def __len__(self) -> int:
+        self._flush()
+        return len(self.terms)
+
+    def rebuild(self):
+        """从当前词汇表整体重建，清空缓存"""
+        popularity = self.popularity
+        if popularity is None:
+            weights = {term: df for term, df in self._doc_freqs() if df}
+        else:
+            weights = {term: (popularity.get(term, 0), df) for term, df in self._doc_freqs() if df}
+        self.weights = weights
+        self.terms = sorted(weights)
+        self._top = {}
+        self._dirty = set()
+        self._stale = False
+
+    def touch(self, terms: Iterable[str]):
+        """记录权重可能变化的词项（新增、删除或文档频率变化），下次补全时更新"""
+        if not self._stale:
+            self._dirty.update(terms)
+
+    def invalidate(self):
+        """词汇表整体替换（如载入了另一个索引），下次补全时重建"""
+        self._stale = True
+        self._dirty = set()
+
+    def _flush(self):
+        """应用待更新的词项"""
+        if self._stale or len(self._dirty) > self.REBUILD_FRACTION * len(self.terms):
+            self.rebuild()
+            return
+        dirty, self._dirty = self._dirty, set()
+        for term in dirty:
+            self._update(term, self._weight_of(term))
+
+    def _weight_of(self, term: str):
+        """词项的当前权重，词项已不存在时为 None"""
+        df = self._df(term)
+        if not df:
+            return None
+        return df if self.popularity is None else (self.popularity.get(term, 0), df)
+
+    def _precedes(self, a: str, b: str) -> bool:
+        """补全顺序中 a 是否排在 b 之前"""
+        weight_a, weight_b = self.weights[a], self.weights[b]
+        return weight_a > weight_b or (weight_a == weight_b and a < b)
+
+    def _insert(self, top: List[str], term: str):
+        """把词项插入按补全顺序排列的列表"""
+        position = 0
+        while position < len(top) and self._precedes(top[position], term):
+            position += 1
+        top.insert(position, term)
+
+    def _update(self, term: str, weight):
+        """更新一个词项的权重（None 表示删除），并维护所在前缀的缓存"""
+        old = self.weights.get(term)
+        if weight == old:
+            return
+        if old is None:
+            bisect.insort(self.terms, term)
+        if weight is None:
+            del self.terms[bisect.bisect_left(self.terms, term)]
+            del self.weights[term]
+        else:
+            self.weights[term] = weight
+        decreased = weight is None or (old is not None and weight < old)
+
+        for end in range(len(term) + 1):
+            prefix = term[:end]
+            top = self._top.get(prefix)
+            if top is None:
+                continue
+            if term in top:
+                if decreased:
+                    # 缓存之外的词项可能超过它，下次查询时重新计算
+                    del self._top[prefix]
+                else:
+                    top.remove(term)
+                    self._insert(top, term)
+            elif weight is not None and self._precedes(term, top[-1]):
+                self._insert(top, term)
+                top.pop()
+
+    def _best(self, lo: int, hi: int, k: int) -> List[str]:
+        """有序数组 [lo, hi) 范围内权重最高的 k 个词项（nlargest 稳定，权重相同时保持字典序）"""
+        return heapq.nlargest(k, self.terms[lo:hi], key=self.weights.__getitem__)
+
+    def complete(self, prefix: str, k: int = None) -> List[str]:
+        """
+        返回以 prefix 开头、权重最高的 k 个词项
+
+        Args:
+            prefix: 前缀
+            k: 返回数，默认为缓存的补全数；大于缓存的补全数时扫描整个前缀范围
+
+        Returns:
+            词项列表，按权重降序
+        """
+        self._flush()
+        k = self.k if k is None else k
+        if k <= 0:
+            return []
+        lo = bisect.bisect_left(self.terms, prefix)
+        hi = bisect.bisect_left(self.terms, prefix + _MAX_CHAR, lo)
+        if hi - lo <= max(self.SCAN_LIMIT, self.k) or k > self.k:
+            return self._best(lo, hi, k)
+        top = self._top.get(prefix)
+        if top is None:
+            top = self._top[prefix] = self._best(lo, hi, self.k)
+        return top[:k]
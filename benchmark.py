@@ -0,0 +1,1166 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Reproducible benchmark suite for the inverted index
+
+Measures build throughput, peak memory (RSS and tracemalloc) and
+per-query-type latency percentiles over a fixed query log, writes the
+results as JSON and can compare them against a stored baseline.
+
+Usage:
+    python benchmark.py --docs 5000 --output output/benchmark.json
+    python benchmark.py --docs 5000 --compare output/benchmark_baseline.json
+    python benchmark.py --write-query-log data/reuters_query_log.json
+    python benchmark.py --corpus synthetic --docs 100000
+    python benchmark.py --corpus synthetic --scaling 10000,100000,1000000
+    python benchmark.py --docs 5000 --index-options-report
+    python benchmark.py --docs 0 --champions 64
+    python benchmark.py --docs 5000 --wal-report
+    python benchmark.py --docs 5000 --sqlite-report
+    python benchmark.py --docs 5000 --cjk-report
+    python benchmark.py --docs 0 --autocomplete-report
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import tempfile
+import tracemalloc
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from inverted_index import InvertedIndex, INDEX_OPTIONS
+from parse_reuters import load_reuters_documents
+from corpus_generator import ZipfCorpusGenerator
+from tracing import Tracer, JsonLinesSink, PrometheusSink, RingBufferSink
+from wal import WriteAheadLog
+
+DEFAULT_QUERY_LOG = os.path.join('data', 'reuters_query_log.json')
+DEFAULT_SEED = 42
+DEFAULT_OUTPUT = os.path.join('output', 'benchmark_results.json')
+DEFAULT_SCALING_OUTPUT = os.path.join('output', 'scaling_results.json')
+
+# Metrics where a larger value is a regression (max_ns is too noisy to compare)
+LOWER_IS_BETTER = ('mean_ns', 'p50_ns', 'p95_ns', 'p99_ns', '_bytes', '_kb', '_seconds')
+# Metrics where a smaller value is a regression
+HIGHER_IS_BETTER = ('_per_second',)
+
+
+def percentile(sorted_values, pct):
+    """
+    Nearest-rank percentile of an already sorted list
+
+    Args:
+        sorted_values: Values in ascending order
+        pct: Percentile in [0, 100]
+
+    Returns:
+        The percentile value (0 for an empty list)
+    """
+    if not sorted_values:
+        return 0
+    rank = max(1, int(-(-pct * len(sorted_values) // 100)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def peak_rss_kb():
+    """Peak resident set size of this process in KB (None if unavailable)"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes, Linux reports kilobytes
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+def iter_documents(documents):
+    """
+    Iterate a document source
+
+    A source is either a list of {'id', 'text'} documents or a zero-argument
+    callable returning a fresh iterator, so synthetic corpora can be
+    streamed (and re-streamed for the tracemalloc build) without being
+    held in memory.
+    """
+    return documents() if callable(documents) else iter(documents)
+
+
+def build_index(documents, index_factory=InvertedIndex):
+    """Build an index from a document source (see iter_documents)"""
+    index = index_factory()
+    for doc in iter_documents(documents):
+        index.add_document(doc['id'], doc['text'])
+    return index
+
+
+def benchmark_build(documents, index_factory=InvertedIndex, trace_memory=True):
+    """
+    Measure build throughput and memory
+
+    The timed build runs without tracemalloc (which slows allocation
+    heavily); a second build under tracemalloc measures Python heap peak.
+
+    Returns:
+        (index, dict of build metrics)
+    """
+    start = time.perf_counter_ns()
+    index = build_index(documents, index_factory)
+    elapsed_ns = time.perf_counter_ns() - start
+    total_tokens = index.stats.total_tokens
+    num_docs = len(index.documents)
+
+    seconds = elapsed_ns / 1e9
+    results = {
+        'documents': num_docs,
+        'tokens': total_tokens,
+        'vocab_size': len(index.index),
+        'postings': sum(len(docs) for docs in index.index.values()),
+        'build_seconds': seconds,
+        'docs_per_second': num_docs / seconds if seconds else 0.0,
+        'tokens_per_second': total_tokens / seconds if seconds else 0.0,
+        'peak_rss_kb': peak_rss_kb(),
+        'index_bytes': index.memory_report()['total_bytes'],
+    }
+
+    if trace_memory:
+        tracemalloc.start()
+        traced = build_index(documents, index_factory)
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        results['tracemalloc_current_bytes'] = current
+        results['tracemalloc_peak_bytes'] = peak
+        del traced
+
+    return index, results
+
+
+def generate_query_log(index, documents=None, seed=DEFAULT_SEED, per_type=25):
+    """
+    Generate a deterministic query log from an index
+
+    Terms are drawn from document-frequency bands (frequent, medium and
+    rare) and phrases from consecutive tokens of sampled documents, so the
+    log exercises both cheap and expensive paths.
+
+    Args:
+        index: Built InvertedIndex
+        documents: Documents the index was built from (default: the
+                   documents stored in the index)
+        seed: Random seed
+        per_type: Number of queries per query type
+
+    Returns:
+        List of query dicts {'type': ..., 'query': ...}
+    """
+    rng = random.Random(seed)
+    by_df = sorted(((len(docs), term) for term, docs in index.index.items() if docs),
+                   key=lambda item: (-item[0], item[1]))
+    terms = [term for _, term in by_df]
+    frequent = terms[:200]
+    medium = terms[200:2000] or terms
+    rare = [term for df, term in by_df if 2 <= df <= 10] or terms
+
+    def pick(pool, n):
+        return [rng.choice(pool) for _ in range(n)]
+
+    queries = []
+    for _ in range(per_type):
+        queries.append({'type': 'term', 'query': rng.choice(rng.choice((frequent, medium, rare)))})
+        queries.append({'type': 'and', 'query': pick(frequent, 1) + pick(medium, 1)})
+        queries.append({'type': 'or', 'query': pick(frequent, 2) + pick(medium, 1)})
+        queries.append({'type': 'not', 'query': {'include': pick(frequent, 1), 'exclude': pick(medium, 1)}})
+        queries.append({'type': 'ranked', 'query': ' '.join(pick(frequent, 2) + pick(medium, 2))})
+        queries.append({'type': 'wildcard', 'query': rng.choice(medium)[:3] + '*'})
+        queries.append({'type': 'fuzzy', 'query': rng.choice(medium)})
+
+    if documents is None:
+        documents = [{'id': doc_id, 'text': text} for doc_id, text in index.documents.items()]
+    ordered_docs = sorted(documents, key=lambda doc: doc['id'])
+    phrases = 0
+    attempts = 0
+    while phrases < per_type and attempts < per_type * 100 and ordered_docs:
+        attempts += 1
+        tokens = index.preprocess(rng.choice(ordered_docs)['text'])
+        if len(tokens) < 3:
+            continue
+        length = rng.choice((2, 3))
+        start = rng.randrange(len(tokens) - length + 1)
+        queries.append({'type': 'phrase', 'query': ' '.join(tokens[start:start + length])})
+        phrases += 1
+
+    return queries
+
+
+def load_query_log(path):
+    """Load a query log written by save_query_log"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)['queries']
+
+
+def save_query_log(queries, path, source):
+    """Save a query log with a short provenance header"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'source': source, 'queries': queries}, f, indent=1)
+    print(f"✓ Query log saved to {path} ({len(queries)} queries)")
+
+
+def query_runner(index, query):
+    """Return a zero-argument callable that executes one logged query"""
+    kind, q = query['type'], query['query']
+    if kind == 'term':
+        return lambda: index.search(q)
+    if kind == 'and':
+        return lambda: index.search_and(q)
+    if kind == 'or':
+        return lambda: index.search_or(q)
+    if kind == 'not':
+        return lambda: index.search_not(q['include'], q['exclude'])
+    if kind == 'phrase':
+        return lambda: index.search_phrase(q)
+    if kind == 'ranked':
+        return lambda: index.search_ranked(q, k=10)
+    if kind == 'wildcard':
+        return lambda: index.search_wildcard(q)
+    if kind == 'fuzzy':
+        return lambda: index.search_fuzzy(q, max_edits=1)
+    raise ValueError(f"Unknown query type: {kind}")
+
+
+def runnable_queries(index, queries):
+    """Drop phrase queries when the index does not store positions"""
+    if index.index_options == 'positions':
+        return queries
+    return [query for query in queries if query['type'] != 'phrase']
+
+
+def benchmark_queries(index, queries, repeat=5, warmup=1):
+    """
+    Measure per-query-type latency percentiles
+
+    Args:
+        index: Built InvertedIndex
+        queries: Query log
+        repeat: Timed executions per query
+        warmup: Untimed executions per query before timing
+
+    Returns:
+        {query type: {'count', 'mean_ns', 'p50_ns', 'p95_ns', 'p99_ns', 'max_ns'}}
+    """
+    samples = {}
+    perf_counter_ns = time.perf_counter_ns
+    for query in queries:
+        run = query_runner(index, query)
+        for _ in range(warmup):
+            run()
+        timings = samples.setdefault(query['type'], [])
+        for _ in range(repeat):
+            start = perf_counter_ns()
+            run()
+            timings.append(perf_counter_ns() - start)
+
+    results = {}
+    for kind, timings in sorted(samples.items()):
+        timings.sort()
+        results[kind] = {
+            'count': len(timings),
+            'mean_ns': sum(timings) // len(timings),
+            'p50_ns': percentile(timings, 50),
+            'p95_ns': percentile(timings, 95),
+            'p99_ns': percentile(timings, 99),
+            'max_ns': timings[-1],
+        }
+    return results
+
+
+def _flatten(results, prefix=''):
+    """Flatten nested numeric results into {'a.b.c': value}"""
+    flat = {}
+    for key, value in results.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(_flatten(value, name + '.'))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+
+def compare_results(current, baseline, threshold=0.10):
+    """
+    Compare benchmark results against a baseline
+
+    Latency, time and memory metrics regress when they grow by more than
+    `threshold`; throughput metrics regress when they shrink by more than
+    `threshold`. Counts (documents, vocabulary size...) and max latency
+    are not compared.
+
+    Args:
+        current: Results of this run
+        baseline: Stored baseline results
+        threshold: Allowed relative change (0.10 = 10%)
+
+    Returns:
+        List of regressions {'metric', 'baseline', 'current', 'change'}
+    """
+    current_flat = _flatten({'build': current.get('build', {}), 'queries': current.get('queries', {})})
+    baseline_flat = _flatten({'build': baseline.get('build', {}), 'queries': baseline.get('queries', {})})
+
+    regressions = []
+    for metric, old in sorted(baseline_flat.items()):
+        new = current_flat.get(metric)
+        if new is None or not old:
+            continue
+        change = (new - old) / old
+        if metric.endswith(LOWER_IS_BETTER):
+            regressed = change > threshold
+        elif metric.endswith(HIGHER_IS_BETTER):
+            regressed = change < -threshold
+        else:
+            continue
+        if regressed:
+            regressions.append({'metric': metric, 'baseline': old, 'current': new, 'change': change})
+    return regressions
+
+
+def print_report(results):
+    """Print a human-readable summary of benchmark results"""
+    build = results['build']
+    print("\n" + "="*80)
+    print("Build")
+    print("="*80)
+    print(f"  Documents:        {build['documents']:,}")
+    print(f"  Build time:       {build['build_seconds']:.3f} s")
+    print(f"  Throughput:       {build['docs_per_second']:,.0f} docs/s, {build['tokens_per_second']:,.0f} tokens/s")
+    if build.get('peak_rss_kb') is not None:
+        print(f"  Peak RSS:         {build['peak_rss_kb'] / 1024:.1f} MB")
+    if 'tracemalloc_peak_bytes' in build:
+        print(f"  tracemalloc peak: {build['tracemalloc_peak_bytes'] / 2**20:.1f} MB")
+    if 'index_bytes' in build:
+        print(f"  Index size:       {build['index_bytes'] / 2**20:.1f} MB (memory_report estimate)")
+
+    print("\n" + "="*80)
+    print("Query latency (µs)")
+    print("="*80)
+    print(f"{'Type':<12} {'n':>6} {'mean':>10} {'p50':>10} {'p95':>10} {'p99':>10}")
+    print("-" * 62)
+    for kind, stats in results['queries'].items():
+        print(f"{kind:<12} {stats['count']:>6} {stats['mean_ns'] / 1e3:>10.1f} {stats['p50_ns'] / 1e3:>10.1f} "
+              f"{stats['p95_ns'] / 1e3:>10.1f} {stats['p99_ns'] / 1e3:>10.1f}")
+
+
+def _meta(**extra):
+    """Common result metadata"""
+    meta = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+    meta.update(extra)
+    return meta
+
+
+def run_benchmark(documents, queries, repeat=5, trace_memory=True, index_factory=InvertedIndex):
+    """
+    Run the full benchmark
+
+    Args:
+        documents: Document source (see iter_documents)
+        queries: Query log, or None to generate one from the built index
+
+    Returns:
+        Dict with 'meta', 'build' and 'queries' sections
+    """
+    index, build_results = benchmark_build(documents, index_factory, trace_memory)
+    if queries is None:
+        queries = generate_query_log(index)
+    queries = runnable_queries(index, queries)
+    query_results = benchmark_queries(index, queries, repeat=repeat)
+    return {
+        'meta': _meta(documents=build_results['documents'], queries=len(queries), repeat=repeat),
+        'build': build_results,
+        'queries': query_results,
+    }
+
+
+def benchmark_index_options(documents, options=INDEX_OPTIONS, index_factory=InvertedIndex):
+    """
+    Build the index once per index option and compare index size
+
+    Args:
+        documents: Document source (see iter_documents)
+        options: Index options to compare
+        index_factory: Builds an index; called with index_options=option
+
+    Returns:
+        {option: {'index_bytes', 'position_bytes', 'build_seconds', 'saved_ratio'}},
+        where saved_ratio is relative to full positions
+    """
+    results = {}
+    for option in options:
+        index, build = benchmark_build(documents, lambda: index_factory(index_options=option),
+                                       trace_memory=False)
+        results[option] = {
+            'index_bytes': build['index_bytes'],
+            'position_bytes': index.memory_report()['components']['position_lists'],
+            'build_seconds': build['build_seconds'],
+        }
+        del index
+    baseline = results.get('positions', {}).get('index_bytes')
+    for stats in results.values():
+        stats['saved_ratio'] = 1 - stats['index_bytes'] / baseline if baseline else 0.0
+    return results
+
+
+def print_index_options_report(results):
+    """Print the index size per index option"""
+    print("\n" + "="*80)
+    print("Index size by index option")
+    print("="*80)
+    print(f"{'Option':<12} {'Index MB':>10} {'Positions MB':>14} {'Build s':>9} {'Saved':>8}")
+    print("-" * 57)
+    for option, stats in results.items():
+        print(f"{option:<12} {stats['index_bytes'] / 2**20:>10.1f} {stats['position_bytes'] / 2**20:>14.1f} "
+              f"{stats['build_seconds']:>9.2f} {stats['saved_ratio']:>8.1%}")
+
+
+# Frequent CJK ideographs used to spell pseudo-Chinese words for the mixed corpus
+_CJK_CHARS = [chr(code) for code in range(0x4e00, 0x4e00 + 3000)]
+
+
+def mixed_language_documents(documents, fraction=0.5, seed=DEFAULT_SEED):
+    """
+    Turn a fraction of the documents into pseudo-Chinese text
+
+    Every word of a selected document is replaced by a fixed 1-3 character
+    CJK word derived from a hash of the word, so word frequencies keep their
+    Zipf shape. Words are written without spaces, numbers stay inline and
+    sentence breaks become full-width punctuation, as in real Chinese news
+    text mixed with Latin numbers.
+
+    Returns:
+        List of {'id', 'text'} documents
+    """
+    from sketches import hash64
+
+    rng = random.Random(seed)
+    words = {}
+
+    def cjk_word(word):
+        spelled = words.get(word)
+        if spelled is None:
+            value = hash64(word)
+            spelled = ''.join(_CJK_CHARS[(value >> (12 * i)) % len(_CJK_CHARS)] for i in range(1 + value % 3))
+            words[word] = spelled
+        return spelled
+
+    mixed = []
+    for doc in iter_documents(documents):
+        text = doc['text']
+        if rng.random() < fraction:
+            parts = []
+            for word in text.split():
+                stripped = word.strip('.,;:()"\'').lower()
+                if stripped.isdigit():
+                    parts.append(stripped)
+                elif stripped:
+                    parts.append(cjk_word(stripped))
+                if word.endswith('.'):
+                    parts.append('。')
+                elif word.endswith(','):
+                    parts.append('，')
+            text = ''.join(parts)
+        mixed.append({'id': doc['id'], 'text': text})
+    return mixed
+
+
+def benchmark_cjk(documents, fraction=0.5, index_factory=InvertedIndex):
+    """
+    Compare build throughput and index size on a mixed-language corpus
+
+    Builds the original corpus, then the mixed corpus with CJK indexing
+    disabled (CJK text is dropped, as before) and enabled (overlapping
+    bigrams), and times preprocessing of the original Latin text with the
+    CJK check on and off. index_factory is called with cjk_bigrams set per
+    variant.
+
+    Returns:
+        {'corpus': {'documents', 'cjk_documents', 'text_bytes'},
+         'builds': {name: {'build_seconds', 'docs_per_second', 'text_mb_per_second', 'tokens',
+                           'vocab_size', 'postings', 'index_bytes', 'disk_bytes', 'disk_bytes_per_posting'}},
+         'latin_preprocess_seconds': {'cjk_off', 'cjk_on'}}
+    """
+    original = list(iter_documents(documents))
+    mixed = mixed_language_documents(original, fraction)
+    cjk_documents = sum(1 for before, after in zip(original, mixed) if before['text'] != after['text'])
+    text_bytes = sum(len(doc['text'].encode('utf-8')) for doc in mixed)
+    variants = [
+        ('latin', original, True),
+        ('mixed, cjk off', mixed, False),
+        ('mixed, bigrams', mixed, True),
+    ]
+    builds = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for name, docs, cjk_bigrams in variants:
+            index, build = benchmark_build(docs, lambda: index_factory(cjk_bigrams=cjk_bigrams),
+                                           trace_memory=False)
+            path = os.path.join(directory, 'index.idx')
+            index.save_disk_index(path)
+            input_bytes = sum(len(doc['text'].encode('utf-8')) for doc in docs)
+            builds[name] = {
+                'build_seconds': build['build_seconds'],
+                'docs_per_second': build['docs_per_second'],
+                'text_mb_per_second': input_bytes / 2**20 / build['build_seconds'],
+                'tokens': build['tokens'],
+                'vocab_size': build['vocab_size'],
+                'postings': build['postings'],
+                'index_bytes': build['index_bytes'],
+                'disk_bytes': os.path.getsize(path),
+                'disk_bytes_per_posting': os.path.getsize(path) / max(1, build['postings']),
+            }
+            del index
+
+    preprocess = {}
+    for name, cjk_bigrams in (('cjk_off', False), ('cjk_on', True)):
+        analyzer = index_factory(cjk_bigrams=cjk_bigrams)
+        start = time.perf_counter()
+        for doc in original:
+            analyzer.preprocess(doc['text'])
+        preprocess[name] = time.perf_counter() - start
+    return {
+        'corpus': {'documents': len(mixed), 'cjk_documents': cjk_documents, 'text_bytes': text_bytes},
+        'builds': builds,
+        'latin_preprocess_seconds': preprocess,
+    }
+
+
+def print_cjk_report(results):
+    """Print build throughput and index growth for the mixed-language corpus"""
+    corpus = results['corpus']
+    print("\n" + "="*80)
+    print(f"Mixed-language corpus: {corpus['cjk_documents']} of {corpus['documents']} documents in CJK")
+    print("="*80)
+    print(f"{'Build':<16} {'Docs/s':>8} {'MB/s':>6} {'Tokens':>10} {'Terms':>8} {'Postings':>10} "
+          f"{'Memory MB':>10} {'Disk MB':>8} {'B/posting':>10}")
+    print("-" * 92)
+    for name, stats in results['builds'].items():
+        print(f"{name:<16} {stats['docs_per_second']:>8.0f} {stats['text_mb_per_second']:>6.2f} "
+              f"{stats['tokens']:>10} {stats['vocab_size']:>8} {stats['postings']:>10} "
+              f"{stats['index_bytes'] / 2**20:>10.1f} {stats['disk_bytes'] / 2**20:>8.2f} "
+              f"{stats['disk_bytes_per_posting']:>10.2f}")
+    preprocess = results['latin_preprocess_seconds']
+    print(f"\nLatin-only preprocessing: {preprocess['cjk_off']:.2f}s without the CJK check, "
+          f"{preprocess['cjk_on']:.2f}s with it")
+
+
+def benchmark_wal(documents, sync_modes=(0, 64, 1), index_factory=InvertedIndex):
+    """
+    Measure ingest throughput with a write-ahead log against the in-memory build
+
+    For every fsync batch size the index is built with a fresh log, then
+    checkpointed; recovery time is measured by replaying the whole log
+    into an empty index.
+
+    Args:
+        documents: Document source (see iter_documents)
+        sync_modes: WriteAheadLog.sync_every values (0 never fsyncs, 1 fsyncs every record)
+        index_factory: Builds an index; called with wal=log for the logged builds
+
+    Returns:
+        {mode: {'build_seconds', 'docs_per_second', 'relative_throughput', 'syncs',
+                'log_bytes', 'recover_seconds', 'checkpoint_seconds'}};
+        mode 'memory' is the baseline without a log
+    """
+    start = time.perf_counter()
+    index = build_index(documents, index_factory)
+    baseline = time.perf_counter() - start
+    num_docs = len(index.documents)
+    results = {'memory': {'build_seconds': baseline, 'docs_per_second': num_docs / baseline,
+                          'relative_throughput': 1.0}}
+    del index
+
+    with tempfile.TemporaryDirectory() as directory:
+        for sync_every in sync_modes:
+            log_path = os.path.join(directory, f'sync{sync_every}.wal')
+            wal = WriteAheadLog(log_path, sync_every=sync_every)
+            start = time.perf_counter()
+            index = build_index(documents, lambda: index_factory(wal=wal))
+            wal.sync()
+            seconds = time.perf_counter() - start
+            stats = {
+                'build_seconds': seconds,
+                'docs_per_second': num_docs / seconds,
+                'relative_throughput': baseline / seconds,
+                'syncs': wal.syncs,
+                'log_bytes': wal.size_bytes(),
+            }
+
+            start = time.perf_counter()
+            replayed = index_factory(wal=wal).recover(os.path.join(directory, 'missing.json'))
+            stats['recover_seconds'] = time.perf_counter() - start
+            assert replayed == num_docs
+
+            start = time.perf_counter()
+            index.checkpoint(os.path.join(directory, 'checkpoint.json'))
+            stats['checkpoint_seconds'] = time.perf_counter() - start
+            wal.close()
+            results[f'sync_every={sync_every}'] = stats
+            del index
+    return results
+
+
+def print_wal_report(results):
+    """Print ingest throughput with and without the write-ahead log"""
+    print("\n" + "="*80)
+    print("Write-ahead log ingest throughput")
+    print("="*80)
+    print(f"{'Mode':<16} {'Docs/s':>9} {'Relative':>9} {'fsyncs':>8} {'Log MB':>8} "
+          f"{'Recover s':>10} {'Checkpoint s':>13}")
+    print("-" * 79)
+    for mode, stats in results.items():
+        if mode == 'memory':
+            print(f"{mode:<16} {stats['docs_per_second']:>9.0f} {stats['relative_throughput']:>9.1%}")
+            continue
+        print(f"{mode:<16} {stats['docs_per_second']:>9.0f} {stats['relative_throughput']:>9.1%} "
+              f"{stats['syncs']:>8} {stats['log_bytes'] / 2**20:>8.1f} {stats['recover_seconds']:>10.2f} "
+              f"{stats['checkpoint_seconds']:>13.2f}")
+
+
+def benchmark_sqlite(documents, queries=None, repeat=3, cache_mb=16, updates=200,
+                     index_factory=InvertedIndex):
+    """
+    Compare the SQLite backend with the in-memory index and its JSON snapshot
+
+    Args:
+        documents: Document source (see iter_documents)
+        queries: Query log (generated from the index when None)
+        repeat: Timed executions per query
+        cache_mb: Posting cache size for the cached SQLite run
+        updates: Documents re-added (upserted) to measure incremental writes
+        index_factory: Builds the in-memory index and the indexes the database is opened into
+
+    Returns:
+        {'storage': {'json_bytes', 'json_save_seconds', 'json_load_seconds',
+                     'sqlite_bytes', 'sqlite_save_seconds', 'sqlite_open_seconds',
+                     'upserts_per_second', 'batch_upserts_per_second'},
+         'queries': {backend: benchmark_queries results}}
+    """
+    from posting_cache import PostingCache
+
+    index = build_index(documents, index_factory)
+    if queries is None:
+        queries = generate_query_log(index, seed=DEFAULT_SEED)
+    queries = runnable_queries(index, queries)
+    storage = {}
+    results = {'storage': storage, 'queries': {'memory': benchmark_queries(index, queries, repeat)}}
+    with tempfile.TemporaryDirectory() as directory:
+        json_path = os.path.join(directory, 'index.json')
+        start = time.perf_counter()
+        index._write_snapshot(json_path)
+        storage['json_save_seconds'] = time.perf_counter() - start
+        storage['json_bytes'] = os.path.getsize(json_path)
+        start = time.perf_counter()
+        with open(json_path, 'r', encoding='utf-8') as f:
+            json.load(f)
+        storage['json_load_seconds'] = time.perf_counter() - start
+
+        db_path = os.path.join(directory, 'index.sqlite')
+        start = time.perf_counter()
+        storage['sqlite_bytes'] = index.save_sqlite(db_path)
+        storage['sqlite_save_seconds'] = time.perf_counter() - start
+        changed = {doc_id: index.documents[doc_id] for doc_id in list(index.documents)[:updates]}
+        del index
+
+        start = time.perf_counter()
+        db = index_factory()
+        db.open_sqlite(db_path)
+        storage['sqlite_open_seconds'] = time.perf_counter() - start
+        results['queries']['sqlite'] = benchmark_queries(db, queries, repeat)
+
+        start = time.perf_counter()
+        for doc_id, content in changed.items():
+            db.add_document(doc_id, content)
+        storage['upserts_per_second'] = len(changed) / (time.perf_counter() - start)
+        start = time.perf_counter()
+        db.build_from_documents(changed)
+        storage['batch_upserts_per_second'] = len(changed) / (time.perf_counter() - start)
+        db.sqlite_store.close()
+
+        db = index_factory()
+        db.open_sqlite(db_path, cache=PostingCache(cache_mb * 2**20))
+        results['queries'][f'sqlite+cache{cache_mb}MB'] = benchmark_queries(db, queries, repeat)
+        db.sqlite_store.close()
+    return results
+
+
+def print_sqlite_report(results):
+    """Print storage costs and per-query-type mean latency for each backend"""
+    storage = results['storage']
+    print("\n" + "="*80)
+    print("SQLite backend vs in-memory index")
+    print("="*80)
+    print(f"JSON snapshot:   {storage['json_bytes'] / 2**20:>7.1f} MB, save {storage['json_save_seconds']:.2f}s, "
+          f"load {storage['json_load_seconds']:.2f}s (every change rewrites the whole file)")
+    print(f"SQLite database: {storage['sqlite_bytes'] / 2**20:>7.1f} MB, save {storage['sqlite_save_seconds']:.2f}s, "
+          f"open {storage['sqlite_open_seconds']:.2f}s")
+    print(f"SQLite upserts:  {storage['upserts_per_second']:.0f} docs/s (one transaction each), "
+          f"{storage['batch_upserts_per_second']:.0f} docs/s (one transaction)")
+    backends = list(results['queries'])
+    kinds = sorted({kind for backend in backends for kind in results['queries'][backend]})
+    print(f"\n{'Mean latency (us)':<18}" + ''.join(f"{backend:>20}" for backend in backends))
+    print("-" * (18 + 20 * len(backends)))
+    for kind in kinds:
+        row = [results['queries'][backend].get(kind, {}).get('mean_ns') for backend in backends]
+        print(f"{kind:<18}" + ''.join(f"{value / 1000:>20.1f}" if value is not None else f"{'-':>20}"
+                                      for value in row))
+
+
+def benchmark_autocomplete(documents, prefixes_per_length=200, max_length=3, updates=100,
+                           k=10, repeat=20, seed=DEFAULT_SEED, index_factory=InvertedIndex):
+    """
+    Compare query autocompletion with a naive prefix scan sorted by DF
+
+    The last `updates` documents are held out and added after the completion
+    index is built, to time the incremental update applied on the next
+    completion against a full rebuild.
+
+    Args:
+        documents: Document source (see iter_documents)
+        prefixes_per_length: Prefixes sampled from the vocabulary per prefix length
+        max_length: Longest prefix length
+        updates: Documents added after the completion index is built
+        k: Completions per prefix
+        repeat: Timed completions per prefix (after the first, cold one)
+        seed: Seed for prefix sampling
+        index_factory: Builds the indexes whose throughput is compared
+
+    Returns:
+        {'vocab_size', 'build_seconds', 'build_docs_per_second': {'off', 'on'},
+         'update_documents', 'update_seconds', 'rebuild_seconds',
+         'prefixes': {length: {'prefixes', 'naive_mean_ns', 'cold_mean_ns', 'mean_ns', 'p99_ns'}}}
+    """
+    docs = list(iter_documents(documents))
+    held_out = docs[-updates:] if updates else []
+    initial = docs[:len(docs) - len(held_out)]
+
+    throughput = {}
+    for name in ('off', 'on'):
+        index = index_factory()
+        if name == 'on':
+            index.build_autocomplete(k)
+        start = time.perf_counter()
+        for doc in initial:
+            index.add_document(doc['id'], doc['text'])
+        throughput[name] = len(initial) / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    index.build_autocomplete(k)
+    build_seconds = time.perf_counter() - start
+
+    rng = random.Random(seed)
+    vocabulary = sorted(index.index)
+    prefix_results = {}
+    probe = ''
+    for length in range(1, max_length + 1):
+        prefixes = sorted({term[:length] for term in rng.sample(vocabulary, min(prefixes_per_length, len(vocabulary)))
+                           if len(term) >= length})
+        naive, cold, warm = [], [], []
+        for prefix in prefixes:
+            start = time.perf_counter_ns()
+            expected = sorted((term for term in index.index if term.startswith(prefix)),
+                              key=lambda term: (-index.stats.df(term), term))[:k]
+            naive.append(time.perf_counter_ns() - start)
+            start = time.perf_counter_ns()
+            completions = index.complete(prefix, k)
+            cold.append(time.perf_counter_ns() - start)
+            if completions != expected:
+                raise AssertionError(f"completions for {prefix!r} differ: {completions} != {expected}")
+            for _ in range(repeat):
+                start = time.perf_counter_ns()
+                index.complete(prefix, k)
+                warm.append(time.perf_counter_ns() - start)
+        warm.sort()
+        if length == 1:
+            # A cached prefix, completed again after the held-out documents are added
+            probe = prefixes[0]
+        prefix_results[length] = {
+            'prefixes': len(prefixes),
+            'naive_mean_ns': sum(naive) / len(naive),
+            'cold_mean_ns': sum(cold) / len(cold),
+            'mean_ns': sum(warm) / len(warm),
+            'p99_ns': percentile(warm, 99),
+        }
+
+    for doc in held_out:
+        index.add_document(doc['id'], doc['text'])
+    start = time.perf_counter()
+    index.complete(probe, k)
+    update_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    index._completions.rebuild()
+    rebuild_seconds = time.perf_counter() - start
+    return {
+        'vocab_size': len(vocabulary),
+        'build_seconds': build_seconds,
+        'build_docs_per_second': throughput,
+        'update_documents': len(held_out),
+        'update_seconds': update_seconds,
+        'rebuild_seconds': rebuild_seconds,
+        'prefixes': prefix_results,
+    }
+
+
+def print_autocomplete_report(results):
+    """Print completion latency per prefix length and the cost of keeping completions current"""
+    print("\n" + "="*80)
+    print(f"Query autocompletion over {results['vocab_size']} terms")
+    print("="*80)
+    print(f"{'Prefix length':<14} {'Prefixes':>9} {'Naive scan (us)':>16} {'Cold (us)':>10} "
+          f"{'Mean (us)':>10} {'P99 (us)':>9}")
+    print("-" * 73)
+    for length, stats in results['prefixes'].items():
+        print(f"{length:<14} {stats['prefixes']:>9} {stats['naive_mean_ns'] / 1000:>16.1f} "
+              f"{stats['cold_mean_ns'] / 1000:>10.1f} {stats['mean_ns'] / 1000:>10.2f} {stats['p99_ns'] / 1000:>9.2f}")
+    throughput = results['build_docs_per_second']
+    print(f"\nCompletion index build: {results['build_seconds'] * 1000:.1f} ms")
+    print(f"Index build: {throughput['off']:.0f} docs/s without completions, "
+          f"{throughput['on']:.0f} docs/s with them enabled")
+    print(f"After adding {results['update_documents']} documents: incremental update "
+          f"{results['update_seconds'] * 1000:.1f} ms, full rebuild {results['rebuild_seconds'] * 1000:.1f} ms")
+
+
+def benchmark_champions(index, queries, k=10, repeat=5):
+    """
+    Compare champion-list ranking against exhaustive ranking
+
+    Every 'ranked' query in the log runs once per mode to measure quality
+    (recall@k against the exhaustive top k) and how often the safe mode had
+    to fall back to full posting lists, then `repeat` times for latency.
+
+    Args:
+        index: InvertedIndex built with champion_size > 0
+        queries: Query log
+        k: Results per query
+        repeat: Timed executions per query
+
+    Returns:
+        {mode: {'mean_ns', 'p50_ns', 'p95_ns', 'p99_ns', 'recall', 'fallback_rate',
+                'full_lists_per_query'}}; fallback_rate is the share of queries
+        that scanned at least one full posting list
+    """
+    ranked = [query['query'] for query in queries if query['type'] == 'ranked']
+    if not ranked:
+        return {}
+    # Champion tiers are built on first use; build them before timing
+    exhaustive = [index.search_ranked(query, k, champions='off') for query in ranked]
+    for query in ranked:
+        index.search_ranked(query, k)
+
+    perf_counter_ns = time.perf_counter_ns
+    results = {}
+    for mode in ('off', 'safe', 'only'):
+        ring = RingBufferSink(capacity=len(ranked))
+        tracer, index.tracer = index.tracer, Tracer([ring])
+        try:
+            hits = 0
+            for query, expected in zip(ranked, exhaustive):
+                top = {doc_id for doc_id, _ in index.search_ranked(query, k, champions=mode)}
+                hits += len(top & {doc_id for doc_id, _ in expected})
+        finally:
+            index.tracer = tracer
+        fallbacks = [trace.counters.get('champion_fallback', 0) for trace in ring.traces]
+
+        timings = []
+        for query in ranked:
+            for _ in range(repeat):
+                start = perf_counter_ns()
+                index.search_ranked(query, k, champions=mode)
+                timings.append(perf_counter_ns() - start)
+        timings.sort()
+        results[mode] = {
+            'mean_ns': sum(timings) // len(timings),
+            'p50_ns': percentile(timings, 50),
+            'p95_ns': percentile(timings, 95),
+            'p99_ns': percentile(timings, 99),
+            'recall': hits / max(1, sum(len(expected) for expected in exhaustive)),
+            'fallback_rate': sum(1 for count in fallbacks if count) / len(ranked) if mode == 'safe' else 0.0,
+            'full_lists_per_query': sum(fallbacks) / len(ranked) if mode == 'safe' else 0.0,
+        }
+    return results
+
+
+def print_champions_report(results, champion_size):
+    """Print champion-list latency and quality against exhaustive ranking"""
+    print("\n" + "="*80)
+    print(f"Ranked queries with champion lists (champion_size={champion_size})")
+    print("="*80)
+    print(f"{'Mode':<12} {'mean':>10} {'p50':>10} {'p95':>10} {'p99':>10} {'recall':>8} {'fallback':>9} "
+          f"{'full lists':>11}")
+    print("-" * 85)
+    labels = {'off': 'exhaustive', 'safe': 'safe', 'only': 'champions'}
+    for mode, stats in results.items():
+        print(f"{labels[mode]:<12} {stats['mean_ns'] / 1e3:>10.1f} {stats['p50_ns'] / 1e3:>10.1f} "
+              f"{stats['p95_ns'] / 1e3:>10.1f} {stats['p99_ns'] / 1e3:>10.1f} {stats['recall']:>8.1%} "
+              f"{stats['fallback_rate']:>9.1%} {stats['full_lists_per_query']:>11.2f}")
+    print("(latencies in µs)")
+
+
+def run_scaling(generator, sizes, repeat=3, trace_memory=False, seed=DEFAULT_SEED):
+    """
+    Benchmark a synthetic corpus at increasing sizes
+
+    Each size is built from scratch by streaming documents from the
+    generator and queried with a log generated from that index, so build
+    time, memory and latency can be charted against corpus size.
+
+    Args:
+        generator: ZipfCorpusGenerator
+        sizes: Document counts to benchmark
+        repeat: Timed runs per query
+        trace_memory: Also measure the tracemalloc peak (slow for large sizes)
+        seed: Seed for query log generation
+
+    Returns:
+        Dict with 'meta', 'corpus' and 'runs' (one entry per size)
+    """
+    runs = []
+    for size in sizes:
+        print(f"Scaling run: {size:,} documents")
+        source = lambda size=size: generator.documents(size)
+        index, build_results = benchmark_build(source, trace_memory=trace_memory)
+        queries = generate_query_log(index, seed=seed)
+        runs.append({
+            'documents': size,
+            'build': build_results,
+            'queries': benchmark_queries(index, queries, repeat=repeat),
+        })
+        print(f"  build {build_results['build_seconds']:.2f} s, "
+              f"{build_results['docs_per_second']:,.0f} docs/s, vocabulary {build_results['vocab_size']:,}")
+        del index
+    return {
+        'meta': _meta(repeat=repeat),
+        'corpus': corpus_description(generator),
+        'runs': runs,
+    }
+
+
+def corpus_description(generator):
+    """Parameters that reproduce a synthetic corpus"""
+    return {
+        'corpus': 'synthetic-zipf',
+        'vocab_size': generator.vocab_size,
+        'zipf_s': generator.zipf_s,
+        'length_distribution': generator.length_distribution,
+        'mean_length': generator.mean_length,
+        'phrase_rate': generator.phrase_rate,
+        'seed': generator.seed,
+    }
+
+
+def _replays_query_log(args):
+    """Whether the Reuters query log on the command line is replayed (synthetic logs are generated)"""
+    return args.corpus == 'reuters' and not args.scaling and os.path.exists(args.query_log)
+
+
+def _report_index_options(documents, args, index_factory):
+    results = benchmark_index_options(documents, index_factory=index_factory)
+    print_index_options_report(results)
+    return results, {}
+
+
+def _report_wal(documents, args, index_factory):
+    results = benchmark_wal(documents, index_factory=index_factory)
+    print_wal_report(results)
+    return results, {}
+
+
+def _report_cjk(documents, args, index_factory):
+    results = benchmark_cjk(documents, index_factory=index_factory)
+    print_cjk_report(results)
+    return results, {}
+
+
+def _report_sqlite(documents, args, index_factory):
+    queries = load_query_log(args.query_log) if _replays_query_log(args) else None
+    results = benchmark_sqlite(documents, queries, repeat=args.repeat, index_factory=index_factory)
+    print_sqlite_report(results)
+    return results, {}
+
+
+def _report_autocomplete(documents, args, index_factory):
+    results = benchmark_autocomplete(documents, seed=args.seed, index_factory=index_factory)
+    print_autocomplete_report(results)
+    return results, {}
+
+
+def _report_champions(documents, args, index_factory):
+    index = build_index(documents, lambda: index_factory(champion_size=args.champions))
+    if _replays_query_log(args):
+        queries = load_query_log(args.query_log)
+    else:
+        queries = generate_query_log(index, None if callable(documents) else documents, seed=args.seed)
+    results = benchmark_champions(index, queries, repeat=args.repeat)
+    print_champions_report(results, args.champions)
+    return results, {'champion_size': args.champions}
+
+
+# Report modes: results key -> fn(documents, args, index_factory) returning (results, extra meta).
+# Each mode is selected by its --<mode>-report flag (champions by --champions SIZE).
+REPORTS = {
+    'index_options': _report_index_options,
+    'wal': _report_wal,
+    'cjk': _report_cjk,
+    'sqlite': _report_sqlite,
+    'autocomplete': _report_autocomplete,
+    'champions': _report_champions,
+}
+
+
+def _selected_report(args):
+    """Report mode requested on the command line, or None for the query benchmark"""
+    for mode in REPORTS:
+        if getattr(args, 'champions' if mode == 'champions' else f'{mode}_report'):
+            return mode
+    return None
+
+
+def _write_results(results, path):
+    """Write results as JSON"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"\n✓ Results saved to {path}")
+
+
+def _compare(results, args):
+    """Compare against the baseline given on the command line; returns the exit code"""
+    with open(args.compare, 'r') as f:
+        baseline = json.load(f)
+    regressions = compare_results(results, baseline, args.threshold)
+    print("\n" + "="*80)
+    print(f"Comparison against {args.compare} (threshold {args.threshold:.0%})")
+    print("="*80)
+    if not regressions:
+        print("✓ No regressions")
+        return 0
+    for item in regressions:
+        print(f"  ✗ {item['metric']}: {item['baseline']:,.6g} → {item['current']:,.6g} ({item['change']:+.1%})")
+    return 1
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Inverted index benchmark suite')
+    parser.add_argument('--data-dir', default='data', help='Directory with Reuters SGML files')
+    parser.add_argument('--corpus', choices=('reuters', 'synthetic'), default='reuters',
+                        help='Reuters-21578 or a streamed synthetic Zipfian corpus')
+    parser.add_argument('--docs', type=int, default=5000, help='Number of documents (0 for all Reuters)')
+    parser.add_argument('--vocab-size', type=int, default=50000, help='Synthetic vocabulary size')
+    parser.add_argument('--zipf-s', type=float, default=1.07, help='Synthetic Zipf exponent')
+    parser.add_argument('--scaling', metavar='SIZES',
+                        help='Comma-separated synthetic corpus sizes to benchmark in turn')
+    parser.add_argument('--query-log', default=DEFAULT_QUERY_LOG, help='Query log to replay')
+    parser.add_argument('--write-query-log', metavar='PATH', help='Generate a query log and exit')
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED, help='Seed for query log generation')
+    parser.add_argument('--repeat', type=int, default=5, help='Timed runs per query')
+    parser.add_argument('--no-tracemalloc', action='store_true', help='Skip the tracemalloc build')
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help='Where to write results')
+    parser.add_argument('--compare', metavar='BASELINE', help='Baseline results to compare against')
+    parser.add_argument('--threshold', type=float, default=0.10, help='Allowed relative regression')
+    parser.add_argument('--trace-jsonl', metavar='PATH', help='Write a per-query trace (JSON lines)')
+    parser.add_argument('--trace-prometheus', metavar='PATH', help='Write aggregated query metrics (Prometheus text)')
+    parser.add_argument('--index-options', choices=INDEX_OPTIONS, default='positions',
+                        help='What postings store (phrase queries are skipped without positions)')
+    parser.add_argument('--index-options-report', action='store_true',
+                        help='Compare index size across index options and exit')
+    parser.add_argument('--wal-report', action='store_true',
+                        help='Compare ingest throughput with a write-ahead log at several fsync batch sizes and exit')
+    parser.add_argument('--cjk-report', action='store_true',
+                        help='Compare build throughput and index size on a mixed Latin/CJK corpus and exit')
+    parser.add_argument('--sqlite-report', action='store_true',
+                        help='Compare the SQLite backend with the in-memory index and its JSON snapshot and exit')
+    parser.add_argument('--autocomplete-report', action='store_true',
+                        help='Compare query autocompletion with a naive prefix scan and exit')
+    parser.add_argument('--champions', type=int, metavar='SIZE',
+                        help='Compare champion-list ranking (tiers of SIZE docs) with exhaustive ranking and exit')
+    args = parser.parse_args(argv)
+
+    # Optional per-query tracing of the timed runs (adds the tracing overhead to the latencies)
+    sinks = []
+    if args.trace_jsonl:
+        sinks.append(JsonLinesSink(args.trace_jsonl))
+    if args.trace_prometheus:
+        sinks.append(PrometheusSink())
+    index_kwargs = {'index_options': args.index_options}
+    if sinks:
+        index_kwargs['tracer'] = Tracer(sinks)
+    # Report modes pass their own options (e.g. wal=, champion_size=) on top of the command-line ones
+    index_factory = lambda **options: InvertedIndex(**{**index_kwargs, **options})
+    try:
+        return _run(args, index_factory)
+    finally:
+        for sink in sinks:
+            if isinstance(sink, PrometheusSink):
+                sink.write(args.trace_prometheus)
+                print(f"✓ Prometheus metrics written to {args.trace_prometheus}")
+            else:
+                sink.close()
+
+
+def _run(args, index_factory):
+    """Run the benchmark mode selected on the command line; returns the exit code"""
+    mode = _selected_report(args)
+    if args.corpus == 'synthetic' or args.scaling:
+        generator = ZipfCorpusGenerator(vocab_size=args.vocab_size, zipf_s=args.zipf_s, seed=args.seed)
+        if args.scaling:
+            sizes = [int(size) for size in args.scaling.split(',')]
+            results = run_scaling(generator, sizes, repeat=args.repeat,
+                                  trace_memory=not args.no_tracemalloc, seed=args.seed)
+            output = args.output if args.output != DEFAULT_OUTPUT else DEFAULT_SCALING_OUTPUT
+            _write_results(results, output)
+            return 0
+        documents = lambda: generator.documents(args.docs)
+        meta = {'documents': args.docs, 'corpus': corpus_description(generator)}
+    else:
+        documents = load_reuters_documents(args.data_dir, max_docs=args.docs or None)
+        meta = {'documents': len(documents)}
+
+    if mode:
+        results, extra = REPORTS[mode](documents, args, index_factory)
+        _write_results({'meta': _meta(**meta, **extra), mode: results}, args.output)
+        return 0
+
+    if args.corpus == 'synthetic':
+        # Synthetic query logs are generated from the index, not replayed
+        results = run_benchmark(documents, None, repeat=args.repeat,
+                                trace_memory=not args.no_tracemalloc, index_factory=index_factory)
+        results['meta']['corpus'] = meta['corpus']
+        print_report(results)
+        _write_results(results, args.output)
+        return _compare(results, args) if args.compare else 0
+
+    if args.write_query_log:
+        index = build_index(documents)
+        queries = generate_query_log(index, documents, seed=args.seed)
+        save_query_log(queries, args.write_query_log,
+                       {'corpus': 'reuters-21578', 'documents': len(documents), 'seed': args.seed})
+        return 0
+
+    if os.path.exists(args.query_log):
+        queries = load_query_log(args.query_log)
+    else:
+        print(f"Query log {args.query_log} not found, generating one (seed={args.seed})")
+        queries = generate_query_log(build_index(documents), documents, seed=args.seed)
+
+    results = run_benchmark(documents, queries, repeat=args.repeat,
+                            trace_memory=not args.no_tracemalloc, index_factory=index_factory)
+    print_report(results)
+    _write_results(results, args.output)
+    return _compare(results, args) if args.compare else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,76 @@
+"""
+冠军列表（champion lists）
+为倒排列表较长的词项保存单词项 BM25 得分（impact）最高的若干文档，
+并记录其余文档 impact 的上界，使排序查询可以先只给冠军文档打分，
+在能证明其余文档无法进入前 k 名时提前结束
+"""
+
+import heapq
+from typing import Iterable, List, Tuple
+
+
+class ChampionList:
+    """
+    一个词项的冠军层
+
+    impact 是不含 idf 的单词项 BM25 得分 tf·(k1+1)/(tf + k1·(1-b+b·dl/avgdl))，
+    按建立冠军层时的平均文档长度 avgdl 计算；floor 是冠军层之外全部文档的
+    最大 impact。平均文档长度变为 A 时，任一文档的 impact 至多变为原来的
+    max(1, A/avgdl) 倍，因此 bound(A) 始终是冠军层之外文档 impact 的安全上界
+    """
+
+    __slots__ = ('size', 'avgdl', 'heap', 'floor')
+
+    def __init__(self, size: int, avgdl: float):
+        """
+        初始化空冠军层
+
+        Args:
+            size: 冠军层大小
+            avgdl: 计算 impact 所用的平均文档长度
+        """
+        self.size = size
+        self.avgdl = avgdl
+        # (impact, 文档ID) 小顶堆
+        self.heap: List[Tuple[float, str]] = []
+        self.floor = 0.0
+
+    @classmethod
+    def from_impacts(cls, impacts: Iterable[Tuple[float, str]], size: int, avgdl: float) -> 'ChampionList':
+        """
+        由倒排列表中全部文档的 impact 构建
+
+        Args:
+            impacts: (impact, 文档ID) 序列
+            size: 冠军层大小
+            avgdl: 计算 impact 所用的平均文档长度
+        """
+        tier = cls(size, avgdl)
+        best = heapq.nlargest(size + 1, impacts)
+        if len(best) > size:
+            tier.floor = best.pop()[0]
+        heapq.heapify(best)
+        tier.heap = best
+        return tier
+
+    def offer(self, doc_id: str, impact: float):
+        """新文档加入倒排列表时调用：进入冠军层，或抬高 floor"""
+        entry = (impact, doc_id)
+        if len(self.heap) < self.size:
+            heapq.heappush(self.heap, entry)
+        elif entry > self.heap[0]:
+            evicted = heapq.heapreplace(self.heap, entry)
+            self.floor = max(self.floor, evicted[0])
+        else:
+            self.floor = max(self.floor, impact)
+
+    def doc_ids(self) -> List[str]:
+        """冠军文档ID"""
+        return [doc_id for _, doc_id in self.heap]
+
+    def bound(self, avgdl: float) -> float:
+        """平均文档长度为 avgdl 时，冠军层之外文档 impact 的上界"""
+        return self.floor * max(1.0, avgdl / self.avgdl)
+
+    def __len__(self) -> int:
+        return len(self.heap)
@@ -0,0 +1,62 @@
+"""
+中日韩（CJK）文本分词
+中文、日文和韩文不以空格分词，原来的分词规则（提取 [a-z0-9]+）会把这些文本
+整个丢掉。这里把连续的 CJK 字符切成相互重叠的二元组（"倒排索引" ->
+"倒排"、"排索"、"索引"），不需要词典；单独出现的一个字作为一个词项。
+二元组依次占用相邻的位置，短语查询按位置检查二元组首尾相接，因此
+"倒排索引" 只匹配这四个字连续出现的文档。
+
+非 CJK 部分仍按原规则提取字母数字组合，CJK 字符视为分隔符
+（"python教程" -> "python"、"教程"）。
+
+一个字只在单独出现时才是词项，所以查询单个字时要展开为该字和所有含该字的
+二元组（见 InvertedIndex.expand_cjk_char），才能匹配该字出现在较长字串中的文档。
+"""
+
+import re
+from typing import List
+
+# 连续的 CJK 字符：CJK 统一表意文字及扩展 A、兼容表意文字、日文假名、韩文音节；
+# 全角标点不在其中，二元组不跨越标点
+CJK_RUN = re.compile(
+    '[\u3040-\u309f\u30a0-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff'
+    '\U00020000-\U0002a6df]+')
+# CJK_RUN 中最小的字符：按字典序排列的词项中，CJK 词项都不小于它
+CJK_FIRST = '\u3040'
+# 原有的拉丁文分词规则
+LATIN_TOKEN = re.compile(r'\b[a-z0-9]+\b')
+
+
+def has_cjk(text: str) -> bool:
+    """文本中是否含有 CJK 字符（纯 ASCII 文本直接返回 False）"""
+    return not text.isascii() and CJK_RUN.search(text) is not None
+
+
+def is_cjk_char(text: str) -> bool:
+    """是否为单个 CJK 字符"""
+    return len(text) == 1 and has_cjk(text)
+
+
+def cjk_bigrams(run: str) -> List[str]:
+    """把一段连续的 CJK 字符切成重叠的二元组，只有一个字时返回该字"""
+    if len(run) == 1:
+        return [run]
+    return [run[i:i + 2] for i in range(len(run) - 1)]
+
+
+def tokenize_mixed(text: str) -> List[str]:
+    """
+    对含 CJK 字符的文本分词（text 已转小写）
+
+    Returns:
+        按出现顺序排列的词项：拉丁文词项和 CJK 二元组
+    """
+    tokens = []
+    start = 0
+    for match in CJK_RUN.finditer(text):
+        # 切片而不是传入 pos/endpos：\b 在 pos 处会参考之前的 CJK 字符
+        tokens.extend(LATIN_TOKEN.findall(text[start:match.start()]))
+        tokens.extend(cjk_bigrams(match.group()))
+        start = match.end()
+    tokens.extend(LATIN_TOKEN.findall(text[start:]))
+    return tokens
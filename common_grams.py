@@ -0,0 +1,164 @@
+"""
+常用词二元组索引（common grams）
+为包含至少一个高频词的相邻词对建立倒排列表，使由高频词组成的短语查询
+（如 "stock market"、"mln dlrs"）不必遍历高频词很长的位置列表：
+二词短语直接由一个较短的文档集合回答，更长的短语先用词对过滤候选文档
+"""
+
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Union
+
+
+def _prefix(term: str) -> str:
+    """词项的字段前缀（'title:oil' -> 'title:'，无字段时为空串）"""
+    return term[:term.rfind(':') + 1]
+
+
+class CommonGramsIndex:
+    """
+    常用词二元组索引
+
+    词对以 '前词 后词' 为键，倒排列表是包含该词对的文档ID集合（不保存位置，
+    更长短语的位置检查仍由位置列表完成）；只有至少一个词属于常用词集合的词对
+    才建立索引，因此一个短语中的相邻词对要么被覆盖（索引中没有即说明短语
+    不可能出现），要么交给位置列表检查
+    """
+
+    def __init__(self, common_words: Iterable[str]):
+        """
+        初始化空索引
+
+        Args:
+            common_words: 常用词集合（不带字段前缀，对所有字段生效）
+        """
+        self.common_words = frozenset(common_words)
+        # 词对倒排索引：{'前词 后词': {文档ID}}
+        self.postings = defaultdict(set)
+        # 按字段前缀缓存的常用词集合：{前缀: {前缀+常用词}}
+        self._common_by_prefix = {}
+
+    @classmethod
+    def from_postings(cls, postings: Dict[str, Dict[str, List[int]]],
+                      common_words: Iterable[str]) -> 'CommonGramsIndex':
+        """
+        由已有的位置索引构建（如为已建好的索引开启常用词二元组，或从文件加载之后）
+
+        先记录常用词的全部出现位置，再扫描一遍位置列表找出与其相邻的词项，
+        不需要重新分析文档；不保存位置的倒排列表被跳过
+
+        Args:
+            postings: {词项: {文档ID: [位置列表]}}
+            common_words: 常用词集合
+        """
+        grams = cls(common_words)
+
+        # 常用词的出现：{(字段前缀, 文档ID, 位置): 词项}
+        slots = {}
+        for term, docs in postings.items():
+            if not grams.is_common(term):
+                continue
+            prefix = _prefix(term)
+            for doc_id, positions in docs.items():
+                if positions.__class__ is int:
+                    break
+                for position in positions:
+                    slots[prefix, doc_id, position] = term
+
+        # 与常用词相邻的其他词项
+        neighbors = {}
+        for term, docs in postings.items():
+            prefix = _prefix(term)
+            for doc_id, positions in docs.items():
+                if positions.__class__ is int:
+                    break
+                for position in positions:
+                    if (prefix, doc_id, position - 1) in slots or (prefix, doc_id, position + 1) in slots:
+                        neighbors[prefix, doc_id, position] = term
+        neighbors.update(slots)
+
+        index = grams.postings
+        for (prefix, doc_id, position), term in neighbors.items():
+            following = neighbors.get((prefix, doc_id, position + 1))
+            if following is not None and ((prefix, doc_id, position) in slots
+                                          or (prefix, doc_id, position + 1) in slots):
+                index[term + ' ' + following].add(doc_id)
+        return grams
+
+    def is_common(self, term: str) -> bool:
+        """词项（可带字段前缀）是否为常用词"""
+        return term[term.rfind(':') + 1:] in self.common_words
+
+    def _common_for(self, prefix: str) -> frozenset:
+        """带字段前缀的常用词集合"""
+        common = self._common_by_prefix.get(prefix)
+        if common is None:
+            common = frozenset(prefix + word for word in self.common_words)
+            self._common_by_prefix[prefix] = common
+        return common
+
+    def add_document(self, doc_id: str, tokens: List[str], prefix: str = ''):
+        """
+        为一个字段的词项序列建立词对
+
+        Args:
+            doc_id: 文档ID
+            tokens: 带字段前缀的词项序列（位置即下标）
+            prefix: 字段前缀，无字段时为空串
+        """
+        common = self._common_for(prefix)
+        index = self.postings
+        for first, second in zip(tokens, tokens[1:]):
+            if first in common or second in common:
+                index[first + ' ' + second].add(doc_id)
+
+    def remove_document(self, doc_id: str, positions: Dict[str, Union[List[int], int]]):
+        """
+        删除一个文档的词对
+
+        Args:
+            doc_id: 文档ID
+            positions: 文档的 {词项: 位置列表}（从倒排索引中移除的倒排项，
+                       不保存位置的词项被跳过）
+        """
+        slots = {}
+        for term, value in positions.items():
+            if value.__class__ is int:
+                continue
+            prefix = _prefix(term)
+            for position in value:
+                slots[prefix, position] = term
+        index = self.postings
+        for (prefix, position), first in slots.items():
+            second = slots.get((prefix, position + 1))
+            if second is None or not (self.is_common(first) or self.is_common(second)):
+                continue
+            key = first + ' ' + second
+            docs = index.get(key)
+            if docs is not None:
+                docs.discard(doc_id)
+                if not docs:
+                    del index[key]
+
+    def plan(self, tokens: List[str]) -> Optional[List[Set[str]]]:
+        """
+        找出短语中被覆盖的相邻词对
+
+        Args:
+            tokens: 短语的词项序列
+
+        Returns:
+            被覆盖词对的文档集合，按大小升序；某个被覆盖的词对不在索引中时
+            短语不可能出现，返回 None
+        """
+        covered = []
+        for first, second in zip(tokens, tokens[1:]):
+            if self.is_common(first) or self.is_common(second):
+                docs = self.postings.get(first + ' ' + second)
+                if not docs:
+                    return None
+                covered.append(docs)
+        covered.sort(key=len)
+        return covered
+
+    def __len__(self) -> int:
+        return len(self.postings)
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Deterministic synthetic corpus generator for scaling tests
+
+Generates documents whose term distribution follows Zipf's law, with a
+configurable document-length distribution and planted multi-word phrases
+that co-occur at a controllable rate. Documents are produced lazily and
+each one depends only on (seed, document number), so any slice of a
+100M-document corpus can be regenerated without generating the rest.
+"""
+
+import math
+import random
+import argparse
+from itertools import accumulate
+from typing import Dict, Iterator, List
+
+# Syllables used to spell synthetic words (never collide with stop words)
+_ONSETS = 'bcdfgklmnprstvz'
+_VOWELS = 'aeiou'
+_SYLLABLES = [onset + vowel for onset in _ONSETS for vowel in _VOWELS]
+
+LENGTH_DISTRIBUTIONS = ('lognormal', 'uniform', 'fixed')
+
+
+def synthetic_word(rank: int) -> str:
+    """
+    Spell a unique pronounceable word for a vocabulary rank
+
+    Ranks are written in base len(_SYLLABLES) and every digit becomes a
+    syllable, so distinct ranks always give distinct words.
+    """
+    base = len(_SYLLABLES)
+    syllables = [_SYLLABLES[rank % base]]
+    rank //= base
+    while rank:
+        rank -= 1
+        syllables.append(_SYLLABLES[rank % base])
+        rank //= base
+    return 'q' + ''.join(reversed(syllables))
+
+
+class ZipfCorpusGenerator:
+    """Streaming generator of Zipf-distributed synthetic documents"""
+
+    def __init__(self, vocab_size: int = 50000, zipf_s: float = 1.07,
+                 length_distribution: str = 'lognormal', mean_length: int = 120,
+                 length_sigma: float = 0.6, min_length: int = 5, max_length: int = 2000,
+                 num_phrases: int = 200, phrase_rate: float = 0.5, seed: int = 42):
+        """
+        Configure the generator
+
+        Args:
+            vocab_size: Number of distinct words
+            zipf_s: Zipf exponent (word with rank r has weight 1 / r^s)
+            length_distribution: 'lognormal', 'uniform' or 'fixed'
+            mean_length: Mean document length in tokens
+            length_sigma: Shape of the lognormal length distribution
+            min_length: Minimum document length
+            max_length: Maximum document length
+            num_phrases: Number of distinct planted phrases (2-4 words each)
+            phrase_rate: Expected number of planted phrases per document
+            seed: Seed that fixes the vocabulary, phrases and every document
+        """
+        if length_distribution not in LENGTH_DISTRIBUTIONS:
+            raise ValueError(f"Unknown length distribution: {length_distribution}")
+        if vocab_size < 1:
+            raise ValueError("vocab_size must be positive")
+
+        self.vocab_size = vocab_size
+        self.zipf_s = zipf_s
+        self.length_distribution = length_distribution
+        self.mean_length = mean_length
+        self.length_sigma = length_sigma
+        self.min_length = min_length
+        self.max_length = max_length
+        self.phrase_rate = phrase_rate
+        self.seed = seed
+
+        self.vocabulary = [synthetic_word(rank) for rank in range(vocab_size)]
+        self._cum_weights = list(accumulate(1.0 / (rank ** zipf_s) for rank in range(1, vocab_size + 1)))
+        # lognormal mu chosen so that the distribution mean equals mean_length
+        self._mu = math.log(mean_length) - length_sigma ** 2 / 2
+
+        # Phrases are built from mid-frequency words so they stay selective
+        rng = random.Random(seed)
+        low = min(vocab_size - 1, 100)
+        high = min(vocab_size, 5000)
+        self.phrases = [[self.vocabulary[rng.randrange(low, high)] for _ in range(rng.randint(2, 4))]
+                        for _ in range(num_phrases)]
+
+    def _document_rng(self, doc_number: int) -> random.Random:
+        """Random generator that depends only on (seed, document number)"""
+        return random.Random(self.seed * 1000003 + doc_number)
+
+    def _length(self, rng: random.Random) -> int:
+        """Draw a document length"""
+        if self.length_distribution == 'fixed':
+            length = self.mean_length
+        elif self.length_distribution == 'uniform':
+            length = rng.randint(self.min_length, 2 * self.mean_length - self.min_length)
+        else:
+            length = int(rng.lognormvariate(self._mu, self.length_sigma))
+        return max(self.min_length, min(self.max_length, length))
+
+    def tokens(self, doc_number: int) -> List[str]:
+        """Generate the token list of one document"""
+        rng = self._document_rng(doc_number)
+        words = rng.choices(self.vocabulary, cum_weights=self._cum_weights, k=self._length(rng))
+
+        # Plant phrases: the number of phrases is Poisson-like with mean phrase_rate
+        if self.phrases and self.phrase_rate > 0:
+            while rng.random() < self.phrase_rate / (1 + self.phrase_rate):
+                phrase = rng.choice(self.phrases)
+                position = rng.randrange(len(words) + 1)
+                words[position:position] = phrase
+        return words
+
+    def document(self, doc_number: int) -> Dict[str, str]:
+        """Generate one document as {'id', 'text'} like load_reuters_documents"""
+        return {'id': f'synth_{doc_number}', 'text': ' '.join(self.tokens(doc_number))}
+
+    def documents(self, count: int, start: int = 0) -> Iterator[Dict[str, str]]:
+        """
+        Stream documents start .. start + count - 1
+
+        Args:
+            count: Number of documents
+            start: Number of the first document
+
+        Yields:
+            Document dicts {'id', 'text'}
+        """
+        for doc_number in range(start, start + count):
+            yield self.document(doc_number)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Generate a synthetic Zipfian corpus')
+    parser.add_argument('--docs', type=int, default=10, help='Number of documents')
+    parser.add_argument('--vocab-size', type=int, default=50000)
+    parser.add_argument('--zipf-s', type=float, default=1.07)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='Write one document per line (id<TAB>text) instead of printing samples')
+    args = parser.parse_args()
+
+    generator = ZipfCorpusGenerator(vocab_size=args.vocab_size, zipf_s=args.zipf_s, seed=args.seed)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            for doc in generator.documents(args.docs):
+                f.write(f"{doc['id']}\t{doc['text']}\n")
+        print(f"✓ Wrote {args.docs} documents to {args.output}")
+    else:
+        for doc in generator.documents(args.docs):
+            print(f"[{doc['id']}] {doc['text'][:120]}...")
@@ -0,0 +1,196 @@
+"""
+语料统计
+增量维护文档数、词项总数、平均文档长度和每个词项的文档频率（DF）/集合频率（CF），
+并精确维护文档频率最高的若干词项，使高频词查询不必排序整个词汇表
+"""
+
+import heapq
+from operator import itemgetter
+from typing import Dict, Iterable, List, Tuple
+
+
+class TopKCounter:
+    """
+    计数器，同时精确维护计数最高的 capacity 个键
+
+    计数加一时只需与当前前 capacity 名的最低计数（floor）比较：只有超过
+    floor 的键才需要进入前列并淘汰最低者，因此绝大多数更新是 O(1) 的。
+    计数减一可能让前列之外的键反超，此时标记失效，下次查询时重建一次
+    """
+
+    def __init__(self, capacity: int = 100):
+        """
+        初始化计数器
+
+        Args:
+            capacity: 精确维护的前列大小，top(k) 在 k <= capacity 时为 O(capacity)
+        """
+        self.capacity = capacity
+        self.counts: Dict[str, int] = {}
+        self._top: Dict[str, int] = {}
+        # 前列中最低计数的下界，前列未满时为 0
+        self._floor = 0
+        self._valid = True
+
+    @classmethod
+    def from_counts(cls, counts: Dict[str, int], capacity: int = 100) -> 'TopKCounter':
+        """由已知计数批量构建"""
+        counter = cls(capacity)
+        counter.counts = {key: count for key, count in counts.items() if count > 0}
+        counter._rebuild()
+        return counter
+
+    def _rebuild(self):
+        """从全部计数重建前列（O(n log capacity)）"""
+        self._top = dict(heapq.nlargest(self.capacity, self.counts.items(), key=itemgetter(1)))
+        self._floor = min(self._top.values()) if len(self._top) >= self.capacity else 0
+        self._valid = True
+
+    def _admit(self, key: str, count: int):
+        """让计数超过 floor 的键进入前列"""
+        top = self._top
+        if len(top) >= self.capacity:
+            weakest = min(top, key=top.get)
+            if count <= top[weakest]:
+                self._floor = top[weakest]
+                return
+            del top[weakest]
+        top[key] = count
+        if len(top) >= self.capacity:
+            self._floor = min(top.values())
+
+    def increment(self, key: str):
+        """计数加一"""
+        self.increment_many((key,))
+
+    def increment_many(self, keys: Iterable[str]):
+        """多个键的计数各加一（索引构建的热路径，循环内联）"""
+        counts = self.counts
+        top = self._top
+        for key in keys:
+            count = counts.get(key, 0) + 1
+            counts[key] = count
+            if key in top:
+                top[key] = count
+            elif count > self._floor:
+                self._admit(key, count)
+
+    def decrement(self, key: str):
+        """计数减一，降为 0 时移除"""
+        count = self.counts.get(key, 0) - 1
+        if count < 0:
+            return
+        if count:
+            self.counts[key] = count
+        else:
+            del self.counts[key]
+        if key in self._top:
+            # 前列之外的键可能反超，下次查询时重建
+            self._valid = False
+            if count:
+                self._top[key] = count
+            else:
+                del self._top[key]
+
+    def top(self, k: int) -> List[Tuple[str, int]]:
+        """按计数降序返回前 k 个 (键, 计数)，同计数按键的字典序"""
+        if k > self.capacity:
+            items = heapq.nlargest(k, self.counts.items(), key=itemgetter(1))
+        else:
+            if not self._valid:
+                self._rebuild()
+            items = self._top.items()
+        return sorted(items, key=lambda item: (-item[1], item[0]))[:k]
+
+    def __len__(self) -> int:
+        return len(self.counts)
+
+
+class CorpusStats:
+    """
+    增量维护的语料统计
+
+    add_document / remove_document 的代价与文档中不同词项的个数成正比，
+    N、avgdl、DF、CF 的读取均为 O(1)，top_terms(k) 在 k 不超过前列大小时与词汇表大小无关
+    """
+
+    def __init__(self):
+        self.num_docs = 0
+        self.total_tokens = 0
+        self.collection_freq: Dict[str, int] = {}
+        self.doc_freq = TopKCounter()
+
+    @classmethod
+    def from_index(cls, index: Dict[str, Dict[str, List[int]]],
+                   doc_lengths: Dict[str, int]) -> 'CorpusStats':
+        """
+        由已有的倒排索引重建统计（如从文件加载之后）
+
+        Args:
+            index: {词项: {文档ID: [位置列表] 或 词频}}
+            doc_lengths: {文档ID: 词项数量}
+        """
+        stats = cls()
+        stats.num_docs = len(doc_lengths)
+        stats.total_tokens = sum(doc_lengths.values())
+        # 倒排项是位置列表或词频（不保存位置的字段）
+        stats.collection_freq = {term: sum(value if value.__class__ is int else len(value)
+                                           for value in postings.values())
+                                 for term, postings in index.items() if postings}
+        stats.doc_freq = TopKCounter.from_counts(
+            {term: len(postings) for term, postings in index.items()})
+        return stats
+
+    @property
+    def avgdl(self) -> float:
+        """平均文档长度"""
+        return self.total_tokens / self.num_docs if self.num_docs else 0.0
+
+    def df(self, term: str) -> int:
+        """词项的文档频率"""
+        return self.doc_freq.counts.get(term, 0)
+
+    def cf(self, term: str) -> int:
+        """词项在整个语料中的出现次数"""
+        return self.collection_freq.get(term, 0)
+
+    def doc_freqs(self) -> Iterable[Tuple[str, int]]:
+        """全部 (词项, 文档频率)，顺序不定"""
+        return self.doc_freq.counts.items()
+
+    def add_document(self, term_counts: Dict[str, int], length: int = None):
+        """
+        计入一个文档
+
+        Args:
+            term_counts: {词项: 文档内词频}
+            length: 文档长度，默认为词频之和（不保存词频的字段按 1 计入词频时须另行给出）
+        """
+        self.num_docs += 1
+        self.total_tokens += sum(term_counts.values()) if length is None else length
+        collection_freq = self.collection_freq
+        for term, tf in term_counts.items():
+            collection_freq[term] = collection_freq.get(term, 0) + tf
+        self.doc_freq.increment_many(term_counts)
+
+    def remove_document(self, term_counts: Dict[str, int], length: int = None):
+        """
+        移除一个文档（与 add_document 对称）
+
+        Args:
+            term_counts: 该文档加入时的 {词项: 文档内词频}
+            length: 该文档加入时的文档长度，默认为词频之和
+        """
+        self.num_docs -= 1
+        self.total_tokens -= sum(term_counts.values()) if length is None else length
+        for term, tf in term_counts.items():
+            remaining = self.collection_freq.get(term, 0) - tf
+            if remaining > 0:
+                self.collection_freq[term] = remaining
+            else:
+                self.collection_freq.pop(term, None)
+            self.doc_freq.decrement(term)
+
+    def top_terms(self, k: int = 10) -> List[Tuple[str, int]]:
+        """按文档频率降序返回前 k 个 (词项, 文档频率)"""
+        return self.doc_freq.top(k)
@@ -0,0 +1,241 @@
+"""
+近重复文档检测
+基于词项 shingle 的 MinHash 签名与 LSH 分带（banding），
+在索引构建时以亚线性时间找出近似重复的文档
+"""
+
+import zlib
+import random
+from collections import defaultdict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+
+# 32 位哈希的取值上界，同时作为空桶的哨兵值
+_HASH_SPACE = 1 << 32
+
+# 组合词项哈希时使用的多项式基数（奇数）
+_SHINGLE_BASE = 0x01000193
+
+# 支持的重复文档处理方式
+DEDUP_MODES = ('flag', 'skip', 'cluster')
+
+
+class MinHasher:
+    """
+    MinHash 签名生成器
+
+    采用单次排列哈希（one permutation hashing）：每个 shingle 只哈希一次，
+    按哈希值分到 num_perm 个桶中并在桶内取最小值，代价与 shingle 数成正比
+    而不是与 shingle 数 × 签名长度成正比。空桶用旋转填充（densification）
+    从右侧最近的非空桶借值，保证签名仍可逐分量比较
+    """
+
+    def __init__(self, num_perm: int = 64, shingle_size: int = 3, seed: int = 1):
+        """
+        初始化 MinHash
+
+        Args:
+            num_perm: 签名长度（分桶数）
+            shingle_size: 每个 shingle 包含的连续词项数
+            seed: 随机种子，保证签名可复现
+        """
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        rng = random.Random(seed)
+        # 奇数乘子用于打散 crc32 的比特
+        self._multiplier = rng.getrandbits(32) | 1
+        self._salt = rng.getrandbits(32)
+        self._token_hashes: Dict[str, int] = {}
+
+    def _token_hash(self, token: str) -> int:
+        """返回词项的 32 位哈希（带缓存，词汇表远小于词项总数）"""
+        value = self._token_hashes.get(token)
+        if value is None:
+            value = zlib.crc32(token.encode('utf-8'), self._salt)
+            self._token_hashes[token] = value
+        return value
+
+    def shingles(self, tokens: Sequence[str]) -> set:
+        """
+        将词项序列切分为 shingle，并哈希为整数集合
+
+        每个 shingle 的哈希由其中各词项的哈希按多项式组合得到，无需拼接字符串
+        """
+        hashes = [self._token_hash(token) for token in tokens]
+        k = min(self.shingle_size, len(hashes))
+        combined = hashes[:len(hashes) - k + 1]
+        for offset in range(1, k):
+            combined = [(value * _SHINGLE_BASE + following) & 0xFFFFFFFF
+                        for value, following in zip(combined, hashes[offset:])]
+        return set(combined)
+
+    def signature(self, tokens: Sequence[str]) -> Tuple[int, ...]:
+        """
+        计算词项序列的 MinHash 签名
+
+        Args:
+            tokens: 预处理后的词项序列
+
+        Returns:
+            长度为 num_perm 的签名
+        """
+        bins = self.num_perm
+        multiplier = self._multiplier
+        mins = [_HASH_SPACE] * bins
+        for shingle in self.shingles(tokens):
+            value = (shingle * multiplier) & 0xFFFFFFFF
+            slot, rank = value % bins, value // bins
+            if rank < mins[slot]:
+                mins[slot] = rank
+
+        if _HASH_SPACE not in mins:
+            return tuple(mins)
+
+        # 旋转填充：空桶取右侧最近非空桶的值，并按距离加上偏移
+        signature = list(mins)
+        for slot in range(bins):
+            if mins[slot] == _HASH_SPACE:
+                source, distance = slot, 0
+                while mins[source] == _HASH_SPACE:
+                    source = (source + 1) % bins
+                    distance += 1
+                signature[slot] = mins[source] + distance * _HASH_SPACE
+        return tuple(signature)
+
+
+def estimate_jaccard(sig1: Sequence[int], sig2: Sequence[int]) -> float:
+    """用两个签名中相同分量的比例估计 Jaccard 相似度"""
+    same = sum(1 for x, y in zip(sig1, sig2) if x == y)
+    return same / len(sig1)
+
+
+class NearDuplicateDetector:
+    """
+    基于 LSH 分带的近重复检测器
+
+    签名被切成 bands 段，每段 rows 个分量；任意一段完全相同的文档成为候选，
+    再用签名估计的 Jaccard 相似度确认。相似度约为 (1/bands)^(1/rows) 以上的
+    文档对大概率被召回，而查找代价只与候选数有关
+    """
+
+    def __init__(self, threshold: float = 0.8, num_perm: int = 64, bands: int = 8,
+                 shingle_size: int = 3, mode: str = 'flag', seed: int = 1):
+        """
+        初始化检测器
+
+        Args:
+            threshold: 判定为近重复的 Jaccard 相似度阈值
+            num_perm: 签名长度，必须能被 bands 整除
+            bands: LSH 分带数
+            shingle_size: shingle 长度（词项数）
+            mode: 重复文档的处理方式：
+                  'flag' 照常索引并标记；'skip' 不索引；'cluster' 不索引但记录所属簇
+            seed: 随机种子
+        """
+        if mode not in DEDUP_MODES:
+            raise ValueError(f"不支持的去重模式: {mode}，可选 {DEDUP_MODES}")
+        if num_perm % bands:
+            raise ValueError(f"签名长度 {num_perm} 必须能被分带数 {bands} 整除")
+
+        self.threshold = threshold
+        self.mode = mode
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.hasher = MinHasher(num_perm, shingle_size, seed)
+        # 每个分带的桶：{分带值: [文档ID列表]}
+        self._buckets: List[Dict[Tuple[int, ...], List[str]]] = [defaultdict(list) for _ in range(bands)]
+        # 已登记文档的签名
+        self._signatures: Dict[str, Tuple[int, ...]] = {}
+
+        # 统计信息
+        self.documents_seen = 0
+        self.duplicates_found = 0
+        self.tokens_skipped = 0
+
+    def _bands(self, signature: Tuple[int, ...]):
+        """依次产生签名的各个分带"""
+        for band in range(self.bands):
+            yield band, signature[band * self.rows:(band + 1) * self.rows]
+
+    def find_duplicate(self, signature: Tuple[int, ...]) -> Optional[str]:
+        """
+        查找与签名最相似且超过阈值的已登记文档
+
+        Returns:
+            最相似文档的ID，没有近重复文档时返回 None
+        """
+        candidates = set()
+        for band, key in self._bands(signature):
+            candidates.update(self._buckets[band].get(key, ()))
+
+        best_doc, best_similarity = None, self.threshold
+        for candidate in candidates:
+            similarity = estimate_jaccard(signature, self._signatures[candidate])
+            if similarity >= best_similarity:
+                best_doc, best_similarity = candidate, similarity
+        return best_doc
+
+    def register(self, doc_id: str, signature: Tuple[int, ...]):
+        """将文档登记到 LSH 桶中"""
+        self._signatures[doc_id] = signature
+        for band, key in self._bands(signature):
+            self._buckets[band][key].append(doc_id)
+
+    def unregister(self, doc_id: str):
+        """从 LSH 桶中移除文档"""
+        signature = self._signatures.pop(doc_id, None)
+        if signature is None:
+            return
+        for band, key in self._bands(signature):
+            bucket = self._buckets[band].get(key)
+            if bucket and doc_id in bucket:
+                bucket.remove(doc_id)
+                if not bucket:
+                    del self._buckets[band][key]
+
+    def signatures(self) -> Dict[str, List[int]]:
+        """已登记文档的签名（写检查点时保存）"""
+        return {doc_id: list(signature) for doc_id, signature in self._signatures.items()}
+
+    def restore(self, signatures: Dict[str, Sequence[int]]):
+        """清空 LSH 桶，重新登记保存的签名（载入检查点时）"""
+        self._buckets = [defaultdict(list) for _ in range(self.bands)]
+        self._signatures = {}
+        for doc_id, signature in signatures.items():
+            self.register(doc_id, tuple(signature))
+
+    def check(self, doc_id: str, tokens: Sequence[str]) -> Optional[str]:
+        """
+        检查文档是否为近重复，并登记非重复文档
+
+        Args:
+            doc_id: 文档ID
+            tokens: 预处理后的词项序列
+
+        Returns:
+            重复时返回代表文档的ID，否则返回 None
+        """
+        if not tokens:
+            return None
+
+        self.documents_seen += 1
+        signature = self.hasher.signature(tokens)
+        original = self.find_duplicate(signature)
+        if original is None:
+            self.register(doc_id, signature)
+            return None
+
+        self.duplicates_found += 1
+        if self.mode != 'flag':
+            self.tokens_skipped += len(tokens)
+        return original
+
+    def report(self) -> Dict[str, float]:
+        """返回去重统计信息"""
+        return {
+            'mode': self.mode,
+            'documents_seen': self.documents_seen,
+            'duplicates_found': self.duplicates_found,
+            'duplicate_ratio': self.duplicates_found / self.documents_seen if self.documents_seen else 0.0,
+            'tokens_skipped': self.tokens_skipped,
+        }
@@ -0,0 +1,695 @@
+"""
+磁盘倒排索引
+把倒排索引写成单个只读文件：倒排列表按块压缩存储（文档序号差值和位置差值
+采用变长整数编码），词典是按字典序排列的定长数组，查询时在映射的文件上
+二分查找，倒排列表按需解码，并可经由 PostingCache 缓存解码结果。
+
+文件以 mmap 映射（或复制到共享内存），多个进程打开同一文件时共享同一份
+物理内存，每个进程只额外保存文档ID列表和文档长度
+"""
+
+import os
+import sys
+import json
+import mmap
+import heapq
+import itertools
+import struct
+from array import array
+from collections.abc import Mapping
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from memory_usage import postings_size
+
+
+MAGIC = b'IIDX\x00\x02\x00\x00'
+# 文件头：魔数、元数据偏移、元数据长度
+_HEADER = struct.Struct('<8sQQ')
+# 每块的倒排项数
+BLOCK_SIZE = 128
+# 元数据中预先保存的高频词个数
+TOP_TERMS = 100
+# 词典每项的字段数：倒排列表偏移、字节数、文档频率、集合频率、是否保存位置
+_ENTRY_FIELDS = 5
+
+
+def encode_varint(value: int, out: bytearray):
+    """把非负整数以 LEB128 变长编码追加到 out"""
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def decode_varint(buf, pos: int) -> Tuple[int, int]:
+    """从 buf[pos:] 解码一个变长整数，返回 (值, 下一个位置)"""
+    result = 0
+    shift = 0
+    while True:
+        byte = buf[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
+
+
+def encode_postings(postings: Iterable[Tuple[int, Union[List[int], int]]], positional: bool) -> bytes:
+    """
+    编码一个词项的倒排列表
+
+    每块以 (倒排项数, 块内最后一个文档序号, 块体字节数) 开头，便于跳过整块；
+    块体依次为文档序号差值、词频，以及（保存位置时）位置差值
+
+    Args:
+        postings: 按文档序号升序的 (文档序号, 位置列表或词频)
+        positional: 是否保存位置
+
+    Returns:
+        编码后的字节串
+    """
+    out = bytearray()
+    block = bytearray()
+    count = 0
+    previous = 0
+    for ordinal, value in postings:
+        encode_varint(ordinal - previous, block)
+        previous = ordinal
+        if positional:
+            encode_varint(len(value), block)
+            last = 0
+            for position in value:
+                encode_varint(position - last, block)
+                last = position
+        else:
+            encode_varint(value, block)
+        count += 1
+        if count == BLOCK_SIZE:
+            _flush_block(out, block, count, previous)
+            block = bytearray()
+            count = 0
+    if count:
+        _flush_block(out, block, count, previous)
+    return bytes(out)
+
+
+def _flush_block(out: bytearray, block: bytearray, count: int, last_ordinal: int):
+    """写出一个块"""
+    encode_varint(count, out)
+    encode_varint(last_ordinal, out)
+    encode_varint(len(block), out)
+    out += block
+
+
+def decode_postings(buf, start: int, end: int, positional: bool,
+                    base: int = 0) -> Iterator[Tuple[int, Union[List[int], int]]]:
+    """
+    解码 buf[start:end] 中的倒排列表
+
+    Args:
+        base: 从块边界开始解码时，上一块的最后一个文档序号
+
+    Yields:
+        (文档序号, 位置列表或词频)
+    """
+    pos = start
+    ordinal = base
+    while pos < end:
+        count, pos = decode_varint(buf, pos)
+        _, pos = decode_varint(buf, pos)
+        _, pos = decode_varint(buf, pos)
+        for _ in range(count):
+            # 内联的变长整数解码（热路径）
+            delta = shift = 0
+            while True:
+                byte = buf[pos]
+                pos += 1
+                delta |= (byte & 0x7F) << shift
+                if byte < 0x80:
+                    break
+                shift += 7
+            ordinal += delta
+            tf = shift = 0
+            while True:
+                byte = buf[pos]
+                pos += 1
+                tf |= (byte & 0x7F) << shift
+                if byte < 0x80:
+                    break
+                shift += 7
+            if not positional:
+                yield ordinal, tf
+                continue
+            positions = []
+            position = 0
+            for _ in range(tf):
+                delta = shift = 0
+                while True:
+                    byte = buf[pos]
+                    pos += 1
+                    delta |= (byte & 0x7F) << shift
+                    if byte < 0x80:
+                        break
+                    shift += 7
+                position += delta
+                positions.append(position)
+            yield ordinal, positions
+
+
+def _block_ordinals(buf, pos: int, count: int, base: int, positional: bool) -> Iterator[int]:
+    """只解码一个块体中的文档序号（跳过词频和位置），base 为上一块的最后一个文档序号"""
+    ordinal = base
+    for _ in range(count):
+        delta, pos = decode_varint(buf, pos)
+        ordinal += delta
+        tf, pos = decode_varint(buf, pos)
+        if positional:
+            # 跳过 tf 个变长整数：每个以最高位为 0 的字节结束
+            while tf:
+                if buf[pos] < 0x80:
+                    tf -= 1
+                pos += 1
+        yield ordinal
+
+
+class DiskIndexWriter:
+    """
+    磁盘索引写入器
+
+    词项须按字典序加入，倒排列表直接追加写入文件，因此写入大索引时
+    内存中只需保留词典；close 时写入文档表、词典和元数据
+    """
+
+    def __init__(self, path: str, index_options: str = 'positions', fields: Dict[str, str] = None):
+        """
+        创建索引文件
+
+        Args:
+            path: 索引文件路径
+            index_options: 索引选项（见 inverted_index.INDEX_OPTIONS）
+            fields: {字段名: 索引选项}
+        """
+        self.path = path
+        self.index_options = index_options
+        self.fields = dict(fields or {})
+        self._file = open(path, 'wb')
+        self._file.write(_HEADER.pack(MAGIC, 0, 0))
+        # 词典：词项的 UTF-8 编码，以及各项的 (偏移, 字节数, 文档频率, 集合频率, 是否保存位置)
+        self._terms: List[bytes] = []
+        self._entries = array('Q')
+        self._last_term = None
+
+    def add_term(self, term: str, postings: Iterable[Tuple[int, Union[List[int], int]]]):
+        """
+        写入一个词项的倒排列表
+
+        Args:
+            term: 词项，须大于之前写入的词项
+            postings: 按文档序号升序的 (文档序号, 位置列表或词频)
+        """
+        if self._last_term is not None and term <= self._last_term:
+            raise ValueError(f"词项须按字典序写入: {term!r} <= {self._last_term!r}")
+        postings = iter(postings)
+        first = next(postings, None)
+        if first is None:
+            return
+        positional = first[1].__class__ is not int
+        # 边编码边统计文档频率和集合频率，倒排列表不必整个放在内存中
+        counts = [0, 0]
+
+        def counted():
+            for posting in itertools.chain((first,), postings):
+                counts[0] += 1
+                counts[1] += len(posting[1]) if positional else posting[1]
+                yield posting
+
+        data = encode_postings(counted(), positional)
+        self._terms.append(term.encode('utf-8'))
+        self._entries.extend((self._file.tell(), len(data), counts[0], counts[1], int(positional)))
+        self._file.write(data)
+        self._last_term = term
+
+    def _write_section(self, sections: Dict, name: str, data):
+        """写入一个段（按 8 字节对齐，使数组段可以直接映射为 array）"""
+        f = self._file
+        f.write(b'\x00' * (-f.tell() % 8))
+        sections[name] = (f.tell(), len(memoryview(data).cast('B')))
+        f.write(data)
+
+    def _write_strings(self, sections: Dict, name: str, strings: Iterable[bytes]):
+        """
+        写入字符串表：拼接的内容，和各字符串的起始偏移（array('Q')，末尾多一项总长度）
+
+        内容直接写入文件，内存中只保留偏移数组
+        """
+        f = self._file
+        f.write(b'\x00' * (-f.tell() % 8))
+        start = f.tell()
+        offsets = array('Q')
+        for value in strings:
+            offsets.append(f.tell() - start)
+            f.write(value)
+        offsets.append(f.tell() - start)
+        sections[name + '_text'] = (start, offsets[-1])
+        self._write_section(sections, name + '_offsets', offsets)
+
+    def close(self, doc_ids: List[str], doc_lengths: List[int], documents: Optional[List[str]] = None):
+        """
+        写入文档表、词典和元数据并关闭文件
+
+        Args:
+            doc_ids: 按文档序号排列的文档ID
+            doc_lengths: 按文档序号排列的文档长度
+            documents: 可选的按文档序号排列的文档内容（可以是迭代器）
+        """
+        f = self._file
+        sections = {}
+        self._write_strings(sections, 'doc_id', (doc_id.encode('utf-8') for doc_id in doc_ids))
+        self._write_section(sections, 'doc_lengths', array('Q', doc_lengths))
+        if documents is not None:
+            self._write_strings(sections, 'doc', (text.encode('utf-8') for text in documents))
+        self._write_strings(sections, 'term', self._terms)
+        self._write_section(sections, 'term_entries', self._entries)
+
+        # 预先保存文档频率最高的词项，打开索引时不必扫描词典
+        entries = self._entries
+        top = heapq.nsmallest(TOP_TERMS, range(len(self._terms)),
+                              key=lambda i: (-entries[i * _ENTRY_FIELDS + 2], self._terms[i]))
+        meta = json.dumps({
+            'num_docs': len(doc_ids),
+            'num_terms': len(self._terms),
+            'total_tokens': sum(doc_lengths),
+            'index_options': self.index_options,
+            'fields': self.fields,
+            'block_size': BLOCK_SIZE,
+            'byteorder': sys.byteorder,
+            'top_terms': [[self._terms[i].decode('utf-8'), entries[i * _ENTRY_FIELDS + 2]] for i in top],
+            'sections': sections,
+        }).encode('utf-8')
+        meta_offset = f.tell()
+        f.write(meta)
+        f.seek(0)
+        f.write(_HEADER.pack(MAGIC, meta_offset, len(meta)))
+        f.close()
+
+
+def write_disk_index(index, path: str) -> int:
+    """
+    把内存中的 InvertedIndex 写成磁盘索引
+
+    先写入临时文件再改名，写到一半失败时不会留下损坏的索引文件
+
+    Args:
+        index: InvertedIndex 实例
+        path: 索引文件路径
+
+    Returns:
+        文件字节数
+    """
+    doc_ids = list(index.documents)
+    ordinals = {doc_id: ordinal for ordinal, doc_id in enumerate(doc_ids)}
+    temp_path = path + '.tmp'
+    writer = DiskIndexWriter(temp_path, index.index_options, index.fields)
+    try:
+        for term in sorted(index.index):
+            postings = index.index[term]
+            writer.add_term(term, sorted((ordinals[doc_id], value) for doc_id, value in postings.items()))
+        writer.close(doc_ids, [index.doc_lengths[doc_id] for doc_id in doc_ids],
+                     [index.documents[doc_id] for doc_id in doc_ids])
+    except BaseException:
+        writer._file.close()
+        os.remove(temp_path)
+        raise
+    os.replace(temp_path, path)
+    return os.path.getsize(path)
+
+
+class DiskIndex:
+    """
+    只读的磁盘索引
+
+    打开时只解析元数据和文档表，词典在映射的文件上二分查找；postings(term)
+    解码一个词项的倒排列表，结果与内存索引相同：{文档ID: [位置列表] 或 词频}
+    """
+
+    def __init__(self, source: Union[str, memoryview]):
+        """
+        打开磁盘索引
+
+        Args:
+            source: 索引文件路径，或包含索引文件内容的缓冲区（如共享内存）
+        """
+        if isinstance(source, str):
+            self.path = source
+            self._file = open(source, 'rb')
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            self._buffer = self._mmap
+        else:
+            self.path = None
+            self._file = self._mmap = None
+            self._buffer = source
+        self._view = memoryview(self._buffer)
+        # 映射到文件的数组视图，关闭前须释放
+        self._arrays = []
+        buf = self._buffer
+        magic, meta_offset, meta_length = _HEADER.unpack_from(buf, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"不是磁盘索引文件: {source if self.path else '<buffer>'}")
+        self.meta = json.loads(bytes(buf[meta_offset:meta_offset + meta_length]))
+        if self.meta['byteorder'] != sys.byteorder:
+            self.close()
+            raise ValueError("磁盘索引的字节序与本机不同")
+        self.index_options = self.meta['index_options']
+        self.fields = self.meta['fields']
+        sections = self.meta['sections']
+
+        # 文档表：文档序号 -> 文档ID；解码倒排列表时需要，保存在进程内
+        offsets = self.array('doc_id_offsets')
+        text_start = sections['doc_id_text'][0]
+        self.doc_ids: List[str] = [str(buf[text_start + offsets[i]:text_start + offsets[i + 1]], 'utf-8')
+                                   for i in range(len(offsets) - 1)]
+        self.doc_lengths: Dict[str, int] = dict(zip(self.doc_ids, self.array('doc_lengths')))
+
+        self.dictionary = DiskDictionary(self)
+        self.documents = DiskDocuments(self) if 'doc_offsets' in sections else {}
+        self._ordinals = None
+        # 解码统计；块数只由 intersect 统计
+        self.decoded_terms = 0
+        self.decoded_bytes = 0
+        self.decoded_blocks = 0
+        self.skipped_blocks = 0
+
+    def array(self, section: str) -> memoryview:
+        """把一个数组段映射为无符号 64 位整数数组（不复制）"""
+        start, length = self.meta['sections'][section]
+        view = self._view[start:start + length].cast('Q')
+        self._arrays.append(view)
+        return view
+
+    def ordinal(self, doc_id: str) -> int:
+        """文档ID对应的文档序号（首次调用时建立映射），不存在时引发 KeyError"""
+        if self._ordinals is None:
+            self._ordinals = {doc_id: ordinal for ordinal, doc_id in enumerate(self.doc_ids)}
+        return self._ordinals[doc_id]
+
+    def postings(self, term: str, partition: Tuple[int, int] = None) -> Dict[str, Union[List[int], int]]:
+        """
+        解码一个词项的倒排列表，词项不存在时引发 KeyError
+
+        Args:
+            term: 词项
+            partition: 可选的文档序号范围 [lo, hi)，只解码其中的文档：最后一个
+                       文档序号小于 lo 的块只读块头跳过，到达 hi 即停止
+        """
+        offset, nbytes, _, _, positional = self.dictionary[term]
+        self.decoded_terms += 1
+        doc_ids = self.doc_ids
+        if partition is None:
+            self.decoded_bytes += nbytes
+            return {doc_ids[ordinal]: value
+                    for ordinal, value in decode_postings(self._buffer, offset, offset + nbytes, positional)}
+        return {doc_ids[ordinal]: value for ordinal, value in self._decode_range(offset, nbytes, positional, partition)}
+
+    def _decode_range(self, offset: int, nbytes: int, positional: bool,
+                      partition: Tuple[int, int]) -> Iterator[Tuple[int, Union[List[int], int]]]:
+        """解码倒排列表中文档序号在 [lo, hi) 范围内的部分"""
+        lo, hi = partition
+        buf = self._buffer
+        pos, end = offset, offset + nbytes
+        base = 0
+        while pos < end:
+            block = pos
+            _, pos = decode_varint(buf, pos)
+            last, pos = decode_varint(buf, pos)
+            size, pos = decode_varint(buf, pos)
+            if last >= lo:
+                pos = block
+                break
+            self.skipped_blocks += 1
+            pos += size
+            base = last
+        self.decoded_bytes += end - pos
+        for ordinal, value in decode_postings(buf, pos, end, positional, base):
+            if ordinal >= hi:
+                break
+            if ordinal >= lo:
+                yield ordinal, value
+
+    def intersect(self, terms: List[str], partition: Tuple[int, int] = None) -> List[str]:
+        """
+        AND 查询：同时包含所有词项的文档ID，按文档序号排列
+
+        从文档频率最低的词项出发得到候选文档，其余词项逐块比较块内最后一个
+        文档序号：不含候选文档的块直接跳过、不解码。相似文档的序号越集中
+        （见 doc_order.py），候选文档落在越少的块中，跳过的块就越多
+
+        Args:
+            terms: 词项列表
+            partition: 可选的文档序号范围 [lo, hi)，只返回其中的文档
+        """
+        entries = []
+        for term in terms:
+            entry = self.dictionary.get(term)
+            if entry is None:
+                return []
+            entries.append(entry)
+        if not entries:
+            return []
+        entries.sort(key=lambda entry: entry[2])
+        offset, nbytes, df, _, positional = entries[0]
+        self.decoded_terms += 1
+        if partition is None:
+            self.decoded_bytes += nbytes
+            self.decoded_blocks += -(-df // BLOCK_SIZE)
+            candidates = [ordinal for ordinal, _ in decode_postings(self._buffer, offset, offset + nbytes, positional)]
+        else:
+            candidates = [ordinal for ordinal, _ in self._decode_range(offset, nbytes, positional, partition)]
+        for offset, nbytes, _, _, positional in entries[1:]:
+            if not candidates:
+                break
+            candidates = self._filter_blocks(candidates, offset, offset + nbytes, positional)
+        doc_ids = self.doc_ids
+        return [doc_ids[ordinal] for ordinal in candidates]
+
+    def _filter_blocks(self, candidates: List[int], start: int, end: int, positional: bool) -> List[int]:
+        """保留出现在 buf[start:end] 的倒排列表中的候选文档序号（均为升序）"""
+        buf = self._buffer
+        kept = []
+        i = 0
+        n = len(candidates)
+        pos = start
+        # 上一块的最后一个文档序号，即本块差值的起点
+        base = 0
+        while pos < end and i < n:
+            count, pos = decode_varint(buf, pos)
+            last, pos = decode_varint(buf, pos)
+            size, pos = decode_varint(buf, pos)
+            if last >= candidates[i]:
+                self.decoded_blocks += 1
+                self.decoded_bytes += size
+                ordinals = set(_block_ordinals(buf, pos, count, base, positional))
+                while i < n and candidates[i] <= last:
+                    if candidates[i] in ordinals:
+                        kept.append(candidates[i])
+                    i += 1
+            else:
+                self.skipped_blocks += 1
+            pos += size
+            base = last
+        return kept
+
+    def close(self):
+        """释放数组视图并关闭文件（缓冲区由调用方释放）"""
+        for view in self._arrays:
+            view.release()
+        self._arrays = []
+        self._view.release()
+        if self._mmap is not None:
+            self._mmap.close()
+            self._file.close()
+
+
+class DiskDictionary(Mapping):
+    """
+    磁盘索引的词典：{词项: (偏移, 字节数, 文档频率, 集合频率, 是否保存位置)}
+
+    词项按 UTF-8 字节序（即码位序，与 str 的比较一致）排列，查找在映射的
+    文件上二分查找，不在进程内建立哈希表
+    """
+
+    def __init__(self, disk_index: DiskIndex):
+        self._buffer = disk_index._buffer
+        self._offsets = disk_index.array('term_offsets')
+        self._text_start = disk_index.meta['sections']['term_text'][0]
+        self._entries = disk_index.array('term_entries')
+        self._size = len(self._offsets) - 1
+
+    def _term_bytes(self, i: int) -> bytes:
+        start = self._text_start
+        return bytes(self._buffer[start + self._offsets[i]:start + self._offsets[i + 1]])
+
+    def find(self, term: str) -> int:
+        """词项的序号，不存在时为 -1"""
+        key = term.encode('utf-8')
+        lo, hi = 0, self._size
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._term_bytes(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo if lo < self._size and self._term_bytes(lo) == key else -1
+
+    def entry(self, i: int) -> Tuple[int, int, int, int, bool]:
+        """第 i 个词项的词典项"""
+        entries = self._entries
+        j = i * _ENTRY_FIELDS
+        return entries[j], entries[j + 1], entries[j + 2], entries[j + 3], bool(entries[j + 4])
+
+    def __getitem__(self, term: str) -> Tuple[int, int, int, int, bool]:
+        i = self.find(term) if term.__class__ is str else -1
+        if i < 0:
+            raise KeyError(term)
+        return self.entry(i)
+
+    def __contains__(self, term) -> bool:
+        return term.__class__ is str and self.find(term) >= 0
+
+    def __iter__(self) -> Iterator[str]:
+        for i in range(self._size):
+            yield str(self._term_bytes(i), 'utf-8')
+
+    def items(self) -> Iterator[Tuple[str, Tuple[int, int, int, int, bool]]]:
+        """按顺序遍历 (词项, 词典项)，不逐个二分查找"""
+        for i in range(self._size):
+            yield str(self._term_bytes(i), 'utf-8'), self.entry(i)
+
+    def __len__(self) -> int:
+        return self._size
+
+
+class DiskCorpusStats:
+    """
+    磁盘索引的语料统计（只读），接口同 corpus_stats.CorpusStats
+
+    DF/CF 直接读取词典，高频词读取写入时保存在元数据中的前 TOP_TERMS 个
+    """
+
+    def __init__(self, disk_index: DiskIndex):
+        self.dictionary = disk_index.dictionary
+        self.num_docs = disk_index.meta['num_docs']
+        self.total_tokens = disk_index.meta['total_tokens']
+        self._top_terms = [tuple(item) for item in disk_index.meta['top_terms']]
+
+    @property
+    def avgdl(self) -> float:
+        """平均文档长度"""
+        return self.total_tokens / self.num_docs if self.num_docs else 0.0
+
+    def df(self, term: str) -> int:
+        """词项的文档频率"""
+        entry = self.dictionary.get(term)
+        return entry[2] if entry else 0
+
+    def cf(self, term: str) -> int:
+        """词项在整个语料中的出现次数"""
+        entry = self.dictionary.get(term)
+        return entry[3] if entry else 0
+
+    def doc_freqs(self) -> Iterator[Tuple[str, int]]:
+        """全部 (词项, 文档频率)，按词项顺序"""
+        return ((term, entry[2]) for term, entry in self.dictionary.items())
+
+    def top_terms(self, k: int = 10) -> List[Tuple[str, int]]:
+        """按文档频率降序返回前 k 个 (词项, 文档频率)"""
+        if k <= len(self._top_terms):
+            return self._top_terms[:k]
+        dictionary = self.dictionary
+        counts = ((term, dictionary.entry(i)[2]) for i, term in enumerate(dictionary))
+        return heapq.nsmallest(k, counts, key=lambda item: (-item[1], item[0]))
+
+
+class DiskDocuments(Mapping):
+    """磁盘索引中的文档内容：{文档ID: 文档内容}，按需从文件读取"""
+
+    def __init__(self, disk_index: DiskIndex, partition: Tuple[int, int] = None):
+        """
+        Args:
+            disk_index: DiskIndex 实例
+            partition: 可选的文档序号范围 [lo, hi)，只包含其中的文档
+        """
+        self._disk = disk_index
+        self._offsets = disk_index.array('doc_offsets')
+        self._text_start = disk_index.meta['sections']['doc_text'][0]
+        self.partition = partition
+
+    def __getitem__(self, doc_id: str) -> str:
+        ordinal = self._disk.ordinal(doc_id)
+        if self.partition is not None and not self.partition[0] <= ordinal < self.partition[1]:
+            raise KeyError(doc_id)
+        start = self._text_start + self._offsets[ordinal]
+        end = self._text_start + self._offsets[ordinal + 1]
+        return str(self._disk._buffer[start:end], 'utf-8')
+
+    def __contains__(self, doc_id) -> bool:
+        if self.partition is None:
+            return doc_id in self._disk.doc_lengths
+        return doc_id in self._disk.doc_lengths and self.partition[0] <= self._disk.ordinal(doc_id) < self.partition[1]
+
+    def __iter__(self) -> Iterator[str]:
+        if self.partition is None:
+            return iter(self._disk.doc_ids)
+        return iter(self._disk.doc_ids[self.partition[0]:self.partition[1]])
+
+    def __len__(self) -> int:
+        if self.partition is None:
+            return len(self._disk.doc_ids)
+        return len(range(*self.partition))
+
+
+class DiskPostings(Mapping):
+    """
+    磁盘索引的倒排列表映射：{词项: {文档ID: [位置列表] 或 词频}}
+
+    可替代 InvertedIndex.index 供查询方法使用；判断词项是否存在和遍历词项
+    只访问词典，取倒排列表时先查缓存，未命中才解码。限定了文档序号范围时
+    只含范围内的文档（范围内没有该词项的文档时为空字典）
+    """
+
+    def __init__(self, disk_index: DiskIndex, cache=None, partition: Tuple[int, int] = None):
+        """
+        Args:
+            disk_index: DiskIndex 实例，或同样提供 postings(term) 和 dictionary 的
+                        其他存储（如 sqlite_store.SqliteStore）
+            cache: 可选的 PostingCache（不同范围的映射不能共用一个缓存）
+            partition: 可选的文档序号范围 [lo, hi)，仅支持 DiskIndex
+        """
+        self.disk = disk_index
+        self.cache = cache
+        self.partition = partition
+
+    def _decode(self, term: str) -> Dict[str, Union[List[int], int]]:
+        if self.partition is None:
+            return self.disk.postings(term)
+        return self.disk.postings(term, self.partition)
+
+    def __getitem__(self, term: str) -> Dict[str, Union[List[int], int]]:
+        cache = self.cache
+        if cache is None:
+            return self._decode(term)
+        postings = cache.get(term)
+        if postings is None:
+            postings = self._decode(term)
+            container_bytes, value_bytes = postings_size(postings)
+            cache.put(term, postings, container_bytes + value_bytes)
+        return postings
+
+    def __contains__(self, term) -> bool:
+        return term in self.disk.dictionary
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.disk.dictionary)
+
+    def __len__(self) -> int:
+        return len(self.disk.dictionary)
@@ -0,0 +1,243 @@
+"""
+文档序号重排
+文档序号按加入顺序分配，内容相近的文档分散在整个序号空间中。重排在索引
+构建后重新分配内部文档序号，使相似文档的序号相邻：倒排列表中的序号差值
+变小，变长整数编码更短；同一词项的文档集中在更少的块中，按块跳跃的求交集
+（DiskIndex.intersect）可以跳过更多的块。对外的文档ID不变，查询结果相同。
+
+排序策略：
+    arrival  保持原顺序（对照）
+    topics   按 TOPICS、PLACES 类别排序，同类内按 MinHash 签名排序
+    date     按日期排序
+    minhash  按文档词项集合的 MinHash 签名排序，共享最小哈希值的文档相邻
+
+    python doc_order.py --index output/reuters.idx --strategies arrival,topics,date,minhash
+"""
+
+import os
+import sys
+import time
+import argparse
+from typing import Callable, Dict, Iterable, List, Sequence
+
+from dedup import MinHasher
+from disk_index import DiskIndex, DiskIndexWriter, decode_postings
+
+ORDER_STRATEGIES = ('arrival', 'topics', 'date', 'minhash')
+
+
+def minhash_keys(doc_ids: Iterable[str], tokens_of: Callable[[str], Sequence[str]],
+                 num_perm: int = 4, seed: int = 1) -> Dict[str, tuple]:
+    """
+    计算每个文档词项集合的 MinHash 签名，作为排序键
+
+    签名按分量字典序排序时，第一个分量相同（最小哈希词项相同）的文档相邻，
+    其概率等于文档间的 Jaccard 相似度；后续分量在组内继续细分
+
+    Args:
+        doc_ids: 文档ID
+        tokens_of: 返回文档预处理后词项的函数
+        num_perm: 签名长度
+        seed: 随机种子
+    """
+    hasher = MinHasher(num_perm=num_perm, shingle_size=1, seed=seed)
+    return {doc_id: hasher.signature(tokens_of(doc_id)) for doc_id in doc_ids}
+
+
+def order_documents(doc_ids: Sequence[str], strategy: str, metadata: Dict[str, Dict] = None,
+                    tokens_of: Callable[[str], Sequence[str]] = None) -> List[str]:
+    """
+    按策略排列文档
+
+    Args:
+        doc_ids: 按原文档序号排列的文档ID
+        strategy: 排序策略，见 ORDER_STRATEGIES
+        metadata: {文档ID: {'topics', 'places', 'date'}}（见 parse_reuters.parse_reuters_sgml），
+                  'topics' 和 'date' 策略需要
+        tokens_of: 返回文档预处理后词项的函数，'topics' 和 'minhash' 策略需要
+
+    Returns:
+        新的文档顺序（文档ID列表），排序键相同的文档保持原顺序
+    """
+    if strategy not in ORDER_STRATEGIES:
+        raise ValueError(f"不支持的排序策略: {strategy}，可选 {ORDER_STRATEGIES}")
+    if strategy == 'arrival':
+        return list(doc_ids)
+    if strategy in ('topics', 'date') and metadata is None:
+        raise ValueError(f"排序策略 {strategy} 需要文档元数据")
+    if strategy in ('topics', 'minhash') and tokens_of is None:
+        raise ValueError(f"排序策略 {strategy} 需要文档词项")
+    empty = {}
+    if strategy == 'date':
+        # 缺少日期的文档排在最后
+        def date_key(doc_id):
+            date = metadata.get(doc_id, empty).get('date')
+            return not date, date or ''
+
+        return sorted(doc_ids, key=date_key)
+    signatures = minhash_keys(doc_ids, tokens_of)
+    if strategy == 'minhash':
+        return sorted(doc_ids, key=signatures.__getitem__)
+
+    def category_key(doc_id):
+        # 没有类别的文档排在最后
+        info = metadata.get(doc_id, empty)
+        topics = tuple(info.get('topics') or ())
+        places = tuple(info.get('places') or ())
+        return not topics, topics, not places, places, signatures[doc_id]
+
+    return sorted(doc_ids, key=category_key)
+
+
+def reorder_disk_index(disk: DiskIndex, path: str, order: Sequence[str]) -> int:
+    """
+    按新的文档顺序重写磁盘索引：重新分配文档序号，倒排列表按新序号重新编码
+
+    先写入临时文件再改名，写到一半失败时不会留下损坏的索引文件
+
+    Args:
+        disk: 原磁盘索引
+        path: 新索引文件路径（不能与原索引相同）
+        order: 新顺序中的文档ID，须为原索引文档ID的一个排列
+
+    Returns:
+        文件字节数
+    """
+    if len(order) != len(disk.doc_ids) or set(order) != set(disk.doc_ids):
+        raise ValueError("新顺序须包含原索引的每个文档ID恰好一次")
+    new_ordinals = [0] * len(order)
+    for new_ordinal, doc_id in enumerate(order):
+        new_ordinals[disk.ordinal(doc_id)] = new_ordinal
+    dictionary = disk.dictionary
+    temp_path = path + '.tmp'
+    writer = DiskIndexWriter(temp_path, disk.index_options, disk.fields)
+    try:
+        for i, term in enumerate(dictionary):
+            offset, nbytes, _, _, positional = dictionary.entry(i)
+            writer.add_term(term, sorted(
+                (new_ordinals[ordinal], value)
+                for ordinal, value in decode_postings(disk._buffer, offset, offset + nbytes, positional)))
+        documents = disk.documents
+        writer.close(list(order), [disk.doc_lengths[doc_id] for doc_id in order],
+                     (documents[doc_id] for doc_id in order) if documents else None)
+    except BaseException:
+        writer._file.close()
+        os.remove(temp_path)
+        raise
+    os.replace(temp_path, path)
+    return os.path.getsize(path)
+
+
+def gap_stats(disk: DiskIndex) -> Dict[str, float]:
+    """
+    倒排列表的序号差值统计
+
+    Returns:
+        {'postings_bytes': 全部倒排列表的字节数,
+         'gap_bytes': 序号差值的变长整数编码字节数,
+         'mean_log2_gap': 序号差值以 2 为底对数的平均值}
+    """
+    from math import log2
+
+    dictionary = disk.dictionary
+    buf = disk._buffer
+    postings_bytes = gap_bytes = count = 0
+    log_sum = 0.0
+    for i in range(len(dictionary)):
+        offset, nbytes, _, _, positional = dictionary.entry(i)
+        postings_bytes += nbytes
+        previous = 0
+        for ordinal, _ in decode_postings(buf, offset, offset + nbytes, positional):
+            gap = ordinal - previous
+            previous = ordinal
+            gap_bytes += max(1, -(-gap.bit_length() // 7))
+            log_sum += log2(gap) if gap else 0.0
+            count += 1
+    return {
+        'postings_bytes': postings_bytes,
+        'gap_bytes': gap_bytes,
+        'mean_log2_gap': log_sum / count if count else 0.0,
+    }
+
+
+def _and_queries(query_log: str) -> List[List[str]]:
+    """查询日志中的 AND 查询词列表"""
+    from benchmark import load_query_log
+    return [query['query'] for query in load_query_log(query_log) if query['type'] == 'and']
+
+
+def main(argv=None):
+    from inverted_index import InvertedIndex
+    from parse_reuters import iter_reuters_documents
+    from posting_cache import ensure_reuters_disk_index
+
+    parser = argparse.ArgumentParser(description='Reassign doc ordinals so similar documents are adjacent')
+    parser.add_argument('--index', default=os.path.join('output', 'reuters.idx'),
+                        help='Disk index file (built from Reuters if missing)')
+    parser.add_argument('--data-dir', default='data', help='Directory with Reuters SGML files (for metadata)')
+    parser.add_argument('--query-log', default=os.path.join('data', 'reuters_query_log.json'),
+                        help='Query log whose AND queries are timed')
+    parser.add_argument('--strategies', default=','.join(ORDER_STRATEGIES),
+                        help='Comma-separated strategies to compare')
+    parser.add_argument('--passes', type=int, default=5, help='Times to replay the AND queries')
+    parser.add_argument('--output-dir', default=None,
+                        help='Keep the reordered indexes here as <index>.<strategy>.idx (default: discard)')
+    args = parser.parse_args(argv)
+
+    ensure_reuters_disk_index(args.index, args.data_dir)
+    metadata = {doc['id']: doc for doc in iter_reuters_documents(args.data_dir, verbose=False)}
+    for doc in metadata.values():
+        del doc['title'], doc['body'], doc['text']
+    queries = _and_queries(args.query_log)
+    analyzer = InvertedIndex()
+    source = DiskIndex(args.index)
+
+    def tokens_of(doc_id):
+        return analyzer.preprocess(source.documents[doc_id])
+
+    output_dir = args.output_dir or os.path.dirname(args.index) or '.'
+    base = os.path.splitext(os.path.basename(args.index))[0]
+    print(f"{len(source.doc_ids)} documents, {len(queries)} AND queries x {args.passes} passes")
+    print(f"{'Strategy':<9} {'Index MB':>9} {'Postings MB':>12} {'Gap MB':>8} {'log2 gap':>9} "
+          f"{'Blocks skipped':>15} {'AND ms':>8}")
+    print("-" * 76)
+    baseline = None
+    for strategy in args.strategies.split(','):
+        start = time.perf_counter()
+        order = order_documents(source.doc_ids, strategy, metadata, tokens_of)
+        path = os.path.join(output_dir, f"{base}.{strategy}.idx")
+        size = reorder_disk_index(source, path, order)
+        reorder_seconds = time.perf_counter() - start
+
+        index = InvertedIndex()
+        index.load_disk_index(path)
+        disk = index.disk_index
+        stats = gap_stats(disk)
+        for terms in queries:
+            index.search_and(terms)
+        disk.decoded_blocks = disk.skipped_blocks = 0
+        start = time.perf_counter()
+        for _ in range(args.passes):
+            for terms in queries:
+                index.search_and(terms)
+        latency = (time.perf_counter() - start) * 1000 / max(1, len(queries) * args.passes)
+        visited = disk.decoded_blocks + disk.skipped_blocks
+        skipped = disk.skipped_blocks / visited if visited else 0.0
+        disk.close()
+        if not args.output_dir:
+            os.remove(path)
+
+        row = (size, stats['postings_bytes'], stats['gap_bytes'], latency)
+        baseline = baseline or row
+        print(f"{strategy:<9} {size / 2**20:>9.2f} {stats['postings_bytes'] / 2**20:>12.2f} "
+              f"{stats['gap_bytes'] / 2**20:>8.2f} {stats['mean_log2_gap']:>9.2f} {skipped:>15.1%} "
+              f"{latency:>8.3f}   ({reorder_seconds:.0f}s to reorder)")
+        if row is not baseline:
+            print(f"{'':<9} {row[0] / baseline[0] - 1:>+9.1%} {row[1] / baseline[1] - 1:>+12.1%} "
+                  f"{row[2] / baseline[2] - 1:>+8.1%} {'':>9} {'':>15} {row[3] / baseline[3] - 1:>+8.1%}")
+    source.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,113 @@
+"""
+模糊匹配
+在有序词典上模拟 Levenshtein 自动机：按字典序遍历词项，相邻词项共享前缀的
+动态规划行，一旦某个前缀的编辑距离下界超过阈值，就用二分查找跳过该前缀下的全部词项
+"""
+
+from typing import List, Tuple
+
+from term_dictionary import SortedTermDictionary
+
+
+# 支持的最大编辑距离
+MAX_EDIT_DISTANCE = 2
+
+
+def _next_row(previous_row: List[int], char: str, query: str,
+              depth: int = 0, max_edits: int = None) -> List[int]:
+    """
+    根据上一行和新字符计算编辑距离矩阵的下一行
+
+    给定 max_edits 时只计算宽度为 2k+1 的对角带，带外的值记为 max_edits + 1
+    （这些单元的真实距离必然超过阈值），并将所有值截断到 max_edits + 1
+
+    Args:
+        previous_row: 上一行
+        char: 新加入前缀的字符
+        query: 查询词
+        depth: 新前缀的长度
+        max_edits: 编辑距离阈值，None 表示计算完整行
+    """
+    if max_edits is None:
+        row = [previous_row[0] + 1]
+        for j, query_char in enumerate(query, 1):
+            row.append(min(row[j - 1] + 1,
+                           previous_row[j] + 1,
+                           previous_row[j - 1] + (query_char != char)))
+        return row
+
+    cap = max_edits + 1
+    row = [cap] * (len(query) + 1)
+    if depth <= max_edits:
+        row[0] = depth
+    for j in range(max(1, depth - max_edits), min(len(query), depth + max_edits) + 1):
+        value = min(row[j - 1] + 1,
+                    previous_row[j] + 1,
+                    previous_row[j - 1] + (query[j - 1] != char))
+        row[j] = value if value < cap else cap
+    return row
+
+
+def levenshtein(a: str, b: str) -> int:
+    """计算两个字符串的编辑距离"""
+    row = list(range(len(b) + 1))
+    for char in a:
+        row = _next_row(row, char, b)
+    return row[-1]
+
+
+def fuzzy_terms(dictionary: SortedTermDictionary, query: str,
+                max_edits: int = 1) -> List[Tuple[str, int]]:
+    """
+    查找与 query 编辑距离不超过 max_edits 的全部词项
+
+    Args:
+        dictionary: 有序词典
+        query: 查询词
+        max_edits: 最大编辑距离（0-2）
+
+    Returns:
+        [(词项, 编辑距离)] 列表，按字典序排列
+    """
+    if not 0 <= max_edits <= MAX_EDIT_DISTANCE:
+        raise ValueError(f"编辑距离必须在 0 到 {MAX_EDIT_DISTANCE} 之间: {max_edits}")
+
+    results = []
+    size = len(dictionary)
+    cap = max_edits + 1
+    # rows[i] 是当前前缀长度为 i 时的动态规划行（值截断到 max_edits + 1）
+    rows = [[min(j, cap) for j in range(len(query) + 1)]]
+    previous = ''
+    position = 0
+
+    while position < size:
+        term = dictionary.term_at(position)
+
+        # 复用与上一个词项共享前缀的行
+        shared = 0
+        limit = min(len(previous), len(term), len(rows) - 1)
+        while shared < limit and previous[shared] == term[shared]:
+            shared += 1
+        del rows[shared + 1:]
+
+        dead_prefix = None
+        for i in range(shared, len(term)):
+            row = _next_row(rows[-1], term[i], query, i + 1, max_edits)
+            rows.append(row)
+            if min(row) == cap:
+                # 该前缀下不可能再有匹配
+                dead_prefix = term[:i + 1]
+                break
+
+        if dead_prefix is not None:
+            previous = dead_prefix
+            position = dictionary.prefix_end(dead_prefix)
+            continue
+
+        distance = rows[-1][-1]
+        if distance <= max_edits:
+            results.append((term, distance))
+        previous = term
+        position += 1
+
+    return results
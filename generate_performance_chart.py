@@ -4,6 +4,7 @@
 Generate performance comparison charts
 """
 
+import os
 import json
 import matplotlib.pyplot as plt
 import numpy as np
@@ -174,6 +175,58 @@ def create_performance_charts():
     
     return output_path
 
+def create_scaling_charts(results_file='output/scaling_results.json',
+                          output_path='output/scaling_chart.png'):
+    """Chart build time, memory and query latency against synthetic corpus size"""
+
+    # Produced by: python benchmark.py --corpus synthetic --scaling 10000,100000,1000000
+    with open(results_file, 'r') as f:
+        results = json.load(f)
+
+    runs = results['runs']
+    doc_counts = [run['documents'] for run in runs]
+    query_types = sorted(runs[0]['queries'])
+
+    fig, (ax1, ax2, ax3) = plt.subplots(1, 3, figsize=(18, 6))
+    corpus = results['corpus']
+    fig.suptitle(f"Scaling on a synthetic Zipf corpus (s={corpus['zipf_s']}, vocabulary {corpus['vocab_size']:,})",
+                 fontsize=16, fontweight='bold')
+
+    ax1.plot(doc_counts, [run['build']['build_seconds'] for run in runs], 'o-',
+             linewidth=2.5, markersize=8, color='#3498db')
+    ax1.set_title('Build Time', fontsize=14, fontweight='bold')
+    ax1.set_ylabel('Seconds', fontsize=12)
+
+    ax2.plot(doc_counts, [run['build']['peak_rss_kb'] / 1024 for run in runs], 's-',
+             linewidth=2.5, markersize=8, color='#2ecc71', label='Peak RSS')
+    if all('tracemalloc_peak_bytes' in run['build'] for run in runs):
+        ax2.plot(doc_counts, [run['build']['tracemalloc_peak_bytes'] / 2**20 for run in runs], '^-',
+                 linewidth=2.5, markersize=8, color='#f39c12', label='tracemalloc peak')
+    ax2.set_title('Memory', fontsize=14, fontweight='bold')
+    ax2.set_ylabel('MB', fontsize=12)
+    ax2.legend(fontsize=10)
+
+    for kind in query_types:
+        ax3.plot(doc_counts, [run['queries'][kind]['p95_ns'] / 1e6 for run in runs], 'o-',
+                 linewidth=2, markersize=6, label=kind)
+    ax3.set_title('Query Latency (p95)', fontsize=14, fontweight='bold')
+    ax3.set_ylabel('Milliseconds', fontsize=12)
+    ax3.set_yscale('log')
+    ax3.legend(fontsize=9)
+
+    for ax in (ax1, ax2, ax3):
+        ax.set_xscale('log')
+        ax.set_xlabel('Number of Documents', fontsize=12, fontweight='bold')
+        ax.grid(True, alpha=0.3, linestyle='--')
+
+    plt.tight_layout(rect=[0, 0, 1, 0.94])
+    plt.savefig(output_path, dpi=150, bbox_inches='tight', facecolor='white')
+    print(f"✓ Scaling chart saved: {output_path}")
+
+    return output_path
+
 if __name__ == '__main__':
     create_performance_charts()
+    if os.path.exists('output/scaling_results.json'):
+        create_scaling_charts()
 
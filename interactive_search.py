@@ -1,9 +1,172 @@
 """
 交互式倒排索引查询系统
 允许用户交互式地查询倒排索引
+
+    python interactive_search.py                                  # 示例文档
+    python interactive_search.py --index output/reuters.idx       # 打开保存的索引
+    python interactive_search.py --index output/reuters.idx --data-dir data   # 不存在时先构建
+
+保存的索引可以是磁盘索引（save_disk_index）、SQLite 数据库（save_sqlite）或
+JSON 快照（save_to_file），按文件头识别。索引模块的导入和索引的打开都在后台
+线程中进行，菜单立即出现，第一次查询时才等待打开完成。输入查询词时按 Tab
+补全（需要 readline 模块）。
 """
 
-from inverted_index import InvertedIndex
+import os
+import sys
+import time
+import argparse
+import threading
+from itertools import islice
+
+# 分页查询每页显示的文档数
+PAGE_SIZE = 10
+# 显示文档内容的最大字符数
+MAX_CONTENT_CHARS = 300
+# 解码倒排列表缓存的大小（打开磁盘索引或 SQLite 数据库时）
+CACHE_BYTES = 16 * 2**20
+
+# 示例文档集
+SAMPLE_DOCUMENTS = {
+    "doc1": "Information retrieval is the process of obtaining information system resources.",
+    "doc2": "Search engines use inverted index for fast information retrieval.",
+    "doc3": "An inverted index is a database index storing a mapping from content.",
+    "doc4": "The inverted index data structure is a central component of search engines.",
+    "doc5": "Information systems store and retrieve data efficiently using index structures.",
+    "doc6": "Database management systems use various index structures for query optimization.",
+    "doc7": "Full-text search requires inverted index to find documents quickly.",
+    "doc8": "Modern search engines process millions of queries using inverted indexes.",
+    "doc9": "Python is a popular programming language for data science and machine learning.",
+    "doc10": "Machine learning algorithms can process large datasets efficiently.",
+}
+
+
+def open_index(path: str, data_dir: str = None):
+    """
+    打开保存的索引，按文件头识别格式；文件不存在且给出 data_dir 时先从 Reuters 语料构建磁盘索引
+
+    Returns:
+        InvertedIndex
+    """
+    from inverted_index import InvertedIndex
+    from posting_cache import PostingCache
+
+    if not os.path.exists(path):
+        if data_dir is None:
+            raise FileNotFoundError(f"索引文件不存在: {path}")
+        from posting_cache import ensure_reuters_disk_index
+        ensure_reuters_disk_index(path, data_dir)
+    with open(path, 'rb') as f:
+        head = f.read(16)
+    index = InvertedIndex()
+    if head.startswith(b'SQLite format 3'):
+        index.open_sqlite(path, cache=PostingCache(CACHE_BYTES))
+    elif head.lstrip()[:1] == b'{':
+        index.load_from_file(path)
+    else:
+        index.load_disk_index(path, cache=PostingCache(CACHE_BYTES))
+    return index
+
+
+def build_sample_index():
+    """用示例文档构建内存索引"""
+    from inverted_index import InvertedIndex
+
+    index = InvertedIndex()
+    index.build_from_documents(SAMPLE_DOCUMENTS)
+    return index
+
+
+class LazyIndex:
+    """在后台线程中打开索引；第一次访问索引属性时等待打开完成"""
+
+    def __init__(self, opener, description: str):
+        """
+        Args:
+            opener: 返回 InvertedIndex 的函数
+            description: 打开完成时显示的说明
+        """
+        self._index = None
+        self._error = None
+        self.description = description
+        self.open_seconds = None
+        self._thread = threading.Thread(target=self._open, args=(opener,), daemon=True)
+        self._thread.start()
+
+    def _open(self, opener):
+        start = time.perf_counter()
+        try:
+            self._index = opener()
+        except BaseException as exc:  # 在主线程中第一次使用时重新抛出
+            self._error = exc
+        self.open_seconds = time.perf_counter() - start
+
+    def get(self):
+        """返回打开的索引，尚未打开完成时等待"""
+        if self._index is None and self._error is None:
+            if self._thread.is_alive():
+                print("正在载入索引...")
+            self._thread.join()
+            if self._index is not None:
+                print(f"✓ {self.description}，共 {len(self._index.documents)} 个文档"
+                      f"（载入 {self.open_seconds * 1000:.0f} ms）")
+        if self._error is not None:
+            raise self._error
+        return self._index
+
+    @property
+    def ready(self) -> bool:
+        """索引是否已打开"""
+        return self._index is not None
+
+    def __getattr__(self, name):
+        return getattr(self.get(), name)
+
+
+class QueryTimer:
+    """:timing 开启时打印每次查询的耗时（不含显示结果的时间）"""
+
+    def __init__(self):
+        self.enabled = False
+
+    def __call__(self, function, *args, **kwargs):
+        start = time.perf_counter()
+        result = function(*args, **kwargs)
+        if self.enabled:
+            print(f"⏱ 查询耗时 {(time.perf_counter() - start) * 1000:.3f} ms")
+        return result
+
+
+class TermCompleter:
+    """readline 补全函数：按文档频率补全正在输入的查询词"""
+
+    def __init__(self, index):
+        self.index = index
+        self.matches = []
+
+    def __call__(self, text: str, state: int):
+        if state == 0:
+            # 索引尚未打开完成时不补全，避免按 Tab 时卡住
+            ready = getattr(self.index, 'ready', True)
+            if ready and text and '*' not in text and '?' not in text:
+                self.matches = self.index.complete(text, PAGE_SIZE)
+            else:
+                self.matches = []
+        return self.matches[state] if state < len(self.matches) else None
+
+
+def enable_tab_completion(index) -> bool:
+    """为 input() 开启 Tab 补全，没有 readline 模块（如 Windows）时返回 False"""
+    try:
+        import readline
+    except ImportError:
+        return False
+    readline.set_completer(TermCompleter(index))
+    if 'libedit' in (readline.__doc__ or ''):
+        readline.parse_and_bind('bind ^I rl_complete')
+    else:
+        readline.parse_and_bind('tab: complete')
+    return True
 
 
 def print_menu():
@@ -11,7 +174,7 @@ def print_menu():
     print("\n" + "="*60)
     print("倒排索引查询系统")
     print("="*60)
-    print("1. 单词查询")
+    print("1. 单词查询 (支持通配符 * 和 ?)")
     print("2. AND查询 (多个词都必须出现)")
     print("3. OR查询 (任一词出现即可)")
     print("4. NOT查询 (包含某词但排除另一词)")
@@ -21,84 +184,143 @@ def print_menu():
     print("8. 显示索引结构")
     print("9. 显示统计信息")
     print("0. 退出")
+    print(":timing 开启/关闭查询计时")
+    print(":complete 前缀  显示查询词补全（输入查询词时也可按 Tab 补全）")
     print("="*60)
 
 
-def display_results(doc_ids, index):
-    """显示查询结果"""
+def print_document(index, doc_id):
+    """显示一篇文档，过长的内容截断"""
+    content = index.documents[doc_id]
+    if len(content) > MAX_CONTENT_CHARS:
+        content = content[:MAX_CONTENT_CHARS] + "..."
+    print(f"\n[{doc_id}]")
+    print(f"{content}")
+
+
+def display_results(doc_ids, index, query=None):
+    """显示查询结果，没有结果时给出拼写建议"""
     if not doc_ids:
         print("\n❌ 未找到匹配的文档")
+        suggestion = index.did_you_mean(query) if query else None
+        if suggestion:
+            print(f"💡 您是不是要找: {suggestion}")
         return
-    
+
     print(f"\n✓ 找到 {len(doc_ids)} 个文档:")
     print("-" * 60)
     for doc_id in sorted(doc_ids):
-        content = index.documents[doc_id]
-        print(f"\n[{doc_id}]")
-        print(f"{content}")
+        print_document(index, doc_id)
     print("-" * 60)
 
 
-def main():
+def more_pages(shown):
+    """询问是否显示下一页"""
+    return input(f"\n已显示 {shown} 个文档，按回车显示下一页，输入 q 结束: ").strip().lower() != 'q'
+
+
+def display_pages(index, query_type, query, text=None, timer=None):
+    """分页显示布尔查询的结果：每页从上一页停下的位置继续求值，不计算完整结果集"""
+    timer = timer or QueryTimer()
+    cursor = None
+    shown = 0
+    while True:
+        page = timer(index.search_page, query_type, query, PAGE_SIZE, cursor)
+        if not shown and not page.results:
+            display_results(set(), index, text)
+            return
+        print("-" * 60)
+        for doc_id in page.results:
+            print_document(index, doc_id)
+        shown += len(page.results)
+        cursor = page.cursor
+        if cursor is None:
+            print("-" * 60)
+            print(f"✓ 共 {shown} 个文档")
+            return
+        if not more_pages(shown):
+            return
+
+
+def main(argv=None):
     """主程序"""
-    # 创建索引并加载示例数据
-    index = InvertedIndex()
-    
-    # 示例文档集
-    documents = {
-        "doc1": "Information retrieval is the process of obtaining information system resources.",
-        "doc2": "Search engines use inverted index for fast information retrieval.",
-        "doc3": "An inverted index is a database index storing a mapping from content.",
-        "doc4": "The inverted index data structure is a central component of search engines.",
-        "doc5": "Information systems store and retrieve data efficiently using index structures.",
-        "doc6": "Database management systems use various index structures for query optimization.",
-        "doc7": "Full-text search requires inverted index to find documents quickly.",
-        "doc8": "Modern search engines process millions of queries using inverted indexes.",
-        "doc9": "Python is a popular programming language for data science and machine learning.",
-        "doc10": "Machine learning algorithms can process large datasets efficiently.",
-    }
-    
-    print("正在构建倒排索引...")
-    index.build_from_documents(documents)
-    print(f"✓ 索引构建完成! 共 {len(documents)} 个文档\n")
-    
-    # 主循环
+    parser = argparse.ArgumentParser(description='Interactive inverted index search shell')
+    parser.add_argument('--index', metavar='PATH',
+                        help='Saved index to open (disk index, SQLite database or JSON snapshot); '
+                             'default: build a small sample index')
+    parser.add_argument('--data-dir', metavar='DIR',
+                        help='Build a disk index from the Reuters SGML files here if PATH does not exist')
+    args = parser.parse_args(argv)
+
+    if args.index:
+        index = LazyIndex(lambda: open_index(args.index, args.data_dir), f"已打开索引 {args.index}")
+    else:
+        index = LazyIndex(build_sample_index, "示例索引构建完成")
+    timer = QueryTimer()
+    enable_tab_completion(index)
+    try:
+        run_shell(index, timer)
+    except (EOFError, KeyboardInterrupt):
+        print()
+    return 0
+
+
+def run_shell(index, timer):
+    """菜单主循环"""
     while True:
         print_menu()
         choice = input("\n请选择操作 (0-9): ").strip()
-        
+
         if choice == '0':
             print("\n感谢使用! 再见!")
             break
-        
+
+        elif choice == ':timing':
+            timer.enabled = not timer.enabled
+            print(f"\n查询计时已{'开启' if timer.enabled else '关闭'}")
+            continue
+
+        elif choice.startswith(':complete'):
+            prefix = choice[len(':complete'):].strip()
+            completions = timer(index.complete, prefix, PAGE_SIZE)
+            if completions:
+                print(f"\n以 '{prefix}' 开头的词项（按文档频率）:")
+                for term in completions:
+                    print(f"  {term} ({index.stats.df(term)})")
+            else:
+                print(f"\n没有以 '{prefix}' 开头的词项")
+            continue
+
         elif choice == '1':
             # 单词查询
             term = input("\n请输入查询词: ").strip()
-            if term:
-                result = index.search(term)
+            if term and ('*' in term or '?' in term):
+                expanded = timer(index.expand_wildcard, term)
+                print(f"\n通配符查询: '{term}' → {expanded}")
+                display_pages(index, 'or', expanded, timer=timer)
+            elif term:
+                result = timer(index.search, term)
                 print(f"\n查询: '{term}'")
-                if result:
+                if result and len(result) <= PAGE_SIZE:
                     print(f"倒排列表: {dict(result)}")
-                display_results(set(result.keys()), index)
-        
+                display_pages(index, 'or', [term], term, timer)
+
         elif choice == '2':
             # AND查询
             terms_input = input("\n请输入多个查询词 (空格分隔): ").strip()
             if terms_input:
                 terms = terms_input.split()
-                result = index.search_and(terms)
                 print(f"\n查询: {' AND '.join(terms)}")
-                display_results(result, index)
-        
+                display_pages(index, 'and', terms, terms_input, timer)
+
         elif choice == '3':
             # OR查询
             terms_input = input("\n请输入多个查询词 (空格分隔): ").strip()
             if terms_input:
                 terms = terms_input.split()
-                result = index.search_or(terms)
                 print(f"\n查询: {' OR '.join(terms)}")
-                display_results(result, index)
-        
+                display_pages(index, 'or', terms, terms_input, timer)
+
         elif choice == '4':
             # NOT查询
             include_input = input("\n请输入必须包含的词 (空格分隔): ").strip()
@@ -106,56 +328,63 @@ def main():
             if include_input or exclude_input:
                 include_terms = include_input.split() if include_input else []
                 exclude_terms = exclude_input.split() if exclude_input else []
-                result = index.search_not(include_terms, exclude_terms)
                 print(f"\n查询: 包含 {include_terms} 但不包含 {exclude_terms}")
-                display_results(result, index)
-        
+                display_pages(index, 'not', {'include': include_terms, 'exclude': exclude_terms}, timer=timer)
+
         elif choice == '5':
             # 短语查询
             phrase = input("\n请输入查询短语: ").strip()
             if phrase:
-                result = index.search_phrase(phrase)
                 print(f"\n查询短语: \"{phrase}\"")
-                display_results(result, index)
-        
+                display_pages(index, 'phrase', phrase, phrase, timer)
+
         elif choice == '6':
             # 词频统计
             term = input("\n请输入词项: ").strip()
             if term:
-                df = index.get_document_frequency(term)
+                df = timer(index.get_document_frequency, term)
                 print(f"\n词项 '{term}' 的统计:")
                 print(f"文档频率 (DF): {df} 个文档")
-                
+
                 if df > 0:
                     print("\n各文档中的词频 (TF):")
-                    for doc_id in sorted(index.documents.keys()):
-                        tf = index.get_term_frequency(term, doc_id)
-                        if tf > 0:
-                            print(f"  {doc_id}: {tf} 次")
-        
+                    tokens = index.preprocess(term)
+                    postings = index.index.get(tokens[0], {}) if tokens else {}
+                    for doc_id in sorted(postings)[:PAGE_SIZE * 5]:
+                        print(f"  {doc_id}: {index.get_term_frequency(term, doc_id)} 次")
+                    if df > PAGE_SIZE * 5:
+                        print(f"  ... 另有 {df - PAGE_SIZE * 5} 个文档")
+
         elif choice == '7':
             # 显示所有文档
             print("\n所有文档:")
             print("-" * 60)
-            for doc_id in sorted(index.documents.keys()):
-                print(f"\n[{doc_id}]")
-                print(f"{index.documents[doc_id]}")
+            shown = 0
+            for doc_id in index.documents:
+                print_document(index, doc_id)
+                shown += 1
+                if shown % PAGE_SIZE == 0 and shown < len(index.documents) and not more_pages(shown):
+                    break
             print("-" * 60)
-        
+
         elif choice == '8':
             # 显示索引结构
-            index.display_index()
-        
+            if len(index.documents) > PAGE_SIZE * 10:
+                print(f"\n索引有 {len(index.documents)} 个文档，只显示前 {PAGE_SIZE * 5} 个词项:")
+                for term in islice(sorted(index.index), PAGE_SIZE * 5):
+                    print(f"  {term}: {len(index.index[term])} 个文档")
+            else:
+                index.display_index()
+
         elif choice == '9':
             # 显示统计信息
             index.display_statistics()
-        
+
         else:
             print("\n❌ 无效的选择，请重试")
-        
+
         input("\n按回车键继续...")
 
 
 if __name__ == "__main__":
-    main()
-
+    sys.exit(main())
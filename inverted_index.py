@@ -3,26 +3,139 @@
 实现了完整的倒排索引功能，包括文档处理、索引构建和查询
 """
 
+import os
 import re
 import json
-from collections import defaultdict
-from typing import List, Dict, Set, Tuple
+import math
+import heapq
+from array import array
+from collections import Counter, defaultdict
+from collections.abc import Mapping
+from itertools import chain, filterfalse, islice
+from typing import List, Dict, Iterable, Iterator, Set, Tuple, Union
+
+from term_dictionary import SortedTermDictionary, KGramIndex, wildcard_to_regex, literal_prefix
+from fuzzy import fuzzy_terms
+from dedup import NearDuplicateDetector
+from sketches import HyperLogLog, hash64
+from tracing import Tracer
+from memory_usage import MemoryAccountant, format_bytes
+from corpus_stats import CorpusStats
+from common_grams import CommonGramsIndex
+from champions import ChampionList
+from disk_index import DiskIndex, DiskDocuments, DiskPostings, DiskCorpusStats, write_disk_index
+from wal import WriteAheadLog, atomic_write
+from cjk import CJK_FIRST, has_cjk, is_cjk_char, tokenize_mixed
+from autocomplete import CompletionIndex
+from pagination import (PAGE_QUERY_TYPES, CursorError, QueryBudget, ResultPage,
+                        PostingWindow, query_fingerprint, encode_cursor, decode_cursor, scan_windows)
+
+
+# 倒排项保存的信息（同 Lucene 的 IndexOptions）：
+# 'docs' 只保存文档ID，'freqs' 保存文档ID和词频，'positions' 保存完整位置列表
+INDEX_OPTIONS = ('docs', 'freqs', 'positions')
+
+
+# 排序查询使用冠军列表的方式：'safe' 先给冠军文档打分，只在不能证明结果与完整
+# 排序一致时扫描完整倒排列表；'only' 只用冠军文档（近似）；'off' 不使用冠军列表
+CHAMPION_MODES = ('safe', 'only', 'off')
+
+
+class PositionsNotIndexedError(ValueError):
+    """查询需要位置信息，但相应字段未保存位置"""
 
 
 class InvertedIndex:
     """倒排索引核心类"""
-    
-    def __init__(self):
-        """初始化倒排索引"""
-        # 倒排索引：{词项: {文档ID: [位置列表]}}
+
+    # 通配符查询默认最多展开的词项数
+    DEFAULT_MAX_EXPANSIONS = 50
+    # BM25 参数
+    BM25_K1 = 1.2
+    BM25_B = 0.75
+    # 近似计数：HyperLogLog 精度，以及为词项建立草图的最小文档频率
+    SKETCH_PRECISION = 10
+    SKETCH_MIN_DF = 256
+    # 剪枝比较得分上界时留出的余量，避免浮点舍入误差剔除恰好并列第 k 名的文档
+    SCORE_EPSILON = 1e-9
+    # 平均文档长度相对建立冠军层时变化超过该比例时重建冠军层（收紧上界）
+    CHAMPION_REBUILD_DRIFT = 0.1
+
+    def __init__(self, kgram_size: int = 3, deduplicator: NearDuplicateDetector = None,
+                 store_term_vectors: bool = False, tracer: Tracer = None,
+                 index_options: str = 'positions', field_options: Dict[str, str] = None,
+                 common_words: Iterable[str] = None, champion_size: int = 0,
+                 wal: WriteAheadLog = None, cjk_bigrams: bool = True):
+        """
+        初始化倒排索引
+
+        Args:
+            kgram_size: 中缀/后缀通配符使用的 k-gram 长度，0 表示不建立 k-gram 索引
+            deduplicator: 可选的近重复检测器，构建索引时识别近似重复的文档
+            store_term_vectors: 是否为每个文档保存词项向量（用于相似文档查询）
+            tracer: 可选的查询追踪器，记录每次查询的阶段耗时和计数器
+            index_options: 倒排项保存的信息，'docs'、'freqs' 或 'positions'
+            field_options: 按字段覆盖 index_options，如 {'title': 'positions', 'body': 'freqs'}
+            common_words: 可选的常用词集合，为含常用词的相邻词对建立二元组索引以加速短语查询
+            champion_size: 每个词项冠军层的文档数，0 表示不使用冠军列表；倒排列表
+                           更长的词项在首次被排序查询用到时建立冠军层，之后增量维护
+            wal: 可选的预写日志，记录每次添加和删除文档，配合 checkpoint/recover 实现崩溃恢复
+            cjk_bigrams: 是否把中日韩文字切成重叠的二元组建立索引（见 cjk.py），
+                         为 False 时与原分词规则相同，CJK 文本被忽略
+        """
+        for option in [index_options] + list((field_options or {}).values()):
+            if option not in INDEX_OPTIONS:
+                raise ValueError(f"不支持的索引选项: {option}，可选 {INDEX_OPTIONS}")
+        self.index_options = index_options
+        # 字段及其索引选项：{字段名: 索引选项}，字段词项以 '字段名:词项' 为键
+        self.fields = dict(field_options or {})
+
+        # 倒排索引：{词项: {文档ID: [位置列表] 或 词频}}
         self.index = defaultdict(lambda: defaultdict(list))
         # 文档存储：{文档ID: 文档内容}
         self.documents = {}
         # 文档长度：{文档ID: 词项数量}
         self.doc_lengths = {}
+        # 语料统计（N、avgdl、DF/CF、高频词），随文档增删增量维护
+        self.stats = CorpusStats()
         # 停用词集合
         self.stop_words = self._load_stop_words()
-        
+        self.cjk_bigrams = cjk_bigrams
+        # 有序词典和 k-gram 索引，在通配符查询时按需构建
+        self.kgram_size = kgram_size
+        self._term_dictionary = None
+        self._kgram_index = None
+        # 查询词补全索引，首次补全时建立，之后随文档增删增量更新
+        self._completions = None
+        # 近重复检测：{重复文档ID: 代表文档ID}
+        self.deduplicator = deduplicator
+        self.duplicate_of = {}
+        # 词项向量：{文档ID: (词项ID数组, 词频数组)}，词项ID升序
+        self.store_term_vectors = store_term_vectors
+        self.term_vectors = {}
+        # 词项ID映射，仅在保存词项向量时分配
+        self.term_ids = {}
+        self.id_to_term = []
+        # 近似计数的词项草图缓存：{词项: (构建时的文档频率, 草图)}
+        self._sketches = {}
+        self._doc_hashes = {}
+        # 查询追踪器，为 None 时不追踪
+        self.tracer = tracer
+        # 内存计量器，首次调用 memory_report 时创建，之后增量更新
+        self._memory_accountant = None
+        # 常用词二元组索引，为 None 时短语查询只使用位置列表
+        self.common_grams = CommonGramsIndex(common_words) if common_words else None
+        # 冠军列表：{词项: ChampionList}
+        self.champion_size = champion_size
+        self._champions = {}
+        # 打开的磁盘索引（只读），为 None 时索引在内存中
+        self.disk_index = None
+        # 打开的 SQLite 数据库，为 None 时索引不在数据库中
+        self.sqlite_store = None
+        # 预写日志，以及最近的检查点包含的最后一个日志序号
+        self.wal = wal
+        self.wal_lsn = 0
+
     def _load_stop_words(self) -> Set[str]:
         """加载停用词表"""
         # 常见英文停用词
@@ -37,49 +150,313 @@ class InvertedIndex:
         """
         文本预处理
         1. 转小写
-        2. 分词（提取字母数字组合）
+        2. 分词（提取字母数字组合；含 CJK 文字时连续的 CJK 字符切成重叠的二元组）
         3. 去停用词
         """
         # 转小写
         text = text.lower()
-        # 分词：提取字母和数字组合
-        tokens = re.findall(r'\b[a-z0-9]+\b', text)
+        if self.cjk_bigrams and has_cjk(text):
+            tokens = tokenize_mixed(text)
+        else:
+            # 分词：提取字母和数字组合
+            tokens = re.findall(r'\b[a-z0-9]+\b', text)
         # 去停用词
         tokens = [token for token in tokens if token not in self.stop_words]
         return tokens
     
-    def add_document(self, doc_id: str, content: str):
+    def _analyze_fields(self, content: Dict[str, str]) -> List[Tuple[str, str, List[str]]]:
+        """预处理多字段文档，返回 [(字段前缀, 索引选项, 带字段前缀的词项列表)]"""
+        analyzed = []
+        for field, text in content.items():
+            option = self.fields.setdefault(field, self.index_options)
+            prefix = field + ':'
+            analyzed.append((prefix, option, [prefix + token for token in self.preprocess(text)]))
+        return analyzed
+
+    def field_option(self, term: str) -> str:
+        """返回词项（可带字段前缀）所属字段的索引选项"""
+        if self.fields and ':' in term:
+            return self.fields.get(term.split(':', 1)[0], self.index_options)
+        return self.index_options
+
+    def _analyze_document(self, content: Union[str, Dict[str, str]]
+                          ) -> Tuple[str, int, Dict[str, Union[List[int], int]]]:
+        """
+        分析一篇文档，结果与 _add_document 写入倒排索引的内容一致（供外部存储使用）
+
+        Returns:
+            (保存的文档内容, 文档长度, {词项: 位置列表或词频})
+        """
+        if isinstance(content, dict):
+            analyzed = self._analyze_fields(content)
+            content = '\n'.join(content.values())
+        else:
+            analyzed = [('', self.index_options, self.preprocess(content))]
+        postings = {}
+        length = 0
+        for _, option, tokens in analyzed:
+            length += len(tokens)
+            if option == 'positions':
+                for position, token in enumerate(tokens):
+                    postings.setdefault(token, []).append(position)
+            else:
+                for token, count in Counter(tokens).items():
+                    postings[token] = count if option == 'freqs' else 1
+        return content, length, postings
+
+    @staticmethod
+    def _tf(value: Union[List[int], int]) -> int:
+        """倒排项中的词频：位置列表的长度，或直接保存的词频"""
+        return value if value.__class__ is int else len(value)
+
+    def add_document(self, doc_id: str, content: Union[str, Dict[str, str]]):
         """
         添加文档到索引
+
+        多字段文档的词项以 '字段名:词项' 为键，各字段按自己的索引选项保存
         
         Args:
             doc_id: 文档唯一标识
-            content: 文档内容
+            content: 文档内容，或 {字段名: 字段内容} 字典
         """
+        if self.disk_index is not None:
+            raise ValueError("磁盘索引是只读的，不能添加文档")
+        if self.sqlite_store is not None:
+            self._sqlite_write(self.sqlite_store.add_documents([(doc_id, content)], self._analyze_document))
+        else:
+            self._add_document(doc_id, content)
+        # 变更成功应用后再写日志：内存中的状态崩溃时本就会丢失，而先写日志的话，
+        # 应用失败的操作会在每次恢复时重放失败
+        if self.wal is not None:
+            self.wal.append('add', doc_id=doc_id, content=content)
+
+    def _add_document(self, doc_id: str, content: Union[str, Dict[str, str]]):
+        """添加文档（不写日志）"""
+        # 预处理文档
+        if isinstance(content, dict):
+            analyzed = self._analyze_fields(content)
+            tokens = [token for _, _, field_tokens in analyzed for token in field_tokens]
+            content = '\n'.join(content.values())
+        else:
+            tokens = self.preprocess(content)
+            analyzed = [('', self.index_options, tokens)]
+
+        # 近重复检测：'skip' 和 'cluster' 模式下重复文档不进入索引
+        if self.deduplicator is not None:
+            original = self.deduplicator.check(doc_id, tokens)
+            if original is not None:
+                if self.deduplicator.mode == 'skip':
+                    return
+                self.duplicate_of[doc_id] = original
+                if self.deduplicator.mode == 'cluster':
+                    return
+
         # 保存原始文档
         self.documents[doc_id] = content
         
-        # 预处理文档
-        tokens = self.preprocess(content)
-        
         # 记录文档长度
         self.doc_lengths[doc_id] = len(tokens)
         
         # 构建倒排索引
-        for position, token in enumerate(tokens):
-            # 记录词项在文档中的位置
-            self.index[token][doc_id].append(position)
+        vocabulary_size = len(self.index)
+        term_counts = Counter(tokens)
+        for prefix, option, field_tokens in analyzed:
+            if option == 'positions':
+                for position, token in enumerate(field_tokens):
+                    # 记录词项在文档中的位置
+                    self.index[token][doc_id].append(position)
+                if self.common_grams is not None:
+                    self.common_grams.add_document(doc_id, field_tokens, prefix)
+            else:
+                # 不保存位置：'freqs' 保存词频，'docs' 只记录出现（词频记为 1）
+                for token in dict.fromkeys(field_tokens):
+                    self.index[token][doc_id] = term_counts[token] if option == 'freqs' else 1
+
+        # 出现新词项时，有序词典需要重建
+        if len(self.index) != vocabulary_size:
+            self._term_dictionary = None
+            self._kgram_index = None
+
+        # 统计与倒排项一致（'docs' 字段的词频按 1 计，与 CorpusStats.from_index 相同），
+        # 删除时才能从倒排项中减去同样的数值
+        indexed_counts = term_counts
+        if any(option == 'docs' for _, option, _ in analyzed):
+            indexed_counts = dict(term_counts)
+            for _, option, field_tokens in analyzed:
+                if option == 'docs':
+                    indexed_counts.update(dict.fromkeys(field_tokens, 1))
+        self.stats.add_document(indexed_counts, len(tokens))
+
+        if self._completions is not None:
+            self._completions.touch(term_counts)
+
+        if self._champions:
+            self._offer_champions(doc_id, term_counts)
+
+        if self.store_term_vectors:
+            self._store_term_vector(doc_id, term_counts)
+
+        if self._memory_accountant is not None:
+            self._memory_accountant.note_document(doc_id, tokens)
+
+    def _offer_champions(self, doc_id: str, term_counts: Dict[str, int]):
+        """把新文档提交给已建立的冠军层"""
+        k1, b = self.BM25_K1, self.BM25_B
+        doc_length = self.doc_lengths[doc_id]
+        for term in term_counts:
+            tier = self._champions.get(term)
+            if tier is not None:
+                tf = self._tf(self.index[term][doc_id])
+                tier.offer(doc_id, tf * (k1 + 1) / (tf + k1 * (1 - b + b * doc_length / tier.avgdl)))
+
+    def _store_term_vector(self, doc_id: str, term_counts: Dict[str, int]):
+        """以紧凑数组形式保存文档的词项向量"""
+        vector = []
+        for term, tf in term_counts.items():
+            term_id = self.term_ids.get(term)
+            if term_id is None:
+                term_id = len(self.id_to_term)
+                self.term_ids[term] = term_id
+                self.id_to_term.append(term)
+            vector.append((term_id, tf))
+        vector.sort()
+        self.term_vectors[doc_id] = (array('I', [term_id for term_id, _ in vector]),
+                                     array('I', [tf for _, tf in vector]))
+
+    def delete_document(self, doc_id: str) -> bool:
+        """
+        从索引中删除文档
+
+        代价与文档中不同词项的个数成正比（多字段索引且未保存词项向量时，
+        需要遍历词汇表找出文档的词项）
+
+        Args:
+            doc_id: 文档ID
+
+        Returns:
+            文档是否存在
+        """
+        if self.disk_index is not None:
+            raise ValueError("磁盘索引是只读的，不能删除文档")
+        if self.sqlite_store is not None:
+            deleted, touched = self.sqlite_store.delete_documents([doc_id])
+            self._sqlite_write(touched)
+            existed = deleted > 0
+        else:
+            existed = self._delete_document(doc_id)
+        if existed and self.wal is not None:
+            self.wal.append('delete', doc_id=doc_id)
+        return existed
+
+    def _delete_document(self, doc_id: str) -> bool:
+        """删除文档（不写日志）"""
+        if self.deduplicator is not None:
+            self.deduplicator.unregister(doc_id)
+        was_duplicate = self.duplicate_of.pop(doc_id, None) is not None
+        if doc_id not in self.documents:
+            return was_duplicate
+
+        term_counts = self._document_term_counts(doc_id)
+        # 移除倒排项，保留被移除的值（位置列表用于删除词对，大小用于内存计量）
+        removed = {}
+        vocabulary_changed = False
+        for term in term_counts:
+            postings = self.index.get(term)
+            if postings is None or doc_id not in postings:
+                continue
+            removed[term] = postings.pop(doc_id)
+            if not postings:
+                del self.index[term]
+                vocabulary_changed = True
+        if vocabulary_changed:
+            self._term_dictionary = None
+            self._kgram_index = None
+
+        self.stats.remove_document({term: self._tf(value) for term, value in removed.items()},
+                                   self.doc_lengths[doc_id])
+
+        if self._completions is not None:
+            self._completions.touch(term_counts)
+
+        if self.common_grams is not None:
+            self.common_grams.remove_document(doc_id, removed)
+
+        for term in removed:
+            # 冠军文档被删除时丢弃冠军层（下次排序查询时重建）；删除其他文档只会
+            # 降低冠军层之外的最大 impact，原有上界仍然安全
+            tier = self._champions.get(term)
+            if tier is not None and (term not in self.index or doc_id in tier.doc_ids()):
+                del self._champions[term]
+            # 草图以文档频率判断是否过期，删除后再添加会使其误判，直接丢弃
+            self._sketches.pop(term, None)
+        self._doc_hashes.pop(doc_id, None)
+
+        if self._memory_accountant is not None:
+            self._memory_accountant.forget_document(doc_id, removed)
+
+        del self.documents[doc_id]
+        del self.doc_lengths[doc_id]
+        self.term_vectors.pop(doc_id, None)
+        return True
+
+    def _document_term_counts(self, doc_id: str) -> Dict[str, int]:
+        """文档的 {词项: 词频}，用于找出删除时要移除的倒排项"""
+        if doc_id in self.term_vectors or not self.fields:
+            return self.get_term_vector(doc_id)
+        # 多字段文档的原文已合并保存，无法重新分析，只能从倒排列表中找出其词项；
+        # 'docs' 字段的倒排项不含词频，按 1 计
+        return {term: self._tf(postings[doc_id])
+                for term, postings in self.index.items() if doc_id in postings}
+
+    def get_term_vector(self, doc_id: str) -> Dict[str, int]:
+        """
+        获取文档的词项向量
+
+        未保存词项向量时会重新预处理文档内容
+
+        Args:
+            doc_id: 文档ID
+
+        Returns:
+            {词项: 词频} 字典
+        """
+        vector = self.term_vectors.get(doc_id)
+        if vector is not None:
+            term_ids, tfs = vector
+            return {self.id_to_term[term_id]: tf for term_id, tf in zip(term_ids, tfs)}
+        if doc_id not in self.documents:
+            return {}
+        return dict(Counter(self.preprocess(self.documents[doc_id])))
     
     def build_from_documents(self, documents: Dict[str, str]):
         """
         从文档集合批量构建索引
         
+        打开的 SQLite 数据库在一个事务中写入全部文档
+
         Args:
             documents: {文档ID: 文档内容} 字典
         """
+        if self.sqlite_store is not None and self.wal is None:
+            self._sqlite_write(self.sqlite_store.add_documents(documents.items(), self._analyze_document))
+            return
         for doc_id, content in documents.items():
             self.add_document(doc_id, content)
     
+    def cluster_members(self, doc_id: str) -> List[str]:
+        """
+        返回文档所在近重复簇的全部成员（代表文档在首位）
+
+        Args:
+            doc_id: 文档ID（代表文档或重复文档均可）
+
+        Returns:
+            文档ID列表
+        """
+        representative = self.duplicate_of.get(doc_id, doc_id)
+        members = [dup for dup, original in self.duplicate_of.items() if original == representative]
+        return [representative] + members
+
     def search(self, term: str) -> Dict[str, List[int]]:
         """
         搜索单个词项
@@ -88,16 +465,141 @@ class InvertedIndex:
             term: 搜索词项
             
         Returns:
-            {文档ID: [位置列表]} 字典
+            {文档ID: [位置列表]} 字典（未保存位置的字段为 {文档ID: 词频}）
         """
+        trace = self.tracer and self.tracer.start('term', term)
+
         # 预处理查询词
-        processed_terms = self.preprocess(term)
-        if not processed_terms:
-            return {}
-        
-        term = processed_terms[0]
-        return dict(self.index.get(term, {}))
+        processed_terms = self._query_terms(term)
+        if trace:
+            trace.mark('preprocess')
+
+        result = dict(self._term_postings(processed_terms[0])) if processed_terms else {}
+        if trace:
+            trace.mark('fetch')
+            trace.count('postings_scanned', len(result))
+            self.tracer.finish(trace, len(result))
+        return result
     
+    def _query_terms(self, text: str) -> List[str]:
+        """预处理查询文本；以 '字段名:' 开头时只在该字段中查询（如 'title:oil prices'）"""
+        if self.fields and ':' in text:
+            field, _, rest = text.partition(':')
+            field = field.strip()
+            if field in self.fields:
+                prefix = field + ':'
+                return [prefix + token for token in self.preprocess(rest)]
+        return self.preprocess(text)
+
+    def _require_positions(self, tokens: List[str]):
+        """短语查询需要位置信息，未保存时抛出 PositionsNotIndexedError"""
+        for token in tokens:
+            option = self.field_option(token)
+            if option != 'positions':
+                raise PositionsNotIndexedError(
+                    f"词项 '{token}' 所在字段的索引选项为 '{option}'，未保存位置，无法执行短语查询")
+
+    def _preprocess_terms(self, terms: List[str]) -> List[str]:
+        """预处理查询词列表，返回展平后的词项"""
+        processed_terms = []
+        for term in terms:
+            processed_terms.extend(self._query_terms(term))
+        return processed_terms
+
+    def _is_cjk_char(self, term: str) -> bool:
+        """查询词项是否为单个 CJK 字（可带字段前缀），这样的词项查询时展开"""
+        if not self.cjk_bigrams or term.isascii():
+            return False
+        return is_cjk_char(term) or (bool(self.fields) and term[-2:-1] == ':' and is_cjk_char(term[-1]))
+
+    def expand_cjk_char(self, term: str) -> List[str]:
+        """
+        单个 CJK 字的查询展开
+
+        连续两个以上的 CJK 字只按二元组建立索引，字本身只在单独出现时才是词项。
+        返回该字（若是词项）和所有含该字的二元组：以它开头的二元组是有序词典中
+        的一段前缀范围，以它结尾的二元组扫描 CJK 词项所在的范围得到
+
+        Args:
+            term: 单个 CJK 字，可带字段前缀
+
+        Returns:
+            词项列表
+        """
+        prefix, char = term[:-1], term[-1]
+        dictionary = self.get_term_dictionary()
+        terms = [other for other in dictionary.prefix_terms(term) if len(other) <= len(term) + 1]
+        start = dictionary.lower_bound(prefix + CJK_FIRST)
+        terms.extend(other for other in dictionary.iter_range(start, dictionary.prefix_end(prefix))
+                     if len(other) == len(term) + 1 and other[-1] == char and other[-2] != char)
+        return terms
+
+    def _term_postings(self, term: str, window: Tuple[int, int] = None) -> Dict[str, Union[List[int], int]]:
+        """
+        查询词项的倒排列表；单个 CJK 字合并展开后各词项的倒排列表（见 expand_cjk_char）
+
+        Args:
+            term: 预处理后的查询词项
+            window: 可选的文档序号范围 [lo, hi)，只取磁盘索引中该范围内的部分
+        """
+        if self._is_cjk_char(term):
+            return self._cjk_char_postings(term, window)
+        if window is None:
+            return self.index.get(term, {})
+        return self.disk_index.postings(term, window) if term in self.index else {}
+
+    def _cjk_char_postings(self, term: str, window: Tuple[int, int] = None) -> Dict[str, Union[List[int], int]]:
+        """
+        单个 CJK 字的倒排列表；未保存位置时词频相加
+
+        位置与 preprocess 的编号一致：n 个字的字串占 n-1 个位置，字取以它开头的
+        二元组的位置，字串的最后一个字取它所在二元组的位置
+        """
+        prefix_length = len(term) - 1
+        char = term[-1]
+        positional = self.field_option(term) == 'positions'
+        merged = {}
+        # 字在二元组第二位时的二元组位置
+        seconds = {}
+        for other in self.expand_cjk_char(term):
+            postings = self.index.get(other, {}) if window is None else self.disk_index.postings(other, window)
+            chars = other[prefix_length:]
+            for doc_id, value in postings.items():
+                if not positional:
+                    merged[doc_id] = merged.get(doc_id, 0) + value
+                    continue
+                if chars[0] == char:
+                    merged.setdefault(doc_id, set()).update(value)
+                if len(chars) == 2 and chars[1] == char:
+                    seconds.setdefault(doc_id, set()).update(value)
+        if positional:
+            for doc_id, positions in seconds.items():
+                # 后一个位置上有以该字开头的二元组时，该字已由那个二元组计入
+                starts = merged.setdefault(doc_id, set())
+                starts.update([position for position in positions if position + 1 not in starts])
+            return {doc_id: sorted(positions) for doc_id, positions in merged.items()}
+        if self.field_option(term) == 'docs':
+            return dict.fromkeys(merged, 1)
+        return merged
+
+    def _plan_and(self, processed_terms: List[str]) -> List[Dict[str, List[int]]]:
+        """
+        AND查询计划：按文档频率升序排列倒排列表
+
+        从最短的倒排列表出发逐个过滤，代价取决于最稀有的词项
+        """
+        return sorted((self._term_postings(term) for term in processed_terms), key=len)
+
+    @staticmethod
+    def _iter_and(postings: List[Dict[str, List[int]]]) -> Iterator[str]:
+        """惰性产生同时出现在所有倒排列表中的文档ID（不构建中间集合）"""
+        if not postings:
+            return iter(())
+        matches = iter(postings[0])
+        for other in postings[1:]:
+            matches = filter(other.__contains__, matches)
+        return matches
+
     def search_and(self, terms: List[str]) -> Set[str]:
         """
         AND查询：返回包含所有词项的文档
@@ -110,25 +612,53 @@ class InvertedIndex:
         """
         if not terms:
             return set()
-        
+
+        trace = self.tracer and self.tracer.start('and', terms)
+
         # 预处理所有查询词
-        processed_terms = []
-        for term in terms:
-            tokens = self.preprocess(term)
-            processed_terms.extend(tokens)
-        
-        if not processed_terms:
-            return set()
-        
-        # 获取第一个词项的文档集合
-        result = set(self.index.get(processed_terms[0], {}).keys())
-        
-        # 与其他词项的文档集合求交集
-        for term in processed_terms[1:]:
-            result &= set(self.index.get(term, {}).keys())
-        
+        processed_terms = self._preprocess_terms(terms)
+        if trace:
+            trace.mark('preprocess')
+
+        result = set(self._intersect(processed_terms, trace)) if processed_terms else set()
+        if trace:
+            trace.mark('intersect')
+            self.tracer.finish(trace, len(result))
         return result
-    
+
+    def _intersect(self, processed_terms: List[str], trace=None) -> Iterator[str]:
+        """
+        按AND查询计划惰性求交集，追踪时记录候选文档数
+
+        未配置缓存的磁盘索引按块跳跃求交集，只解码可能含候选文档的块
+        """
+        if (self.disk_index is not None and self.index.cache is None
+                and not any(self._is_cjk_char(term) for term in processed_terms)):
+            disk = self.disk_index
+            skipped = disk.skipped_blocks
+            matches = disk.intersect(processed_terms, self.index.partition)
+            if trace:
+                trace.mark('fetch')
+                trace.count('blocks_skipped', disk.skipped_blocks - skipped)
+            return iter(matches)
+        # 从文档频率最低的词项开始求交集
+        postings = self._plan_and(processed_terms)
+        if trace:
+            trace.mark('fetch')
+            trace.count('candidates', len(postings[0]))
+            trace.count('postings_total', sum(len(docs) for docs in postings))
+        return self._iter_and(postings)
+
+    def _union(self, processed_terms: List[str], trace=None) -> Set[str]:
+        """合并多个词项的倒排列表，追踪时记录扫描的倒排项数"""
+        result = set()
+        for token in processed_terms:
+            postings = self._term_postings(token)
+            result.update(postings)
+            if trace:
+                trace.count('postings_scanned', len(postings))
+        return result
+
     def search_or(self, terms: List[str]) -> Set[str]:
         """
         OR查询：返回包含任一词项的文档
@@ -139,14 +669,17 @@ class InvertedIndex:
         Returns:
             文档ID集合
         """
-        result = set()
+        trace = self.tracer and self.tracer.start('or', terms)
 
         # 预处理所有查询词
-        for term in terms:
-            tokens = self.preprocess(term)
-            for token in tokens:
-                result |= set(self.index.get(token, {}).keys())
+        processed_terms = self._preprocess_terms(terms)
+        if trace:
+            trace.mark('preprocess')
 
+        result = self._union(processed_terms, trace)
+        if trace:
+            trace.mark('union')
+            self.tracer.finish(trace, len(result))
         return result
 
     def search_not(self, include_terms: List[str], exclude_terms: List[str]) -> Set[str]:
@@ -160,18 +693,96 @@ class InvertedIndex:
         Returns:
             文档ID集合
         """
+        trace = self.tracer and self.tracer.start('not', {'include': include_terms, 'exclude': exclude_terms})
+
+        processed_include = self._preprocess_terms(include_terms)
+        processed_exclude = self._preprocess_terms(exclude_terms)
+        if trace:
+            trace.mark('preprocess')
+
         # 获取包含词项的文档
         if include_terms:
-            result = self.search_and(include_terms)
+            result = set(self._intersect(processed_include, trace)) if processed_include else set()
+            if trace:
+                trace.mark('intersect')
         else:
             result = set(self.documents.keys())
 
         # 排除包含排除词项的文档
-        exclude_docs = self.search_or(exclude_terms)
-        result -= exclude_docs
-
+        result -= self._union(processed_exclude, trace)
+        if trace:
+            trace.mark('exclude')
+            self.tracer.finish(trace, len(result))
         return result
 
+    def _iter_phrase(self, tokens: List[str], trace=None) -> Iterator[str]:
+        """
+        惰性产生包含连续词项序列 tokens 的文档ID
+
+        有常用词二元组索引时，被覆盖的相邻词对先把候选文档限制在最小的词对
+        文档集合内（二词短语直接由它回答），再只对候选文档检查位置。
+        追踪时记录候选文档数和首词项的起始位置数（生成器耗尽时记入）
+        """
+        # 如果只有一个词，直接返回
+        if len(tokens) == 1:
+            yield from self._term_postings(tokens[0])
+            return
+
+        # 获取第一个词的文档列表
+        first_postings = self._term_postings(tokens[0])
+        other_postings = [self._term_postings(token) for token in tokens[1:]]
+        candidates = first_postings
+        doc_filters = []
+        if self.common_grams is not None:
+            covered = self.common_grams.plan(tokens)
+            if trace:
+                trace.count('biwords', len(covered or ()))
+            if covered is None:
+                # 被覆盖的词对不在索引中，短语不可能出现
+                return
+            if covered:
+                candidates, doc_filters = covered[0], covered[1:]
+                if len(tokens) == 2:
+                    if trace:
+                        trace.mark('fetch')
+                        trace.count('candidates', len(candidates))
+                    yield from candidates
+                    return
+        if trace:
+            trace.mark('fetch')
+
+        # 对每个候选文档检查短语是否连续出现
+        start_positions = 0
+        for doc_id in candidates:
+            positions = first_postings.get(doc_id)
+            if not positions or (doc_filters and not all(doc_id in docs for docs in doc_filters)):
+                continue
+            if trace:
+                start_positions += len(positions)
+            if self._phrase_at(doc_id, positions, other_postings):
+                yield doc_id
+
+        if trace:
+            trace.count('candidates', len(candidates))
+            trace.count('start_positions', start_positions)
+
+    @staticmethod
+    def _phrase_at(doc_id: str, positions: List[int], other_postings: List[Dict[str, List[int]]]) -> bool:
+        """文档中是否有一个首词项位置，其后各词项依次出现在连续位置"""
+        # 检查每个位置
+        for start_pos in positions:
+            # 检查后续词是否在连续位置出现
+            match = True
+            for i, postings in enumerate(other_postings, 1):
+                expected_pos = start_pos + i
+                if doc_id not in postings or expected_pos not in postings[doc_id]:
+                    match = False
+                    break
+
+            if match:
+                return True
+        return False
+
     def search_phrase(self, phrase: str) -> Set[str]:
         """
         短语查询：返回包含完整短语的文档
@@ -182,43 +793,850 @@ class InvertedIndex:
         Returns:
             文档ID集合
         """
+        trace = self.tracer and self.tracer.start('phrase', phrase)
+
         # 预处理短语
-        tokens = self.preprocess(phrase)
+        tokens = self._query_terms(phrase)
+        self._require_positions(tokens)
+        if trace:
+            trace.mark('preprocess')
+
+        result = set(self._iter_phrase(tokens, trace)) if tokens else set()
+        if trace:
+            trace.mark('positions')
+            self.tracer.finish(trace, len(result))
+        return result
+
+    def search_page(self, query_type: str, query, page_size: int = 20, cursor: str = None,
+                    budget: QueryBudget = None) -> ResultPage:
+        """
+        分页查询：返回一页结果和取下一页的游标
+
+        布尔查询按倒排列表的顺序（内存索引为文档加入顺序，磁盘索引为文档序号）
+        遍历驱动列表，游标记录停下的位置，下一页从该位置继续，不重新计算前面的
+        结果：AND 查询遍历最短的倒排列表，OR 查询依次遍历各词项的倒排列表并跳过
+        前面词项已有的文档，没有包含词的 NOT 查询遍历全部文档。排序查询的第 n 页
+        需要前 n 页的 top-k，每页重新排序。
+
+        Args:
+            query_type: 查询类型，见 PAGE_QUERY_TYPES
+            query: 'and'/'or' 为词项列表，'not' 为 {'include': [...], 'exclude': [...]}，
+                   'phrase'/'ranked' 为查询文本
+            page_size: 每页结果数
+            cursor: 上一页返回的游标，None 表示第一页
+            budget: 可选的查询预算（见 pagination.QueryBudget），用尽时返回部分结果
+
+        Returns:
+            ResultPage；cursor 为 None 时没有更多结果
+
+        Raises:
+            CursorError: 游标不属于该查询，或索引在翻页期间发生了变化
+        """
+        if query_type not in PAGE_QUERY_TYPES:
+            raise ValueError(f"不支持的分页查询类型: {query_type}，可选 {PAGE_QUERY_TYPES}")
+        if page_size <= 0:
+            raise ValueError("page_size 必须为正数")
+        trace = self.tracer and self.tracer.start(query_type + '_page', query)
+        fingerprint = query_fingerprint(query_type, query)
+        state = decode_cursor(cursor, fingerprint) if cursor else None
+        if budget is None:
+            budget = QueryBudget()
+        start_postings = budget.postings
+        if trace:
+            trace.mark('preprocess')
+
+        if query_type == 'ranked':
+            results, state = self._ranked_page(query, page_size, state, budget)
+        else:
+            results, state = self._scan_page(self._page_plan(query_type, query, state), page_size, state, budget)
+        page = ResultPage(results, encode_cursor(fingerprint, state) if state is not None else None,
+                          budget.exhausted, budget.postings - start_postings)
+        if trace:
+            trace.mark('page')
+            trace.count('postings_scanned', page.postings)
+            if page.partial:
+                trace.count('partial')
+            self.tracer.finish(trace, len(results))
+        return page
+
+    def _page_plan(self, query_type: str, query, state: list) -> Tuple[str, list, bool]:
+        """
+        分页布尔查询的遍历计划
+
+        各段在遍历到时才取倒排列表。未配置缓存的磁盘索引按文档序号窗口解码
+        （见 pagination.scan_windows），翻页时从游标处的文档序号续读
+
+        Returns:
+            (驱动词项, [段], 是否按文档序号续读)：段是函数，以续读的文档ID（从头遍历
+            时为 None）调用，返回 (倒排列表或文档表, 接受文档的函数)；依次遍历各段，
+            驱动词项记入游标，索引变化后下一页仍遍历同一个列表
+        """
+        disk = self.disk_index if self.disk_index is not None and self.index.cache is None else None
+
+        def segment(source_term, build):
+            """
+            一段：遍历 source_term 的倒排列表（None 表示全部文档），
+            build(fetch, source) 返回接受文档的函数，fetch 取判断用的倒排列表
+            """
+            def open_segment(resume: str = None):
+                if disk is None:
+                    source = self.documents if source_term is None else self._term_postings(source_term)
+                    return source, build(self._term_postings, source)
+                windows = {}
+
+                def fetch(term):
+                    if term not in windows:
+                        windows[term] = PostingWindow(lambda window: self._term_postings(term, window))
+                    return windows[term]
+
+                source = None if source_term is None else fetch(source_term)
+                accept = build(fetch, source)
+                lo, hi = self.index.partition or (0, len(disk.doc_ids))
+                if resume is not None:
+                    try:
+                        lo = disk.ordinal(resume) + 1
+                    except KeyError:
+                        raise CursorError("游标不属于该索引") from None
+                return scan_windows(disk, source, list(windows.values()), lo, hi), accept
+            return open_segment
+
+        def membership(include, exclude):
+            """接受同时在 include 各列表中、不在 exclude 任一列表中的文档"""
+            def build(fetch, source):
+                required = [fetch(term) for term in include]
+                excluded = [fetch(term) for term in exclude]
+                if not required and not excluded:
+                    return None
+                return lambda doc_id: (all(doc_id in other for other in required)
+                                       and not any(doc_id in other for other in excluded))
+            return build
+
+        if query_type == 'phrase':
+            tokens = self._query_terms(query)
+            self._require_positions(tokens)
+            if not tokens:
+                return None, [], disk is not None
+
+            def build_phrase(fetch, first):
+                others = [fetch(token) for token in tokens[1:]]
+                if not others:
+                    return None
+                return lambda doc_id: self._phrase_at(doc_id, first[doc_id], others)
+            return None, [segment(tokens[0], build_phrase)], disk is not None
+
+        if query_type == 'or':
+            terms = list(dict.fromkeys(self._preprocess_terms(query)))
+            # 跳过前面词项已有的文档
+            return None, [segment(term, membership([], terms[:i])) for i, term in enumerate(terms)], disk is not None
+
+        if query_type == 'not':
+            include = self._preprocess_terms(query['include'])
+            exclude = self._preprocess_terms(query['exclude'])
+            if not query['include']:
+                return None, [segment(None, membership([], exclude))], disk is not None
+        else:
+            include = self._preprocess_terms(query)
+            exclude = []
+        if not include:
+            return None, [], disk is not None
+        # 从文档频率最低的词项开始；翻页时沿用第一页选定的驱动词项
+        driver = state[0] if state else min(include, key=self.stats.df)
+        required = [term for term in include if term != driver]
+        return driver, [segment(driver, membership(required, exclude))], disk is not None
+
+    @staticmethod
+    def _scan_page(plan: Tuple[str, list, bool], page_size: int, state: list,
+                   budget: QueryBudget) -> Tuple[List[str], list]:
+        """
+        从游标状态继续遍历，直到凑满一页、遍历结束或预算用尽
+
+        Returns:
+            (本页文档ID, 游标状态)；游标状态为 [驱动词项, 段号, 段内已遍历数, 最后遍历的文档ID]，
+            遍历结束时为 None
+        """
+        driver, segments, seekable = plan
+        segment, offset, last = state[1:] if state else (0, 0, None)
+        results = []
+        while segment < len(segments):
+            source, accept = segments[segment](last if offset else None)
+            docs = iter(source)
+            if offset and not seekable:
+                # 跳过已遍历的部分；位置上的文档变了说明倒排列表有变化，按文档ID重新定位
+                if next(islice(docs, offset - 1, None), None) != last:
+                    if last not in source:
+                        raise CursorError("索引在翻页期间发生了变化，游标已失效")
+                    docs = iter(source)
+                    offset = next(position for position, doc_id in enumerate(docs, 1) if doc_id == last)
+            for doc_id in docs:
+                if not budget.charge():
+                    return results, [driver, segment, offset, last]
+                offset += 1
+                last = doc_id
+                if accept is None or accept(doc_id):
+                    results.append(doc_id)
+                    if len(results) == page_size:
+                        return results, [driver, segment, offset, last]
+            segment += 1
+            offset = 0
+            last = None
+        return results, None
+
+    def _ranked_page(self, query: str, page_size: int, state: list,
+                     budget: QueryBudget) -> Tuple[List[Tuple[str, float]], list]:
+        """排序查询的一页：计算前 (已返回数 + 本页) 名，多取一名判断是否还有下一页"""
+        offset = state[0] if state else 0
+        ranked = self._rank(Counter(self._query_terms(query)), offset + page_size + 1, budget=budget)
+        results = ranked[offset:offset + page_size]
+        return results, [offset + len(results)] if len(ranked) > offset + page_size else None
+
+    def count_and(self, terms: List[str]) -> int:
+        """
+        计数版AND查询：返回包含所有词项的文档数，不构建结果集合
+
+        Args:
+            terms: 查询词项列表
+
+        Returns:
+            文档数
+        """
+        processed_terms = self._preprocess_terms(terms)
+        if not processed_terms:
+            return 0
+        if (self.disk_index is not None and self.index.cache is None and len(processed_terms) > 1
+                and not any(self._is_cjk_char(term) for term in processed_terms)):
+            return len(self.disk_index.intersect(processed_terms, self.index.partition))
+        postings = self._plan_and(processed_terms)
+        if len(postings) == 1:
+            return len(postings[0])
+        return sum(1 for _ in self._iter_and(postings))
+
+    def count_or(self, terms: List[str]) -> int:
+        """
+        计数版OR查询：返回包含任一词项的文档数，不构建结果集合
+
+        Args:
+            terms: 查询词项列表
+
+        Returns:
+            文档数
+        """
+        # 最长的倒排列表整体计入，其余列表只统计未出现在前面列表中的文档
+        postings = sorted((self._term_postings(term) for term in self._preprocess_terms(terms)),
+                          key=len, reverse=True)
+        if not postings:
+            return 0
+        count = len(postings[0])
+        for i, current in enumerate(postings[1:], 1):
+            matches = iter(current)
+            for earlier in postings[:i]:
+                matches = filterfalse(earlier.__contains__, matches)
+            count += sum(1 for _ in matches)
+        return count
+
+    def count_not(self, include_terms: List[str], exclude_terms: List[str]) -> int:
+        """
+        计数版NOT查询
+
+        Args:
+            include_terms: 必须包含的词项
+            exclude_terms: 必须排除的词项
+
+        Returns:
+            文档数
+        """
+        if not include_terms:
+            return len(self.documents) - self.count_or(exclude_terms)
+
+        processed_terms = self._preprocess_terms(include_terms)
+        if not processed_terms:
+            return 0
+        excluded = [self._term_postings(term) for term in self._preprocess_terms(exclude_terms)]
+        matches = self._iter_and(self._plan_and(processed_terms))
+        for postings in excluded:
+            matches = filterfalse(postings.__contains__, matches)
+        return sum(1 for _ in matches)
+
+    def count_phrase(self, phrase: str) -> int:
+        """
+        计数版短语查询
+
+        Args:
+            phrase: 查询短语
+
+        Returns:
+            文档数
+        """
+        tokens = self._query_terms(phrase)
         if not tokens:
-            return set()
+            return 0
+        self._require_positions(tokens)
+        return sum(1 for _ in self._iter_phrase(tokens))
 
-        # 如果只有一个词，直接返回
-        if len(tokens) == 1:
-            return set(self.index.get(tokens[0], {}).keys())
+    def _term_sketch(self, term: str) -> HyperLogLog:
+        """
+        返回词项倒排列表的 HyperLogLog 草图
 
-        # 获取第一个词的文档列表
-        first_term = tokens[0]
-        candidate_docs = set(self.index.get(first_term, {}).keys())
+        草图按需构建并缓存，文档频率变化后重建
+        """
+        postings = self.index.get(term, {})
+        cached = self._sketches.get(term)
+        if cached is not None and cached[0] == len(postings):
+            return cached[1]
 
-        result = set()
+        sketch = HyperLogLog(self.SKETCH_PRECISION)
+        sketch.update(self._doc_hash(doc_id) for doc_id in postings)
+        self._sketches[term] = (len(postings), sketch)
+        return sketch
 
-        # 对每个候选文档检查短语是否连续出现
-        for doc_id in candidate_docs:
-            # 获取第一个词在文档中的位置
-            positions = self.index[first_term][doc_id]
-
-            # 检查每个位置
-            for start_pos in positions:
-                # 检查后续词是否在连续位置出现
-                match = True
-                for i, token in enumerate(tokens[1:], 1):
-                    expected_pos = start_pos + i
-                    if doc_id not in self.index[token] or \
-                       expected_pos not in self.index[token][doc_id]:
-                        match = False
+    def _doc_hash(self, doc_id: str) -> int:
+        """返回文档ID的 64 位哈希（带缓存）"""
+        value = self._doc_hashes.get(doc_id)
+        if value is None:
+            value = hash64(doc_id)
+            self._doc_hashes[doc_id] = value
+        return value
+
+    def estimate_count(self, terms: List[str], operator: str = 'or') -> int:
+        """
+        近似计数：估计查询命中的文档数
+
+        OR查询合并各词项的 HyperLogLog 草图（逐寄存器取最大值）估计并集大小，
+        代价与倒排列表长度无关；文档频率低于 SKETCH_MIN_DF 的词项直接把文档
+        哈希加入草图。AND查询按词项独立假设估计 N × ∏(df/N)，并以最小文档频率为上界
+
+        Args:
+            terms: 查询词项列表
+            operator: 'or' 或 'and'
+
+        Returns:
+            估计的文档数
+        """
+        processed_terms = self._preprocess_terms(terms)
+        postings = [self._term_postings(term) for term in processed_terms]
+        if not postings:
+            return 0
+
+        if operator == 'and':
+            n = self.stats.num_docs
+            if not n:
+                return 0
+            estimate = float(n)
+            for docs in postings:
+                estimate *= len(docs) / n
+            return int(round(min(estimate, min(len(docs) for docs in postings))))
+
+        if operator != 'or':
+            raise ValueError(f"不支持的运算符: {operator}")
+
+        if len(postings) == 1:
+            return len(postings[0])
+        union = HyperLogLog(self.SKETCH_PRECISION)
+        for term, docs in zip(processed_terms, postings):
+            # 单个 CJK 字的倒排列表由多个词项合并而来，删除文档时无法按词项使其草图失效，不缓存
+            if len(docs) >= self.SKETCH_MIN_DF and not self._is_cjk_char(term):
+                union.merge(self._term_sketch(term))
+            else:
+                union.update(self._doc_hash(doc_id) for doc_id in docs)
+        # 并集不会小于最长的倒排列表
+        return max(len(union), max(len(docs) for docs in postings))
+
+    def _idf(self, term: str) -> float:
+        """BM25 逆文档频率"""
+        df = self.stats.df(term)
+        n = self.stats.num_docs
+        return math.log(1 + (n - df + 0.5) / (df + 0.5))
+
+    def _rank_terms(self, term_weights: Dict[str, float], k: int,
+                    exclude: Set[str] = (), trace=None, budget: QueryBudget = None) -> List[Tuple[str, float]]:
+        """
+        BM25 top-k 排序（逐词项累加，带安全剪枝）
+
+        词项按得分上界从高到低（即从稀有到常见）处理。当剩余词项上界之和
+        已低于当前第 k 名的得分时，新文档不可能进入前 k 名，此后只为已有的
+        候选文档在剩余倒排列表中查找得分，而不再遍历常见词的整个倒排列表
+
+        Args:
+            term_weights: {词项: 查询权重}
+            k: 返回结果数
+            exclude: 不参与排序的文档ID
+            trace: 可选的查询追踪记录
+            budget: 可选的查询预算，按词项检查；用尽时不再处理剩余词项，返回部分得分的排序
+
+        Returns:
+            [(文档ID, 得分)] 列表，按得分降序
+        """
+        if k <= 0 or not self.documents:
+            return []
+
+        k1, b = self.BM25_K1, self.BM25_B
+        avgdl = self.stats.avgdl or 1.0
+        doc_lengths = self.doc_lengths
+
+        # (上界, 词项, idf×权重)，上界为 tf→∞ 时的单词项得分
+        plan = []
+        # 用文档频率判断词项是否存在，磁盘或 SQLite 后端的倒排列表只在下面解码一次
+        for term, weight in term_weights.items():
+            if self.stats.df(term):
+                factor = self._idf(term) * weight
+                plan.append((factor * (k1 + 1), term, factor))
+        # 保存位置时词频为位置列表长度，否则倒排项直接保存词频
+        positional = {term: self.field_option(term) == 'positions' for _, term, _ in plan}
+        plan.sort(reverse=True)
+
+        remaining = sum(bound for bound, _, _ in plan)
+        accumulators = defaultdict(float)
+        threshold = 0.0
+        accepting = True
+
+        for bound, term, factor in plan:
+            # 分区索引中词项可能不在本分区内
+            postings = self.index.get(term, {})
+            if budget is not None and not budget.charge(len(postings) if accepting else len(accumulators)):
+                break
+            remaining -= bound
+            if trace:
+                trace.count('postings_scanned', len(postings) if accepting else len(accumulators))
+            tf_of = len if positional[term] else int
+            if accepting:
+                for doc_id, positions in postings.items():
+                    tf = tf_of(positions)
+                    norm = k1 * (1 - b + b * doc_lengths[doc_id] / avgdl)
+                    accumulators[doc_id] += factor * tf * (k1 + 1) / (tf + norm)
+            else:
+                # 只更新已有候选文档
+                for doc_id in accumulators:
+                    positions = postings.get(doc_id)
+                    if positions:
+                        tf = tf_of(positions)
+                        norm = k1 * (1 - b + b * doc_lengths[doc_id] / avgdl)
+                        accumulators[doc_id] += factor * tf * (k1 + 1) / (tf + norm)
+
+            for doc_id in exclude:
+                accumulators.pop(doc_id, None)
+            if len(accumulators) >= k:
+                threshold = heapq.nlargest(k, accumulators.values())[-1]
+            if accepting and remaining + self.SCORE_EPSILON < threshold:
+                accepting = False
+            if not accepting:
+                # 剔除即使拿到全部剩余得分也无法进入前 k 名的候选
+                bar = threshold - remaining - self.SCORE_EPSILON
+                accumulators = defaultdict(float, {doc_id: score for doc_id, score in accumulators.items()
+                                                   if score >= bar})
+
+        if trace:
+            trace.mark('score')
+            trace.count('accumulators', len(accumulators))
+        return heapq.nlargest(k, accumulators.items(), key=lambda item: (item[1], item[0]))
+
+    def _champion_list(self, term: str, avgdl: float) -> ChampionList:
+        """返回词项的冠军层，按需建立，平均文档长度变化较大时重建"""
+        tier = self._champions.get(term)
+        if tier is None or abs(avgdl / tier.avgdl - 1) > self.CHAMPION_REBUILD_DRIFT:
+            k1, b = self.BM25_K1, self.BM25_B
+            doc_lengths = self.doc_lengths
+            tf_of = len if self.field_option(term) == 'positions' else int
+            impacts = []
+            for doc_id, positions in self.index[term].items():
+                tf = tf_of(positions)
+                impacts.append((tf * (k1 + 1) / (tf + k1 * (1 - b + b * doc_lengths[doc_id] / avgdl)), doc_id))
+            tier = ChampionList.from_impacts(impacts, self.champion_size, avgdl)
+            self._champions[term] = tier
+        return tier
+
+    def _rank_champions(self, term_weights: Dict[str, float], k: int, exclude: Set[str] = (),
+                        trace=None, exact: bool = True) -> List[Tuple[str, float]]:
+        """
+        BM25 top-k 排序，先只给冠军文档打分
+
+        候选文档是各词项冠军层的并集（倒排列表不长于冠军层的词项取全部文档），
+        每个候选按全部查询词项完整打分，第 k 名的得分即为阈值。不在候选中的文档
+        在各词项上的得分都不超过该词项冠军层的上界，于是按上界从高到低逐词项
+        累加（同 _rank_terms）：只要尚未处理的词项上界之和不低于阈值，就扫描该
+        词项的完整倒排列表，否则只为已累加的文档查找得分。结果与完整排序一致，
+        而上界较低的长倒排列表通常无需遍历
+
+        Args:
+            term_weights: {词项: 查询权重}
+            k: 返回结果数
+            exclude: 不参与排序的文档ID
+            trace: 可选的查询追踪记录
+            exact: 为 False 时只给冠军文档打分（近似结果）
+
+        Returns:
+            [(文档ID, 得分)] 列表，按得分降序
+        """
+        k1, b = self.BM25_K1, self.BM25_B
+        avgdl = self.stats.avgdl or 1.0
+        doc_lengths = self.doc_lengths
+
+        plan = []
+        tiers = []
+        candidates = set()
+        for term, weight in term_weights.items():
+            postings = self.index.get(term)
+            if not postings:
+                continue
+            factor = self._idf(term) * weight
+            tf_of = len if self.field_option(term) == 'positions' else int
+            plan.append((factor * (k1 + 1), term, factor, postings, tf_of))
+            if len(postings) <= self.champion_size:
+                candidates.update(postings)
+            else:
+                tier = self._champion_list(term, avgdl)
+                candidates.update(tier.doc_ids())
+                tiers.append((factor * tier.bound(avgdl), term, factor, postings, tf_of))
+        # 与 _rank_terms 相同的词项顺序，保证得分逐位相同
+        plan.sort(key=lambda item: item[:2], reverse=True)
+        if trace:
+            trace.mark('champions')
+            trace.count('champion_candidates', len(candidates))
+
+        scores = {}
+
+        def score_docs(doc_ids):
+            for doc_id in doc_ids:
+                if doc_id in scores or doc_id in exclude:
+                    continue
+                norm = k1 * (1 - b + b * doc_lengths[doc_id] / avgdl)
+                score = 0.0
+                for _, _, factor, postings, tf_of in plan:
+                    positions = postings.get(doc_id)
+                    if positions:
+                        tf = tf_of(positions)
+                        score += factor * tf * (k1 + 1) / (tf + norm)
+                scores[doc_id] = score
+
+        score_docs(candidates)
+        result = heapq.nlargest(k, scores.items(), key=lambda item: (item[1], item[0]))
+
+        if exact and tiers:
+            tiers.sort(key=lambda item: item[:2], reverse=True)
+            # 未处理词项的上界之和（后缀和）
+            rest = [0.0] * (len(tiers) + 1)
+            for i in range(len(tiers) - 1, -1, -1):
+                rest[i] = rest[i + 1] + tiers[i][0]
+            # 候选之外文档的部分得分（只来自有冠军层的词项）
+            accumulators = defaultdict(float)
+            for i, (_, _, factor, postings, tf_of) in enumerate(tiers):
+                # 部分得分是最终得分的下界，与候选得分一起给出第 k 名得分的下界
+                threshold = heapq.nlargest(k, chain(scores.values(), accumulators.values()))[-1] \
+                    if len(scores) + len(accumulators) >= k else 0.0
+                if rest[i] + self.SCORE_EPSILON >= threshold:
+                    if trace:
+                        trace.count('champion_fallback')
+                        trace.count('postings_scanned', len(postings))
+                    for doc_id, positions in postings.items():
+                        if doc_id not in scores and doc_id not in exclude:
+                            tf = tf_of(positions)
+                            norm = k1 * (1 - b + b * doc_lengths[doc_id] / avgdl)
+                            accumulators[doc_id] += factor * tf * (k1 + 1) / (tf + norm)
+                else:
+                    if not accumulators:
                         break
+                    for doc_id in accumulators:
+                        positions = postings.get(doc_id)
+                        if positions:
+                            tf = tf_of(positions)
+                            norm = k1 * (1 - b + b * doc_lengths[doc_id] / avgdl)
+                            accumulators[doc_id] += factor * tf * (k1 + 1) / (tf + norm)
+                    # 剔除即使拿到全部剩余得分也无法进入前 k 名的文档
+                    bar = threshold - rest[i + 1] - self.SCORE_EPSILON
+                    accumulators = defaultdict(float, {doc_id: score for doc_id, score in accumulators.items()
+                                                       if score >= bar})
+            # 按与 _rank_terms 相同的词项顺序重新打分，保证得分逐位相同
+            score_docs(accumulators)
+            result = heapq.nlargest(k, scores.items(), key=lambda item: (item[1], item[0]))
 
-                if match:
-                    result.add(doc_id)
-                    break
+        if trace:
+            trace.mark('score')
+            trace.count('accumulators', len(scores))
+        return result
 
+    def _rank(self, term_weights: Dict[str, float], k: int, exclude: Set[str] = (),
+              trace=None, champions: str = 'safe', budget: QueryBudget = None) -> List[Tuple[str, float]]:
+        """
+        BM25 top-k 排序：设置了冠军列表时先给冠军文档打分，只在必要时扫描完整倒排列表
+
+        有查询预算时逐词项累加（见 _rank_terms），不使用冠军列表
+        """
+        if champions not in CHAMPION_MODES:
+            raise ValueError(f"不支持的冠军列表模式: {champions}，可选 {CHAMPION_MODES}")
+        if any(self._is_cjk_char(term) for term in term_weights):
+            # 单个 CJK 字展开为含该字的词项，各自沿用该字的查询权重
+            expanded = Counter()
+            for term, weight in term_weights.items():
+                for other in (self.expand_cjk_char(term) if self._is_cjk_char(term) else [term]):
+                    expanded[other] += weight
+            term_weights = expanded
+        if self.champion_size and champions != 'off' and k > 0 and self.documents and budget is None:
+            return self._rank_champions(term_weights, k, exclude, trace, exact=champions == 'safe')
+        return self._rank_terms(term_weights, k, exclude, trace, budget)
+
+    def search_ranked(self, query: str, k: int = 10, champions: str = 'safe') -> List[Tuple[str, float]]:
+        """
+        排序查询：按 BM25 得分返回前 k 个文档
+
+        Args:
+            query: 查询文本
+            k: 返回结果数
+            champions: 设置了 champion_size 时使用冠军列表的方式，见 CHAMPION_MODES
+
+        Returns:
+            [(文档ID, 得分)] 列表，按得分降序
+        """
+        trace = self.tracer and self.tracer.start('ranked', query)
+        term_weights = Counter(self._query_terms(query))
+        if trace:
+            trace.mark('preprocess')
+
+        result = self._rank(term_weights, k, trace=trace, champions=champions)
+        if trace:
+            trace.mark('select')
+            self.tracer.finish(trace, len(result))
         return result
 
+    def more_like_this(self, doc_id: str, k: int = 10, max_query_terms: int = 25,
+                       min_doc_freq: int = 2) -> List[Tuple[str, float]]:
+        """
+        相似文档查询：返回与指定文档最相似的 k 个文档
+
+        从文档的词项向量中按 TF-IDF 选出权重最高的词项，
+        以其 TF-IDF 权重作为查询权重执行剪枝的 top-k 排序查询
+
+        Args:
+            doc_id: 参照文档ID
+            k: 返回结果数
+            max_query_terms: 最多使用的查询词项数
+            min_doc_freq: 词项至少出现在多少个文档中才被选用
+
+        Returns:
+            [(文档ID, 得分)] 列表，不含参照文档本身
+        """
+        vector = self.get_term_vector(doc_id)
+        n = self.stats.num_docs
+        weighted = []
+        for term, tf in vector.items():
+            df = self.stats.df(term)
+            if df >= min_doc_freq:
+                weighted.append((tf * math.log(n / df), term))
+        top_terms = heapq.nlargest(max_query_terms, weighted)
+        term_weights = {term: weight for weight, term in top_terms if weight > 0}
+        return self._rank(term_weights, k, exclude={doc_id})
+
+    def build_common_grams(self, num_common: int = 50, common_words: Iterable[str] = None):
+        """
+        为已建好的索引开启常用词二元组索引，之后加入的文档增量维护
+
+        Args:
+            num_common: 未指定 common_words 时，取文档频率最高的 num_common 个词
+            common_words: 常用词集合（不带字段前缀）
+        """
+        if common_words is None:
+            common_words = {term[term.rfind(':') + 1:] for term, _ in self.stats.top_terms(num_common)}
+        self.common_grams = CommonGramsIndex.from_postings(self.index, common_words)
+
+    def build_autocomplete(self, k: int = 10, popularity: Dict[str, int] = None):
+        """
+        建立查询词补全索引，之后加入或删除的文档增量更新（见 autocomplete.py）
+
+        Args:
+            k: 每个前缀缓存的补全数
+            popularity: 可选的 {词项: 查询次数}（如由查询日志统计），补全先按查询次数、
+                        再按文档频率排序；默认只按文档频率
+        """
+        # 语料统计可能被替换（载入其他索引时），每次通过 self.stats 读取
+        self._completions = CompletionIndex(lambda: self.stats.doc_freqs(), lambda term: self.stats.df(term),
+                                            k, popularity)
+
+    def complete(self, prefix: str, k: int = 10) -> List[str]:
+        """
+        查询词补全：返回以 prefix 开头的词项，按文档频率（或查询热度）降序
+
+        首次调用时按文档频率建立补全索引
+        """
+        if self._completions is None:
+            self.build_autocomplete(max(k, 10))
+        return self._completions.complete(prefix.lower(), k)
+
+    def get_term_dictionary(self) -> SortedTermDictionary:
+        """返回当前词汇表的有序词典（词汇表变化后按需重建）"""
+        if self._term_dictionary is None:
+            # 以文档频率判断词项是否仍有倒排项，不必取出倒排列表（磁盘索引上取出即需解码）
+            self._term_dictionary = SortedTermDictionary(
+                term for term in self.index if self.stats.df(term))
+        return self._term_dictionary
+
+    def _get_kgram_index(self) -> KGramIndex:
+        """返回 k-gram 索引（首次中缀/后缀查询时构建）"""
+        if self._kgram_index is None:
+            self._kgram_index = KGramIndex(self.get_term_dictionary(), k=self.kgram_size)
+        return self._kgram_index
+
+    def expand_wildcard(self, pattern: str, max_expansions: int = None) -> List[str]:
+        """
+        展开通配符模式，返回匹配的词项
+
+        以字面前缀开头的模式（如 'petro*'）通过有序词典做 O(log n) 前缀范围查找；
+        以通配符开头的模式（如 '*port*'）通过 k-gram 索引筛选候选词项。
+        匹配词项过多时按文档频率保留前 max_expansions 个
+
+        Args:
+            pattern: 通配符模式，支持 '*' 和 '?'
+            max_expansions: 最多展开的词项数，默认 DEFAULT_MAX_EXPANSIONS
+
+        Returns:
+            匹配的词项列表（按文档频率降序）
+        """
+        if max_expansions is None:
+            max_expansions = self.DEFAULT_MAX_EXPANSIONS
+
+        pattern = pattern.strip().lower()
+        if not pattern:
+            return []
+
+        regex = wildcard_to_regex(pattern)
+        prefix = literal_prefix(pattern)
+        term_dictionary = self.get_term_dictionary()
+
+        if prefix == pattern:
+            # 没有通配符，退化为精确匹配
+            candidates = [pattern] if pattern in term_dictionary else []
+        elif prefix:
+            candidates = term_dictionary.prefix_terms(prefix)
+        else:
+            candidates = self._get_kgram_index().candidates(pattern) if self.kgram_size else None
+            if candidates is None:
+                # 没有可用的固定片段，只能扫描整个词典
+                candidates = term_dictionary
+
+        matches = [term for term in candidates if regex.match(term)]
+        if len(matches) > max_expansions:
+            matches = heapq.nlargest(max_expansions, matches, key=self.stats.df)
+        else:
+            matches.sort(key=self.stats.df, reverse=True)
+        return matches
+
+    def search_wildcard(self, pattern: str, max_expansions: int = None) -> Set[str]:
+        """
+        通配符查询：展开模式后对所有匹配词项做OR查询
+
+        Args:
+            pattern: 通配符模式，如 'petro*'、'*port*'
+            max_expansions: 最多展开的词项数
+
+        Returns:
+            文档ID集合
+        """
+        trace = self.tracer and self.tracer.start('wildcard', pattern)
+        terms = self.expand_wildcard(pattern, max_expansions)
+        if trace:
+            trace.mark('expand')
+            trace.count('expansions', len(terms))
+
+        # 展开结果都是词典中的词项，无需再预处理
+        result = self._union(terms, trace)
+        if trace:
+            trace.mark('union')
+            self.tracer.finish(trace, len(result))
+        return result
+
+    def expand_fuzzy(self, term: str, max_edits: int = 1,
+                     max_expansions: int = None) -> List[str]:
+        """
+        模糊展开：返回与 term 编辑距离不超过 max_edits 的词项
+
+        Args:
+            term: 查询词
+            max_edits: 最大编辑距离（0-2）
+            max_expansions: 最多展开的词项数，默认 DEFAULT_MAX_EXPANSIONS
+
+        Returns:
+            词项列表，按（编辑距离，文档频率降序）排列
+        """
+        if max_expansions is None:
+            max_expansions = self.DEFAULT_MAX_EXPANSIONS
+
+        term = term.strip().lower()
+        if not term:
+            return []
+
+        matches = fuzzy_terms(self.get_term_dictionary(), term, max_edits)
+        matches.sort(key=lambda item: (item[1], -self.stats.df(item[0])))
+        return [match for match, _ in matches[:max_expansions]]
+
+    def search_fuzzy(self, term: str, max_edits: int = 1,
+                     max_expansions: int = None) -> Set[str]:
+        """
+        模糊查询：对编辑距离范围内的全部词项做OR查询
+
+        Args:
+            term: 查询词
+            max_edits: 最大编辑距离（0-2）
+            max_expansions: 最多展开的词项数
+
+        Returns:
+            文档ID集合
+        """
+        trace = self.tracer and self.tracer.start('fuzzy', term)
+        terms = self.expand_fuzzy(term, max_edits, max_expansions)
+        if trace:
+            trace.mark('expand')
+            trace.count('expansions', len(terms))
+
+        result = self._union(terms, trace)
+        if trace:
+            trace.mark('union')
+            self.tracer.finish(trace, len(result))
+        return result
+
+    def suggest_terms(self, term: str, limit: int = 5, max_edits: int = 2) -> List[str]:
+        """
+        拼写建议：返回与 term 相近的词项（不含 term 本身）
+
+        候选按编辑距离升序、文档频率降序排列
+
+        Args:
+            term: 可能拼错的词
+            limit: 最多返回的建议数
+            max_edits: 最大编辑距离
+
+        Returns:
+            建议词项列表
+        """
+        term = term.strip().lower()
+        suggestions = []
+        # 候选按编辑距离排序，距离更小的候选已足够时无需展开更大的距离
+        for edits in range(1, max_edits + 1):
+            candidates = self.expand_fuzzy(term, edits, max_expansions=limit + 1)
+            suggestions = [candidate for candidate in candidates if candidate != term]
+            if len(suggestions) >= limit:
+                break
+        return suggestions[:limit]
+
+    def did_you_mean(self, query: str) -> str:
+        """
+        "您是不是要找"：逐词纠正查询中不在词汇表里的词
+
+        Args:
+            query: 原始查询文本
+
+        Returns:
+            纠正后的查询；无需纠正或找不到建议时返回 None
+        """
+        corrected = []
+        changed = False
+        for word in query.lower().split():
+            tokens = self.preprocess(word)
+            # CJK 词被切成二元组，逐个二元组纠错没有意义
+            if tokens and not self.index.get(tokens[0]) and not has_cjk(word):
+                suggestions = self.suggest_terms(tokens[0], limit=1)
+                if suggestions:
+                    corrected.append(suggestions[0])
+                    changed = True
+                    continue
+            corrected.append(word)
+        return ' '.join(corrected) if changed else None
+
     def get_term_frequency(self, term: str, doc_id: str) -> int:
         """
         获取词项在文档中的频率
@@ -230,12 +1648,12 @@ class InvertedIndex:
         Returns:
             词频
         """
-        processed_terms = self.preprocess(term)
+        processed_terms = self._query_terms(term)
         if not processed_terms:
             return 0
 
         term = processed_terms[0]
-        return len(self.index.get(term, {}).get(doc_id, []))
+        return self._tf(self.index.get(term, {}).get(doc_id, []))
 
     def get_document_frequency(self, term: str) -> int:
         """
@@ -247,12 +1665,12 @@ class InvertedIndex:
         Returns:
             文档频率
         """
-        processed_terms = self.preprocess(term)
+        processed_terms = self._query_terms(term)
         if not processed_terms:
             return 0
 
         term = processed_terms[0]
-        return len(self.index.get(term, {}))
+        return len(self._term_postings(term))
 
     def display_index(self):
         """显示倒排索引结构"""
@@ -271,8 +1689,10 @@ class InvertedIndex:
             # 显示每个文档的信息
             for doc_id in sorted(postings.keys()):
                 positions = postings[doc_id]
-                freq = len(positions)
-                print(f"  └─ 文档 {doc_id}: 词频={freq}, 位置={positions}")
+                if isinstance(positions, int):
+                    print(f"  └─ 文档 {doc_id}: 词频={positions}")
+                else:
+                    print(f"  └─ 文档 {doc_id}: 词频={len(positions)}, 位置={positions}")
 
     def display_statistics(self):
         """显示索引统计信息"""
@@ -281,28 +1701,126 @@ class InvertedIndex:
         print("="*80)
         print(f"文档总数: {len(self.documents)}")
         print(f"词项总数: {len(self.index)}")
-        print(f"平均文档长度: {sum(self.doc_lengths.values()) / len(self.doc_lengths) if self.doc_lengths else 0:.2f}")
+        print(f"平均文档长度: {self.stats.avgdl:.2f}")
 
         # 最常见的词项
-        term_doc_counts = [(term, len(postings)) for term, postings in self.index.items()]
-        term_doc_counts.sort(key=lambda x: x[1], reverse=True)
-
         print("\n最常见的词项 (按文档频率):")
-        for term, count in term_doc_counts[:10]:
+        for term, count in self.stats.top_terms(10):
             print(f"  {term}: {count} 个文档")
 
+    def memory_report(self, top_n: int = 10) -> Dict:
+        """
+        内存占用报告：按组件估计索引各部分占用的字节数
+
+        首次调用时完整遍历索引，之后 add_document 增量更新各组件的合计值
+
+        Args:
+            top_n: 列出占用最大的词项数
+
+        Returns:
+            {'total_bytes', 'components': {组件: 字节数}, 'num_terms', 'num_postings',
+             'bytes_per_term', 'bytes_per_posting', 'heaviest_terms': [(词项, 字节数)]}
+        """
+        if self._memory_accountant is None:
+            self._memory_accountant = MemoryAccountant(self)
+        return self._memory_accountant.report(top_n)
+
+    def display_memory_report(self, top_n: int = 10):
+        """显示内存占用报告"""
+        report = self.memory_report(top_n)
+        print("\n" + "="*80)
+        print("内存占用")
+        print("="*80)
+        for component, size in sorted(report['components'].items(), key=lambda item: -item[1]):
+            print(f"  {component:<20} {format_bytes(size):>12}")
+        print(f"  {'合计':<18} {format_bytes(report['total_bytes']):>12}")
+        print(f"\n每个词项: {report['bytes_per_term']:.1f} B，每个倒排项: {report['bytes_per_posting']:.1f} B")
+        print(f"\n占用最大的词项:")
+        for term, size in report['heaviest_terms']:
+            print(f"  {term}: {format_bytes(size)}")
+
     def save_to_file(self, filename: str):
         """保存索引到文件"""
+        self._write_snapshot(filename, indent=2)
+        print(f"\n索引已保存到: {filename}")
+
+    def _write_snapshot(self, filename: str, indent: int = None, **extra):
+        """把完整索引写成 JSON 文件（先写临时文件再改名，写到一半崩溃时原文件保持完整）"""
         data = {
             'index': {term: dict(postings) for term, postings in self.index.items()},
             'documents': self.documents,
-            'doc_lengths': self.doc_lengths
+            'doc_lengths': self.doc_lengths,
+            'duplicate_of': self.duplicate_of,
+            'index_options': self.index_options,
+            'fields': self.fields,
+            'champion_size': self.champion_size
         }
+        if self.common_grams is not None:
+            # 词对由位置列表重建，不写入文件
+            data['common_words'] = sorted(self.common_grams.common_words)
+        if self.deduplicator is not None:
+            # 近重复检测的签名，恢复后仍能识别检查点之前文档的重复
+            data['dedup_signatures'] = self.deduplicator.signatures()
+        if self.store_term_vectors:
+            data['id_to_term'] = self.id_to_term
+            data['term_vectors'] = {doc_id: [list(term_ids), list(tfs)]
+                                    for doc_id, (term_ids, tfs) in self.term_vectors.items()}
 
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        data.update(extra)
+        atomic_write(filename, json.dumps(data, ensure_ascii=False, indent=indent).encode('utf-8'))
 
-        print(f"\n索引已保存到: {filename}")
+    def checkpoint(self, filename: str) -> int:
+        """
+        写检查点：原子地保存完整索引，再清空预写日志
+
+        检查点记录其包含的最后一个日志序号，改名完成之前崩溃时旧检查点和完整的
+        日志仍在；之后崩溃时重放会跳过已包含在检查点中的记录
+
+        Args:
+            filename: 检查点文件路径
+
+        Returns:
+            检查点包含的最后一个日志序号
+        """
+        if self.wal is None:
+            raise ValueError("未配置预写日志")
+        self.wal.sync()
+        lsn = self.wal.last_lsn
+        self._write_snapshot(filename, wal_lsn=lsn)
+        self.wal.reset(lsn)
+        self.wal_lsn = lsn
+        return lsn
+
+    def recover(self, filename: str) -> int:
+        """
+        崩溃恢复：加载检查点（文件不存在时从空索引开始），再重放预写日志中
+        检查点之后的操作
+
+        Args:
+            filename: 检查点文件路径
+
+        Returns:
+            重放的操作数
+        """
+        if self.wal is None:
+            raise ValueError("未配置预写日志")
+        if os.path.exists(filename):
+            self.load_from_file(filename)
+        # 重放时不再写日志
+        wal, self.wal = self.wal, None
+        replayed = 0
+        try:
+            for record in wal.records(self.wal_lsn):
+                if record['op'] == 'add':
+                    self._add_document(record['doc_id'], record['content'])
+                elif record['op'] == 'delete':
+                    self._delete_document(record['doc_id'])
+                else:
+                    raise ValueError(f"未知的日志操作: {record['op']}")
+                replayed += 1
+        finally:
+            self.wal = wal
+        return replayed
 
     def load_from_file(self, filename: str):
         """从文件加载索引"""
@@ -316,6 +1834,133 @@ class InvertedIndex:
 
         self.documents = data['documents']
         self.doc_lengths = data['doc_lengths']
+        self.duplicate_of = data.get('duplicate_of', {})
+        self.index_options = data.get('index_options', 'positions')
+        self.fields = data.get('fields', {})
+        self.champion_size = data.get('champion_size', 0)
+        self._champions = {}
+        self.wal_lsn = data.get('wal_lsn', 0)
+        if 'term_vectors' in data:
+            self.store_term_vectors = True
+            self.id_to_term = data['id_to_term']
+            self.term_ids = {term: term_id for term_id, term in enumerate(self.id_to_term)}
+            self.term_vectors = {doc_id: (array('I', term_ids), array('I', tfs))
+                                 for doc_id, (term_ids, tfs) in data['term_vectors'].items()}
+        self.stats = CorpusStats.from_index(self.index, self.doc_lengths)
+        self.common_grams = None
+        if data.get('common_words'):
+            self.build_common_grams(common_words=data['common_words'])
+        if self.deduplicator is not None:
+            self.deduplicator.restore(data.get('dedup_signatures', {}))
+        self._term_dictionary = None
+        self._kgram_index = None
+        if self._completions is not None:
+            self._completions.invalidate()
+        self._memory_accountant = None
 
         print(f"\n索引已从文件加载: {filename}")
 
+    def save_disk_index(self, path: str) -> int:
+        """
+        保存为磁盘索引（见 disk_index.py）
+
+        Args:
+            path: 索引文件路径
+
+        Returns:
+            文件字节数
+        """
+        return write_disk_index(self, path)
+
+    def load_disk_index(self, source: Union[str, DiskIndex], cache=None, partition: Tuple[int, int] = None):
+        """
+        打开磁盘索引，此后查询按需从文件解码倒排列表，索引变为只读
+
+        Args:
+            source: 索引文件路径，或已打开的 DiskIndex（如映射到共享内存的快照）
+            cache: 可选的 PostingCache，缓存解码后的倒排列表
+            partition: 可选的文档序号范围 [lo, hi)：查询只返回该范围内的文档，
+                       语料统计仍取整个索引，因此各范围的 BM25 得分与不分区时
+                       相同（见 query_workers.py 的查询内并行）
+        """
+        disk = source if isinstance(source, DiskIndex) else DiskIndex(source)
+        self.disk_index = disk
+        documents = disk.documents
+        if partition is not None and isinstance(documents, DiskDocuments):
+            documents = DiskDocuments(disk, partition)
+        self._attach_storage(DiskPostings(disk, cache, partition), documents, disk.doc_lengths,
+                             DiskCorpusStats(disk), disk.index_options, disk.fields)
+
+    def save_sqlite(self, path: str) -> int:
+        """
+        把内存中的索引写入 SQLite 数据库（见 sqlite_store.py），替换其原有内容
+
+        Args:
+            path: 数据库文件路径
+
+        Returns:
+            文件字节数
+        """
+        # sqlite3 只在使用 SQLite 存储时导入，不拖慢其他用法的启动
+        from sqlite_store import SqliteStore
+
+        store = SqliteStore(path, self.index_options, self.fields)
+        try:
+            store.replace_with(self)
+        finally:
+            store.close()
+        return store.size_bytes()
+
+    def open_sqlite(self, path: str, cache=None):
+        """
+        打开（或创建）SQLite 数据库，此后查询按需读取倒排列表，添加和删除文档
+        以事务增量写入数据库，不再需要 save_to_file
+
+        新建数据库时使用本索引的索引选项和字段选项
+
+        Args:
+            path: 数据库文件路径
+            cache: 可选的 PostingCache，缓存解码后的倒排列表（写入时失效相应词项）
+        """
+        from sqlite_store import SqliteStore, SqliteCorpusStats
+
+        store = SqliteStore(path, self.index_options, self.fields)
+        self.sqlite_store = store
+        self._attach_storage(DiskPostings(store, cache), store.documents, store.doc_lengths,
+                             SqliteCorpusStats(store), store.index_options, store.fields)
+
+    def _sqlite_write(self, touched: Set[str]):
+        """数据库写入后：缓存中变化的倒排列表失效，有序词典需要重建，补全索引更新相应词项"""
+        cache = self.index.cache
+        if cache is not None:
+            for term in touched:
+                cache.discard(term)
+        if self._completions is not None:
+            self._completions.touch(touched)
+        if touched:
+            self._term_dictionary = None
+            self._kgram_index = None
+
+    def _attach_storage(self, postings: Mapping, documents: Mapping, doc_lengths: Dict[str, int],
+                        stats, index_options: str, fields: Dict[str, str]):
+        """改用外部存储（磁盘索引或数据库）提供倒排列表、文档和语料统计，清空内存中的辅助结构"""
+        self.index = postings
+        self.documents = documents
+        self.doc_lengths = doc_lengths
+        self.duplicate_of = {}
+        self.index_options = index_options
+        self.fields = fields
+        self.stats = stats
+        self.store_term_vectors = False
+        self.term_vectors = {}
+        self.term_ids = {}
+        self.id_to_term = []
+        self.common_grams = None
+        self._champions = {}
+        self._sketches = {}
+        self._term_dictionary = None
+        self._kgram_index = None
+        if self._completions is not None:
+            self._completions.invalidate()
+        self._memory_accountant = None
+
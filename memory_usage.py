@@ -0,0 +1,247 @@
+"""
+内存占用估计
+用 sys.getsizeof 递归估计对象图的字节数（共享对象只计一次），
+并按组件（词典、倒排容器、位置列表、文档存储……）增量统计倒排索引的内存占用
+"""
+
+import sys
+import heapq
+from array import array
+from typing import Dict, List, Tuple
+
+_getsizeof = sys.getsizeof
+
+# CPython 缓存的小整数不单独占用内存
+_SMALL_INT_MAX = 256
+
+
+def deep_sizeof(obj, seen: set = None) -> int:
+    """
+    估计对象及其引用的全部对象占用的字节数
+
+    Args:
+        obj: 待估计的对象
+        seen: 已计入的对象 id 集合，在多次调用间传递以避免重复计数
+
+    Returns:
+        字节数
+    """
+    if seen is None:
+        seen = set()
+    total = 0
+    stack = [obj]
+    while stack:
+        current = stack.pop()
+        if id(current) in seen:
+            continue
+        seen.add(id(current))
+        if isinstance(current, int) and -5 <= current <= _SMALL_INT_MAX:
+            continue
+        total += _getsizeof(current)
+
+        if isinstance(current, (str, bytes, bytearray, int, float, array)):
+            continue
+        if isinstance(current, dict):
+            stack.extend(current.keys())
+            stack.extend(current.values())
+        elif isinstance(current, (list, tuple, set, frozenset)):
+            stack.extend(current)
+        else:
+            attributes = getattr(current, '__dict__', None)
+            if attributes is not None:
+                stack.append(attributes)
+            for slot in getattr(type(current), '__slots__', ()):
+                if hasattr(current, slot):
+                    stack.append(getattr(current, slot))
+    return total
+
+
+def postings_size(postings: Dict[str, List[int]]) -> Tuple[int, int]:
+    """
+    估计一个词项倒排列表的字节数
+
+    文档ID与文档存储共享，不计入
+
+    Args:
+        postings: {文档ID: [位置列表] 或 词频}
+
+    Returns:
+        (倒排容器字节数, 位置列表（或词频）字节数)
+    """
+    position_bytes = 0
+    for positions in postings.values():
+        position_bytes += _value_size(positions)
+    return _getsizeof(postings), position_bytes
+
+
+def _value_size(value) -> int:
+    """一个倒排项值的字节数：位置列表（含大整数），或不保存位置时的词频"""
+    if value.__class__ is int:
+        return _getsizeof(value) if value > _SMALL_INT_MAX else 0
+    size = _getsizeof(value)
+    if value and value[-1] > _SMALL_INT_MAX:
+        size += sum(_getsizeof(p) for p in value if p > _SMALL_INT_MAX)
+    return size
+
+
+class MemoryAccountant:
+    """
+    倒排索引内存计量器
+
+    创建时遍历整个索引，缓存每个词项的字节数和各组件的合计值；此后索引
+    通过 note_document / forget_document 报告加入和删除的文档，计量器只测量
+    该文档的位置列表并更新合计值，代价与文档长度成正比，生成报告时无需再遍历
+    倒排列表
+    """
+
+    def __init__(self, index):
+        """
+        初始化并完整计量一次索引
+
+        Args:
+            index: InvertedIndex 实例
+        """
+        self.index = index
+        # {词项: (词项字符串字节数, 倒排容器字节数, 位置列表字节数, 文档频率)}
+        self.term_sizes: Dict[str, Tuple[int, int, int, int]] = {}
+        self.totals = {'term_dictionary': 0, 'posting_containers': 0, 'position_lists': 0,
+                       'documents': 0, 'doc_lengths': 0, 'term_vectors': 0}
+        self.postings = 0
+        # 按对象身份缓存的辅助结构大小：{组件名: (对象 id, 字节数)}
+        self._cached_structures = {}
+
+        for term, postings in index.index.items():
+            container_bytes, position_bytes = postings_size(postings)
+            self._set_term(term, (_getsizeof(term), container_bytes, position_bytes, len(postings)))
+        for doc_id in index.documents:
+            self._measure_document(doc_id)
+
+    def _set_term(self, term: str, sizes: Tuple[int, int, int, int]):
+        """更新词项的缓存大小，并把差值计入合计值"""
+        old = self.term_sizes.get(term, (0, 0, 0, 0))
+        self.term_sizes[term] = sizes
+        self.totals['term_dictionary'] += sizes[0] - old[0]
+        self.totals['posting_containers'] += sizes[1] - old[1]
+        self.totals['position_lists'] += sizes[2] - old[2]
+        self.postings += sizes[3] - old[3]
+
+    def note_document(self, doc_id: str, tokens: List[str]):
+        """
+        计入新加入文档的开销
+
+        文档只会在各词项的倒排列表中新增一个位置列表，因此只需测量这些
+        位置列表，并重新读取倒排容器（哈希表）的大小
+
+        Args:
+            doc_id: 文档ID
+            tokens: 文档的词项序列
+        """
+        index = self.index.index
+        term_sizes = self.term_sizes
+        for term in set(tokens):
+            postings = index[term]
+            position_bytes = _value_size(postings[doc_id])
+            old = term_sizes.get(term)
+            if old is None:
+                self._set_term(term, (_getsizeof(term), _getsizeof(postings), position_bytes, 1))
+            else:
+                self._set_term(term, (old[0], _getsizeof(postings), old[2] + position_bytes, old[3] + 1))
+        self._measure_document(doc_id)
+
+    def forget_document(self, doc_id: str, removed: Dict[str, object]):
+        """
+        扣除被删除文档的开销（在倒排项移除之后、文档存储移除之前调用）
+
+        Args:
+            doc_id: 文档ID
+            removed: 从各词项倒排列表中移除的 {词项: 位置列表或词频}
+        """
+        index = self.index.index
+        for term, value in removed.items():
+            old = self.term_sizes.get(term)
+            if old is None:
+                continue
+            postings = index.get(term)
+            if postings is None:
+                self._set_term(term, (0, 0, 0, 0))
+                del self.term_sizes[term]
+            else:
+                self._set_term(term, (old[0], _getsizeof(postings), old[2] - _value_size(value), old[3] - 1))
+        self._measure_document(doc_id, sign=-1)
+
+    def _measure_document(self, doc_id: str, sign: int = 1):
+        """测量一个文档的存储开销（文档ID、原文、长度和词项向量），sign 为 -1 时扣除"""
+        index = self.index
+        content = index.documents.get(doc_id)
+        if content is None:
+            return
+        self.totals['documents'] += sign * (_getsizeof(doc_id) + _getsizeof(content))
+        length = index.doc_lengths.get(doc_id, 0)
+        if length > _SMALL_INT_MAX:
+            self.totals['doc_lengths'] += sign * _getsizeof(length)
+        vector = index.term_vectors.get(doc_id)
+        if vector is not None:
+            self.totals['term_vectors'] += sign * (_getsizeof(vector) + _getsizeof(vector[0]) + _getsizeof(vector[1]))
+
+    def _structure_size(self, name: str, obj) -> int:
+        """辅助结构的深度大小，对象未被替换时复用上次结果"""
+        if obj is None:
+            return 0
+        cached = self._cached_structures.get(name)
+        if cached is not None and cached[0] == id(obj):
+            return cached[1]
+        size = deep_sizeof(obj)
+        self._cached_structures[name] = (id(obj), size)
+        return size
+
+    def report(self, top_n: int = 10) -> Dict:
+        """
+        生成内存报告
+
+        Args:
+            top_n: 列出占用最大的词项数
+
+        Returns:
+            报告字典，见 InvertedIndex.memory_report
+        """
+        index = self.index
+        components = dict(self.totals)
+        # 容器本身（哈希表）的大小
+        components['term_dictionary'] += _getsizeof(index.index)
+        components['documents'] += _getsizeof(index.documents)
+        components['doc_lengths'] += _getsizeof(index.doc_lengths)
+        if index.term_vectors:
+            components['term_vectors'] += (_getsizeof(index.term_vectors) + _getsizeof(index.term_ids)
+                                           + _getsizeof(index.id_to_term))
+        components['duplicate_of'] = _getsizeof(index.duplicate_of)
+        components['caches'] = (self._structure_size('sorted_dictionary', index._term_dictionary)
+                                + self._structure_size('kgram_index', index._kgram_index)
+                                + deep_sizeof(index._sketches) + deep_sizeof(index._champions)
+                                + _getsizeof(index._doc_hashes)
+                                + len(index._doc_hashes) * _getsizeof(1 << 63))
+        # 常用词二元组索引随文档增长，每次报告时完整测量
+        components['common_grams'] = deep_sizeof(index.common_grams.postings) if index.common_grams else 0
+
+        total = sum(components.values())
+        postings_bytes = components['posting_containers'] + components['position_lists']
+        num_terms = len(self.term_sizes)
+        heaviest = heapq.nlargest(top_n, self.term_sizes.items(),
+                                  key=lambda item: (item[1][0] + item[1][1] + item[1][2], item[0]))
+        return {
+            'total_bytes': total,
+            'components': components,
+            'num_terms': num_terms,
+            'num_postings': self.postings,
+            'bytes_per_term': total / num_terms if num_terms else 0.0,
+            'bytes_per_posting': postings_bytes / self.postings if self.postings else 0.0,
+            'heaviest_terms': [(term, sizes[0] + sizes[1] + sizes[2]) for term, sizes in heaviest],
+        }
+
+
+def format_bytes(num_bytes: float) -> str:
+    """以合适的单位格式化字节数"""
+    for unit in ('B', 'KB', 'MB'):
+        if abs(num_bytes) < 1024:
+            return f"{num_bytes:.1f} {unit}"
+        num_bytes /= 1024
+    return f"{num_bytes:.1f} GB"
@@ -0,0 +1,178 @@
+"""
+分页查询和查询预算
+search_and / search_or / search_not 返回完整的结果集合：没有包含词的 NOT 查询或
+含高频词的 OR 查询几乎返回整个语料。InvertedIndex.search_page 每次只返回一页
+结果和一个不透明的游标，取下一页时从上一页停下的倒排列表位置继续遍历，而不是
+重新计算整个查询。
+
+磁盘索引上按文档序号续读：从上一页最后一个文档的下一个序号开始，按逐次加倍
+的序号窗口解码驱动列表和判断用的倒排列表（按块头跳过窗口之前的块），一页的
+代价与这一页覆盖的序号范围成正比，而不是每页从头解码整个倒排列表。
+
+查询预算限制一次调用的工作量：截止时间或最多检查的倒排项数。预算用尽时停止
+求值，返回已找到的结果并标记为部分结果（partial），游标指向停下的位置，可以
+继续取下去。
+"""
+
+import json
+import time
+import base64
+from collections.abc import Mapping
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from sketches import hash64
+
+# 分页查询类型（排序查询的下一页需要重新排序，见 InvertedIndex.search_page）
+PAGE_QUERY_TYPES = ('and', 'or', 'not', 'phrase', 'ranked')
+
+# 磁盘索引分页续读时第一个文档序号窗口的大小，之后逐次加倍
+FIRST_WINDOW = 1024
+
+
+class CursorError(ValueError):
+    """游标无效：不属于该查询，或索引在翻页期间发生了变化"""
+
+
+class QueryBudget:
+    """一次查询调用的工作量预算"""
+
+    # 每检查这么多倒排项读取一次时钟
+    CLOCK_INTERVAL = 256
+
+    def __init__(self, timeout: float = None, max_postings: int = None):
+        """
+        Args:
+            timeout: 从创建预算起允许的秒数，None 表示不限
+            max_postings: 最多检查的倒排项数，None 表示不限
+        """
+        self.deadline = time.perf_counter() + timeout if timeout is not None else None
+        self.max_postings = max_postings
+        # 已检查的倒排项数
+        self.postings = 0
+        self.exhausted = False
+        self._next_clock = self.CLOCK_INTERVAL
+
+    def charge(self, postings: int = 1) -> bool:
+        """
+        记入将要检查的倒排项
+
+        Returns:
+            预算是否允许检查这些倒排项；不允许时标记为用尽，不记入
+        """
+        if self.exhausted:
+            return False
+        if self.max_postings is not None and self.postings + postings > self.max_postings:
+            self.exhausted = True
+            return False
+        self.postings += postings
+        if self.deadline is not None and self.postings >= self._next_clock:
+            self._next_clock = self.postings + self.CLOCK_INTERVAL
+            if time.perf_counter() > self.deadline:
+                self.exhausted = True
+        return True
+
+
+class ResultPage:
+    """一页查询结果"""
+
+    def __init__(self, results: List, cursor: Optional[str], partial: bool, postings: int):
+        """
+        Args:
+            results: 文档ID列表（排序查询为 (文档ID, 得分) 列表）
+            cursor: 取下一页的游标，没有更多结果时为 None
+            partial: 是否因预算用尽提前停止（本页可能不满，且之后可能还有结果）
+            postings: 本页检查的倒排项数
+        """
+        self.results = results
+        self.cursor = cursor
+        self.partial = partial
+        self.postings = postings
+
+    def __len__(self) -> int:
+        return len(self.results)
+
+    def __iter__(self):
+        return iter(self.results)
+
+    def __repr__(self) -> str:
+        return (f"ResultPage({len(self.results)} results, partial={self.partial}, "
+                f"more={self.cursor is not None})")
+
+
+def query_fingerprint(query_type: str, query) -> int:
+    """查询的指纹，游标只能用于同一个查询"""
+    return hash64(json.dumps([query_type, query], ensure_ascii=False, sort_keys=True)) & 0xFFFFFFFF
+
+
+def encode_cursor(fingerprint: int, state: list) -> str:
+    """把查询指纹和遍历状态编码为不透明的游标字符串"""
+    data = json.dumps([fingerprint] + state, ensure_ascii=False, separators=(',', ':'))
+    return base64.urlsafe_b64encode(data.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str, fingerprint: int) -> list:
+    """解码游标，返回遍历状态；游标损坏或不属于该查询时抛出 CursorError"""
+    try:
+        data = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(data.decode('utf-8'))
+    except (ValueError, UnicodeDecodeError) as exc:
+        raise CursorError(f"无法解析游标: {cursor!r}") from exc
+    if not isinstance(values, list) or not values or values[0] != fingerprint:
+        raise CursorError("游标不属于该查询")
+    return values[1:]
+
+
+class PostingWindow(Mapping):
+    """磁盘索引分页：一个词项在当前文档序号窗口内的倒排列表 {文档ID: 位置列表或词频}"""
+
+    def __init__(self, load: Callable[[Tuple[int, int]], Dict]):
+        """
+        Args:
+            load: 取词项在文档序号范围 [lo, hi) 内倒排列表的函数
+        """
+        self._load = load
+        self.postings: Dict = {}
+
+    def load(self, window: Tuple[int, int]):
+        """改为文档序号范围 [lo, hi) 内的倒排列表"""
+        self.postings = self._load(window)
+
+    def __getitem__(self, doc_id: str):
+        return self.postings[doc_id]
+
+    def __contains__(self, doc_id) -> bool:
+        return doc_id in self.postings
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.postings)
+
+    def __len__(self) -> int:
+        return len(self.postings)
+
+
+def scan_windows(disk_index, source: Optional[PostingWindow], windows: Iterable[PostingWindow],
+                 lo: int, hi: int) -> Iterator[str]:
+    """
+    从文档序号 lo 开始按逐次加倍的窗口遍历到 hi，每个窗口先载入 windows 中各列表
+    在该窗口内的部分；逐个产出的文档只需与当前窗口比较
+
+    Args:
+        disk_index: disk_index.DiskIndex
+        source: 遍历的倒排列表（须在 windows 中），None 表示遍历全部文档
+        windows: 本段用到的全部 PostingWindow
+        lo, hi: 文档序号范围 [lo, hi)
+
+    Yields:
+        文档ID，按文档序号排列
+    """
+    size = FIRST_WINDOW
+    while lo < hi:
+        window = (lo, min(hi, lo + size))
+        for postings in windows:
+            postings.load(window)
+        if source is None:
+            yield from disk_index.doc_ids[window[0]:window[1]]
+        else:
+            yield from source
+        lo = window[1]
+        size *= 2
@@ -6,7 +6,23 @@ Parse Reuters-21578 SGML files and extract document content
 
 import re
 import os
-from typing import List, Dict
+from datetime import datetime
+from typing import Dict, Iterator, List
+
+def _category_list(reuters_content: str, tag: str) -> List[str]:
+    """Return the <D> entries of a category tag such as TOPICS or PLACES"""
+    match = re.search(rf'<{tag}>(.*?)</{tag}>', reuters_content, re.DOTALL)
+    return re.findall(r'<D>(.*?)</D>', match.group(1)) if match else []
+
+def _parse_date(reuters_content: str) -> str:
+    """Return the DATE of a document as ISO 8601 (e.g. '1987-02-26T15:01:01'), or '' if malformed"""
+    match = re.search(r'<DATE>\s*(\d+-[A-Z]+-\d{4} \d\d:\d\d:\d\d)', reuters_content)
+    if not match:
+        return ""
+    try:
+        return datetime.strptime(match.group(1), '%d-%b-%Y %H:%M:%S').isoformat()
+    except ValueError:
+        return ""
 
 def parse_reuters_sgml(file_path: str) -> List[Dict[str, str]]:
     """
@@ -16,20 +32,23 @@ def parse_reuters_sgml(file_path: str) -> List[Dict[str, str]]:
         file_path: Path to the SGML file
         
     Returns:
-        List of documents, each as a dict with 'id', 'title', and 'body'
+        List of documents, each as a dict with 'id', 'title', 'body', 'text',
+        'topics' and 'places' (lists of category codes) and 'date' (ISO 8601,
+        empty if missing or malformed)
     """
     with open(file_path, 'r', encoding='latin-1', errors='ignore') as f:
         content = f.read()
     
     documents = []
     
-    # Find all REUTERS tags
-    reuters_pattern = r'<REUTERS[^>]*>(.*?)</REUTERS>'
-    reuters_matches = re.findall(reuters_pattern, content, re.DOTALL)
+    # Find all REUTERS tags (a single pass; the attributes carry NEWID)
+    reuters_pattern = r'<REUTERS([^>]*)>(.*?)</REUTERS>'
     
-    for i, reuters_content in enumerate(reuters_matches):
+    for i, reuters_match in enumerate(re.finditer(reuters_pattern, content, re.DOTALL)):
+        attributes, reuters_content = reuters_match.groups()
+        
         # Extract NEWID
-        newid_match = re.search(r'NEWID="(\d+)"', content.split('</REUTERS>')[i])
+        newid_match = re.search(r'NEWID="(\d+)"', attributes)
         doc_id = newid_match.group(1) if newid_match else str(i)
         
         # Extract TITLE
@@ -47,11 +66,43 @@ def parse_reuters_sgml(file_path: str) -> List[Dict[str, str]]:
                 'id': f'reuters_{doc_id}',
                 'title': title,
                 'body': body,
-                'text': text
+                'text': text,
+                'topics': _category_list(reuters_content, 'TOPICS'),
+                'places': _category_list(reuters_content, 'PLACES'),
+                'date': _parse_date(reuters_content)
             })
     
     return documents
 
+def iter_reuters_documents(data_dir: str, max_docs: int = None, verbose: bool = True) -> Iterator[Dict[str, str]]:
+    """
+    Yield Reuters documents file by file, so only one SGML file is held in memory
+
+    Args:
+        data_dir: Directory containing SGML files
+        max_docs: Maximum number of documents to yield (None for all)
+        verbose: Print the name of each file as it is parsed
+
+    Yields:
+        Documents as returned by parse_reuters_sgml
+    """
+    count = 0
+
+    # Find all SGML files
+    sgm_files = sorted([f for f in os.listdir(data_dir) if f.endswith('.sgm')])
+
+    for sgm_file in sgm_files:
+        file_path = os.path.join(data_dir, sgm_file)
+        if verbose:
+            print(f"Parsing {sgm_file}...")
+
+        for document in parse_reuters_sgml(file_path):
+            # Check if we've reached the limit
+            if max_docs and count >= max_docs:
+                return
+            count += 1
+            yield document
+
 def load_reuters_documents(data_dir: str, max_docs: int = None) -> List[Dict[str, str]]:
     """
     Load Reuters documents from all SGML files
@@ -63,22 +114,7 @@ def load_reuters_documents(data_dir: str, max_docs: int = None) -> List[Dict[str
     Returns:
         List of documents
     """
-    all_documents = []
-    
-    # Find all SGML files
-    sgm_files = sorted([f for f in os.listdir(data_dir) if f.endswith('.sgm')])
-    
-    for sgm_file in sgm_files:
-        file_path = os.path.join(data_dir, sgm_file)
-        print(f"Parsing {sgm_file}...")
-        
-        documents = parse_reuters_sgml(file_path)
-        all_documents.extend(documents)
-        
-        # Check if we've reached the limit
-        if max_docs and len(all_documents) >= max_docs:
-            all_documents = all_documents[:max_docs]
-            break
+    all_documents = list(iter_reuters_documents(data_dir, max_docs))
     
     print(f"Loaded {len(all_documents)} documents")
     return all_documents
@@ -2,11 +2,15 @@
 # -*- coding: utf-8 -*-
 """
 Performance testing for inverted index with Reuters-21578 dataset
+
+Quick smoke-level timings; see benchmark.py for latency percentiles,
+memory tracking and baseline comparison.
 """
 
 import time
 import json
 from inverted_index import InvertedIndex
+from dedup import NearDuplicateDetector
 from parse_reuters import load_reuters_documents
 
 def test_index_building(doc_counts=[100, 500, 1000, 2000, 5000]):
@@ -44,12 +48,12 @@ def test_index_building(doc_counts=[100, 500, 1000, 2000, 5000]):
         index = InvertedIndex()
         
         # Measure build time
-        start_time = time.time()
+        start_time = time.perf_counter()
         
         for i, doc in enumerate(all_documents[:count]):
             index.add_document(doc['id'], doc['text'])
         
-        build_time = time.time() - start_time
+        build_time = time.perf_counter() - start_time
         
         # Get statistics
         vocab_size = len(index.index)
@@ -94,9 +98,9 @@ def test_query_performance(num_docs=1000):
     # Test queries
     test_cases = [
         ('Single term', 'market', lambda: index.search('market')),
-        ('Boolean AND', 'market AND trade', lambda: index.search('market AND trade')),
-        ('Boolean OR', 'market OR trade', lambda: index.search('market OR trade')),
-        ('Boolean NOT', 'market NOT trade', lambda: index.search('market NOT trade')),
+        ('Boolean AND', 'market AND trade', lambda: index.search_and(['market', 'trade'])),
+        ('Boolean OR', 'market OR trade', lambda: index.search_or(['market', 'trade'])),
+        ('Boolean NOT', 'market NOT trade', lambda: index.search_not(['market'], ['trade'])),
         ('Phrase query', '"stock market"', lambda: index.search_phrase('stock market')),
     ]
     
@@ -117,9 +121,9 @@ def test_query_performance(num_docs=1000):
         # Measure time (average of 10 runs)
         times = []
         for _ in range(10):
-            start = time.time()
+            start = time.perf_counter()
             result = query_func()
-            times.append((time.time() - start) * 1000)  # Convert to ms
+            times.append((time.perf_counter() - start) * 1000)  # Convert to ms
         
         avg_time = sum(times) / len(times)
         result_count = len(result) if result else 0
@@ -132,12 +136,134 @@ def test_query_performance(num_docs=1000):
     
     return results
 
-def save_results(build_results, query_results, output_file='output/performance_results.json'):
+# Latency targets (ms, p95) for fuzzy expansion and spelling suggestions
+FUZZY_LATENCY_TARGETS_MS = {1: 50.0, 2: 200.0}
+
+def test_fuzzy_performance(num_docs=1000):
+    """
+    Test fuzzy expansion and "did you mean" latency against the targets
+    
+    Args:
+        num_docs: Number of documents to index (None for the full corpus)
+        
+    Returns:
+        Dict with fuzzy query performance results
+    """
+    print("\n" + "="*80)
+    print(f"Testing Fuzzy Query Performance ({num_docs or 'all'} documents)")
+    print("="*80)
+    
+    documents = load_reuters_documents('data', max_docs=num_docs)
+    index = InvertedIndex()
+    for doc in documents:
+        index.add_document(doc['id'], doc['text'])
+    index.get_term_dictionary()
+    print(f"Vocabulary: {len(index.index):,} terms")
+    
+    misspellings = ['markte', 'petrolem', 'dolar', 'goverment', 'excange',
+                    'compnay', 'shaers', 'reuter', 'bnak', 'tradign']
+    
+    results = {
+        'vocab_size': len(index.index),
+        'max_edits': [],
+        'p50_ms': [],
+        'p95_ms': [],
+        'target_ms': [],
+        'within_target': []
+    }
+    
+    print(f"\n{'Operation':<25} {'p50 (ms)':<12} {'p95 (ms)':<12} {'Target':<10}")
+    print("-" * 65)
+    
+    for max_edits, target in sorted(FUZZY_LATENCY_TARGETS_MS.items()):
+        times = []
+        for term in misspellings:
+            start = time.perf_counter()
+            index.expand_fuzzy(term, max_edits=max_edits)
+            times.append((time.perf_counter() - start) * 1000)
+        times.sort()
+        p50 = times[len(times) // 2]
+        p95 = times[min(len(times) - 1, int(len(times) * 0.95))]
+        
+        results['max_edits'].append(max_edits)
+        results['p50_ms'].append(p50)
+        results['p95_ms'].append(p95)
+        results['target_ms'].append(target)
+        results['within_target'].append(p95 <= target)
+        
+        status = 'OK' if p95 <= target else 'SLOW'
+        print(f"{'fuzzy (edits=%d)' % max_edits:<25} {p50:>8.2f}    {p95:>8.2f}    {target:>6.0f} {status}")
+    
+    start = time.perf_counter()
+    for term in misspellings:
+        index.did_you_mean(term)
+    avg_suggest = (time.perf_counter() - start) * 1000 / len(misspellings)
+    results['did_you_mean_avg_ms'] = avg_suggest
+    print(f"{'did you mean':<25} {avg_suggest:>8.2f} (avg)")
+    
+    return results
+
+def test_dedup_savings(num_docs=1000, mode='skip'):
+    """
+    Measure how much index size near-duplicate detection saves
+    
+    Args:
+        num_docs: Number of documents to index (None for the full corpus)
+        mode: Deduplication mode ('skip' or 'cluster' drop duplicates from the index)
+        
+    Returns:
+        Dict with index sizes with and without deduplication
+    """
+    print("\n" + "="*80)
+    print(f"Testing Near-Duplicate Detection ({num_docs or 'all'} documents, mode={mode})")
+    print("="*80)
+    
+    documents = load_reuters_documents('data', max_docs=num_docs)
+    
+    def measure(deduplicator):
+        index = InvertedIndex(deduplicator=deduplicator)
+        start = time.perf_counter()
+        for doc in documents:
+            index.add_document(doc['id'], doc['text'])
+        build_time = time.perf_counter() - start
+        postings = sum(len(docs) for docs in index.index.values())
+        positions = sum(len(pos) for docs in index.index.values() for pos in docs.values())
+        serialized = len(json.dumps({term: dict(docs) for term, docs in index.index.items()}))
+        return index, {
+            'documents': len(index.documents),
+            'build_time': build_time,
+            'postings': postings,
+            'positions': positions,
+            'index_bytes': serialized
+        }
+    
+    _, baseline = measure(None)
+    deduped_index, deduped = measure(NearDuplicateDetector(mode=mode))
+    
+    results = {'baseline': baseline, 'deduplicated': deduped,
+               'detector': deduped_index.deduplicator.report()}
+    
+    print(f"\n{'Metric':<20} {'Baseline':>14} {'Deduplicated':>14} {'Saved':>8}")
+    print("-" * 60)
+    for key in ('documents', 'postings', 'positions', 'index_bytes'):
+        saved = 1 - deduped[key] / baseline[key] if baseline[key] else 0.0
+        print(f"{key:<20} {baseline[key]:>14,} {deduped[key]:>14,} {saved:>7.2%}")
+    print(f"{'build_time (s)':<20} {baseline['build_time']:>14.3f} {deduped['build_time']:>14.3f}")
+    print(f"Duplicates found: {results['detector']['duplicates_found']:,}")
+    
+    return results
+
+def save_results(build_results, query_results, output_file='output/performance_results.json',
+                 fuzzy_results=None, dedup_results=None):
     """Save performance test results to JSON file"""
     results = {
         'index_building': build_results,
         'query_performance': query_results
     }
+    if fuzzy_results is not None:
+        results['fuzzy_performance'] = fuzzy_results
+    if dedup_results is not None:
+        results['dedup_savings'] = dedup_results
 
     with open(output_file, 'w') as f:
         json.dump(results, f, indent=2)
@@ -151,8 +277,15 @@ if __name__ == '__main__':
     # Test query performance with 1000 documents
     query_results = test_query_performance(1000)
     
+    # Test fuzzy matching latency on the full Reuters vocabulary
+    fuzzy_results = test_fuzzy_performance(None)
+    
+    # Measure index size saved by near-duplicate detection on the full corpus
+    dedup_results = test_dedup_savings(None)
+    
     # Save results
-    save_results(build_results, query_results)
+    save_results(build_results, query_results, fuzzy_results=fuzzy_results,
+                 dedup_results=dedup_results)
     
     print("\n" + "="*80)
     print("Performance testing completed!")
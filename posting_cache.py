@@ -0,0 +1,308 @@
+"""
+解码倒排列表缓存
+按字节限制容量的 W-TinyLFU 缓存：新条目先进入 LRU 窗口（默认占容量的 20%，
+容纳同一查询内的短期重复访问），被挤出窗口时与主区的淘汰候选比较近期访问频率
+（Count-Min 草图估计），频率更高才能进入主区（分段 LRU：试用段 + 保护段）。
+只访问一次的冷门词项因此无法把高频词项挤出缓存。也支持普通 LRU 作为对照，并提供按查询日志回放的工具：
+
+    python posting_cache.py --index output/reuters.idx --query-log data/reuters_query_log.json --cache-mb 1,4,16
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+from collections import OrderedDict
+from typing import Dict, Hashable
+
+from sketches import CountMinSketch, hash64
+
+CACHE_POLICIES = ('tinylfu', 'lru')
+
+
+class PostingCache:
+    """按字节限制容量的 W-TinyLFU 缓存"""
+
+    def __init__(self, max_bytes: int, policy: str = 'tinylfu', window_fraction: float = 0.2,
+                 protected_fraction: float = 0.8, expected_entries: int = 10000):
+        """
+        初始化缓存
+
+        Args:
+            max_bytes: 缓存条目的字节数上限
+            policy: 'tinylfu' 或 'lru'（全部容量作为一个 LRU，来者皆收）
+            window_fraction: 准入窗口占总容量的比例
+            protected_fraction: 保护段占主区的比例
+            expected_entries: 预计的条目数，决定频率草图的大小
+        """
+        if policy not in CACHE_POLICIES:
+            raise ValueError(f"不支持的缓存策略: {policy}，可选 {CACHE_POLICIES}")
+        self.max_bytes = max_bytes
+        self.policy = policy
+        if policy == 'lru':
+            self.window_max = max_bytes
+        else:
+            self.window_max = max(1, int(max_bytes * window_fraction))
+        self.main_max = max_bytes - self.window_max
+        self.protected_max = int(self.main_max * protected_fraction)
+        # 各段：{键: (值, 字节数)}，按最近访问排序（末尾最新）
+        self.window = OrderedDict()
+        self.probation = OrderedDict()
+        self.protected = OrderedDict()
+        self.window_bytes = self.probation_bytes = self.protected_bytes = 0
+        self.sketch = CountMinSketch(width=expected_entries)
+        self.reset_stats()
+
+    def reset_stats(self):
+        """清零命中统计"""
+        self.hits = 0
+        self.misses = 0
+        self.hit_bytes = 0
+        self.miss_bytes = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.evicted = 0
+
+    def _frequency(self, key: Hashable) -> int:
+        return self.sketch.estimate(hash64(str(key)))
+
+    def get(self, key: Hashable):
+        """
+        查找缓存，同时记录一次访问频率
+
+        Returns:
+            缓存的值，未命中时为 None
+        """
+        if self.policy == 'tinylfu':
+            self.sketch.add(hash64(str(key)))
+        entry = self.window.get(key)
+        if entry is not None:
+            self.window.move_to_end(key)
+        elif key in self.protected:
+            entry = self.protected[key]
+            self.protected.move_to_end(key)
+        elif key in self.probation:
+            # 试用段再次命中：晋升到保护段，保护段超出容量时把最久未用的降回试用段
+            entry = self.probation.pop(key)
+            self.probation_bytes -= entry[1]
+            self.protected[key] = entry
+            self.protected_bytes += entry[1]
+            while self.protected_bytes > self.protected_max and len(self.protected) > 1:
+                demoted_key, demoted = self.protected.popitem(last=False)
+                self.protected_bytes -= demoted[1]
+                self.probation[demoted_key] = demoted
+                self.probation_bytes += demoted[1]
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.hit_bytes += entry[1]
+        return entry[0]
+
+    def put(self, key: Hashable, value, size: int):
+        """
+        缓存一个未命中后取得的值
+
+        Args:
+            key: 键
+            value: 值
+            size: 值的字节数
+        """
+        self.miss_bytes += size
+        if size > self.max_bytes or key in self.window or key in self.probation or key in self.protected:
+            self.rejected += size > self.max_bytes
+            return
+        if size > self.window_max:
+            # 大于窗口的条目不经过窗口，直接与主区的淘汰候选比较频率，
+            # 保证缓存的总字节数不超过 max_bytes
+            self._admit(key, (value, size))
+            return
+        self.window[key] = (value, size)
+        self.window_bytes += size
+        while self.window_bytes > self.window_max:
+            candidate_key, candidate = self.window.popitem(last=False)
+            self.window_bytes -= candidate[1]
+            if self.policy == 'lru':
+                self.evicted += 1
+            else:
+                self._admit(candidate_key, candidate)
+
+    def discard(self, key: Hashable):
+        """删除一个条目（缓存的值已过期时）"""
+        for segment in (self.window, self.probation, self.protected):
+            entry = segment.pop(key, None)
+            if entry is not None:
+                if segment is self.window:
+                    self.window_bytes -= entry[1]
+                elif segment is self.probation:
+                    self.probation_bytes -= entry[1]
+                else:
+                    self.protected_bytes -= entry[1]
+                return
+
+    def _admit(self, key: Hashable, entry):
+        """被挤出窗口的条目尝试进入主区：须比它要挤掉的每个条目访问更频繁"""
+        size = entry[1]
+        if size > self.main_max:
+            self.rejected += 1
+            return
+        overflow = self.probation_bytes + self.protected_bytes + size - self.main_max
+        victims = []
+        if overflow > 0:
+            frequency = self._frequency(key)
+            # 淘汰顺序：试用段最久未用者优先，其次保护段
+            for segment in (self.probation, self.protected):
+                for victim_key, victim in segment.items():
+                    if overflow <= 0:
+                        break
+                    if self._frequency(victim_key) >= frequency:
+                        self.rejected += 1
+                        return
+                    victims.append((segment, victim_key))
+                    overflow -= victim[1]
+        for segment, victim_key in victims:
+            victim = segment.pop(victim_key)
+            if segment is self.probation:
+                self.probation_bytes -= victim[1]
+            else:
+                self.protected_bytes -= victim[1]
+            self.evicted += 1
+        self.probation[key] = entry
+        self.probation_bytes += size
+        self.admitted += 1
+
+    @property
+    def size_bytes(self) -> int:
+        """当前缓存的字节数"""
+        return self.window_bytes + self.probation_bytes + self.protected_bytes
+
+    def __len__(self) -> int:
+        return len(self.window) + len(self.probation) + len(self.protected)
+
+    def stats(self) -> Dict:
+        """命中率等统计"""
+        lookups = self.hits + self.misses
+        fetched = self.hit_bytes + self.miss_bytes
+        return {
+            'policy': self.policy,
+            'max_bytes': self.max_bytes,
+            'size_bytes': self.size_bytes,
+            'entries': len(self),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': self.hits / lookups if lookups else 0.0,
+            'byte_hit_ratio': self.hit_bytes / fetched if fetched else 0.0,
+            'admitted': self.admitted,
+            'rejected': self.rejected,
+            'evicted': self.evicted,
+        }
+
+
+def load_queries(path: str):
+    """
+    读取查询日志：benchmark.py 的查询日志（JSON），或查询追踪写出的 JSON Lines
+    （每行含 'type' 和 'query'，见 tracing.JsonLinesSink）
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        if path.endswith('.jsonl'):
+            records = [json.loads(line) for line in f if line.strip()]
+            return [{'type': record['type'], 'query': record['query']} for record in records]
+        return json.load(f)['queries']
+
+
+def zipf_sample(queries, count: int, s: float = 1.0, seed: int = 42):
+    """
+    按 Zipf 分布从查询日志中抽样（打乱后排名 r 的查询权重为 1/r^s），
+    模拟少量热门查询反复出现、大量冷门查询只出现一次的真实负载
+    """
+    rng = random.Random(seed)
+    ranked = list(queries)
+    rng.shuffle(ranked)
+    weights = [1.0 / rank ** s for rank in range(1, len(ranked) + 1)]
+    return rng.choices(ranked, weights=weights, k=count)
+
+
+def replay(index_path: str, queries, max_bytes: int, policy: str = 'tinylfu', passes: int = 1) -> Dict:
+    """
+    以查询日志驱动磁盘索引和缓存
+
+    Args:
+        index_path: 磁盘索引文件
+        queries: 查询列表 [{'type', 'query'}]
+        max_bytes: 缓存容量
+        policy: 缓存策略
+        passes: 回放次数
+
+    Returns:
+        缓存统计，另含解码的词项数和字节数、总耗时
+    """
+    from inverted_index import InvertedIndex
+    from benchmark import query_runner
+
+    index = InvertedIndex()
+    cache = PostingCache(max_bytes, policy=policy)
+    index.load_disk_index(index_path, cache=cache)
+    runners = [query_runner(index, query) for query in queries]
+    start = time.perf_counter()
+    for _ in range(passes):
+        for run in runners:
+            run()
+    elapsed = time.perf_counter() - start
+    results = cache.stats()
+    results.update({
+        'queries': len(runners) * passes,
+        'decoded_terms': index.disk_index.decoded_terms,
+        'decoded_bytes': index.disk_index.decoded_bytes,
+        'seconds': elapsed,
+    })
+    index.disk_index.close()
+    return results
+
+
+def ensure_reuters_disk_index(path: str, data_dir: str = 'data'):
+    """磁盘索引不存在时由 Reuters 语料构建"""
+    if os.path.exists(path):
+        return
+    from parse_reuters import iter_reuters_documents
+    from spimi import SpimiBuilder
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with SpimiBuilder(path) as builder:
+        for doc in iter_reuters_documents(data_dir):
+            builder.add_document(doc['id'], doc['text'])
+        builder.finish()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Replay a query log against a cached disk index')
+    parser.add_argument('--index', default=os.path.join('output', 'reuters.idx'),
+                        help='Disk index file (built from Reuters if missing)')
+    parser.add_argument('--data-dir', default='data', help='Directory with Reuters SGML files')
+    parser.add_argument('--query-log', default=os.path.join('data', 'reuters_query_log.json'),
+                        help='Query log (.json) or recorded traces (.jsonl)')
+    parser.add_argument('--cache-mb', default='1,4,16', help='Comma-separated cache sizes in MB')
+    parser.add_argument('--passes', type=int, default=3, help='Times to replay the log')
+    parser.add_argument('--zipf-s', type=float, default=0.0,
+                        help='If > 0, replay a Zipf-skewed sample of the log instead of the log itself')
+    parser.add_argument('--samples', type=int, default=1000, help='Sample size for --zipf-s')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed for --zipf-s')
+    args = parser.parse_args(argv)
+
+    ensure_reuters_disk_index(args.index, args.data_dir)
+    queries = load_queries(args.query_log)
+    if args.zipf_s > 0:
+        queries = zipf_sample(queries, args.samples, args.zipf_s, args.seed)
+    print(f"{'Policy':<8} {'Cache MB':>9} {'Hit ratio':>10} {'Byte hits':>10} {'Decoded MB':>11} {'Seconds':>8}")
+    print("-" * 61)
+    for size in args.cache_mb.split(','):
+        for policy in CACHE_POLICIES:
+            results = replay(args.index, queries, int(float(size) * 2**20), policy, args.passes)
+            print(f"{policy:<8} {float(size):>9.1f} {results['hit_ratio']:>10.1%} "
+                  f"{results['byte_hit_ratio']:>10.1%} {results['decoded_bytes'] / 2**20:>11.1f} "
+                  f"{results['seconds']:>8.2f}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,364 @@
+"""
+多进程查询
+冻结的索引导出为磁盘索引快照（见 disk_index.py），多个工作进程只读映射同一份
+快照：以 mmap 打开文件时共享操作系统的页缓存，或先复制到共享内存
+（multiprocessing.shared_memory）再映射。倒排列表、文档内容和词典只有一份
+物理内存，每个工作进程只额外保存文档ID列表和文档长度，查询吞吐随核数扩展：
+
+    python query_workers.py --index output/reuters.idx --workers 1,2,4
+
+单条重查询（长短语、宽泛的排序查询、大的 OR/AND）还可以查询内并行：把文档
+序号划分为连续的分区，各工作进程在自己的分区上执行同一条查询（只解码倒排列表
+中落在分区内的块），再合并各分区的结果集或前 k 个结果。语料统计取整个索引，
+因此合并后的结果与不分区时相同：
+
+    python query_workers.py --partitioned --workers 1,2,4
+"""
+
+import os
+import sys
+import time
+import heapq
+import argparse
+from itertools import chain
+from multiprocessing import Pool, shared_memory
+from typing import Dict, List, Optional, Tuple
+
+from disk_index import DiskIndex
+
+ATTACH_MODES = ('mmap', 'shm')
+
+
+class SharedSnapshot:
+    """复制到共享内存中的磁盘索引快照"""
+
+    def __init__(self, name: str, size: int, shm: shared_memory.SharedMemory = None):
+        """
+        连接已有的共享内存快照
+
+        Args:
+            name: 共享内存名称
+            size: 快照字节数（共享内存可能按页向上取整）
+            shm: 创建者已持有的共享内存对象
+        """
+        self.name = name
+        self.size = size
+        self._shm = shm or shared_memory.SharedMemory(name=name)
+        self._buffer = None
+
+    @classmethod
+    def create(cls, path: str) -> 'SharedSnapshot':
+        """
+        把磁盘索引文件复制到新建的共享内存
+
+        Args:
+            path: 磁盘索引文件路径
+        """
+        size = os.path.getsize(path)
+        shm = shared_memory.SharedMemory(create=True, size=size)
+        with open(path, 'rb') as f:
+            f.readinto(shm.buf[:size])
+        return cls(shm.name, size, shm)
+
+    def open(self) -> DiskIndex:
+        """在共享内存上打开磁盘索引（不复制）"""
+        self._buffer = self._shm.buf[:self.size]
+        return DiskIndex(self._buffer)
+
+    def close(self):
+        """断开连接（须先关闭 open 返回的 DiskIndex）"""
+        if self._buffer is not None:
+            self._buffer.release()
+            self._buffer = None
+        self._shm.close()
+
+    def unlink(self):
+        """销毁共享内存（由创建者在所有进程断开后调用）"""
+        self._shm.unlink()
+
+
+def process_memory(pid: int = None) -> Optional[Dict[str, int]]:
+    """
+    进程的内存占用（字节），读取 /proc/<pid>/smaps_rollup，其他平台返回 None
+
+    Returns:
+        {'rss', 'pss', 'shared', 'private'}；pss 把共享页按共享进程数均摊，
+        各进程 pss 之和即实际占用的物理内存
+    """
+    path = f"/proc/{pid or 'self'}/smaps_rollup"
+    try:
+        with open(path) as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return None
+    fields = {}
+    for line in lines[1:]:
+        key, _, value = line.partition(':')
+        parts = value.split()
+        if parts and parts[-1] == 'kB':
+            fields[key] = int(parts[0]) * 1024
+    return {
+        'rss': fields.get('Rss', 0),
+        'pss': fields.get('Pss', 0),
+        'shared': fields.get('Shared_Clean', 0) + fields.get('Shared_Dirty', 0),
+        'private': fields.get('Private_Clean', 0) + fields.get('Private_Dirty', 0),
+    }
+
+
+def partition_ranges(count: int, partitions: int) -> List[Tuple[int, int]]:
+    """
+    把文档序号 [0, count) 划分为至多 partitions 个大小相差不超过 1 的连续范围
+
+    Returns:
+        [(lo, hi)]，按序号排列，不含空范围（count 为 0 时为 [(0, 0)]）
+    """
+    partitions = max(1, min(partitions, count))
+    size, extra = divmod(count, partitions)
+    ranges = []
+    lo = 0
+    for i in range(partitions):
+        hi = lo + size + (1 if i < extra else 0)
+        if hi > lo:
+            ranges.append((lo, hi))
+        lo = hi
+    return ranges or [(0, 0)]
+
+
+def merge_partitions(results: List, k: int = 10):
+    """
+    合并同一条查询在各分区上的结果（分区的文档互不重叠）
+
+    Args:
+        results: 各分区的结果：文档ID集合、{文档ID: 位置列表}，或 [(文档ID, 得分)]
+        k: 排序结果保留的文档数
+
+    Returns:
+        与不分区执行时相同类型的结果；排序结果按 (得分, 文档ID) 取前 k 个，
+        与 InvertedIndex 的排序规则一致
+    """
+    first = results[0]
+    if isinstance(first, dict):
+        merged = {}
+        for result in results:
+            merged.update(result)
+        return merged
+    if isinstance(first, list):
+        return heapq.nlargest(k, chain.from_iterable(results), key=lambda item: (item[1], item[0]))
+    return set().union(*results)
+
+
+# 工作进程内的索引（由 _attach 初始化）
+_worker_index = None
+_worker_snapshot = None
+# 工作进程内各分区的索引：{(lo, hi): InvertedIndex}，共用已映射的快照
+_worker_partitions = {}
+
+
+def _attach(mode: str, location: str, cache_bytes: int):
+    """工作进程初始化：映射快照"""
+    global _worker_index, _worker_snapshot
+    from inverted_index import InvertedIndex
+    from posting_cache import PostingCache
+
+    if mode == 'shm':
+        name, size = location
+        _worker_snapshot = SharedSnapshot(name, size)
+        disk = _worker_snapshot.open()
+    else:
+        disk = DiskIndex(location)
+    _worker_index = InvertedIndex()
+    _worker_index.load_disk_index(disk, cache=PostingCache(cache_bytes) if cache_bytes else None)
+
+
+def _run_query(query: Dict):
+    """在工作进程中执行一条查询（格式同 benchmark.py 的查询日志）"""
+    from benchmark import query_runner
+    return query_runner(_worker_index, query)()
+
+
+def _run_partition(task: Tuple[Dict, int, int]):
+    """在工作进程中只对文档序号 [lo, hi) 执行一条查询"""
+    from benchmark import query_runner
+    from inverted_index import InvertedIndex
+
+    query, lo, hi = task
+    index = _worker_partitions.get((lo, hi))
+    if index is None:
+        # 分区索引不缓存倒排列表：缓存按词项保存，不能在分区间共用
+        index = _worker_partitions[(lo, hi)] = InvertedIndex()
+        index.load_disk_index(_worker_index.disk_index, partition=(lo, hi))
+    return query_runner(index, query)()
+
+
+class QueryWorkerPool:
+    """映射同一份索引快照的查询工作进程池"""
+
+    def __init__(self, path: str, workers: int = None, mode: str = 'mmap', cache_bytes: int = 0):
+        """
+        启动工作进程
+
+        Args:
+            path: 磁盘索引文件路径
+            workers: 工作进程数，默认为 CPU 核数
+            mode: 'mmap' 各进程映射文件，'shm' 先复制到共享内存再映射
+            cache_bytes: 每个工作进程的倒排列表缓存容量，0 表示不缓存
+        """
+        if mode not in ATTACH_MODES:
+            raise ValueError(f"不支持的映射方式: {mode}，可选 {ATTACH_MODES}")
+        self.snapshot = None
+        if mode == 'shm':
+            self.snapshot = SharedSnapshot.create(path)
+            location = (self.snapshot.name, self.snapshot.size)
+        else:
+            location = path
+        self.workers = workers or os.cpu_count() or 1
+        self._pool = Pool(self.workers, initializer=_attach, initargs=(mode, location, cache_bytes))
+        # 文档数，用于划分查询内并行的分区
+        disk = DiskIndex(path)
+        self.num_docs = len(disk.doc_ids)
+        disk.close()
+
+    def map(self, queries: List[Dict], chunksize: int = 8) -> List:
+        """
+        并行执行查询
+
+        Args:
+            queries: 查询列表 [{'type', 'query'}]
+            chunksize: 每次分派给一个工作进程的查询数
+
+        Returns:
+            按查询顺序排列的结果
+        """
+        return self._pool.map(_run_query, queries, chunksize)
+
+    def search_partitioned(self, query: Dict, partitions: int = None, k: int = 10):
+        """
+        查询内并行：把文档序号划分为连续分区，各工作进程在一个分区上执行同一条
+        查询，合并各分区的结果
+
+        Args:
+            query: 查询 {'type', 'query'}（格式同 benchmark.py 的查询日志）
+            partitions: 分区数，默认为工作进程数
+            k: 排序查询返回的文档数（须与 query_runner 的 k 一致）
+
+        Returns:
+            与 map([query])[0] 相同的结果
+        """
+        tasks = [(query, lo, hi) for lo, hi in partition_ranges(self.num_docs, partitions or self.workers)]
+        return merge_partitions(self._pool.map(_run_partition, tasks, chunksize=1), k)
+
+    def memory(self) -> List[Optional[Dict[str, int]]]:
+        """各工作进程的内存占用（见 process_memory）"""
+        # multiprocessing.Pool 不公开工作进程列表
+        return [process_memory(process.pid) for process in self._pool._pool]
+
+    def close(self):
+        """结束工作进程并释放共享内存"""
+        self._pool.close()
+        self._pool.join()
+        if self.snapshot is not None:
+            self.snapshot.close()
+            self.snapshot.unlink()
+            self.snapshot = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _median_seconds(run, repeat: int) -> float:
+    """执行 repeat 次，返回耗时的中位数（秒）"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+    return sorted(times)[len(times) // 2]
+
+
+def partition_report(path: str, queries: List[Dict], worker_counts: List[int], mode: str,
+                     heavy: int = 12, repeat: int = 5):
+    """
+    打印查询内并行的延迟报告：从查询日志中选出单进程最慢的 heavy 条查询，
+    对每个工作进程数比较单进程延迟和分区并行延迟
+
+    Critical path 列是在本进程中依次执行各分区时最慢分区的耗时之和，即核数
+    足够、忽略进程间通信时分区并行能达到的延迟
+    """
+    from benchmark import query_runner
+    from inverted_index import InvertedIndex
+
+    disk = DiskIndex(path)
+    index = InvertedIndex()
+    index.load_disk_index(disk)
+    timed = [(_median_seconds(query_runner(index, query), 1), i) for i, query in enumerate(queries)]
+    selected = [queries[i] for _, i in heapq.nlargest(heavy, timed)]
+    sequential = sum(_median_seconds(query_runner(index, query), repeat) for query in selected)
+    kinds = sorted({query['type'] for query in selected})
+    print(f"{len(selected)} heaviest queries ({', '.join(kinds)}), "
+          f"sequential {sequential * 1000 / len(selected):.2f} ms/query")
+    print(f"{'Workers':>7} {'Latency ms':>11} {'Speedup':>8} {'Critical path ms':>17} {'Ideal speedup':>14}")
+    print("-" * 61)
+    for workers in worker_counts:
+        partitions = []
+        for bounds in partition_ranges(len(disk.doc_ids), workers):
+            partitions.append(InvertedIndex())
+            partitions[-1].load_disk_index(disk, partition=bounds)
+        critical = sum(max(_median_seconds(query_runner(partition, query), repeat) for partition in partitions)
+                       for query in selected)
+        with QueryWorkerPool(path, workers, mode) as pool:
+            for query in selected:
+                if pool.search_partitioned(query) != query_runner(index, query)():
+                    raise AssertionError(f"分区合并结果与单进程不同: {query}")
+            latency = sum(_median_seconds(lambda: pool.search_partitioned(query), repeat) for query in selected)
+        print(f"{workers:>7} {latency * 1000 / len(selected):>11.2f} {sequential / latency:>7.2f}x "
+              f"{critical * 1000 / len(selected):>17.2f} {sequential / critical:>13.2f}x")
+    disk.close()
+
+
+def main(argv=None):
+    from benchmark import load_query_log
+    from posting_cache import ensure_reuters_disk_index
+
+    parser = argparse.ArgumentParser(description='Serve a query log from several processes sharing one index snapshot')
+    parser.add_argument('--index', default=os.path.join('output', 'reuters.idx'),
+                        help='Disk index file (built from Reuters if missing)')
+    parser.add_argument('--data-dir', default='data', help='Directory with Reuters SGML files')
+    parser.add_argument('--query-log', default=os.path.join('data', 'reuters_query_log.json'),
+                        help='Query log to replay')
+    parser.add_argument('--workers', default='1,2,4', help='Comma-separated worker counts')
+    parser.add_argument('--mode', choices=ATTACH_MODES, default='mmap', help='How workers attach the snapshot')
+    parser.add_argument('--passes', type=int, default=3, help='Times to replay the log per worker count')
+    parser.add_argument('--partitioned', action='store_true',
+                        help='Report per-query latency with the doc-id space split across workers')
+    parser.add_argument('--heavy', type=int, default=12,
+                        help='Number of slowest logged queries to time with --partitioned')
+    args = parser.parse_args(argv)
+
+    ensure_reuters_disk_index(args.index, args.data_dir)
+    worker_counts = [int(count) for count in args.workers.split(',')]
+    print(f"Snapshot: {args.index} ({os.path.getsize(args.index) / 2**20:.1f} MB), "
+          f"{os.cpu_count()} CPUs, mode={args.mode}")
+    if args.partitioned:
+        partition_report(args.index, load_query_log(args.query_log), worker_counts, args.mode, args.heavy)
+        return 0
+    queries = load_query_log(args.query_log) * args.passes
+    print(f"{'Workers':>7} {'QPS':>8} {'Private MB/worker':>18} {'Total PSS MB':>13}")
+    print("-" * 50)
+    for workers in worker_counts:
+        with QueryWorkerPool(args.index, workers, args.mode) as pool:
+            pool.map(queries[:workers * 8], chunksize=1)
+            start = time.perf_counter()
+            pool.map(queries)
+            elapsed = time.perf_counter() - start
+            memory = [usage for usage in pool.memory() if usage]
+        private = sum(usage['private'] for usage in memory) / len(memory) / 2**20 if memory else float('nan')
+        pss = sum(usage['pss'] for usage in memory) / 2**20 if memory else float('nan')
+        print(f"{workers:>7} {len(queries) / elapsed:>8.1f} {private:>18.1f} {pss:>13.1f}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,142 @@
+"""
+概率草图
+HyperLogLog 基数估计，用于在不展开倒排列表的情况下估计并集的文档数；
+Count-Min 频率估计，用于缓存准入时比较访问频率（TinyLFU）
+"""
+
+import math
+import hashlib
+from typing import Iterable
+
+
+def hash64(value: str) -> int:
+    """返回字符串的 64 位哈希（跨进程稳定，不受 PYTHONHASHSEED 影响）"""
+    return int.from_bytes(hashlib.blake2b(value.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+class HyperLogLog:
+    """
+    HyperLogLog 基数估计
+
+    m = 2^precision 个寄存器，每个寄存器记录落入该桶的哈希值中
+    前导零个数的最大值。标准误差约为 1.04 / sqrt(m)
+    """
+
+    def __init__(self, precision: int = 10):
+        """
+        初始化草图
+
+        Args:
+            precision: 寄存器数的以 2 为底的对数（4-16）
+        """
+        if not 4 <= precision <= 16:
+            raise ValueError(f"precision 必须在 4 到 16 之间: {precision}")
+        self.precision = precision
+        self.registers = bytearray(1 << precision)
+
+    def add_hash(self, value: int):
+        """加入一个 64 位哈希值"""
+        p = self.precision
+        slot = value >> (64 - p)
+        rest = value & ((1 << (64 - p)) - 1)
+        rank = (64 - p) - rest.bit_length() + 1
+        if rank > self.registers[slot]:
+            self.registers[slot] = rank
+
+    def update(self, hashes: Iterable[int]):
+        """批量加入哈希值"""
+        for value in hashes:
+            self.add_hash(value)
+
+    def merge(self, other: 'HyperLogLog'):
+        """
+        并入另一个草图（逐寄存器取最大值），结果估计两者并集的基数
+
+        寄存器值不超过 64，把全部寄存器看作一个大整数的 8 位通道，
+        用 SWAR 位运算一次完成所有通道的比较和取最大值
+        """
+        if other.precision != self.precision:
+            raise ValueError("只能合并 precision 相同的草图")
+        size = len(self.registers)
+        high_bits = int.from_bytes(b'\x80' * size, 'little')
+        a = int.from_bytes(self.registers, 'little')
+        b = int.from_bytes(other.registers, 'little')
+        # 每个通道 (a | 0x80) - b 的最高位为 1 当且仅当 a >= b，且通道间不会借位
+        mask = ((((a | high_bits) - b) & high_bits) >> 7) * 0xFF
+        merged = (a & mask) | (b & ~mask)
+        self.registers = bytearray(merged.to_bytes(size, 'little'))
+
+    def copy(self) -> 'HyperLogLog':
+        """返回草图的副本"""
+        sketch = HyperLogLog(self.precision)
+        sketch.registers = bytearray(self.registers)
+        return sketch
+
+    def estimate(self) -> float:
+        """估计已加入元素的基数"""
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        registers = bytes(self.registers)
+        harmonic = sum(registers.count(r) * 2.0 ** -r for r in range(max(registers) + 1))
+        raw = alpha * m * m / harmonic
+        zeros = self.registers.count(0)
+        # 小基数时改用线性计数
+        if raw <= 2.5 * m and zeros:
+            return m * math.log(m / zeros)
+        return raw
+
+    def __len__(self) -> int:
+        return int(round(self.estimate()))
+
+
+class CountMinSketch:
+    """
+    带老化的 Count-Min 频率草图（TinyLFU 的频率估计器）
+
+    depth 行计数器，每行用一个哈希函数定位；估计值取各行计数的最小值，
+    只会高估。计数器上限为 15（即 4 位计数器），累计加入 sample_size 次后
+    所有计数减半，使频率估计反映近期的访问
+    """
+
+    MAX_COUNT = 15
+
+    def __init__(self, width: int = 4096, depth: int = 4, sample_size: int = None):
+        """
+        初始化草图
+
+        Args:
+            width: 每行计数器数，向上取整为 2 的幂
+            depth: 行数
+            sample_size: 老化周期，默认为 10 × width
+        """
+        self.width = 1 << max(0, width - 1).bit_length()
+        self.depth = depth
+        self.sample_size = sample_size or 10 * self.width
+        self.table = bytearray(self.width * depth)
+        self.additions = 0
+
+    def _slots(self, value: int):
+        """一个 64 位哈希值在各行中的计数器下标（双重哈希）"""
+        mask = self.width - 1
+        low = value & 0xFFFFFFFF
+        high = (value >> 32) | 1
+        return [row * self.width + ((low + row * high) & mask) for row in range(self.depth)]
+
+    def add(self, value: int):
+        """记录一次访问（只增加最小的计数器，即保守更新）"""
+        table = self.table
+        slots = self._slots(value)
+        smallest = min(table[slot] for slot in slots)
+        if smallest < self.MAX_COUNT:
+            for slot in slots:
+                if table[slot] == smallest:
+                    table[slot] = smallest + 1
+        self.additions += 1
+        if self.additions >= self.sample_size:
+            self.table = bytearray(count >> 1 for count in table)
+            self.additions //= 2
+
+    def estimate(self, value: int) -> int:
+        """估计访问次数"""
+        table = self.table
+        return min(table[slot] for slot in self._slots(value))
@@ -0,0 +1,309 @@
+"""
+外存索引构建（SPIMI，single-pass in-memory indexing）
+语料大于内存时直接构建磁盘索引：文档逐个分析，倒排项以变长整数编码追加到
+内存中各词项的缓冲区，估计的内存占用达到预算时把当前块按词项排序写成临时
+运行文件（run）并清空；全部文档处理完后，用堆对各运行文件做 k 路归并，
+按字典序把每个词项的倒排列表写入 DiskIndexWriter。
+
+文档按加入顺序编号，后写出的运行文件中的文档序号都更大，同一词项在各运行
+文件中的倒排列表首尾相接即有序。文档内容写入临时文件，最后流式写入索引；
+常驻内存的只有文档ID、文档长度和最终文件的词典：
+
+    python spimi.py --data-dir data --output output/reuters.idx --memory-mb 4
+"""
+
+import os
+import sys
+import time
+import heapq
+import shutil
+import struct
+import argparse
+import tempfile
+import itertools
+from array import array
+from operator import itemgetter
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple, Union
+
+from disk_index import DiskIndexWriter, decode_varint, encode_varint
+from inverted_index import InvertedIndex
+
+# 内存块中每个词项的估计开销（字节）：词项字符串、字典槽位、
+# [缓冲区, 最后文档序号] 列表、bytearray 头和预留空间
+TERM_OVERHEAD = 240
+# 临时文档文件中每篇文档的长度前缀
+_DOC_HEADER = struct.Struct('<I')
+# 读写运行文件的缓冲区大小
+_IO_BUFFER = 1 << 20
+
+
+def _read_varint(f: BinaryIO) -> Optional[int]:
+    """从文件读取一个变长整数，文件结束时返回 None"""
+    result = 0
+    shift = 0
+    while True:
+        byte = f.read(1)
+        if not byte:
+            return None
+        result |= (byte[0] & 0x7F) << shift
+        if byte[0] < 0x80:
+            return result
+        shift += 7
+
+
+def decode_run_postings(buf, positional: bool) -> Iterator[Tuple[int, Union[List[int], int]]]:
+    """
+    解码运行文件中一个词项的倒排项流（不分块，首项的差值即文档序号）
+
+    Yields:
+        (文档序号, 位置列表或词频)
+    """
+    pos = 0
+    ordinal = 0
+    end = len(buf)
+    while pos < end:
+        delta, pos = decode_varint(buf, pos)
+        ordinal += delta
+        tf, pos = decode_varint(buf, pos)
+        if not positional:
+            yield ordinal, tf
+            continue
+        positions = []
+        position = 0
+        for _ in range(tf):
+            delta, pos = decode_varint(buf, pos)
+            position += delta
+            positions.append(position)
+        yield ordinal, positions
+
+
+class SpimiBuilder:
+    """按内存预算分块构建磁盘索引"""
+
+    def __init__(self, path: str, memory_budget: int = 64 * 2**20, index_options: str = 'positions',
+                 field_options: Dict[str, str] = None, store_documents: bool = True, temp_dir: str = None):
+        """
+        开始构建
+
+        Args:
+            path: 磁盘索引文件路径
+            memory_budget: 内存块的字节数上限，超过时写出一个运行文件
+            index_options: 索引选项（见 inverted_index.INDEX_OPTIONS）
+            field_options: 按字段覆盖 index_options
+            store_documents: 是否在索引中保存文档内容
+            temp_dir: 运行文件所在目录，默认为系统临时目录
+        """
+        self.path = path
+        self.memory_budget = memory_budget
+        # 分析器：与内存索引相同的预处理和字段规则
+        self.analyzer = InvertedIndex(index_options=index_options, field_options=field_options)
+        self._temp_dir = tempfile.mkdtemp(prefix='spimi-', dir=temp_dir)
+        # 内存块：{词项: [倒排项流, 最后文档序号]}
+        self._block = {}
+        self._block_bytes = 0
+        self.doc_ids: List[str] = []
+        self.doc_lengths = array('Q')
+        self._documents = None
+        if store_documents:
+            self._documents = open(os.path.join(self._temp_dir, 'documents'), 'wb', buffering=_IO_BUFFER)
+        self.runs: List[str] = []
+        # 统计
+        self.peak_block_bytes = 0
+        self.run_bytes = 0
+
+    def add_document(self, doc_id: str, content: Union[str, Dict[str, str]]):
+        """
+        加入一篇文档（文档ID须唯一）
+
+        Args:
+            doc_id: 文档唯一标识
+            content: 文档内容，或 {字段名: 字段内容} 字典
+        """
+        content, length, postings = self.analyzer._analyze_document(content)
+        ordinal = len(self.doc_ids)
+        for term, value in postings.items():
+            if value.__class__ is int:
+                self._append(term, ordinal, value)
+            else:
+                self._append(term, ordinal, len(value), value)
+        self.doc_ids.append(doc_id)
+        self.doc_lengths.append(length)
+        if self._documents is not None:
+            data = content.encode('utf-8')
+            self._documents.write(_DOC_HEADER.pack(len(data)))
+            self._documents.write(data)
+        if self._block_bytes > self.peak_block_bytes:
+            self.peak_block_bytes = self._block_bytes
+        if self._block_bytes >= self.memory_budget:
+            self._spill()
+
+    def _append(self, term: str, ordinal: int, tf: int, positions: List[int] = None):
+        """把一个倒排项追加到词项的缓冲区"""
+        entry = self._block.get(term)
+        if entry is None:
+            entry = self._block[term] = [bytearray(), 0]
+            self._block_bytes += TERM_OVERHEAD + len(term)
+        buf = entry[0]
+        size = len(buf)
+        encode_varint(ordinal - entry[1], buf)
+        entry[1] = ordinal
+        encode_varint(tf, buf)
+        if positions is not None:
+            last = 0
+            for position in positions:
+                encode_varint(position - last, buf)
+                last = position
+        self._block_bytes += len(buf) - size
+
+    def _spill(self):
+        """把内存块按词项排序写成运行文件：每个词项为 (词项长度, 词项, 倒排项流长度, 倒排项流)"""
+        path = os.path.join(self._temp_dir, f'run-{len(self.runs):05d}')
+        header = bytearray()
+        with open(path, 'wb', buffering=_IO_BUFFER) as f:
+            for term in sorted(self._block):
+                buf = self._block[term][0]
+                encoded = term.encode('utf-8')
+                del header[:]
+                encode_varint(len(encoded), header)
+                header += encoded
+                encode_varint(len(buf), header)
+                f.write(header)
+                f.write(buf)
+            self.run_bytes += f.tell()
+        self.runs.append(path)
+        self._block = {}
+        self._block_bytes = 0
+
+    @staticmethod
+    def _read_run(path: str, run: int) -> Iterator[Tuple[str, int, bytes]]:
+        """顺序读取运行文件，产出 (词项, 运行文件编号, 倒排项流)"""
+        with open(path, 'rb', buffering=_IO_BUFFER) as f:
+            while True:
+                length = _read_varint(f)
+                if length is None:
+                    return
+                term = f.read(length).decode('utf-8')
+                yield term, run, f.read(_read_varint(f))
+
+    def _read_documents(self) -> Iterator[str]:
+        """按文档序号读回临时文件中的文档内容"""
+        with open(self._documents.name, 'rb', buffering=_IO_BUFFER) as f:
+            for _ in range(len(self.doc_ids)):
+                length, = _DOC_HEADER.unpack(f.read(_DOC_HEADER.size))
+                yield f.read(length).decode('utf-8')
+
+    def finish(self) -> Dict:
+        """
+        归并运行文件，写出磁盘索引并删除临时文件
+
+        先写入临时文件再改名，失败时不会留下损坏的索引文件
+
+        Returns:
+            统计：文档数、词项数、运行文件数和字节数、内存块峰值字节数、索引文件字节数
+        """
+        if self._documents is not None:
+            self._documents.close()
+        # 最后一块不必写出，直接在内存中参与归并
+        sources = [self._read_run(path, run) for run, path in enumerate(self.runs)]
+        last = self._block
+        sources.append((term, len(self.runs), last[term][0]) for term in sorted(last))
+        temp_path = self.path + '.tmp'
+        writer = DiskIndexWriter(temp_path, self.analyzer.index_options, self.analyzer.fields)
+        try:
+            # 同一词项按运行文件编号（即文档序号）先后出现
+            for term, group in itertools.groupby(heapq.merge(*sources), key=itemgetter(0)):
+                positional = self.analyzer.field_option(term) == 'positions'
+                writer.add_term(term, itertools.chain.from_iterable(
+                    decode_run_postings(buf, positional) for _, _, buf in group))
+            writer.close(self.doc_ids, self.doc_lengths,
+                         self._read_documents() if self._documents is not None else None)
+        except BaseException:
+            writer._file.close()
+            os.remove(temp_path)
+            raise
+        finally:
+            self._block = {}
+            self._block_bytes = 0
+            shutil.rmtree(self._temp_dir, ignore_errors=True)
+        os.replace(temp_path, self.path)
+        return {
+            'documents': len(self.doc_ids),
+            'terms': len(writer._terms),
+            'runs': len(self.runs) + bool(last),
+            'run_bytes': self.run_bytes,
+            'peak_block_bytes': self.peak_block_bytes,
+            'file_bytes': os.path.getsize(self.path),
+        }
+
+    def abort(self):
+        """放弃构建，删除临时文件"""
+        if self._documents is not None:
+            self._documents.close()
+        self._block = {}
+        shutil.rmtree(self._temp_dir, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc_info):
+        if exc_type is not None:
+            self.abort()
+
+
+def peak_rss() -> Optional[int]:
+    """进程的峰值常驻内存（字节），不支持的平台返回 None"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 以 KB 为单位，macOS 以字节为单位
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def main(argv=None):
+    import tracemalloc
+    from parse_reuters import iter_reuters_documents
+
+    parser = argparse.ArgumentParser(description='Build a disk index from Reuters with a capped memory budget')
+    parser.add_argument('--data-dir', default='data', help='Directory with Reuters SGML files')
+    parser.add_argument('--output', default=os.path.join('output', 'reuters.idx'), help='Disk index file to write')
+    parser.add_argument('--memory-mb', type=float, default=4.0, help='Memory budget for buffered postings in MB')
+    parser.add_argument('--index-options', choices=('docs', 'freqs', 'positions'), default='positions',
+                        help='Information stored per posting')
+    parser.add_argument('--max-docs', type=int, default=None, help='Index only the first N documents')
+    parser.add_argument('--temp-dir', default=None, help='Directory for sorted runs')
+    parser.add_argument('--trace-memory', action='store_true',
+                        help='Also report the peak Python heap via tracemalloc (several times slower)')
+    args = parser.parse_args(argv)
+
+    os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+    if args.trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    with SpimiBuilder(args.output, int(args.memory_mb * 2**20), args.index_options,
+                      temp_dir=args.temp_dir) as builder:
+        for doc in iter_reuters_documents(args.data_dir, args.max_docs, verbose=False):
+            builder.add_document(doc['id'], doc['text'])
+        results = builder.finish()
+    elapsed = time.perf_counter() - start
+    traced_peak = None
+    if args.trace_memory:
+        _, traced_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    rss = peak_rss()
+    print(f"Indexed {results['documents']} documents, {results['terms']} terms in {elapsed:.1f}s")
+    print(f"Budget:            {args.memory_mb:.1f} MB")
+    print(f"Peak block:        {results['peak_block_bytes'] / 2**20:.1f} MB (estimated)")
+    if traced_peak is not None:
+        print(f"Peak Python heap:  {traced_peak / 2**20:.1f} MB (tracemalloc)")
+    if rss is not None:
+        print(f"Peak RSS:          {rss / 2**20:.1f} MB")
+    print(f"Runs:              {results['runs']} ({results['run_bytes'] / 2**20:.1f} MB spilled)")
+    print(f"Index:             {args.output} ({results['file_bytes'] / 2**20:.1f} MB)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
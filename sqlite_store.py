@@ -0,0 +1,415 @@
+"""
+SQLite 倒排存储
+把词典、按块编码的倒排列表和文档内容保存在本地 SQLite 数据库中（标准库
+sqlite3）。与 JSON 快照不同（save_to_file / load_from_file 每次完整重写、完整
+载入），添加和删除文档以事务增量更新数据库，索引打开即可查询，倒排列表
+按需读取解码。
+
+倒排列表按文档序号每 BLOCK_SIZE 项存为一行，每块独立编码（见
+disk_index.encode_postings）。文档序号自增且不复用，新文档的倒排项总是追加在
+末尾，添加文档只需改写各词项的最后一块；删除文档只改写包含它的块
+"""
+
+import os
+import json
+import sqlite3
+from collections import defaultdict
+from collections.abc import Mapping
+from typing import Callable, Dict, Iterable, Iterator, List, Set, Tuple, Union
+
+from disk_index import BLOCK_SIZE, encode_postings, decode_postings
+
+# 分析文档的函数：内容 -> (保存的文档内容, 文档长度, {词项: 位置列表或词频})，
+# 即 InvertedIndex._analyze_document
+Analyzer = Callable[[Union[str, Dict[str, str]]], Tuple[str, int, Dict[str, Union[List[int], int]]]]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS documents (
+    ordinal INTEGER PRIMARY KEY AUTOINCREMENT,
+    doc_id TEXT NOT NULL UNIQUE,
+    length INTEGER NOT NULL,
+    content TEXT NOT NULL,
+    terms TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS terms (
+    term TEXT PRIMARY KEY,
+    df INTEGER NOT NULL,
+    cf INTEGER NOT NULL,
+    positional INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS postings (
+    term TEXT NOT NULL,
+    last_ordinal INTEGER NOT NULL,
+    data BLOB NOT NULL,
+    PRIMARY KEY (term, last_ordinal)
+) WITHOUT ROWID;
+"""
+
+
+def _tf(value: Union[List[int], int]) -> int:
+    return value if value.__class__ is int else len(value)
+
+
+class SqliteStore:
+    """SQLite 数据库中的倒排索引"""
+
+    def __init__(self, path: str, index_options: str = 'positions', field_options: Dict[str, str] = None):
+        """
+        打开（或创建）数据库
+
+        Args:
+            path: 数据库文件路径
+            index_options: 新建数据库的索引选项；已有数据库以保存的选项为准
+            field_options: 新建数据库的字段索引选项
+        """
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        # 预写日志模式：提交不必每次 fsync，读写互不阻塞
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        with self.conn:
+            self.conn.executescript(SCHEMA)
+            meta = dict(self.conn.execute('SELECT key, value FROM meta'))
+            if not meta:
+                meta = {'index_options': index_options, 'fields': json.dumps(field_options or {}),
+                        'total_tokens': '0'}
+                self.conn.executemany('INSERT INTO meta (key, value) VALUES (?, ?)', meta.items())
+        self.index_options = meta['index_options']
+        # 字段表由分析器就地扩充（见 InvertedIndex._analyze_fields），写事务提交时保存
+        self.fields: Dict[str, str] = json.loads(meta['fields'])
+        self.dictionary = SqliteDictionary(self)
+        self.documents = SqliteDocuments(self)
+        self.doc_ids: Dict[int, str] = {}
+        self.ordinals: Dict[str, int] = {}
+        self.doc_lengths: Dict[str, int] = {}
+        self._load_documents()
+        # 解码统计
+        self.decoded_terms = 0
+        self.decoded_bytes = 0
+
+    def _load_documents(self):
+        """载入文档表：文档序号 <-> 文档ID 和文档长度保存在进程内（就地更新，索引持有同一字典）"""
+        self.doc_ids.clear()
+        self.ordinals.clear()
+        self.doc_lengths.clear()
+        for ordinal, doc_id, length in self.conn.execute(
+                'SELECT ordinal, doc_id, length FROM documents ORDER BY ordinal'):
+            self.doc_ids[ordinal] = doc_id
+            self.ordinals[doc_id] = ordinal
+            self.doc_lengths[doc_id] = length
+        self.total_tokens = int(self.conn.execute(
+            "SELECT value FROM meta WHERE key = 'total_tokens'").fetchone()[0])
+
+    def _save_meta(self):
+        self.conn.executemany('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)', [
+            ('fields', json.dumps(self.fields)),
+            ('total_tokens', str(self.total_tokens)),
+        ])
+
+    def _transaction(self, work: Callable):
+        """在一个事务中执行 work；失败时回滚，并从数据库重新载入进程内的文档表"""
+        try:
+            with self.conn:
+                result = work()
+                self._save_meta()
+            return result
+        except BaseException:
+            self._load_documents()
+            raise
+
+    # ---- 写入 ----
+
+    def add_documents(self, items: Iterable[Tuple[str, Union[str, Dict[str, str]]]], analyze: Analyzer) -> Set[str]:
+        """
+        在一个事务中添加文档，已存在的文档ID先删除旧文档（upsert）
+
+        Args:
+            items: (文档ID, 文档内容) 序列
+            analyze: 分析函数（见 Analyzer）
+
+        Returns:
+            倒排列表有变化的词项
+        """
+        def work():
+            touched = set()
+            # 同一批中重复的文档ID以最后一次为准；先一次删除全部旧文档，
+            # 同一块中的多个旧倒排项只需重写一次该块
+            documents = dict(items)
+            existing = [doc_id for doc_id in documents if doc_id in self.ordinals]
+            if existing:
+                self._delete(existing, touched)
+            pending = defaultdict(list)
+            for doc_id, content in documents.items():
+                text, length, postings = analyze(content)
+                ordinal = self.conn.execute(
+                    'INSERT INTO documents (doc_id, length, content, terms) VALUES (?, ?, ?, ?)',
+                    (doc_id, length, text, '\n'.join(postings))).lastrowid
+                self.doc_ids[ordinal] = doc_id
+                self.ordinals[doc_id] = ordinal
+                self.doc_lengths[doc_id] = length
+                self.total_tokens += length
+                for term, value in postings.items():
+                    pending[term].append((ordinal, value))
+            self._append_postings(pending, touched)
+            return touched
+
+        return self._transaction(work)
+
+    def delete_documents(self, doc_ids: Iterable[str]) -> Tuple[int, Set[str]]:
+        """
+        在一个事务中删除文档
+
+        Returns:
+            (删除的文档数, 倒排列表有变化的词项)
+        """
+        def work():
+            touched = set()
+            existing = list(dict.fromkeys(doc_id for doc_id in doc_ids if doc_id in self.ordinals))
+            if existing:
+                self._delete(existing, touched)
+            return len(existing), touched
+
+        return self._transaction(work)
+
+    def _insert_blocks(self, term: str, postings: List, positional: bool):
+        """把按文档序号升序的倒排项每 BLOCK_SIZE 项编码为一行"""
+        rows = []
+        for i in range(0, len(postings), BLOCK_SIZE):
+            chunk = postings[i:i + BLOCK_SIZE]
+            rows.append((term, chunk[-1][0], encode_postings(chunk, positional)))
+        self.conn.executemany('INSERT INTO postings (term, last_ordinal, data) VALUES (?, ?, ?)', rows)
+
+    def _append_postings(self, pending: Dict[str, List], touched: Set[str]):
+        """把缓冲的新倒排项追加到各词项末尾：未满的最后一块与新倒排项合并后重新分块"""
+        conn = self.conn
+        for term in sorted(pending):
+            postings = pending[term]
+            positional = postings[0][1].__class__ is not int
+            last = conn.execute(
+                'SELECT last_ordinal, data FROM postings WHERE term = ? ORDER BY last_ordinal DESC LIMIT 1',
+                (term,)).fetchone()
+            if last is not None:
+                tail = list(decode_postings(last[1], 0, len(last[1]), positional))
+                if len(tail) < BLOCK_SIZE:
+                    conn.execute('DELETE FROM postings WHERE term = ? AND last_ordinal = ?', (term, last[0]))
+                    postings = tail + postings
+            self._insert_blocks(term, postings, positional)
+            new = pending[term]
+            conn.execute(
+                'INSERT INTO terms (term, df, cf, positional) VALUES (?, ?, ?, ?) '
+                'ON CONFLICT (term) DO UPDATE SET df = df + excluded.df, cf = cf + excluded.cf',
+                (term, len(new), sum(_tf(value) for _, value in new), int(positional)))
+            touched.add(term)
+        pending.clear()
+
+    def _delete(self, doc_ids: List[str], touched: Set[str]):
+        """
+        删除文档：从包含它们的块中去掉倒排项，更新文档频率和集合频率
+
+        同一词项的待删文档序号按升序查找所在的块，每个块只解码和重写一次
+        """
+        conn = self.conn
+        removals = defaultdict(set)
+        for doc_id in doc_ids:
+            ordinal = self.ordinals[doc_id]
+            terms, = conn.execute('SELECT terms FROM documents WHERE ordinal = ?', (ordinal,)).fetchone()
+            for term in terms.split('\n') if terms else ():
+                removals[term].add(ordinal)
+        for term in sorted(removals):
+            ordinals = removals[term]
+            row = conn.execute('SELECT positional FROM terms WHERE term = ?', (term,)).fetchone()
+            if row is None:
+                continue
+            positional = row[0]
+            # 找出包含各文档序号的块：块按最后文档序号排列，第一个不小于序号的块即是
+            blocks = {}
+            block_last = -1
+            for ordinal in sorted(ordinals):
+                if ordinal <= block_last:
+                    continue
+                row = conn.execute(
+                    'SELECT last_ordinal, data FROM postings WHERE term = ? AND last_ordinal >= ? '
+                    'ORDER BY last_ordinal LIMIT 1', (term, ordinal)).fetchone()
+                if row is None:
+                    break
+                block_last = row[0]
+                blocks[block_last] = row[1]
+            df = cf = 0
+            for last_ordinal, data in blocks.items():
+                block = list(decode_postings(data, 0, len(data), positional))
+                remaining = [posting for posting in block if posting[0] not in ordinals]
+                if len(remaining) == len(block):
+                    continue
+                df += len(block) - len(remaining)
+                cf += sum(_tf(value) for ordinal, value in block if ordinal in ordinals)
+                conn.execute('DELETE FROM postings WHERE term = ? AND last_ordinal = ?', (term, last_ordinal))
+                if remaining:
+                    self._insert_blocks(term, remaining, positional)
+            if df:
+                conn.execute('UPDATE terms SET df = df - ?, cf = cf - ? WHERE term = ?', (df, cf, term))
+                conn.execute('DELETE FROM terms WHERE term = ? AND df <= 0', (term,))
+                touched.add(term)
+        for doc_id in doc_ids:
+            ordinal = self.ordinals.pop(doc_id)
+            conn.execute('DELETE FROM documents WHERE ordinal = ?', (ordinal,))
+            del self.doc_ids[ordinal]
+            self.total_tokens -= self.doc_lengths.pop(doc_id)
+
+    def replace_with(self, index):
+        """
+        用内存中的 InvertedIndex 替换数据库的全部内容（一个事务）
+
+        Args:
+            index: InvertedIndex 实例
+        """
+        def work():
+            conn = self.conn
+            for table in ('documents', 'terms', 'postings'):
+                conn.execute(f'DELETE FROM {table}')
+            self._load_documents()
+            self.index_options = index.index_options
+            self.fields.clear()
+            self.fields.update(index.fields)
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('index_options', ?)",
+                         (self.index_options,))
+
+            ordinals = {doc_id: ordinal for ordinal, doc_id in enumerate(index.documents, 1)}
+            doc_terms = defaultdict(list)
+            for term in sorted(index.index):
+                postings = sorted((ordinals[doc_id], value) for doc_id, value in index.index[term].items()
+                                  if doc_id in ordinals)
+                if not postings:
+                    continue
+                positional = postings[0][1].__class__ is not int
+                self._insert_blocks(term, postings, positional)
+                conn.execute('INSERT INTO terms (term, df, cf, positional) VALUES (?, ?, ?, ?)',
+                             (term, len(postings), sum(_tf(value) for _, value in postings), int(positional)))
+                for ordinal, _ in postings:
+                    doc_terms[ordinal].append(term)
+            conn.executemany(
+                'INSERT INTO documents (ordinal, doc_id, length, content, terms) VALUES (?, ?, ?, ?, ?)',
+                ((ordinal, doc_id, index.doc_lengths[doc_id], index.documents[doc_id],
+                  '\n'.join(doc_terms.get(ordinal, ())))
+                 for doc_id, ordinal in ordinals.items()))
+            self._load_documents()
+            self.total_tokens = sum(self.doc_lengths.values())
+
+        self._transaction(work)
+
+    # ---- 读取 ----
+
+    def postings(self, term: str) -> Dict[str, Union[List[int], int]]:
+        """读取并解码一个词项的倒排列表，词项不存在时引发 KeyError"""
+        rows = self.conn.execute(
+            'SELECT p.data, t.positional FROM postings p JOIN terms t USING (term) '
+            'WHERE p.term = ? ORDER BY p.last_ordinal', (term,)).fetchall()
+        if not rows:
+            raise KeyError(term)
+        doc_ids = self.doc_ids
+        result = {}
+        for data, positional in rows:
+            self.decoded_bytes += len(data)
+            for ordinal, value in decode_postings(data, 0, len(data), positional):
+                result[doc_ids[ordinal]] = value
+        self.decoded_terms += 1
+        return result
+
+    def size_bytes(self) -> int:
+        """数据库文件（含未合并的预写日志）的字节数"""
+        return sum(os.path.getsize(self.path + suffix)
+                   for suffix in ('', '-wal') if os.path.exists(self.path + suffix))
+
+    def close(self):
+        """合并预写日志并关闭数据库"""
+        self.conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        self.conn.close()
+
+
+class SqliteDictionary(Mapping):
+    """数据库中的词典：{词项: (文档频率, 集合频率, 是否保存位置)}"""
+
+    def __init__(self, store: SqliteStore):
+        self._conn = store.conn
+
+    def __getitem__(self, term: str) -> Tuple[int, int, bool]:
+        row = self._conn.execute('SELECT df, cf, positional FROM terms WHERE term = ?', (term,)).fetchone()
+        if row is None:
+            raise KeyError(term)
+        return row[0], row[1], bool(row[2])
+
+    def __contains__(self, term) -> bool:
+        return term.__class__ is str and self._conn.execute(
+            'SELECT 1 FROM terms WHERE term = ?', (term,)).fetchone() is not None
+
+    def __iter__(self) -> Iterator[str]:
+        return (term for term, in self._conn.execute('SELECT term FROM terms ORDER BY term').fetchall())
+
+    def __len__(self) -> int:
+        return self._conn.execute('SELECT COUNT(*) FROM terms').fetchone()[0]
+
+
+class SqliteDocuments(Mapping):
+    """数据库中的文档内容：{文档ID: 文档内容}，按需读取"""
+
+    def __init__(self, store: SqliteStore):
+        self._store = store
+
+    def __getitem__(self, doc_id: str) -> str:
+        row = self._store.conn.execute('SELECT content FROM documents WHERE doc_id = ?', (doc_id,)).fetchone()
+        if row is None:
+            raise KeyError(doc_id)
+        return row[0]
+
+    def __contains__(self, doc_id) -> bool:
+        return doc_id in self._store.doc_lengths
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._store.doc_lengths)
+
+    def __len__(self) -> int:
+        return len(self._store.doc_lengths)
+
+
+class SqliteCorpusStats:
+    """数据库中的语料统计，接口同 corpus_stats.CorpusStats（随数据库的写入即时变化）"""
+
+    def __init__(self, store: SqliteStore):
+        self._store = store
+
+    @property
+    def num_docs(self) -> int:
+        """文档数"""
+        return len(self._store.doc_lengths)
+
+    @property
+    def total_tokens(self) -> int:
+        """词项总数"""
+        return self._store.total_tokens
+
+    @property
+    def avgdl(self) -> float:
+        """平均文档长度"""
+        return self.total_tokens / self.num_docs if self.num_docs else 0.0
+
+    def df(self, term: str) -> int:
+        """词项的文档频率"""
+        entry = self._store.dictionary.get(term)
+        return entry[0] if entry else 0
+
+    def cf(self, term: str) -> int:
+        """词项在整个语料中的出现次数"""
+        entry = self._store.dictionary.get(term)
+        return entry[1] if entry else 0
+
+    def doc_freqs(self) -> Iterable[Tuple[str, int]]:
+        """全部 (词项, 文档频率)，顺序不定"""
+        return self._store.conn.execute('SELECT term, df FROM terms')
+
+    def top_terms(self, k: int = 10) -> List[Tuple[str, int]]:
+        """按文档频率降序返回前 k 个 (词项, 文档频率)"""
+        return self._store.conn.execute(
+            'SELECT term, df FROM terms ORDER BY df DESC, term LIMIT ?', (k,)).fetchall()
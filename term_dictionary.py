@@ -0,0 +1,233 @@
+"""
+有序词典与通配符支持
+实现前缀编码（front coding）的有序词典，支持 O(log n) 的前缀范围查找；
+以及字符 k-gram 索引，用于中缀和后缀通配符查询
+"""
+
+import re
+import bisect
+from collections import defaultdict
+from typing import Iterable, Iterator, List, Optional, Set, Tuple
+
+
+# 比任何词项字符都大的哨兵字符，用于计算前缀范围的上界
+_MAX_CHAR = '\U0010ffff'
+
+
+def wildcard_to_regex(pattern: str):
+    """
+    将通配符模式编译为正则表达式
+
+    支持 '*'（任意多个字符）和 '?'（单个字符）
+
+    Args:
+        pattern: 通配符模式，如 'petro*'、'*port*'、'b?nk'
+
+    Returns:
+        编译后的正则表达式对象
+    """
+    parts = []
+    for char in pattern:
+        if char == '*':
+            parts.append('.*')
+        elif char == '?':
+            parts.append('.')
+        else:
+            parts.append(re.escape(char))
+    return re.compile(''.join(parts) + r'\Z', re.DOTALL)
+
+
+def literal_prefix(pattern: str) -> str:
+    """返回通配符模式中第一个通配符之前的字面前缀"""
+    match = re.match(r'[^*?]*', pattern)
+    return match.group(0)
+
+
+class SortedTermDictionary:
+    """
+    前缀编码的有序词典
+
+    词项按字典序排列并分块存储：每块的首个词项完整保存（用于二分查找），
+    其余词项只保存与前一个词项的公共前缀长度和剩余后缀
+    """
+
+    def __init__(self, terms: Iterable[str], block_size: int = 16):
+        """
+        构建有序词典
+
+        Args:
+            terms: 词项集合
+            block_size: 每个前缀编码块包含的词项数
+        """
+        sorted_terms = sorted(set(terms))
+        self.block_size = block_size
+        self._size = len(sorted_terms)
+        # 每块的首个词项
+        self._heads: List[str] = []
+        # 每块其余词项的编码串：chr(公共前缀长度+1) + chr(后缀长度+1) + 后缀
+        self._tails: List[str] = []
+        # 最近解码的块，顺序访问时避免重复解码
+        self._cached_block = (-1, [])
+
+        for start in range(0, self._size, block_size):
+            block = sorted_terms[start:start + block_size]
+            self._heads.append(block[0])
+            encoded = []
+            previous = block[0]
+            for term in block[1:]:
+                shared = 0
+                limit = min(len(previous), len(term))
+                while shared < limit and previous[shared] == term[shared]:
+                    shared += 1
+                suffix = term[shared:]
+                encoded.append(chr(shared + 1) + chr(len(suffix) + 1) + suffix)
+                previous = term
+            self._tails.append(''.join(encoded))
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __iter__(self) -> Iterator[str]:
+        for block_no in range(len(self._heads)):
+            yield from self._decode_block(block_no)
+
+    def __contains__(self, term: str) -> bool:
+        position = self.lower_bound(term)
+        return position < self._size and self.term_at(position) == term
+
+    def _decode_block(self, block_no: int) -> List[str]:
+        """解码一个前缀编码块，返回其中的全部词项"""
+        if self._cached_block[0] == block_no:
+            return self._cached_block[1]
+        terms = [self._heads[block_no]]
+        encoded = self._tails[block_no]
+        i = 0
+        while i < len(encoded):
+            shared = ord(encoded[i]) - 1
+            length = ord(encoded[i + 1]) - 1
+            suffix = encoded[i + 2:i + 2 + length]
+            terms.append(terms[-1][:shared] + suffix)
+            i += 2 + length
+        self._cached_block = (block_no, terms)
+        return terms
+
+    def lower_bound(self, term: str) -> int:
+        """
+        返回第一个不小于 term 的词项序号
+
+        先在块首词项上二分定位块，再在块内二分，复杂度 O(log n)
+        """
+        block_no = bisect.bisect_right(self._heads, term) - 1
+        if block_no < 0:
+            return 0
+        block = self._decode_block(block_no)
+        return block_no * self.block_size + bisect.bisect_left(block, term)
+
+    def term_at(self, position: int) -> str:
+        """返回指定序号的词项"""
+        block_no, offset = divmod(position, self.block_size)
+        return self._decode_block(block_no)[offset]
+
+    def prefix_range(self, prefix: str) -> Tuple[int, int]:
+        """
+        返回以 prefix 开头的词项序号区间 [start, end)
+
+        Args:
+            prefix: 词项前缀
+
+        Returns:
+            (start, end) 序号区间
+        """
+        return self.lower_bound(prefix), self.prefix_end(prefix)
+
+    def prefix_end(self, prefix: str) -> int:
+        """返回第一个大于所有以 prefix 开头词项的序号"""
+        return self.lower_bound(prefix + _MAX_CHAR)
+
+    def iter_range(self, start: int, end: int) -> Iterator[str]:
+        """按序遍历 [start, end) 区间内的词项"""
+        if start >= end:
+            return
+        block_no, offset = divmod(start, self.block_size)
+        remaining = end - start
+        while remaining > 0 and block_no < len(self._heads):
+            block = self._decode_block(block_no)[offset:offset + remaining]
+            yield from block
+            remaining -= len(block)
+            block_no += 1
+            offset = 0
+
+    def prefix_terms(self, prefix: str) -> List[str]:
+        """返回所有以 prefix 开头的词项（按字典序）"""
+        start, end = self.prefix_range(prefix)
+        return list(self.iter_range(start, end))
+
+
+class KGramIndex:
+    """
+    字符 k-gram 索引
+
+    将每个词项加上边界符 '$' 后切分为长度为 k 的字符片段，
+    记录 {k-gram: 词项集合}，用于快速筛选中缀/后缀通配符的候选词项
+    """
+
+    BOUNDARY = '$'
+
+    def __init__(self, terms: Iterable[str] = (), k: int = 3):
+        """
+        构建 k-gram 索引
+
+        Args:
+            terms: 初始词项集合
+            k: 片段长度
+        """
+        self.k = k
+        self._grams = defaultdict(set)
+        for term in terms:
+            self.add_term(term)
+
+    def _kgrams(self, text: str) -> Set[str]:
+        """切分出 text 的全部 k-gram"""
+        return {text[i:i + self.k] for i in range(len(text) - self.k + 1)}
+
+    def add_term(self, term: str):
+        """加入一个词项"""
+        for gram in self._kgrams(self.BOUNDARY + term + self.BOUNDARY):
+            self._grams[gram].add(term)
+
+    def remove_term(self, term: str):
+        """移除一个词项"""
+        for gram in self._kgrams(self.BOUNDARY + term + self.BOUNDARY):
+            terms = self._grams.get(gram)
+            if terms is not None:
+                terms.discard(term)
+                if not terms:
+                    del self._grams[gram]
+
+    def candidates(self, pattern: str) -> Optional[Set[str]]:
+        """
+        返回可能匹配通配符模式的候选词项
+
+        候选集是所有固定片段 k-gram 对应词项集合的交集，仍需用正则做最终校验
+
+        Args:
+            pattern: 通配符模式
+
+        Returns:
+            候选词项集合；模式中没有足够长的固定片段时返回 None
+        """
+        marked = self.BOUNDARY + pattern + self.BOUNDARY
+        grams = set()
+        for segment in re.split(r'[*?]', marked):
+            grams |= self._kgrams(segment)
+        if not grams:
+            return None
+
+        # 从最小的集合开始求交集
+        postings = sorted((self._grams.get(gram, set()) for gram in grams), key=len)
+        result = set(postings[0])
+        for terms in postings[1:]:
+            if not result:
+                break
+            result &= terms
+        return result
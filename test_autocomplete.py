@@ -0,0 +1,121 @@
+"""
+查询词补全单元测试
+"""
+
+import os
+import random
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+from autocomplete import CompletionIndex
+from inverted_index import InvertedIndex
+
+
+def brute_force(index, prefix, k):
+    """按定义计算补全：以 prefix 开头的词项按 (-文档频率, 词项) 排序"""
+    terms = [term for term in index.index if term.startswith(prefix) and index.stats.df(term)]
+    return sorted(terms, key=lambda term: (-index.stats.df(term), term))[:k]
+
+
+class TestCompletionIndex(unittest.TestCase):
+    """补全索引测试类"""
+
+    def test_order(self):
+        """测试按文档频率降序、相同时按字典序"""
+        counts = {"oil": 5, "oils": 2, "oilseed": 2, "opec": 7, "petroleum": 1}
+        completions = CompletionIndex(lambda: counts.items(), lambda term: counts.get(term, 0), k=3)
+        self.assertEqual(completions.complete("oi"), ["oil", "oils", "oilseed"])
+        self.assertEqual(completions.complete("o", 2), ["opec", "oil"])
+        self.assertEqual(completions.complete(""), ["opec", "oil", "oils"])
+        self.assertEqual(completions.complete("oil", 10), ["oil", "oils", "oilseed"])
+        self.assertEqual(completions.complete("x"), [])
+
+    def test_popularity(self):
+        """测试给出查询热度时先按查询次数排序"""
+        counts = {"oil": 5, "oils": 2, "oilseed": 3}
+        completions = CompletionIndex(lambda: counts.items(), lambda term: counts.get(term, 0),
+                                      popularity={"oils": 4})
+        self.assertEqual(completions.complete("oi"), ["oils", "oil", "oilseed"])
+
+    def test_incremental_matches_rebuild(self):
+        """测试随机增删文档后，增量维护的缓存补全与按定义计算的结果相同"""
+        rng = random.Random(7)
+        words = [f"{a}{b}{c}" for a in "abc" for b in "abcd" for c in ("", "x", "yy", "zzz")]
+        index = InvertedIndex()
+        index.build_from_documents({f"doc{i}": " ".join(rng.choices(words, k=5)) for i in range(20)})
+        index.build_autocomplete(k=3)
+        # 缩小扫描阈值，使大多数前缀走缓存路径
+        index._completions.SCAN_LIMIT = 0
+        prefixes = ["", "a", "b", "ab", "ca", "cdx"]
+        next_id = 20
+        for step in range(60):
+            if rng.random() < 0.6 or len(index.documents) < 5:
+                index.add_document(f"doc{next_id}", " ".join(rng.choices(words, k=rng.randint(1, 6))))
+                next_id += 1
+            else:
+                index.delete_document(rng.choice(sorted(index.documents)))
+            for prefix in prefixes:
+                self.assertEqual(index.complete(prefix, 3), brute_force(index, prefix, 3), (step, prefix))
+
+    def test_touched_terms_only(self):
+        """测试少量文档变化时就地更新而不整体重建"""
+        index = InvertedIndex()
+        index.build_from_documents({f"doc{i}": f"oil common word{i}" for i in range(40)})
+        self.assertEqual(index.complete("oi"), ["oil"])
+        index.add_document("new", "oilseed oilseed")
+        index.delete_document("doc0")
+        with mock.patch.object(index._completions, 'rebuild') as rebuild:
+            self.assertEqual(index.complete("oi"), ["oil", "oilseed"])
+            self.assertEqual(index.complete("word", 50), brute_force(index, "word", 50))
+        rebuild.assert_not_called()
+
+
+class TestStorageBackends(unittest.TestCase):
+    """外部存储上的补全测试类"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.memory = InvertedIndex()
+        self.memory.build_from_documents({
+            "doc1": "oil prices rose",
+            "doc2": "oil exports and oilseed",
+            "doc3": "opec oil output",
+        })
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_disk_index(self):
+        """测试磁盘索引按词典顺序读取文档频率"""
+        path = os.path.join(self.temp_dir, "index.idx")
+        self.memory.save_disk_index(path)
+        disk = InvertedIndex()
+        disk.load_disk_index(path)
+        self.assertEqual(disk.complete("o"), brute_force(self.memory, "o", 10))
+        disk.disk_index.close()
+
+    def test_sqlite_and_reload(self):
+        """测试 SQLite 存储写入后更新补全，载入其他索引后重建"""
+        index = InvertedIndex()
+        index.open_sqlite(os.path.join(self.temp_dir, "index.sqlite"))
+        index.build_from_documents(dict(self.memory.documents))
+        self.assertEqual(index.complete("o"), brute_force(self.memory, "o", 10))
+        index.add_document("doc4", "oilseed oilseed crushing")
+        index.add_document("doc5", "oilseed")
+        self.assertEqual(index.complete("oil"), ["oil", "oilseed"])
+        index.delete_document("doc1")
+        index.delete_document("doc2")
+        self.assertEqual(index.complete("oil"), ["oilseed", "oil"])
+        index.sqlite_store.close()
+
+        path = os.path.join(self.temp_dir, "index.json")
+        self.memory.save_to_file(path)
+        index = InvertedIndex()
+        self.assertEqual(index.complete("o"), [])
+        index.load_from_file(path)
+        self.assertEqual(index.complete("o"), brute_force(self.memory, "o", 10))
+
+
+if __name__ == "__main__":
+    unittest.main()
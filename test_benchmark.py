@@ -0,0 +1,83 @@
+"""
+基准测试工具单元测试
+"""
+
+import unittest
+from inverted_index import InvertedIndex
+from benchmark import (percentile, generate_query_log, benchmark_queries,
+                       compare_results, query_runner, benchmark_build, run_scaling)
+from corpus_generator import ZipfCorpusGenerator
+
+
+class TestBenchmarkHelpers(unittest.TestCase):
+    """基准测试辅助函数测试类"""
+
+    def setUp(self):
+        """每个测试前的准备工作"""
+        self.documents = [
+            {'id': 'doc%d' % i, 'text': 'oil prices rose as trade talks stalled in market %d' % i}
+            for i in range(50)
+        ]
+        self.index = InvertedIndex()
+        for doc in self.documents:
+            self.index.add_document(doc['id'], doc['text'])
+
+    def test_percentile(self):
+        """测试最近秩百分位数"""
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile(values, 100), 100)
+        self.assertEqual(percentile([], 50), 0)
+
+    def test_query_log_deterministic(self):
+        """测试相同种子生成相同的查询日志"""
+        first = generate_query_log(self.index, self.documents, seed=7, per_type=3)
+        second = generate_query_log(self.index, self.documents, seed=7, per_type=3)
+        self.assertEqual(first, second)
+        for query in first:
+            query_runner(self.index, query)()
+
+    def test_query_log_from_index(self):
+        """测试未给出文档时从索引中的文档生成查询日志"""
+        self.assertEqual(generate_query_log(self.index, seed=7, per_type=3),
+                         generate_query_log(self.index, self.documents, seed=7, per_type=3))
+
+    def test_streamed_build(self):
+        """测试以可调用对象流式提供文档构建索引"""
+        generator = ZipfCorpusGenerator(vocab_size=500, seed=1)
+        index, results = benchmark_build(lambda: generator.documents(30), trace_memory=True)
+        self.assertEqual(results['documents'], 30)
+        self.assertEqual(len(index.documents), 30)
+        self.assertGreater(results['tracemalloc_peak_bytes'], 0)
+
+    def test_run_scaling(self):
+        """测试按语料规模依次运行基准测试"""
+        generator = ZipfCorpusGenerator(vocab_size=500, seed=1)
+        results = run_scaling(generator, [20, 40], repeat=1)
+        self.assertEqual([run['documents'] for run in results['runs']], [20, 40])
+        self.assertEqual(results['corpus']['vocab_size'], 500)
+        self.assertIn('phrase', results['runs'][0]['queries'])
+
+    def test_benchmark_queries(self):
+        """测试按查询类型汇总延迟"""
+        queries = [{'type': 'and', 'query': ['oil', 'trade']},
+                   {'type': 'phrase', 'query': 'oil prices'}]
+        results = benchmark_queries(self.index, queries, repeat=3)
+        self.assertEqual(set(results), {'and', 'phrase'})
+        self.assertEqual(results['and']['count'], 3)
+        self.assertLessEqual(results['and']['p50_ns'], results['and']['p99_ns'])
+
+    def test_compare_results(self):
+        """测试与基线比较时识别性能退化"""
+        baseline = {'build': {'docs_per_second': 1000.0, 'documents': 10},
+                    'queries': {'and': {'p95_ns': 1000, 'count': 5}}}
+        current = {'build': {'docs_per_second': 850.0, 'documents': 20},
+                   'queries': {'and': {'p95_ns': 1050, 'count': 5}}}
+        regressions = compare_results(current, baseline, threshold=0.10)
+        self.assertEqual([item['metric'] for item in regressions], ['build.docs_per_second'])
+        self.assertEqual(compare_results(baseline, baseline), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
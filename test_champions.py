@@ -0,0 +1,117 @@
+"""
+冠军列表单元测试
+"""
+
+import os
+import random
+import unittest
+from champions import ChampionList
+from inverted_index import InvertedIndex
+
+
+class TestChampionList(unittest.TestCase):
+    """冠军层测试类"""
+
+    def test_floor_bounds_non_champions(self):
+        """测试 floor 不低于任何冠军层之外文档的 impact"""
+        rng = random.Random(5)
+        impacts = {f"doc{i}": rng.random() for i in range(200)}
+        tier = ChampionList(10, avgdl=100.0)
+        for doc_id, impact in impacts.items():
+            tier.offer(doc_id, impact)
+        champions = set(tier.doc_ids())
+        self.assertEqual(champions, set(sorted(impacts, key=impacts.get)[-10:]))
+        self.assertEqual(tier.floor, max(impact for doc_id, impact in impacts.items() if doc_id not in champions))
+
+    def test_from_impacts(self):
+        """测试批量构建与逐个加入一致"""
+        impacts = [(i % 17 / 17, f"doc{i}") for i in range(100)]
+        built = ChampionList.from_impacts(impacts, 8, avgdl=50.0)
+        offered = ChampionList(8, avgdl=50.0)
+        for impact, doc_id in impacts:
+            offered.offer(doc_id, impact)
+        self.assertEqual(sorted(built.doc_ids()), sorted(offered.doc_ids()))
+        self.assertEqual(built.floor, offered.floor)
+        # 文档数不超过冠军层大小时没有冠军层之外的文档
+        self.assertEqual(ChampionList.from_impacts(impacts[:5], 8, avgdl=50.0).floor, 0.0)
+
+    def test_bound_scales_with_avgdl(self):
+        """测试平均文档长度变大时上界相应放宽"""
+        tier = ChampionList(4, avgdl=100.0)
+        tier.floor = 1.5
+        self.assertEqual(tier.bound(80.0), 1.5)
+        self.assertEqual(tier.bound(200.0), 3.0)
+
+
+class TestChampionRanking(unittest.TestCase):
+    """使用冠军列表的排序查询测试类"""
+
+    def setUp(self):
+        rng = random.Random(17)
+        vocabulary = [f"w{i}" for i in range(300)]
+        weights = [1 / (i + 1) for i in range(300)]
+        self.docs = {f"doc{i}": " ".join(rng.choices(vocabulary, weights, k=rng.randint(5, 80)))
+                     for i in range(400)}
+        self.exhaustive = InvertedIndex()
+        self.exhaustive.build_from_documents(self.docs)
+        self.index = InvertedIndex(champion_size=8)
+        self.index.build_from_documents(self.docs)
+        self.queries = ["w0 w1", "w0 w5 w40", "w2 w3 w100 w200", "w1 w1 w7", "w150", "w0 w299 unknown"]
+
+    def test_safe_matches_exhaustive(self):
+        """测试安全模式与完整排序结果一致"""
+        for query in self.queries:
+            for k in (1, 5, 10, 50):
+                self.assertEqual(self.index.search_ranked(query, k), self.exhaustive.search_ranked(query, k),
+                                 (query, k))
+
+    def test_incremental_updates(self):
+        """测试冠军层建立后继续加入文档，结果仍与完整排序一致"""
+        for query in self.queries:
+            self.index.search_ranked(query)
+        for i in range(100):
+            text = " ".join(f"w{(i * j) % 50}" for j in range(1, 3 + i % 20))
+            self.index.add_document(f"new{i}", text)
+            self.exhaustive.add_document(f"new{i}", text)
+        for query in self.queries:
+            self.assertEqual(self.index.search_ranked(query), self.exhaustive.search_ranked(query), query)
+
+    def test_more_like_this(self):
+        """测试相似文档查询使用冠军列表时结果不变"""
+        self.assertEqual(self.index.more_like_this("doc3"), self.exhaustive.more_like_this("doc3"))
+
+    def test_champions_only(self):
+        """测试只用冠军层的近似结果"""
+        approximate = self.index.search_ranked("w0 w1", 10, champions='only')
+        self.assertEqual(len(approximate), 10)
+        scores = dict(self.exhaustive.search_ranked("w0 w1", len(self.docs)))
+        for doc_id, score in approximate:
+            self.assertAlmostEqual(score, scores[doc_id])
+        self.assertEqual(self.index.search_ranked("w0 w1", 10, champions='off'),
+                         self.exhaustive.search_ranked("w0 w1", 10))
+        with self.assertRaises(ValueError):
+            self.index.search_ranked("w0", champions='fast')
+
+    def test_freqs(self):
+        """测试不保存位置的索引"""
+        index = InvertedIndex(index_options='freqs', champion_size=8)
+        index.build_from_documents(self.docs)
+        for query in self.queries:
+            self.assertEqual(index.search_ranked(query), self.exhaustive.search_ranked(query), query)
+
+    def test_save_and_load(self):
+        """测试冠军层大小随索引保存"""
+        filename = "test_champions_index.json"
+        try:
+            self.index.save_to_file(filename)
+            loaded = InvertedIndex()
+            loaded.load_from_file(filename)
+        finally:
+            if os.path.exists(filename):
+                os.remove(filename)
+        self.assertEqual(loaded.champion_size, 8)
+        self.assertEqual(loaded.search_ranked("w0 w5 w40"), self.exhaustive.search_ranked("w0 w5 w40"))
+
+
+if __name__ == "__main__":
+    unittest.main()
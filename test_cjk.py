@@ -0,0 +1,141 @@
+"""
+CJK 分词单元测试
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from cjk import cjk_bigrams, has_cjk, tokenize_mixed
+from inverted_index import InvertedIndex
+
+
+DOCUMENTS = {
+    "doc1": "倒排索引是搜索引擎的核心数据结构",
+    "doc2": "索引倒排的排索引",
+    "doc3": "Python 教程：用python实现倒排索引",
+    "doc4": "The quick brown fox jumps over the lazy dog",
+    "doc5": "東京タワーの夜景",
+}
+
+
+class TestTokenize(unittest.TestCase):
+    """分词测试类"""
+
+    def test_bigrams(self):
+        """测试连续 CJK 字符切成重叠二元组，单字保留"""
+        self.assertEqual(cjk_bigrams("倒排索引"), ["倒排", "排索", "索引"])
+        self.assertEqual(cjk_bigrams("中"), ["中"])
+
+    def test_mixed_text(self):
+        """测试拉丁文按原规则分词，CJK 字符和标点都是分隔符"""
+        self.assertEqual(tokenize_mixed("python教程：倒排索引，中 ab3增长了3%"),
+                         ["python", "教程", "倒排", "排索", "索引", "中", "ab3", "增长", "长了", "3"])
+        self.assertEqual(tokenize_mixed("한국어 カタカナ"), ["한국", "국어", "カタ", "タカ", "カナ"])
+
+    def test_has_cjk(self):
+        """测试 CJK 检测"""
+        self.assertTrue(has_cjk("abc中"))
+        self.assertFalse(has_cjk("plain ascii"))
+        self.assertFalse(has_cjk("café, naïve"))
+
+    def test_latin_path_unchanged(self):
+        """测试不含 CJK 的文本与原分词规则相同，关闭选项时 CJK 文本被忽略"""
+        index = InvertedIndex()
+        text = "Café prices rose 3.5% in the U.S.-led market"
+        self.assertEqual(index.preprocess(text), InvertedIndex(cjk_bigrams=False).preprocess(text))
+        self.assertEqual(InvertedIndex(cjk_bigrams=False).preprocess("倒排索引 index"), ["index"])
+
+
+class TestCjkSearch(unittest.TestCase):
+    """CJK 文本检索测试类"""
+
+    def setUp(self):
+        self.index = InvertedIndex()
+        self.index.build_from_documents(DOCUMENTS)
+
+    def test_phrase_search_checks_bigram_chain(self):
+        """测试短语查询要求二元组首尾相接：doc2 含全部二元组但不连续"""
+        self.assertEqual(self.index.search_and(["倒排索引"]), {"doc1", "doc2", "doc3"})
+        self.assertEqual(self.index.search_phrase("倒排索引"), {"doc1", "doc3"})
+        self.assertEqual(self.index.search_phrase("索引倒排"), {"doc2"})
+        self.assertEqual(self.index.search_phrase("python实现"), {"doc3"})
+        self.assertEqual(self.index.search_phrase("タワー"), {"doc5"})
+        self.assertEqual(self.index.search_phrase("引擎索引"), set())
+        self.assertEqual(self.index.search_phrase("索引擎"), {"doc1"})
+
+    def test_ranked_and_other_queries(self):
+        """测试排序查询、OR 查询和通配符查询可以使用二元组"""
+        results = self.index.search_ranked("搜索引擎", k=3)
+        self.assertEqual(results[0][0], "doc1")
+        self.assertEqual(self.index.search_or(["夜景", "fox"]), {"doc4", "doc5"})
+        self.assertEqual(self.index.search_wildcard("倒*"), {"doc1", "doc2", "doc3"})
+        self.assertIsNone(self.index.did_you_mean("倒排索引"))
+
+    def test_single_character_query(self):
+        """测试单个字的查询匹配该字出现在较长字串中的文档"""
+        index = InvertedIndex()
+        index.build_from_documents({
+            "a": "石油价格上涨",
+            "b": "油价",
+            "c": "油",
+            "d": "食用油 oil",
+            "e": "汽车",
+        })
+        self.assertEqual(sorted(index.expand_cjk_char("油")), ["油", "油价", "用油", "石油"])
+        self.assertEqual(index.search("油"), {"a": [1], "b": [0], "c": [0], "d": [1]})
+        self.assertEqual(index.search_and(["油"]), {"a", "b", "c", "d"})
+        self.assertEqual(index.search_or(["油", "汽"]), {"a", "b", "c", "d", "e"})
+        self.assertEqual(index.search_not(["油"], ["价"]), {"c", "d"})
+        self.assertEqual(index.search_phrase("油"), {"a", "b", "c", "d"})
+        self.assertEqual({doc_id for doc_id, _ in index.search_ranked("油", k=10)}, {"a", "b", "c", "d"})
+        self.assertEqual(index.get_document_frequency("价"), 2)
+        self.assertEqual(index.estimate_count(["价"]), 2)
+        self.assertEqual(index.estimate_count(["油", "价"], operator='and'), 2)
+
+        temp_dir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(temp_dir, "cjk.idx")
+            index.save_disk_index(path)
+            disk = InvertedIndex()
+            disk.load_disk_index(path)
+            self.assertEqual(disk.search_and(["油", "价"]), {"a", "b"})
+            page = disk.search_page('and', ["油"], 3)
+            rest = disk.search_page('and', ["油"], 3, page.cursor)
+            self.assertEqual(set(page.results) | set(rest.results), {"a", "b", "c", "d"})
+            disk.disk_index.close()
+        finally:
+            shutil.rmtree(temp_dir)
+
+    def test_single_character_phrase(self):
+        """测试单个字与相邻拉丁文词项的短语查询（字在字串开头、中间和末尾）"""
+        index = InvertedIndex()
+        index.build_from_documents({"a": "python中国人java", "b": "中国 python"})
+        self.assertEqual(index.search("国"), {"a": [2], "b": [0]})
+        # 开头
+        self.assertEqual(index.search_phrase("python 中"), {"a"})
+        self.assertEqual(index.search_phrase("中 java"), set())
+        # 中间
+        self.assertEqual(index.search_phrase("python 国"), set())
+        # 末尾
+        self.assertEqual(index.search_phrase("人 java"), {"a"})
+        self.assertEqual(index.search_phrase("国 python"), {"b"})
+        self.assertEqual(index.search_phrase("中国 python"), {"b"})
+
+    def test_disk_index_round_trip(self):
+        """测试 CJK 词项写入磁盘索引后查询结果不变"""
+        temp_dir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(temp_dir, "cjk.idx")
+            self.index.save_disk_index(path)
+            disk = InvertedIndex()
+            disk.load_disk_index(path)
+            self.assertEqual(disk.index["排索"], self.index.index["排索"])
+            self.assertEqual(disk.search_phrase("倒排索引"), {"doc1", "doc3"})
+            disk.disk_index.close()
+        finally:
+            shutil.rmtree(temp_dir)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+"""
+常用词二元组索引单元测试
+"""
+
+import os
+import random
+import unittest
+from common_grams import CommonGramsIndex
+from inverted_index import InvertedIndex, PositionsNotIndexedError
+
+
+class TestCommonGramsIndex(unittest.TestCase):
+    """常用词二元组索引测试类"""
+
+    def test_only_pairs_with_common_words(self):
+        """测试只为含常用词的词对建立索引"""
+        grams = CommonGramsIndex(["mln"])
+        grams.add_document("doc1", ["net", "profit", "mln", "dlrs"])
+        self.assertEqual(set(grams.postings), {"profit mln", "mln dlrs"})
+        self.assertEqual(grams.postings["mln dlrs"], {"doc1"})
+
+    def test_plan(self):
+        """测试短语的词对覆盖"""
+        grams = CommonGramsIndex(["mln"])
+        grams.add_document("doc1", ["profit", "mln", "dlrs"])
+        grams.add_document("doc2", ["loss", "mln", "dlrs"])
+        self.assertEqual(grams.plan(["profit", "mln", "dlrs"]), [{"doc1"}, {"doc1", "doc2"}])
+        # 没有常用词的短语不被覆盖
+        self.assertEqual(grams.plan(["net", "profit"]), [])
+        # 被覆盖的词对不存在：短语不可能出现
+        self.assertIsNone(grams.plan(["mln", "profit"]))
+
+    def test_fields(self):
+        """测试常用词对所有字段生效，词对不跨字段"""
+        grams = CommonGramsIndex(["mln"])
+        grams.add_document("doc1", ["title:mln", "title:dlrs"], "title:")
+        self.assertTrue(grams.is_common("body:mln"))
+        self.assertEqual(set(grams.postings), {"title:mln title:dlrs"})
+
+    def test_from_postings_matches_incremental(self):
+        """测试由位置索引构建的结果与增量构建一致"""
+        rng = random.Random(3)
+        words = [f"w{i}" for i in range(30)]
+        docs = {f"doc{i}": " ".join(rng.choice(words[:rng.randint(5, 30)]) for _ in range(40))
+                for i in range(60)}
+        incremental = InvertedIndex(common_words=words[:4])
+        incremental.build_from_documents(docs)
+        rebuilt = CommonGramsIndex.from_postings(incremental.index, words[:4])
+        self.assertEqual(dict(rebuilt.postings), dict(incremental.common_grams.postings))
+
+
+class TestCommonGramsPhrase(unittest.TestCase):
+    """使用常用词二元组的短语查询测试类"""
+
+    def setUp(self):
+        rng = random.Random(11)
+        vocabulary = ["stock", "market", "mln", "dlrs", "year", "earlier", "oil", "prices", "net", "shr"]
+        self.docs = {f"doc{i}": " ".join(rng.choice(vocabulary) for _ in range(rng.randint(3, 30)))
+                     for i in range(200)}
+        self.plain = InvertedIndex()
+        self.plain.build_from_documents(self.docs)
+        self.grams = InvertedIndex(common_words=["mln", "year", "stock"])
+        self.grams.build_from_documents(self.docs)
+
+    def test_same_results(self):
+        """测试短语查询结果与只用位置列表时一致"""
+        for phrase in ["stock market", "mln dlrs", "dlrs mln", "year earlier", "oil prices",
+                       "net mln dlrs year", "stock stock", "mln", "market oil prices", "zebra mln"]:
+            self.assertEqual(self.grams.search_phrase(phrase), self.plain.search_phrase(phrase), phrase)
+            self.assertEqual(self.grams.count_phrase(phrase), self.plain.count_phrase(phrase), phrase)
+
+    def test_build_common_grams(self):
+        """测试为已建好的索引开启常用词二元组并继续增量维护"""
+        index = InvertedIndex()
+        index.build_from_documents(self.docs)
+        index.build_common_grams(num_common=3)
+        self.assertEqual(len(index.common_grams.common_words), 3)
+        index.add_document("extra", "stock market year earlier mln dlrs")
+        self.plain.add_document("extra", "stock market year earlier mln dlrs")
+        for phrase in ["stock market", "year earlier", "mln dlrs", "market year earlier"]:
+            self.assertEqual(index.search_phrase(phrase), self.plain.search_phrase(phrase), phrase)
+
+    def test_positions_still_required(self):
+        """测试未保存位置时仍明确报错"""
+        index = InvertedIndex(index_options='freqs', common_words=["mln"])
+        index.add_document("doc1", "mln dlrs")
+        self.assertEqual(len(index.common_grams), 0)
+        with self.assertRaises(PositionsNotIndexedError):
+            index.search_phrase("mln dlrs")
+
+    def test_save_and_load(self):
+        """测试常用词随索引保存，加载后重建词对"""
+        filename = "test_common_grams_index.json"
+        try:
+            self.grams.save_to_file(filename)
+            loaded = InvertedIndex()
+            loaded.load_from_file(filename)
+        finally:
+            if os.path.exists(filename):
+                os.remove(filename)
+        self.assertEqual(loaded.common_grams.common_words, self.grams.common_grams.common_words)
+        self.assertEqual(dict(loaded.common_grams.postings), dict(self.grams.common_grams.postings))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+"""
+合成语料生成器单元测试
+"""
+
+import unittest
+from collections import Counter
+from corpus_generator import ZipfCorpusGenerator, synthetic_word
+from inverted_index import InvertedIndex
+
+
+class TestZipfCorpusGenerator(unittest.TestCase):
+    """Zipf 合成语料生成器测试类"""
+
+    def setUp(self):
+        """每个测试前的准备工作"""
+        self.generator = ZipfCorpusGenerator(vocab_size=2000, num_phrases=20, seed=3)
+
+    def test_words_unique_and_indexable(self):
+        """测试合成词互不相同，且预处理后保持不变"""
+        words = [synthetic_word(rank) for rank in range(20000)]
+        self.assertEqual(len(set(words)), len(words))
+        index = InvertedIndex()
+        self.assertEqual(index.preprocess(' '.join(words[:500])), words[:500])
+
+    def test_deterministic_and_sliceable(self):
+        """测试相同种子生成相同文档，且任意区间可单独重新生成"""
+        first = list(self.generator.documents(20))
+        second = list(ZipfCorpusGenerator(vocab_size=2000, num_phrases=20, seed=3).documents(20))
+        self.assertEqual(first, second)
+        self.assertEqual(list(self.generator.documents(5, start=10)), first[10:15])
+        other = list(ZipfCorpusGenerator(vocab_size=2000, num_phrases=20, seed=4).documents(20))
+        self.assertNotEqual(first, other)
+
+    def test_zipf_distribution(self):
+        """测试词频随排名递减"""
+        counts = Counter()
+        for doc_number in range(200):
+            counts.update(self.generator.tokens(doc_number))
+        vocabulary = self.generator.vocabulary
+        self.assertGreater(counts[vocabulary[0]], counts[vocabulary[9]])
+        self.assertGreater(counts[vocabulary[9]], counts[vocabulary[999]])
+        # s≈1 时排名第 1 与第 10 的词频比约为 10
+        ratio = counts[vocabulary[0]] / counts[vocabulary[9]]
+        self.assertTrue(6 < ratio < 16, ratio)
+
+    def test_length_distribution(self):
+        """测试文档长度在配置范围内"""
+        for distribution in ('lognormal', 'uniform', 'fixed'):
+            generator = ZipfCorpusGenerator(vocab_size=500, length_distribution=distribution,
+                                            mean_length=50, min_length=10, max_length=100,
+                                            phrase_rate=0)
+            lengths = [len(generator.tokens(doc_number)) for doc_number in range(300)]
+            self.assertTrue(all(10 <= length <= 100 for length in lengths), distribution)
+            self.assertAlmostEqual(sum(lengths) / len(lengths), 50, delta=8)
+        with self.assertRaises(ValueError):
+            ZipfCorpusGenerator(length_distribution='normal')
+
+    def test_phrase_cooccurrence(self):
+        """测试植入的短语可被短语查询找到，且出现频率随 phrase_rate 变化"""
+        index = InvertedIndex()
+        for doc in self.generator.documents(300):
+            index.add_document(doc['id'], doc['text'])
+        hits = sum(len(index.search_phrase(' '.join(phrase))) for phrase in self.generator.phrases)
+        self.assertGreater(hits, 0)
+
+        rare = ZipfCorpusGenerator(vocab_size=2000, num_phrases=20, phrase_rate=0.05, seed=3)
+        rare_index = InvertedIndex()
+        for doc in rare.documents(300):
+            rare_index.add_document(doc['id'], doc['text'])
+        rare_hits = sum(len(rare_index.search_phrase(' '.join(phrase))) for phrase in rare.phrases)
+        self.assertLess(rare_hits, hits)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+"""
+语料统计单元测试
+"""
+
+import random
+import unittest
+from collections import Counter
+from corpus_stats import TopKCounter, CorpusStats
+from inverted_index import InvertedIndex
+
+
+class TestTopKCounter(unittest.TestCase):
+    """前 k 计数器测试类"""
+
+    def reference_top(self, counts, k):
+        return sorted(counts.items(), key=lambda item: (-item[1], item[0]))[:k]
+
+    def test_matches_full_sort(self):
+        """测试随机增减后前 k 名与完整排序一致"""
+        rng = random.Random(7)
+        counter = TopKCounter(capacity=20)
+        reference = Counter()
+        for step in range(20000):
+            key = f"t{int(rng.paretovariate(1.2) * 5) % 500}"
+            if reference[key] and rng.random() < 0.2:
+                counter.decrement(key)
+                reference[key] -= 1
+            else:
+                counter.increment_many([key])
+                reference[key] += 1
+            if step % 1000 == 0:
+                expected = self.reference_top(+reference, 10)
+                # 同计数的边界可能不同，比较计数序列和每个键的计数
+                top = counter.top(10)
+                self.assertEqual([count for _, count in top], [count for _, count in expected])
+                for key, count in top:
+                    self.assertEqual(reference[key], count)
+        self.assertEqual(counter.counts, dict(+reference))
+
+    def test_large_k_and_from_counts(self):
+        """测试 k 超过前列大小，以及批量构建"""
+        counts = {f"t{i}": i % 37 + 1 for i in range(300)}
+        counter = TopKCounter.from_counts(counts, capacity=5)
+        self.assertEqual([c for _, c in counter.top(50)], [c for _, c in self.reference_top(counts, 50)])
+        self.assertEqual(counter.top(3), self.reference_top(counts, 3))
+
+
+class TestCorpusStats(unittest.TestCase):
+    """语料统计测试类"""
+
+    def test_add_and_remove(self):
+        """测试增删文档时统计量增量更新"""
+        stats = CorpusStats()
+        first = Counter("oil prices oil".split())
+        second = Counter("gold prices".split())
+        stats.add_document(first)
+        stats.add_document(second)
+        self.assertEqual((stats.num_docs, stats.total_tokens), (2, 5))
+        self.assertEqual(stats.avgdl, 2.5)
+        self.assertEqual((stats.df("oil"), stats.cf("oil")), (1, 2))
+        self.assertEqual(stats.top_terms(1), [("prices", 2)])
+
+        stats.remove_document(first)
+        self.assertEqual((stats.num_docs, stats.total_tokens), (1, 2))
+        self.assertEqual((stats.df("oil"), stats.cf("oil")), (0, 0))
+        self.assertEqual(stats.top_terms(5), [("gold", 1), ("prices", 1)])
+
+    def test_index_stats(self):
+        """测试索引维护的统计量与重新计算的结果一致，并在加载后重建"""
+        index = InvertedIndex()
+        for i in range(40):
+            index.add_document(f"doc{i}", " ".join(f"w{j}" for j in range(i % 7 + 1)) + " common common")
+        self.assertEqual(index.stats.num_docs, 40)
+        self.assertEqual(index.stats.total_tokens, sum(index.doc_lengths.values()))
+        self.assertEqual(index.stats.df("w3"), len(index.index["w3"]))
+        self.assertEqual(index.stats.cf("common"), 80)
+        self.assertEqual(index.stats.top_terms(2), [("common", 40), ("w0", 40)])
+
+        rebuilt = CorpusStats.from_index(index.index, index.doc_lengths)
+        self.assertEqual(rebuilt.collection_freq, index.stats.collection_freq)
+        self.assertEqual(rebuilt.top_terms(8), index.stats.top_terms(8))
+        self.assertEqual(rebuilt.avgdl, index.stats.avgdl)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+"""
+近重复检测单元测试
+"""
+
+import unittest
+from dedup import MinHasher, NearDuplicateDetector, estimate_jaccard
+
+
+BASE_TEXT = ("opec ministers meet vienna next week discuss crude oil output quotas "
+             "prices officials said saudi arabia expected push higher ceiling").split()
+
+
+class TestMinHash(unittest.TestCase):
+    """MinHash 签名测试类"""
+
+    def setUp(self):
+        """每个测试前的准备工作"""
+        self.hasher = MinHasher(num_perm=64, shingle_size=3)
+
+    def test_signature_deterministic(self):
+        """测试签名可复现"""
+        other = MinHasher(num_perm=64, shingle_size=3)
+        self.assertEqual(self.hasher.signature(BASE_TEXT), other.signature(BASE_TEXT))
+        self.assertEqual(len(self.hasher.signature(BASE_TEXT)), 64)
+
+    def test_similarity_estimate(self):
+        """测试相同文档与无关文档的相似度估计"""
+        sig = self.hasher.signature(BASE_TEXT)
+        unrelated = self.hasher.signature("wheat corn harvest exports china soybean".split())
+        self.assertEqual(estimate_jaccard(sig, sig), 1.0)
+        self.assertLess(estimate_jaccard(sig, unrelated), 0.2)
+
+    def test_short_documents(self):
+        """测试短于 shingle 长度的文档"""
+        self.assertEqual(len(self.hasher.signature(["oil"])), 64)
+
+
+class TestNearDuplicateDetector(unittest.TestCase):
+    """LSH 近重复检测测试类"""
+
+    def test_detects_near_duplicate(self):
+        """测试识别近似重复的文档"""
+        detector = NearDuplicateDetector(threshold=0.7)
+        self.assertIsNone(detector.check("doc1", BASE_TEXT))
+        revised = BASE_TEXT[:-1] + ["ceilings"]
+        self.assertEqual(detector.check("doc2", revised), "doc1")
+        self.assertIsNone(detector.check("doc3", "wheat corn harvest exports china".split()))
+        self.assertEqual(detector.report()['duplicates_found'], 1)
+
+    def test_invalid_configuration(self):
+        """测试非法参数"""
+        with self.assertRaises(ValueError):
+            NearDuplicateDetector(mode='drop')
+        with self.assertRaises(ValueError):
+            NearDuplicateDetector(num_perm=64, bands=7)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,165 @@
+"""
+磁盘倒排索引单元测试
+"""
+
+import os
+import unittest
+from disk_index import (DiskIndex, DiskIndexWriter, encode_varint, decode_varint,
+                        encode_postings, decode_postings, BLOCK_SIZE, TOP_TERMS)
+from inverted_index import InvertedIndex
+from posting_cache import PostingCache
+
+
+class TestEncoding(unittest.TestCase):
+    """编码测试类"""
+
+    def test_varint_round_trip(self):
+        """测试变长整数编解码"""
+        buf = bytearray()
+        values = [0, 1, 127, 128, 300, 2**32, 2**63]
+        for value in values:
+            encode_varint(value, buf)
+        pos = 0
+        for value in values:
+            decoded, pos = decode_varint(buf, pos)
+            self.assertEqual(decoded, value)
+        self.assertEqual(pos, len(buf))
+
+    def test_postings_round_trip(self):
+        """测试跨多个块的倒排列表编解码"""
+        positional = [(ordinal * 3, [ordinal, ordinal + 5, ordinal + 200]) for ordinal in range(BLOCK_SIZE * 2 + 7)]
+        data = encode_postings(positional, True)
+        self.assertEqual(list(decode_postings(data, 0, len(data), True)), positional)
+        freqs = [(ordinal * 2 + 1, ordinal % 7 + 1) for ordinal in range(BLOCK_SIZE + 1)]
+        data = encode_postings(freqs, False)
+        self.assertEqual(list(decode_postings(data, 0, len(data), False)), freqs)
+
+
+class TestDiskIndex(unittest.TestCase):
+    """磁盘索引测试类"""
+
+    filename = "test_disk_index.idx"
+
+    def setUp(self):
+        """构建内存索引并写成磁盘索引"""
+        self.memory = InvertedIndex()
+        self.memory.build_from_documents({
+            "doc1": "The quick brown fox jumps over the lazy dog",
+            "doc2": "A quick brown dog runs in the park",
+            "doc3": "The lazy cat sleeps all day",
+            "doc4": "Quick foxes and lazy dogs are friends",
+        })
+        self.size = self.memory.save_disk_index(self.filename)
+        self.disk = InvertedIndex()
+        self.disk.load_disk_index(self.filename, cache=PostingCache(1 << 20))
+
+    def tearDown(self):
+        """关闭并删除索引文件"""
+        self.disk.disk_index.close()
+        if os.path.exists(self.filename):
+            os.remove(self.filename)
+
+    def test_file_size(self):
+        """测试返回文件字节数"""
+        self.assertEqual(self.size, os.path.getsize(self.filename))
+
+    def test_queries_match_memory_index(self):
+        """测试各类查询结果与内存索引一致"""
+        for index in (self.memory, self.disk):
+            index.results = [
+                index.search("quick"),
+                index.search_and(["quick", "brown"]),
+                index.search_or(["cat", "fox"]),
+                index.search_not(["lazy"], ["cat"]),
+                index.search_phrase("quick brown"),
+                index.search_ranked("lazy dog", k=3),
+                index.search_wildcard("qu*"),
+                index.search_fuzzy("lasy"),
+                index.count_and(["lazy", "dog"]),
+            ]
+        self.assertEqual(self.disk.results, self.memory.results)
+
+    def test_documents_and_stats(self):
+        """测试文档内容、文档长度和语料统计"""
+        self.assertEqual(dict(self.disk.documents), self.memory.documents)
+        self.assertEqual(self.disk.doc_lengths, self.memory.doc_lengths)
+        self.assertEqual(self.disk.stats.avgdl, self.memory.stats.avgdl)
+        self.assertEqual(self.disk.stats.top_terms(5), self.memory.stats.top_terms(5))
+        self.assertEqual(self.disk.stats.cf("lazy"), self.memory.stats.cf("lazy"))
+
+    def test_dictionary(self):
+        """测试映射在文件上的词典：查找、按字典序遍历"""
+        dictionary = self.disk.disk_index.dictionary
+        self.assertEqual(list(dictionary), sorted(self.memory.index))
+        self.assertEqual(len(dictionary), len(self.memory.index))
+        self.assertEqual(dictionary["lazy"][2], 3)
+        self.assertNotIn("missing", dictionary)
+        self.assertNotIn(42, dictionary)
+        self.assertEqual(self.disk.stats.df("missing"), 0)
+
+    def test_top_terms_beyond_stored(self):
+        """测试超出元数据中保存个数的高频词查询"""
+        k = TOP_TERMS + 50
+        self.assertEqual(self.disk.stats.top_terms(k), self.memory.stats.top_terms(k))
+
+    def test_cache_serves_repeated_terms(self):
+        """测试重复查询由缓存回答，不再解码"""
+        self.disk.search("lazy")
+        decoded = self.disk.disk_index.decoded_terms
+        self.disk.search("lazy")
+        self.assertEqual(self.disk.disk_index.decoded_terms, decoded)
+        self.assertEqual(self.disk.index.cache.hits, 1)
+
+    def test_ranked_query_decodes_once(self):
+        """测试没有缓存时排序查询和相似文档查询的每个倒排列表只解码一次"""
+        uncached = InvertedIndex()
+        uncached.load_disk_index(self.filename)
+        try:
+            uncached.search_ranked("lazy dog quick brown", k=3)
+            self.assertEqual(uncached.disk_index.decoded_terms, 4)
+            uncached.more_like_this("doc1", min_doc_freq=2)
+            selected = [term for term in set(uncached.preprocess(self.memory.documents["doc1"]))
+                        if 2 <= self.memory.stats.df(term) < self.memory.stats.num_docs]
+            self.assertEqual(uncached.disk_index.decoded_terms, 4 + len(selected))
+        finally:
+            uncached.disk_index.close()
+
+    def test_read_only(self):
+        """测试磁盘索引不能添加文档"""
+        with self.assertRaises(ValueError):
+            self.disk.add_document("doc5", "new document")
+
+    def test_freqs_option(self):
+        """测试不保存位置的索引"""
+        filename = "test_disk_index_freqs.idx"
+        memory = InvertedIndex(index_options="freqs")
+        memory.build_from_documents({"doc1": "oil oil price", "doc2": "oil export"})
+        memory.save_disk_index(filename)
+        disk = InvertedIndex()
+        try:
+            disk.load_disk_index(filename)
+            self.assertEqual(disk.index_options, "freqs")
+            self.assertEqual(disk.search("oil"), {"doc1": 2, "doc2": 1})
+            self.assertEqual(disk.search_ranked("oil"), memory.search_ranked("oil"))
+        finally:
+            disk.disk_index.close()
+            os.remove(filename)
+
+    def test_terms_must_be_sorted(self):
+        """测试词项须按字典序写入"""
+        filename = "test_disk_index_unsorted.idx"
+        writer = DiskIndexWriter(filename)
+        try:
+            writer.add_term("oil", [(0, [1])])
+            with self.assertRaises(ValueError):
+                writer.add_term("gas", [(0, [2])])
+            writer.close(["doc1"], [3])
+            disk = DiskIndex(filename)
+            self.assertEqual(disk.meta['num_terms'], 1)
+            disk.close()
+        finally:
+            os.remove(filename)
+
+
+if __name__ == "__main__":
+    unittest.main()
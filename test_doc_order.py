@@ -0,0 +1,150 @@
+"""
+文档序号重排单元测试
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from disk_index import DiskIndex, BLOCK_SIZE
+from doc_order import order_documents, reorder_disk_index, gap_stats
+from inverted_index import InvertedIndex
+from parse_reuters import parse_reuters_sgml
+
+
+SGML = """<!DOCTYPE lewis SYSTEM "lewis.dtd">
+<REUTERS TOPICS="YES" NEWID="7">
+<DATE>26-FEB-1987 15:01:01.79</DATE>
+<TOPICS><D>cocoa</D></TOPICS>
+<PLACES><D>el-salvador</D><D>usa</D></PLACES>
+<TEXT><TITLE>BAHIA COCOA REVIEW</TITLE><BODY>Showers continued in the cocoa zone</BODY></TEXT>
+</REUTERS>
+<REUTERS TOPICS="NO" NEWID="8">
+<DATE>31-MAR-1987 605:12:19.12</DATE>
+<TOPICS></TOPICS>
+<PLACES><D>uk</D></PLACES>
+<TEXT><TITLE>NO TOPICS</TITLE></TEXT>
+</REUTERS>
+"""
+
+
+class TestReutersMetadata(unittest.TestCase):
+    """Reuters 元数据解析测试类"""
+
+    def test_parse_metadata(self):
+        """测试解析 TOPICS、PLACES 和日期，日期格式错误时为空"""
+        with tempfile.NamedTemporaryFile('w', suffix='.sgm', delete=False) as f:
+            f.write(SGML)
+        try:
+            first, second = parse_reuters_sgml(f.name)
+        finally:
+            os.remove(f.name)
+        self.assertEqual(first['id'], 'reuters_7')
+        self.assertEqual(first['topics'], ['cocoa'])
+        self.assertEqual(first['places'], ['el-salvador', 'usa'])
+        self.assertEqual(first['date'], '1987-02-26T15:01:01')
+        self.assertEqual(second['id'], 'reuters_8')
+        self.assertEqual(second['topics'], [])
+        self.assertEqual(second['date'], '')
+
+
+class TestOrderDocuments(unittest.TestCase):
+    """排序策略测试类"""
+
+    def setUp(self):
+        self.doc_ids = ['d1', 'd2', 'd3', 'd4']
+        self.metadata = {
+            'd1': {'topics': ['grain'], 'places': ['usa'], 'date': '1987-03-02T10:00:00'},
+            'd2': {'topics': [], 'places': ['uk'], 'date': '1987-02-27T09:00:00'},
+            'd3': {'topics': ['crude'], 'places': ['usa'], 'date': ''},
+            'd4': {'topics': ['grain'], 'places': ['canada'], 'date': '1987-02-26T15:00:00'},
+        }
+        self.tokens = {'d1': ['wheat', 'corn'], 'd2': ['pound'], 'd3': ['oil', 'opec'], 'd4': ['wheat', 'corn']}
+
+    def order(self, strategy):
+        return order_documents(self.doc_ids, strategy, self.metadata, self.tokens.__getitem__)
+
+    def test_strategies(self):
+        """测试各策略的顺序"""
+        self.assertEqual(self.order('arrival'), self.doc_ids)
+        # 缺少日期和缺少类别的文档排在最后
+        self.assertEqual(self.order('date'), ['d4', 'd2', 'd1', 'd3'])
+        self.assertEqual(self.order('topics'), ['d3', 'd4', 'd1', 'd2'])
+        # 词项集合相同的文档签名相同，排在一起
+        order = self.order('minhash')
+        self.assertEqual(sorted(order), sorted(self.doc_ids))
+        self.assertEqual(abs(order.index('d1') - order.index('d4')), 1)
+
+    def test_invalid_arguments(self):
+        """测试未知策略和缺少输入"""
+        with self.assertRaises(ValueError):
+            order_documents(self.doc_ids, 'random')
+        with self.assertRaises(ValueError):
+            order_documents(self.doc_ids, 'date')
+        with self.assertRaises(ValueError):
+            order_documents(self.doc_ids, 'minhash', self.metadata)
+
+
+class TestReorderDiskIndex(unittest.TestCase):
+    """重写磁盘索引测试类"""
+
+    def setUp(self):
+        """构建两类交替出现的文档：重排后同类文档相邻"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.source_path = os.path.join(self.temp_dir, "source.idx")
+        self.path = os.path.join(self.temp_dir, "reordered.idx")
+        self.memory = InvertedIndex()
+        for i in range(BLOCK_SIZE * 4):
+            if i % 2:
+                self.memory.add_document(f"doc{i}", f"oil prices rose opec output quota {i % 7}")
+            else:
+                self.memory.add_document(f"doc{i}", f"wheat harvest grain exports prices {i % 5}")
+        self.memory.add_document("mixed", "oil and wheat prices")
+        self.memory.save_disk_index(self.source_path)
+        self.source = DiskIndex(self.source_path)
+        self.order = sorted(self.source.doc_ids, key=lambda doc_id: 'oil' in self.memory.documents[doc_id])
+
+    def tearDown(self):
+        self.source.close()
+        shutil.rmtree(self.temp_dir)
+
+    def test_results_unchanged(self):
+        """测试重排后文档ID、内容和查询结果不变，文档序号按新顺序分配"""
+        reorder_disk_index(self.source, self.path, self.order)
+        index = InvertedIndex()
+        index.load_disk_index(self.path)
+        self.assertEqual(index.disk_index.doc_ids, self.order)
+        self.assertEqual(dict(index.documents), self.memory.documents)
+        self.assertEqual(index.doc_lengths, self.memory.doc_lengths)
+        for term in ("oil", "prices", "3"):
+            self.assertEqual(index.index[term], self.memory.index[term])
+        self.assertEqual(index.search_and(["oil", "wheat"]), {"mixed"})
+        self.assertEqual(index.search_phrase("opec output"), self.memory.search_phrase("opec output"))
+        self.assertEqual(index.search_ranked("oil quota", k=5), self.memory.search_ranked("oil quota", k=5))
+        index.disk_index.close()
+
+    def test_smaller_gaps_and_skipped_blocks(self):
+        """测试同类文档相邻后序号差值变小，求交集跳过更多的块"""
+        reorder_disk_index(self.source, self.path, self.order)
+        reordered = DiskIndex(self.path)
+        self.assertLess(gap_stats(reordered)['mean_log2_gap'], gap_stats(self.source)['mean_log2_gap'])
+        expected = self.memory.search_and(["oil", "prices"])
+        self.assertEqual(set(self.source.intersect(["oil", "prices"])), expected)
+        self.assertEqual(set(reordered.intersect(["oil", "prices"])), expected)
+        self.assertEqual(self.source.skipped_blocks, 0)
+        self.assertGreater(reordered.skipped_blocks, 0)
+        self.assertEqual(reordered.intersect(["wheat", "opec"]), [])
+        self.assertEqual(reordered.intersect(["oil", "missing"]), [])
+        reordered.close()
+
+    def test_invalid_order(self):
+        """测试新顺序不是原文档ID的排列时报错"""
+        with self.assertRaises(ValueError):
+            reorder_disk_index(self.source, self.path, self.order[1:])
+        with self.assertRaises(ValueError):
+            reorder_disk_index(self.source, self.path, self.order[:-1] + ["unknown"])
+        self.assertFalse(os.path.exists(self.path))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,40 @@
+"""
+模糊匹配单元测试
+"""
+
+import unittest
+from term_dictionary import SortedTermDictionary
+from fuzzy import fuzzy_terms, levenshtein
+
+
+class TestFuzzyTerms(unittest.TestCase):
+    """Levenshtein 词典遍历测试类"""
+
+    def setUp(self):
+        """每个测试前的准备工作"""
+        self.terms = ["market", "markets", "marker", "basket", "mark",
+                      "dollar", "collar", "dolls", "oil", "soil", "coil"]
+        self.dictionary = SortedTermDictionary(self.terms, block_size=4)
+
+    def test_levenshtein(self):
+        """测试编辑距离计算"""
+        self.assertEqual(levenshtein("kitten", "sitting"), 3)
+        self.assertEqual(levenshtein("", "abc"), 3)
+        self.assertEqual(levenshtein("oil", "oil"), 0)
+
+    def test_matches_brute_force(self):
+        """测试与逐词计算编辑距离的结果一致"""
+        for query in ["markte", "dolar", "oil", "x", "marketing"]:
+            for max_edits in range(3):
+                expected = sorted((term, levenshtein(term, query)) for term in self.terms
+                                  if levenshtein(term, query) <= max_edits)
+                self.assertEqual(fuzzy_terms(self.dictionary, query, max_edits), expected)
+
+    def test_invalid_distance(self):
+        """测试非法编辑距离"""
+        with self.assertRaises(ValueError):
+            fuzzy_terms(self.dictionary, "oil", 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+"""
+交互式查询程序单元测试
+"""
+
+import io
+import os
+import shutil
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from unittest import mock
+
+import interactive_search
+from interactive_search import (LazyIndex, QueryTimer, TermCompleter, SAMPLE_DOCUMENTS, build_sample_index,
+                                open_index)
+
+
+class TestOpenIndex(unittest.TestCase):
+    """打开保存的索引测试类"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.memory = build_sample_index()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_detects_format(self):
+        """测试按文件头识别磁盘索引、SQLite 数据库和 JSON 快照"""
+        paths = {
+            'disk': os.path.join(self.temp_dir, "index.idx"),
+            'sqlite': os.path.join(self.temp_dir, "index.sqlite"),
+            'json': os.path.join(self.temp_dir, "index.json"),
+        }
+        self.memory.save_disk_index(paths['disk'])
+        self.memory.save_sqlite(paths['sqlite'])
+        self.memory.save_to_file(paths['json'])
+        expected = self.memory.search_phrase("inverted index")
+        for kind, path in paths.items():
+            index = open_index(path)
+            self.assertEqual(len(index.documents), len(SAMPLE_DOCUMENTS), kind)
+            self.assertEqual(index.search_phrase("inverted index"), expected, kind)
+            if kind == 'disk':
+                index.disk_index.close()
+            elif kind == 'sqlite':
+                index.sqlite_store.close()
+
+    def test_missing_file(self):
+        """测试文件不存在且没有语料目录时报错"""
+        with self.assertRaises(FileNotFoundError):
+            open_index(os.path.join(self.temp_dir, "missing.idx"))
+
+
+class TestShell(unittest.TestCase):
+    """交互界面测试类"""
+
+    def test_lazy_index(self):
+        """测试后台打开的索引在第一次访问时可用，打开失败时在访问时抛出"""
+        index = LazyIndex(build_sample_index, "示例索引构建完成")
+        with redirect_stdout(io.StringIO()):
+            self.assertEqual(index.search("python"), {"doc9": [0]})
+        self.assertIsNotNone(index.open_seconds)
+
+        def fail():
+            raise FileNotFoundError("missing.idx")
+
+        broken = LazyIndex(fail, "")
+        with self.assertRaises(FileNotFoundError):
+            broken.search("python")
+
+    def test_timing_toggle(self):
+        """测试 :timing 开启后每次查询打印耗时"""
+        inputs = [":timing", "3", "python machine", "", "0"]
+        output = io.StringIO()
+        with mock.patch('builtins.input', side_effect=inputs), redirect_stdout(output):
+            interactive_search.run_shell(LazyIndex(build_sample_index, ""), QueryTimer())
+        text = output.getvalue()
+        self.assertIn("查询计时已开启", text)
+        self.assertIn("查询耗时", text)
+        self.assertIn("✓ 共 2 个文档", text)
+
+    def test_completion(self):
+        """测试 Tab 补全按文档频率返回候选，:complete 显示补全"""
+        index = LazyIndex(build_sample_index, "")
+        index.get()
+        completer = TermCompleter(index)
+        self.assertEqual(completer("inf", 0), "information")
+        self.assertIsNone(completer("inf", 1))
+        self.assertIsNone(completer("in*", 0))
+
+        output = io.StringIO()
+        with mock.patch('builtins.input', side_effect=[":complete in", "0"]), redirect_stdout(output):
+            interactive_search.run_shell(index, QueryTimer())
+        self.assertIn("index (6)\n  inverted (5)", output.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
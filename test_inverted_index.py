@@ -4,7 +4,8 @@
 """
 
 import unittest
-from inverted_index import InvertedIndex
+from inverted_index import InvertedIndex, PositionsNotIndexedError
+from dedup import NearDuplicateDetector
 
 
 class TestInvertedIndex(unittest.TestCase):
@@ -130,6 +131,232 @@ class TestInvertedIndex(unittest.TestCase):
         self.assertEqual(len(result2), 0)
 
 
+class TestWildcardQuery(unittest.TestCase):
+    """测试通配符查询"""
+
+    def setUp(self):
+        """每个测试前的准备工作"""
+        self.index = InvertedIndex()
+        self.index.build_from_documents({
+            "doc1": "Petroleum exports rose",
+            "doc2": "Petrobras reported profits",
+            "doc3": "Oil imports fell",
+            "doc4": "Airport traffic report"
+        })
+
+    def test_prefix_wildcard(self):
+        """测试前缀通配符"""
+        self.assertEqual(self.index.search_wildcard("petro*"), {"doc1", "doc2"})
+
+    def test_infix_wildcard(self):
+        """测试中缀通配符"""
+        self.assertEqual(self.index.search_wildcard("*port*"),
+                         {"doc1", "doc2", "doc3", "doc4"})
+
+    def test_suffix_and_single_char_wildcard(self):
+        """测试后缀和单字符通配符"""
+        self.assertEqual(set(self.index.expand_wildcard("*ports")), {"exports", "imports"})
+        self.assertEqual(self.index.expand_wildcard("o?l"), ["oil"])
+
+    def test_expansion_limit(self):
+        """测试展开数量限制"""
+        self.assertEqual(len(self.index.expand_wildcard("*port*", max_expansions=2)), 2)
+
+    def test_dictionary_refresh_after_add(self):
+        """测试新增文档后词典自动更新"""
+        self.index.search_wildcard("petro*")
+        self.index.add_document("doc5", "Petrochemical output")
+        self.assertIn("doc5", self.index.search_wildcard("petro*"))
+
+    def test_wildcard_without_kgram_index(self):
+        """测试不建立 k-gram 索引时回退到扫描词典"""
+        index = InvertedIndex(kgram_size=0)
+        index.build_from_documents({"doc1": "Airport report"})
+        self.assertEqual(set(index.expand_wildcard("*port")), {"airport", "report"})
+
+
+class TestFuzzyQuery(unittest.TestCase):
+    """测试模糊查询和拼写建议"""
+
+    def setUp(self):
+        """每个测试前的准备工作"""
+        self.index = InvertedIndex()
+        self.index.build_from_documents({
+            "doc1": "Stock market prices rose",
+            "doc2": "The market closed higher",
+            "doc3": "Marker pens are cheap",
+            "doc4": "Dollar weakened against yen"
+        })
+
+    def test_fuzzy_expansion(self):
+        """测试编辑距离展开"""
+        self.assertEqual(self.index.expand_fuzzy("markte", max_edits=2)[0], "market")
+        self.assertEqual(self.index.expand_fuzzy("dolar", max_edits=1), ["dollar"])
+
+    def test_search_fuzzy(self):
+        """测试模糊查询"""
+        self.assertEqual(self.index.search_fuzzy("marke", max_edits=1),
+                         {"doc1", "doc2", "doc3"})
+
+    def test_suggestions_ranked_by_document_frequency(self):
+        """测试同编辑距离的建议按文档频率排序"""
+        self.assertEqual(self.index.suggest_terms("markez", limit=2), ["market", "marker"])
+
+    def test_did_you_mean(self):
+        """测试查询纠错"""
+        self.assertEqual(self.index.did_you_mean("stock markte"), "stock market")
+        self.assertIsNone(self.index.did_you_mean("stock market"))
+
+    def test_invalid_edit_distance(self):
+        """测试超出范围的编辑距离"""
+        with self.assertRaises(ValueError):
+            self.index.expand_fuzzy("market", max_edits=3)
+
+
+class TestDeduplication(unittest.TestCase):
+    """测试构建索引时的近重复检测"""
+
+    def setUp(self):
+        """每个测试前的准备工作"""
+        self.documents = {
+            "doc1": "Opec ministers meet in Vienna next week to discuss crude oil output quotas",
+            "doc2": "Opec ministers meet in Vienna next week to discuss crude oil output quota",
+            "doc3": "Wheat and corn exports to China rose sharply this season"
+        }
+
+    def build(self, mode):
+        """按指定去重模式构建索引"""
+        index = InvertedIndex(deduplicator=NearDuplicateDetector(threshold=0.7, mode=mode))
+        index.build_from_documents(self.documents)
+        return index
+
+    def test_flag_mode(self):
+        """测试标记模式：重复文档照常索引"""
+        index = self.build('flag')
+        self.assertEqual(index.duplicate_of, {"doc2": "doc1"})
+        self.assertIn("doc2", index.search_and(["vienna"]))
+
+    def test_skip_mode(self):
+        """测试跳过模式：重复文档不进入索引"""
+        index = self.build('skip')
+        self.assertNotIn("doc2", index.documents)
+        self.assertEqual(index.search_and(["vienna"]), {"doc1"})
+        self.assertEqual(index.duplicate_of, {})
+
+    def test_cluster_mode(self):
+        """测试聚簇模式：重复文档归入代表文档的簇"""
+        index = self.build('cluster')
+        self.assertNotIn("doc2", index.documents)
+        self.assertEqual(index.cluster_members("doc1"), ["doc1", "doc2"])
+        self.assertEqual(index.cluster_members("doc3"), ["doc3"])
+
+
+class TestRankedQuery(unittest.TestCase):
+    """测试排序查询和相似文档查询"""
+
+    def setUp(self):
+        """每个测试前的准备工作"""
+        self.index = InvertedIndex(store_term_vectors=True)
+        self.index.build_from_documents({
+            "doc1": "Crude oil prices rose as OPEC cut oil output",
+            "doc2": "Oil companies reported higher profits",
+            "doc3": "OPEC ministers discussed crude oil output quotas",
+            "doc4": "Wheat exports to China rose",
+            "doc5": "Central bank cut interest rates"
+        })
+
+    def brute_force(self, query, k):
+        """不剪枝的 BM25 打分，作为对照"""
+        scores = {}
+        avgdl = sum(self.index.doc_lengths.values()) / len(self.index.doc_lengths)
+        for term in self.index.preprocess(query):
+            idf = self.index._idf(term)
+            for doc_id, positions in self.index.index.get(term, {}).items():
+                tf = len(positions)
+                norm = self.index.BM25_K1 * (1 - self.index.BM25_B + self.index.BM25_B *
+                                             self.index.doc_lengths[doc_id] / avgdl)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.index.BM25_K1 + 1) / (tf + norm)
+        return sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:k]
+
+    def test_ranked_matches_exhaustive(self):
+        """测试剪枝排序与穷举打分结果一致"""
+        for query in ["crude oil", "oil output opec", "rose cut"]:
+            ranked = self.index.search_ranked(query, k=2)
+            expected = self.brute_force(query, 2)
+            self.assertEqual([doc for doc, _ in ranked], [doc for doc, _ in expected])
+            for (_, score), (_, expected_score) in zip(ranked, expected):
+                self.assertAlmostEqual(score, expected_score)
+
+    def test_ranked_keeps_ties(self):
+        """测试剪枝不会因浮点舍入丢掉并列的文档"""
+        import random
+        rng = random.Random(2)
+        words = [f"w{i}" for i in range(8)]
+        index = InvertedIndex()
+        for i in range(150):
+            index.add_document(f"doc{i}", " ".join(rng.choice(words) for _ in range(rng.randint(1, 6))))
+        for k in (5, 10, 20):
+            self.assertEqual(len(index.search_ranked("w0 w1", k)), k)
+
+    def test_ranked_empty_query(self):
+        """测试空排序查询"""
+        self.assertEqual(self.index.search_ranked("the"), [])
+
+    def test_term_vector(self):
+        """测试词项向量"""
+        self.assertEqual(self.index.get_term_vector("doc1")["oil"], 2)
+        plain = InvertedIndex()
+        plain.build_from_documents({"doc1": "oil and more oil"})
+        self.assertEqual(plain.get_term_vector("doc1"), {"oil": 2, "more": 1})
+
+    def test_more_like_this(self):
+        """测试相似文档查询"""
+        similar = self.index.more_like_this("doc1", k=2)
+        self.assertEqual(similar[0][0], "doc3")
+        self.assertNotIn("doc1", [doc for doc, _ in similar])
+
+
+class TestCountQuery(unittest.TestCase):
+    """测试计数查询和近似计数"""
+
+    def setUp(self):
+        """每个测试前的准备工作"""
+        self.index = InvertedIndex()
+        self.index.build_from_documents({
+            "doc%d" % i: " ".join(word for word, step in
+                                  (("oil", 2), ("gas", 3), ("price", 5), ("wheat", 7))
+                                  if i % step == 0) + " report"
+            for i in range(1, 301)
+        })
+
+    def test_counts_match_result_sets(self):
+        """测试精确计数与结果集合大小一致"""
+        for terms in (["oil"], ["oil", "gas"], ["oil", "gas", "price"], ["missing", "oil"]):
+            self.assertEqual(self.index.count_and(terms), len(self.index.search_and(terms)))
+            self.assertEqual(self.index.count_or(terms), len(self.index.search_or(terms)))
+        self.assertEqual(self.index.count_not(["oil"], ["gas", "wheat"]),
+                         len(self.index.search_not(["oil"], ["gas", "wheat"])))
+        self.assertEqual(self.index.count_not([], ["oil"]),
+                         len(self.index.search_not([], ["oil"])))
+        self.assertEqual(self.index.count_phrase("wheat report"),
+                         len(self.index.search_phrase("wheat report")))
+
+    def test_estimate_or(self):
+        """测试OR查询的近似计数"""
+        exact = self.index.count_or(["oil", "gas", "price"])
+        self.assertAlmostEqual(self.index.estimate_count(["oil", "gas", "price"]), exact,
+                               delta=exact * 0.1)
+        self.assertEqual(self.index.estimate_count(["oil"]), 150)
+
+    def test_estimate_and(self):
+        """测试AND查询的近似计数不超过最小文档频率"""
+        estimate = self.index.estimate_count(["oil", "wheat"], operator='and')
+        self.assertLessEqual(estimate, self.index.get_document_frequency("wheat"))
+        self.assertAlmostEqual(estimate, self.index.count_and(["oil", "wheat"]), delta=5)
+        with self.assertRaises(ValueError):
+            self.index.estimate_count(["oil"], operator='xor')
+
+
 class TestIndexPersistence(unittest.TestCase):
     """测试索引持久化功能"""
     
@@ -159,6 +386,11 @@ class TestIndexPersistence(unittest.TestCase):
         result = index2.search("test")
         self.assertIn("doc1", result)
         self.assertIn("doc2", result)
+
+        # 语料统计在加载后重建
+        self.assertEqual(index2.stats.num_docs, 2)
+        self.assertEqual(index2.stats.avgdl, index1.stats.avgdl)
+        self.assertEqual(index2.stats.top_terms(2), index1.stats.top_terms(2))
         
         # 清理测试文件
         import os
@@ -166,6 +398,174 @@ class TestIndexPersistence(unittest.TestCase):
             os.remove(filename)
 
 
+class TestIndexOptions(unittest.TestCase):
+    """测试索引选项（仅文档、词频、完整位置）"""
+
+    def setUp(self):
+        self.docs = {
+            "doc1": "the quick brown fox jumps over the lazy dog",
+            "doc2": "the quick red fox",
+            "doc3": "brown dog brown dog",
+        }
+
+    def test_freqs_store_term_frequency(self):
+        """测试 freqs 只保存词频"""
+        index = InvertedIndex(index_options='freqs')
+        index.build_from_documents(self.docs)
+        self.assertEqual(index.index["brown"]["doc3"], 2)
+        self.assertEqual(index.get_term_frequency("brown", "doc3"), 2)
+        self.assertEqual(index.search_and(["quick", "fox"]), {"doc1", "doc2"})
+
+    def test_docs_store_membership_only(self):
+        """测试 docs 只保存文档"""
+        index = InvertedIndex(index_options='docs')
+        index.build_from_documents(self.docs)
+        self.assertEqual(index.index["brown"]["doc3"], 1)
+        self.assertEqual(index.search_or(["brown", "red"]), {"doc1", "doc2", "doc3"})
+
+    def test_phrase_requires_positions(self):
+        """测试未保存位置时短语查询明确报错"""
+        for option in ('docs', 'freqs'):
+            index = InvertedIndex(index_options=option)
+            index.build_from_documents(self.docs)
+            with self.assertRaises(PositionsNotIndexedError):
+                index.search_phrase("quick brown")
+            with self.assertRaises(PositionsNotIndexedError):
+                index.count_phrase("quick brown")
+
+    def test_invalid_option(self):
+        """测试无效的索引选项"""
+        with self.assertRaises(ValueError):
+            InvertedIndex(index_options='offsets')
+        with self.assertRaises(ValueError):
+            InvertedIndex(field_options={'title': 'offsets'})
+
+    def test_ranked_with_freqs(self):
+        """测试词频索引与位置索引的排序结果一致"""
+        full = InvertedIndex()
+        full.build_from_documents(self.docs)
+        freqs = InvertedIndex(index_options='freqs')
+        freqs.build_from_documents(self.docs)
+        self.assertEqual(freqs.search_ranked("brown dog"), full.search_ranked("brown dog"))
+
+    def test_fields(self):
+        """测试按字段设置索引选项和字段查询"""
+        index = InvertedIndex(index_options='docs', field_options={'title': 'positions'})
+        index.add_document("doc1", {"title": "quick brown fox", "body": "lazy dog sleeps"})
+        index.add_document("doc2", {"title": "lazy dog", "body": "quick brown fox runs"})
+        self.assertEqual(set(index.search("title:fox")), {"doc1"})
+        self.assertEqual(set(index.search("body:fox")), {"doc2"})
+        self.assertEqual(index.search_phrase("title:quick brown"), {"doc1"})
+        with self.assertRaises(PositionsNotIndexedError):
+            index.search_phrase("body:quick brown")
+        self.assertEqual(index.field_option("body:fox"), 'docs')
+
+    def test_save_and_load_options(self):
+        """测试索引选项随索引保存和加载"""
+        import os
+        index1 = InvertedIndex(index_options='freqs', field_options={'title': 'positions'})
+        index1.add_document("doc1", {"title": "quick brown fox", "body": "brown dog"})
+        filename = "test_index_options.json"
+        try:
+            index1.save_to_file(filename)
+            index2 = InvertedIndex()
+            index2.load_from_file(filename)
+        finally:
+            if os.path.exists(filename):
+                os.remove(filename)
+        self.assertEqual(index2.index_options, 'freqs')
+        self.assertEqual(index2.fields, {'title': 'positions', 'body': 'freqs'})
+        self.assertEqual(index2.search_phrase("title:brown fox"), {"doc1"})
+        self.assertEqual(index2.get_term_frequency("body:brown", "doc1"), 1)
+
+    def test_memory_savings(self):
+        """测试不保存位置时索引更小"""
+        docs = {f"doc{i}": " ".join(f"w{(i * j) % 50}" for j in range(200)) for i in range(50)}
+        sizes = {}
+        for option in ('freqs', 'positions'):
+            index = InvertedIndex(index_options=option)
+            index.build_from_documents(docs)
+            sizes[option] = index.memory_report()['components']['position_lists']
+        self.assertLess(sizes['freqs'], sizes['positions'])
+
+
+class TestDeleteDocument(unittest.TestCase):
+    """测试删除文档"""
+
+    docs = {
+        "doc1": "the quick brown fox jumps over the lazy dog",
+        "doc2": "a quick brown dog runs in the park",
+        "doc3": "the lazy cat sleeps all day",
+        "doc4": "quick foxes and lazy dogs are friends",
+    }
+
+    def assert_same_index(self, deleted, rebuilt):
+        """删除后的索引与不含被删文档重新构建的索引一致"""
+        self.assertEqual({term: dict(postings) for term, postings in deleted.index.items()},
+                         {term: dict(postings) for term, postings in rebuilt.index.items()})
+        self.assertEqual(deleted.documents, rebuilt.documents)
+        self.assertEqual(deleted.stats.collection_freq, rebuilt.stats.collection_freq)
+        self.assertEqual(deleted.stats.top_terms(5), rebuilt.stats.top_terms(5))
+        self.assertEqual(deleted.stats.avgdl, rebuilt.stats.avgdl)
+
+    def build(self, skip=(), **kwargs):
+        """构建索引，跳过 skip 中的文档"""
+        index = InvertedIndex(**kwargs)
+        index.build_from_documents({doc_id: text for doc_id, text in self.docs.items() if doc_id not in skip})
+        return index
+
+    def test_delete(self):
+        """测试删除后索引与重新构建一致"""
+        index = self.build()
+        self.assertTrue(index.delete_document("doc3"))
+        self.assertFalse(index.delete_document("doc3"))
+        self.assert_same_index(index, self.build(skip={"doc3"}))
+        # 只出现在被删文档中的词项从词典中消失
+        self.assertNotIn("cat", index.index)
+        self.assertEqual(index.search_wildcard("ca*"), set())
+
+    def test_delete_updates_auxiliary_structures(self):
+        """测试删除同步更新常用词二元组、冠军层和内存计量"""
+        index = self.build(common_words=["quick", "lazy"], champion_size=1)
+        index.memory_report()
+        index.search_ranked("lazy quick")
+        index.delete_document("doc1")
+        rebuilt = self.build(skip={"doc1"}, common_words=["quick", "lazy"])
+        self.assertEqual(dict(index.common_grams.postings), dict(rebuilt.common_grams.postings))
+        self.assertEqual(index.search_ranked("lazy quick"), rebuilt.search_ranked("lazy quick"))
+        incremental = index.memory_report()['components']
+        index._memory_accountant = None
+        self.assertEqual(incremental, index.memory_report()['components'])
+
+    def test_delete_fielded_document(self):
+        """测试删除多字段文档"""
+        index = InvertedIndex(field_options={'title': 'positions', 'body': 'freqs'})
+        index.add_document("doc1", {'title': "oil prices", 'body': "oil prices rise"})
+        index.add_document("doc2", {'title': "wheat exports", 'body': "oil exports"})
+        index.delete_document("doc1")
+        self.assertEqual(index.search("title:oil"), {})
+        self.assertEqual(index.search("body:oil"), {"doc2": 1})
+        self.assertEqual(index.stats.cf("body:oil"), 1)
+        self.assertEqual(index.stats.num_docs, 1)
+
+    def test_delete_docs_field(self):
+        """测试删除含 'docs' 字段的文档后统计与重新构建一致"""
+        docs = {"a": {'title': "oil", 'body': "oil oil oil price price"},
+                "b": {'title': "wheat", 'body': "oil"}}
+        for store_term_vectors in (False, True):
+            index = InvertedIndex(field_options={'title': 'positions', 'body': 'docs'},
+                                  store_term_vectors=store_term_vectors)
+            rebuilt = InvertedIndex(field_options={'title': 'positions', 'body': 'docs'})
+            for doc_id, fields in docs.items():
+                index.add_document(doc_id, fields)
+            rebuilt.add_document("b", docs["b"])
+            index.delete_document("a")
+            self.assert_same_index(index, rebuilt)
+            self.assertEqual(index.stats.total_tokens, sum(index.doc_lengths.values()))
+            self.assertEqual(index.stats.avgdl, 2.0)
+            self.assertEqual(index.search_ranked("body:oil"), rebuilt.search_ranked("body:oil"))
+
+
 def run_tests():
     """运行所有测试"""
     print("="*80)
@@ -178,7 +578,14 @@ def run_tests():
     
     # 添加测试
     suite.addTests(loader.loadTestsFromTestCase(TestInvertedIndex))
+    suite.addTests(loader.loadTestsFromTestCase(TestWildcardQuery))
+    suite.addTests(loader.loadTestsFromTestCase(TestFuzzyQuery))
+    suite.addTests(loader.loadTestsFromTestCase(TestDeduplication))
+    suite.addTests(loader.loadTestsFromTestCase(TestRankedQuery))
+    suite.addTests(loader.loadTestsFromTestCase(TestCountQuery))
     suite.addTests(loader.loadTestsFromTestCase(TestIndexPersistence))
+    suite.addTests(loader.loadTestsFromTestCase(TestIndexOptions))
+    suite.addTests(loader.loadTestsFromTestCase(TestDeleteDocument))
     
     # 运行测试
     runner = unittest.TextTestRunner(verbosity=2)
@@ -0,0 +1,61 @@
+"""
+内存占用估计单元测试
+"""
+
+import sys
+import unittest
+from inverted_index import InvertedIndex
+from memory_usage import deep_sizeof, MemoryAccountant, format_bytes
+
+
+class TestDeepSizeof(unittest.TestCase):
+    """深度大小估计测试类"""
+
+    def test_counts_nested_objects(self):
+        """测试递归计入嵌套对象，共享对象只计一次"""
+        text = "x" * 1000
+        self.assertGreater(deep_sizeof([text]), sys.getsizeof(text))
+        self.assertEqual(deep_sizeof([text, text]), sys.getsizeof([text, text]) + sys.getsizeof(text))
+        self.assertEqual(deep_sizeof([1, 2, 3]), sys.getsizeof([1, 2, 3]))
+
+    def test_format_bytes(self):
+        """测试字节数格式化"""
+        self.assertEqual(format_bytes(512), "512.0 B")
+        self.assertEqual(format_bytes(3 * 2**20), "3.0 MB")
+
+
+class TestMemoryReport(unittest.TestCase):
+    """索引内存报告测试类"""
+
+    def setUp(self):
+        """每个测试前的准备工作"""
+        self.index = InvertedIndex()
+        for i in range(30):
+            self.index.add_document(f"doc{i}", "oil prices rose " * (i + 1) + f"term{i}")
+
+    def test_components(self):
+        """测试报告包含各组件并与总数一致"""
+        report = self.index.memory_report(top_n=3)
+        components = report['components']
+        for name in ('term_dictionary', 'posting_containers', 'position_lists', 'documents', 'doc_lengths'):
+            self.assertGreater(components[name], 0, name)
+        self.assertEqual(report['total_bytes'], sum(components.values()))
+        self.assertEqual(report['num_terms'], 33)
+        self.assertEqual(report['num_postings'], 30 * 3 + 30)
+        # 位置列表最长的词项占用最多
+        self.assertEqual(len(report['heaviest_terms']), 3)
+        self.assertNotIn(report['heaviest_terms'][0][0], {f"term{i}" for i in range(30)})
+
+    def test_incremental_matches_full(self):
+        """测试增量更新的结果与重新完整计量一致"""
+        self.index.memory_report()
+        for i in range(30, 60):
+            self.index.add_document(f"doc{i}", "gold prices fell " * (i + 1) + f"term{i}")
+        incremental = self.index.memory_report()
+        full = MemoryAccountant(self.index).report()
+        self.assertEqual(incremental, full)
+        self.assertEqual(incremental['num_postings'], 60 * 3 + 60)
+
+
+if __name__ == "__main__":
+    unittest.main()
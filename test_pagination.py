@@ -0,0 +1,199 @@
+"""
+分页查询和查询预算单元测试
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+from inverted_index import InvertedIndex
+from pagination import FIRST_WINDOW, CursorError, QueryBudget, decode_cursor, encode_cursor, query_fingerprint
+
+
+def make_documents(count=60):
+    """生成文档：每篇都含 common，偶数篇含 even，每 3 篇含 oil prices 短语"""
+    documents = {}
+    for i in range(count):
+        words = ["common", f"word{i}"]
+        if i % 2 == 0:
+            words.append("even")
+        if i % 3 == 0:
+            words += ["oil", "prices"]
+        elif i % 3 == 1:
+            words += ["prices", "oil"]
+        documents[f"doc{i}"] = " ".join(words)
+    return documents
+
+
+class TestSearchPage(unittest.TestCase):
+    """分页查询测试类"""
+
+    def setUp(self):
+        self.index = InvertedIndex()
+        self.index.build_from_documents(make_documents())
+
+    def collect(self, query_type, query, page_size=7, budget_postings=None):
+        """逐页取完全部结果，返回 (结果列表, 页数)"""
+        results = []
+        cursor = None
+        pages = 0
+        while True:
+            budget = QueryBudget(max_postings=budget_postings) if budget_postings else None
+            page = self.index.search_page(query_type, query, page_size, cursor, budget)
+            self.assertLessEqual(len(page), page_size)
+            results.extend(page)
+            pages += 1
+            cursor = page.cursor
+            if cursor is None:
+                return results, pages
+
+    def test_pages_cover_full_results(self):
+        """测试逐页取出的结果与完整查询相同且不重复"""
+        index = self.index
+        cases = [
+            ('and', ["even", "oil"], index.search_and(["even", "oil"])),
+            ('or', ["even", "oil", "word1"], index.search_or(["even", "oil", "word1"])),
+            ('not', {'include': ["oil"], 'exclude': ["even"]}, index.search_not(["oil"], ["even"])),
+            ('not', {'include': [], 'exclude': ["oil"]}, index.search_not([], ["oil"])),
+            ('phrase', "oil prices", index.search_phrase("oil prices")),
+            ('phrase', "common", index.search_phrase("common")),
+        ]
+        for query_type, query, expected in cases:
+            results, _ = self.collect(query_type, query)
+            self.assertEqual(len(results), len(set(results)))
+            self.assertEqual(set(results), expected, query_type)
+
+    def test_empty_and_last_page(self):
+        """测试没有结果时返回空页，结果恰好填满最后一页时再取一次得到空页"""
+        page = self.index.search_page('and', ["missing"])
+        self.assertEqual(page.results, [])
+        self.assertIsNone(page.cursor)
+        results, pages = self.collect('and', ["even"], page_size=10)
+        self.assertEqual(len(results), 30)
+        self.assertEqual(pages, 4)
+
+    def test_resumes_posting_iteration(self):
+        """测试下一页从上一页停下的位置继续：第二页只检查新的倒排项"""
+        first = self.index.search_page('or', ["common"], 10)
+        second = self.index.search_page('or', ["common"], 10, first.cursor)
+        self.assertEqual(first.postings, 10)
+        self.assertEqual(second.postings, 10)
+        self.assertEqual(first.results + second.results, list(self.index.index["common"])[:20])
+
+    def test_ranked_pages(self):
+        """测试排序查询分页与 top-k 一致"""
+        full = self.index.search_ranked("even oil word4", k=100)
+        results, _ = self.collect('ranked', "even oil word4", page_size=4)
+        self.assertEqual(results, full)
+
+    def test_invalid_cursor(self):
+        """测试游标只能用于生成它的查询"""
+        page = self.index.search_page('and', ["common"], 5)
+        with self.assertRaises(CursorError):
+            self.index.search_page('and', ["even"], 5, page.cursor)
+        with self.assertRaises(CursorError):
+            self.index.search_page('and', ["common"], 5, "not-a-cursor")
+        with self.assertRaises(ValueError):
+            self.index.search_page('wildcard', "oil*")
+        self.assertEqual(decode_cursor(encode_cursor(7, ["term", 0, 3, "doc2"]), 7), ["term", 0, 3, "doc2"])
+
+    def test_index_changes_between_pages(self):
+        """测试翻页期间删除之前的文档时按文档ID重新定位；游标位置的文档被删除时报错"""
+        first = self.index.search_page('or', ["common"], 10)
+        self.index.delete_document("doc0")
+        second = self.index.search_page('or', ["common"], 10, first.cursor)
+        self.assertEqual(second.results, [f"doc{i}" for i in range(10, 20)])
+        self.index.delete_document("doc19")
+        with self.assertRaises(CursorError):
+            self.index.search_page('or', ["common"], 10, second.cursor)
+
+    def test_disk_index(self):
+        """测试磁盘索引上的分页查询"""
+        temp_dir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(temp_dir, "index.idx")
+            self.index.save_disk_index(path)
+            disk = InvertedIndex()
+            disk.load_disk_index(path)
+            page = disk.search_page('not', {'include': [], 'exclude': ["even"]}, 5)
+            self.assertEqual(page.results, ["doc1", "doc3", "doc5", "doc7", "doc9"])
+            page = disk.search_page('phrase', "oil prices", 100)
+            self.assertEqual(set(page.results), self.index.search_phrase("oil prices"))
+            disk.disk_index.close()
+        finally:
+            shutil.rmtree(temp_dir)
+
+    def test_disk_index_resumes_by_ordinal(self):
+        """测试磁盘索引按文档序号窗口遍历、从游标处续读，结果与完整查询相同"""
+        memory = InvertedIndex()
+        memory.build_from_documents(make_documents(600))
+        temp_dir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(temp_dir, "index.idx")
+            memory.save_disk_index(path)
+            self.index = InvertedIndex()
+            self.index.load_disk_index(path)
+            cases = [
+                ('and', ["even", "oil"], memory.search_and(["even", "oil"])),
+                ('or', ["even", "oil", "word1"], memory.search_or(["even", "oil", "word1"])),
+                ('not', {'include': ["oil"], 'exclude': ["even"]}, memory.search_not(["oil"], ["even"])),
+                ('not', {'include': [], 'exclude': ["oil"]}, memory.search_not([], ["oil"])),
+                ('phrase', "oil prices", memory.search_phrase("oil prices")),
+            ]
+            for first_window in (FIRST_WINDOW, 16):
+                with mock.patch('pagination.FIRST_WINDOW', first_window):
+                    for query_type, query, expected in cases:
+                        results, _ = self.collect(query_type, query, page_size=50)
+                        self.assertEqual(len(results), len(set(results)))
+                        self.assertEqual(set(results), expected, (query_type, first_window))
+            self.assertGreater(self.index.disk_index.skipped_blocks, 0)
+
+            cursor = encode_cursor(query_fingerprint('and', ["common"]), ["common", 0, 5, "missing"])
+            with self.assertRaises(CursorError):
+                self.index.search_page('and', ["common"], 5, cursor)
+            self.index.disk_index.close()
+        finally:
+            shutil.rmtree(temp_dir)
+
+
+class TestQueryBudget(unittest.TestCase):
+    """查询预算测试类"""
+
+    def setUp(self):
+        self.index = InvertedIndex()
+        self.index.build_from_documents(make_documents())
+
+    def test_max_postings(self):
+        """测试倒排项预算用尽时返回部分结果，游标可以继续"""
+        page = self.index.search_page('and', ["common", "even"], 100, budget=QueryBudget(max_postings=10))
+        self.assertTrue(page.partial)
+        # 驱动列表是较短的 even，检查的 10 个倒排项都是结果
+        self.assertEqual(page.postings, 10)
+        self.assertEqual(len(page), 10)
+        rest = self.index.search_page('and', ["common", "even"], 100, page.cursor)
+        self.assertFalse(rest.partial)
+        self.assertEqual(set(page.results) | set(rest.results), self.index.search_and(["even"]))
+
+    def test_deadline(self):
+        """测试截止时间已过时在下一次读取时钟处停止"""
+        budget = QueryBudget(timeout=0)
+        budget.CLOCK_INTERVAL = 4
+        budget._next_clock = 4
+        page = self.index.search_page('or', ["common"], 100, budget=budget)
+        self.assertTrue(page.partial)
+        self.assertEqual(len(page), 4)
+        self.assertIsNotNone(page.cursor)
+
+    def test_ranked_budget(self):
+        """测试排序查询的预算按词项检查，用尽时跳过剩余词项"""
+        page = self.index.search_page('ranked', "word3 common", 5, budget=QueryBudget(max_postings=5))
+        self.assertTrue(page.partial)
+        self.assertEqual([doc_id for doc_id, _ in page], ["doc3"])
+        page = self.index.search_page('ranked', "word3 common", 5, budget=QueryBudget(max_postings=1000))
+        self.assertFalse(page.partial)
+        self.assertEqual(len(page), 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+"""
+倒排列表缓存单元测试
+"""
+
+import unittest
+from posting_cache import PostingCache, zipf_sample
+
+
+def run(cache, keys, size=100):
+    """按顺序访问键，未命中时放入缓存"""
+    for key in keys:
+        if cache.get(key) is None:
+            cache.put(key, key, size)
+
+
+class TestPostingCache(unittest.TestCase):
+    """倒排列表缓存测试类"""
+
+    def test_hit_and_miss(self):
+        """测试命中统计"""
+        cache = PostingCache(10000)
+        run(cache, ["oil", "oil", "gas", "oil"])
+        stats = cache.stats()
+        self.assertEqual((stats['hits'], stats['misses']), (2, 2))
+        self.assertEqual(stats['hit_ratio'], 0.5)
+
+    def test_byte_bound(self):
+        """测试缓存字节数不超过上限"""
+        for policy in ("tinylfu", "lru"):
+            cache = PostingCache(1000, policy=policy)
+            run(cache, [f"term{i % 37}" for i in range(500)], size=70)
+            self.assertLessEqual(cache.size_bytes, 1000)
+            self.assertGreater(len(cache), 0)
+
+    def test_oversized_entry_rejected(self):
+        """测试大于容量的条目不被缓存"""
+        cache = PostingCache(1000)
+        cache.put("said", "postings", 5000)
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.stats()['rejected'], 1)
+
+    def test_entry_larger_than_window(self):
+        """测试大于窗口的条目直接参与主区准入，总字节数不超过上限"""
+        cache = PostingCache(100)
+        hot = [f"hot{i}" for i in range(8)]
+        run(cache, hot * 3, size=10)
+        cache.put("big", "postings", 95)
+        self.assertLessEqual(cache.size_bytes, 100)
+        self.assertNotIn("big", cache.window)
+        self.assertEqual(cache.stats()['rejected'], 1)
+        self.assertEqual(len(cache), len(hot))
+
+        # 访问频率更高的大条目可以进入主区
+        for _ in range(5):
+            cache.get("wide")
+        cache.put("wide", "postings", 60)
+        self.assertIn("wide", cache.probation)
+        self.assertLessEqual(cache.size_bytes, 100)
+
+    def test_scan_resistance(self):
+        """测试一次性扫描不会把高频词项挤出缓存（LRU 会）"""
+        hot = [f"hot{i}" for i in range(10)]
+        scan = [f"cold{i}" for i in range(200)]
+        sequence = hot * 5
+        for i in range(0, len(scan), 20):
+            sequence += scan[i:i + 20] + hot
+
+        results = {}
+        for policy in ("tinylfu", "lru"):
+            cache = PostingCache(1500, policy=policy)
+            run(cache, sequence)
+            results[policy] = cache.stats()['hit_ratio']
+            if policy == "tinylfu":
+                self.assertTrue(all(key in cache.probation or key in cache.protected for key in hot))
+        self.assertGreater(results["tinylfu"], results["lru"])
+
+    def test_invalid_policy(self):
+        """测试非法缓存策略"""
+        with self.assertRaises(ValueError):
+            PostingCache(1000, policy="fifo")
+
+    def test_zipf_sample(self):
+        """测试 Zipf 抽样偏向少数查询且可复现"""
+        queries = [{'type': 'term', 'query': f"term{i}"} for i in range(100)]
+        sample = zipf_sample(queries, 1000, s=1.2, seed=7)
+        self.assertEqual(sample, zipf_sample(queries, 1000, s=1.2, seed=7))
+        counts = sorted((sample.count(query) for query in queries), reverse=True)
+        self.assertGreater(sum(counts[:10]), 500)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,137 @@
+"""
+多进程查询单元测试
+"""
+
+import os
+import sys
+import unittest
+from disk_index import DiskIndex
+from inverted_index import InvertedIndex
+from query_workers import QueryWorkerPool, SharedSnapshot, merge_partitions, partition_ranges, process_memory
+
+
+DOCS = {
+    "doc1": "The quick brown fox jumps over the lazy dog",
+    "doc2": "A quick brown dog runs in the park",
+    "doc3": "The lazy cat sleeps all day",
+    "doc4": "Quick foxes and lazy dogs are friends",
+}
+
+QUERIES = [
+    {'type': 'term', 'query': "quick"},
+    {'type': 'and', 'query': ["quick", "brown"]},
+    {'type': 'phrase', 'query': "lazy dog"},
+    {'type': 'ranked', 'query': "lazy fox"},
+    {'type': 'wildcard', 'query': "qu*"},
+    {'type': 'or', 'query': ["cat", "park"]},
+    {'type': 'not', 'query': {'include': [], 'exclude': ["lazy"]}},
+    {'type': 'fuzzy', 'query': "dogs"},
+]
+
+
+class TestQueryWorkers(unittest.TestCase):
+    """多进程查询测试类"""
+
+    filename = "test_query_workers.idx"
+
+    @classmethod
+    def setUpClass(cls):
+        cls.memory = InvertedIndex()
+        cls.memory.build_from_documents(DOCS)
+        cls.memory.save_disk_index(cls.filename)
+        from benchmark import query_runner
+        cls.expected = [query_runner(cls.memory, query)() for query in QUERIES]
+
+    @classmethod
+    def tearDownClass(cls):
+        os.remove(cls.filename)
+
+    def test_shared_snapshot(self):
+        """测试共享内存快照与文件内容一致"""
+        snapshot = SharedSnapshot.create(self.filename)
+        try:
+            attached = SharedSnapshot(snapshot.name, snapshot.size)
+            disk = attached.open()
+            index = InvertedIndex()
+            index.load_disk_index(disk)
+            self.assertEqual(index.search_ranked("lazy fox"), self.memory.search_ranked("lazy fox"))
+            self.assertEqual(index.documents["doc3"], DOCS["doc3"])
+            disk.close()
+            attached.close()
+        finally:
+            snapshot.close()
+            snapshot.unlink()
+
+    def test_pool_results(self):
+        """测试工作进程的查询结果与内存索引一致"""
+        for mode in ('mmap', 'shm'):
+            with QueryWorkerPool(self.filename, workers=2, mode=mode) as pool:
+                self.assertEqual(pool.map(QUERIES, chunksize=1), self.expected)
+
+    def test_partition_ranges(self):
+        """测试分区连续、覆盖全部文档序号且大小相差不超过 1"""
+        self.assertEqual(partition_ranges(10, 3), [(0, 4), (4, 7), (7, 10)])
+        self.assertEqual(partition_ranges(2, 4), [(0, 1), (1, 2)])
+        self.assertEqual(partition_ranges(0, 4), [(0, 0)])
+
+    def test_partition_postings(self):
+        """测试按文档序号范围解码的倒排列表与完整列表中该范围的部分相同"""
+        # 大于一个块（128 项）的倒排列表，检验跳过块头
+        docs = {f"doc{i:03d}": "common " + ("rare" if i % 7 == 0 else "other") for i in range(300)}
+        memory = InvertedIndex()
+        memory.build_from_documents(docs)
+        filename = "test_query_workers_blocks.idx"
+        memory.save_disk_index(filename)
+        disk = DiskIndex(filename)
+        try:
+            ordinals = {doc_id: ordinal for ordinal, doc_id in enumerate(disk.doc_ids)}
+            for lo, hi in [(0, 300), (0, 1), (100, 260), (129, 130), (250, 300)]:
+                for term in ("common", "rare"):
+                    expected = {doc_id: value for doc_id, value in disk.postings(term).items()
+                                if lo <= ordinals[doc_id] < hi}
+                    self.assertEqual(disk.postings(term, (lo, hi)), expected, (term, lo, hi))
+                self.assertEqual(disk.intersect(["common", "rare"], (lo, hi)),
+                                 [doc_id for doc_id in disk.intersect(["common", "rare"])
+                                  if lo <= ordinals[doc_id] < hi])
+            self.assertGreater(disk.skipped_blocks, 0)
+            index = InvertedIndex()
+            index.load_disk_index(disk, partition=(100, 200))
+            self.assertEqual(len(index.documents), 100)
+            self.assertIn(disk.doc_ids[150], index.documents)
+            self.assertNotIn(disk.doc_ids[50], index.documents)
+            # 语料统计取整个索引，各分区的 BM25 得分与不分区时相同
+            scores = dict(memory.search_ranked("rare", k=300))
+            for doc_id, score in index.search_ranked("rare", k=300):
+                self.assertAlmostEqual(score, scores[doc_id])
+            disk.close()
+        finally:
+            os.remove(filename)
+
+    def test_merge_partitions(self):
+        """测试合并集合、倒排列表和前 k 个排序结果"""
+        self.assertEqual(merge_partitions([{"a"}, {"b"}, set()]), {"a", "b"})
+        self.assertEqual(merge_partitions([{"a": [0]}, {"b": [1, 2]}]), {"a": [0], "b": [1, 2]})
+        self.assertEqual(merge_partitions([[("a", 2.0), ("b", 1.0)], [("c", 2.0), ("d", 0.5)]], k=3),
+                         [("c", 2.0), ("a", 2.0), ("b", 1.0)])
+
+    def test_search_partitioned(self):
+        """测试分区并行执行后合并的结果与单进程相同"""
+        with QueryWorkerPool(self.filename, workers=2) as pool:
+            for partitions in (1, 2, 3, 8):
+                self.assertEqual([pool.search_partitioned(query, partitions) for query in QUERIES], self.expected)
+
+    def test_invalid_mode(self):
+        """测试非法映射方式"""
+        with self.assertRaises(ValueError):
+            QueryWorkerPool(self.filename, mode="copy")
+
+    @unittest.skipUnless(sys.platform.startswith('linux'), "需要 /proc/<pid>/smaps_rollup")
+    def test_process_memory(self):
+        """测试读取进程内存占用"""
+        usage = process_memory()
+        self.assertGreater(usage['rss'], 0)
+        self.assertLessEqual(usage['pss'], usage['rss'])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+"""
+概率草图单元测试
+"""
+
+import unittest
+from sketches import HyperLogLog, CountMinSketch, hash64
+
+
+class TestHyperLogLog(unittest.TestCase):
+    """HyperLogLog 测试类"""
+
+    def build(self, values, precision=10):
+        """用给定元素构建草图"""
+        sketch = HyperLogLog(precision)
+        sketch.update(hash64(str(value)) for value in values)
+        return sketch
+
+    def test_small_cardinality(self):
+        """测试小基数估计（线性计数）"""
+        self.assertAlmostEqual(len(self.build(range(100))), 100, delta=5)
+
+    def test_large_cardinality(self):
+        """测试大基数估计误差在 3 倍标准误差内"""
+        sketch = self.build(range(20000))
+        self.assertAlmostEqual(sketch.estimate(), 20000, delta=20000 * 3 * 1.04 / 32)
+
+    def test_merge_estimates_union(self):
+        """测试合并后估计并集基数"""
+        union = self.build(range(0, 6000))
+        union.merge(self.build(range(4000, 10000)))
+        self.assertAlmostEqual(union.estimate(), 10000, delta=10000 * 3 * 1.04 / 32)
+
+    def test_merge_takes_register_maximum(self):
+        """测试合并结果与逐寄存器取最大值一致"""
+        a = self.build(range(500))
+        b = self.build(range(300, 900))
+        expected = bytearray(map(max, a.registers, b.registers))
+        a.merge(b)
+        self.assertEqual(a.registers, expected)
+
+    def test_invalid_precision(self):
+        """测试非法精度"""
+        with self.assertRaises(ValueError):
+            HyperLogLog(3)
+
+
+class TestCountMinSketch(unittest.TestCase):
+    """Count-Min 草图测试类"""
+
+    def test_estimate_never_underestimates(self):
+        """测试估计值不低于真实次数（未达上限时）"""
+        sketch = CountMinSketch(width=256)
+        for value in range(200):
+            for _ in range(value % 5):
+                sketch.add(hash64(str(value)))
+        for value in range(200):
+            self.assertGreaterEqual(sketch.estimate(hash64(str(value))), value % 5)
+
+    def test_counter_saturates(self):
+        """测试计数器饱和于 MAX_COUNT"""
+        sketch = CountMinSketch(width=64)
+        for _ in range(100):
+            sketch.add(hash64("hot"))
+        self.assertEqual(sketch.estimate(hash64("hot")), CountMinSketch.MAX_COUNT)
+
+    def test_aging_halves_counts(self):
+        """测试累计加入 sample_size 次后计数减半"""
+        sketch = CountMinSketch(width=64, sample_size=10)
+        for _ in range(8):
+            sketch.add(hash64("hot"))
+        sketch.add(hash64("a"))
+        self.assertEqual(sketch.estimate(hash64("hot")), 8)
+        sketch.add(hash64("b"))
+        self.assertEqual(sketch.estimate(hash64("hot")), 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+"""
+外存索引构建单元测试
+"""
+
+import os
+import glob
+import shutil
+import filecmp
+import tempfile
+import unittest
+from inverted_index import InvertedIndex
+from spimi import SpimiBuilder
+
+
+DOCUMENTS = {
+    "doc1": "The quick brown fox jumps over the lazy dog",
+    "doc2": "A quick brown dog runs in the park",
+    "doc3": "The lazy cat sleeps all day",
+    "doc4": "Quick foxes and lazy dogs are friends",
+    "doc5": "Brown foxes jump over brown dogs again and again",
+    "doc6": "The park is quiet at night",
+}
+
+
+class TestSpimiBuilder(unittest.TestCase):
+    """外存索引构建测试类"""
+
+    def setUp(self):
+        """创建临时目录"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.expected = os.path.join(self.temp_dir, "expected.idx")
+        self.built = os.path.join(self.temp_dir, "built.idx")
+
+    def tearDown(self):
+        """删除临时目录"""
+        shutil.rmtree(self.temp_dir)
+
+    def build(self, memory_budget, documents=DOCUMENTS, **options):
+        """用 SpimiBuilder 构建索引，返回统计"""
+        builder = SpimiBuilder(self.built, memory_budget, temp_dir=self.temp_dir, **options)
+        for doc_id, content in documents.items():
+            builder.add_document(doc_id, content)
+        return builder.finish()
+
+    def test_matches_in_memory_build(self):
+        """测试分成多个运行文件归并的结果与内存索引写出的文件完全相同"""
+        memory = InvertedIndex()
+        memory.build_from_documents(DOCUMENTS)
+        memory.save_disk_index(self.expected)
+        for budget in (1, 600, 1 << 20):
+            results = self.build(budget)
+            self.assertTrue(filecmp.cmp(self.expected, self.built, shallow=False))
+            self.assertEqual(results['documents'], len(DOCUMENTS))
+            self.assertEqual(results['terms'], len(memory.index))
+        # 预算为 1 字节时每篇文档写出一个运行文件（最后一块留在内存中）
+        self.assertEqual(self.build(1)['runs'], len(DOCUMENTS))
+        self.assertEqual(self.build(1 << 20)['runs'], 1)
+
+    def test_index_options_and_fields(self):
+        """测试 freqs 选项和多字段文档"""
+        documents = {
+            "doc1": {"title": "Oil prices", "body": "Oil prices rose as oil supply fell"},
+            "doc2": {"title": "Gas", "body": "Gas prices fell"},
+            "doc3": {"title": "Oil exports", "body": "Exports of crude oil rose"},
+        }
+        memory = InvertedIndex(index_options='freqs', field_options={'title': 'positions'})
+        memory.build_from_documents(documents)
+        memory.save_disk_index(self.expected)
+        self.build(1, documents, index_options='freqs', field_options={'title': 'positions'})
+        self.assertTrue(filecmp.cmp(self.expected, self.built, shallow=False))
+
+        disk = InvertedIndex()
+        disk.load_disk_index(self.built)
+        self.assertEqual(disk.index['body:oil'], {"doc1": 2, "doc3": 1})
+        self.assertEqual(disk.index['title:oil'], {"doc1": [0], "doc3": [0]})
+        disk.disk_index.close()
+
+    def test_searches_built_index(self):
+        """测试构建的索引可以打开并查询"""
+        self.build(300, store_documents=False)
+        disk = InvertedIndex()
+        disk.load_disk_index(self.built)
+        self.assertEqual(disk.search_and(["brown", "dog"]), {"doc1", "doc2"})
+        self.assertEqual(disk.search_phrase("lazy dog"), {"doc1"})
+        self.assertEqual(disk.documents, {})
+        disk.disk_index.close()
+
+    def test_memory_budget(self):
+        """测试内存块在超过预算的那篇文档之后即被写出"""
+        builder = SpimiBuilder(self.built, 500, temp_dir=self.temp_dir)
+        for doc_id, content in DOCUMENTS.items():
+            builder.add_document(doc_id, content)
+            self.assertLess(builder._block_bytes, 500)
+        self.assertGreater(len(builder.runs), 1)
+        builder.finish()
+
+    def test_temporary_files_removed(self):
+        """测试完成或放弃构建后删除运行文件"""
+        self.build(1)
+        self.assertEqual(glob.glob(os.path.join(self.temp_dir, "spimi-*")), [])
+        with self.assertRaises(RuntimeError):
+            with SpimiBuilder(self.built, 1, temp_dir=self.temp_dir) as builder:
+                builder.add_document("doc1", DOCUMENTS["doc1"])
+                raise RuntimeError("中途失败")
+        self.assertEqual(glob.glob(os.path.join(self.temp_dir, "spimi-*")), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
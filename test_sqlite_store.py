@@ -0,0 +1,178 @@
+"""
+SQLite 倒排存储单元测试
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from disk_index import BLOCK_SIZE
+from inverted_index import InvertedIndex
+from posting_cache import PostingCache
+
+
+DOCUMENTS = {
+    "doc1": "The quick brown fox jumps over the lazy dog",
+    "doc2": "A quick brown dog runs in the park",
+    "doc3": "The lazy cat sleeps all day",
+    "doc4": "Quick foxes and lazy dogs are friends",
+    "doc5": "Brown foxes jump over brown dogs again and again",
+}
+
+
+class TestSqliteStore(unittest.TestCase):
+    """SQLite 存储测试类"""
+
+    def setUp(self):
+        """创建临时目录和内存索引"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.temp_dir, "index.sqlite")
+        self.memory = InvertedIndex()
+        self.memory.build_from_documents(DOCUMENTS)
+        self.opened = []
+
+    def tearDown(self):
+        """关闭数据库并删除临时目录"""
+        for index in self.opened:
+            index.sqlite_store.close()
+        shutil.rmtree(self.temp_dir)
+
+    def open(self, cache=None, **options):
+        """打开数据库"""
+        index = InvertedIndex(**options)
+        index.open_sqlite(self.path, cache)
+        self.opened.append(index)
+        return index
+
+    def close(self, index):
+        """关闭数据库"""
+        index.sqlite_store.close()
+        self.opened.remove(index)
+
+    def assertSameIndex(self, db, memory):
+        """断言两个索引的倒排列表、文档、统计和查询结果相同"""
+        self.assertEqual(dict(db.index), memory.index)
+        self.assertEqual(dict(db.documents), memory.documents)
+        self.assertEqual(db.doc_lengths, memory.doc_lengths)
+        self.assertEqual(db.stats.num_docs, memory.stats.num_docs)
+        self.assertEqual(db.stats.total_tokens, memory.stats.total_tokens)
+        for term in memory.index:
+            self.assertEqual(db.stats.df(term), memory.stats.df(term))
+            self.assertEqual(db.stats.cf(term), memory.stats.cf(term))
+        self.assertEqual(db.stats.top_terms(5), memory.stats.top_terms(5))
+        for query in ("brown dog", "lazy", "quick fox"):
+            self.assertEqual(db.search_and(query.split()), memory.search_and(query.split()))
+            self.assertEqual(db.search_phrase(query), memory.search_phrase(query))
+            self.assertEqual(db.search_ranked(query, k=3), memory.search_ranked(query, k=3))
+
+    def test_save_and_open(self):
+        """测试保存后打开的结果与内存索引相同，关闭后再打开数据仍在"""
+        self.assertGreater(self.memory.save_sqlite(self.path), 0)
+        db = self.open()
+        self.assertSameIndex(db, self.memory)
+        self.close(db)
+        self.assertSameIndex(self.open(), self.memory)
+
+    def test_incremental_updates(self):
+        """测试添加、删除和覆盖文档后与内存索引一致"""
+        db = self.open()
+        for doc_id, content in DOCUMENTS.items():
+            db.add_document(doc_id, content)
+        self.assertSameIndex(db, self.memory)
+
+        db.add_document("doc6", "A lazy brown cat in the park")
+        self.memory.add_document("doc6", "A lazy brown cat in the park")
+        self.assertTrue(db.delete_document("doc2"))
+        self.memory.delete_document("doc2")
+        self.assertFalse(db.delete_document("missing"))
+        # 已存在的文档ID被覆盖（内存索引需先删除）
+        db.add_document("doc3", "The quick cat naps")
+        self.memory.delete_document("doc3")
+        self.memory.add_document("doc3", "The quick cat naps")
+        self.assertSameIndex(db, self.memory)
+
+        self.close(db)
+        self.assertSameIndex(self.open(), self.memory)
+
+    def test_batch_upsert(self):
+        """测试批量添加在一个事务中覆盖已存在的文档，同一批中重复的ID以最后一次为准"""
+        self.memory.save_sqlite(self.path)
+        db = self.open()
+        db.build_from_documents({"doc1": "lazy foxes", "doc7": "brown park"})
+        db.sqlite_store.add_documents([("doc8", "cat"), ("doc8", "dog")], db._analyze_document)
+        db._sqlite_write({"cat", "dog"})
+        self.memory.delete_document("doc1")
+        self.memory.build_from_documents({"doc1": "lazy foxes", "doc7": "brown park", "doc8": "dog"})
+        self.assertSameIndex(db, self.memory)
+
+    def test_fields_and_index_options(self):
+        """测试多字段文档和 freqs 选项"""
+        documents = {
+            "doc1": {"title": "Oil prices", "body": "Oil prices rose as oil supply fell"},
+            "doc2": {"title": "Gas", "body": "Gas prices fell"},
+        }
+        options = {'index_options': 'freqs', 'field_options': {'title': 'positions'}}
+        memory = InvertedIndex(**options)
+        memory.build_from_documents(documents)
+        db = self.open(**options)
+        db.build_from_documents(documents)
+        self.assertEqual(db.index['body:oil'], {"doc1": 2})
+        self.assertEqual(db.index['title:oil'], {"doc1": [0]})
+        self.assertEqual(dict(db.index), memory.index)
+        self.close(db)
+        # 再次打开时沿用数据库中的选项
+        db = self.open()
+        self.assertEqual(db.index_options, 'freqs')
+        self.assertEqual(db.fields, memory.fields)
+        self.assertEqual(db.search_ranked("oil", k=2), memory.search_ranked("oil", k=2))
+
+    def test_blocks(self):
+        """测试超过 BLOCK_SIZE 的倒排列表分成多块，删除中间的文档只改写一块"""
+        db = self.open()
+        count = BLOCK_SIZE * 2 + 10
+        db.build_from_documents({f"doc{i}": f"common term{i % 3}" for i in range(count)})
+        for i in range(10):
+            db.add_document(f"extra{i}", "common")
+        conn = db.sqlite_store.conn
+        blocks = [row[0] for row in conn.execute(
+            "SELECT COUNT(*) FROM postings WHERE term = 'common' GROUP BY term")]
+        self.assertEqual(blocks, [-(-(count + 10) // BLOCK_SIZE)])
+        db.delete_document("doc5")
+        self.assertEqual(len(db.index["common"]), count + 9)
+        self.assertNotIn("doc5", db.index["common"])
+        self.assertEqual(db.stats.df("common"), count + 9)
+
+    def test_cache_invalidated_on_write(self):
+        """测试写入后缓存中的倒排列表失效"""
+        self.memory.save_sqlite(self.path)
+        db = self.open(cache=PostingCache(1 << 20))
+        self.assertEqual(set(db.index["lazy"]), {"doc1", "doc3", "doc4"})
+        self.assertEqual(db.search_wildcard("after*"), set())
+        db.delete_document("doc3")
+        db.add_document("doc9", "lazy afternoon")
+        self.assertEqual(set(db.index["lazy"]), {"doc1", "doc4", "doc9"})
+        self.assertEqual(db.search_and(["lazy", "afternoon"]), {"doc9"})
+        self.assertNotIn("afternoon", self.memory.index)
+        self.assertEqual(db.search_wildcard("after*"), {"doc9"})
+
+    def test_failed_transaction_rolls_back(self):
+        """测试批量添加中途失败时数据库和进程内状态都不变"""
+        self.memory.save_sqlite(self.path)
+        db = self.open()
+
+        def analyze(content):
+            if content == "fails":
+                raise RuntimeError("中途失败")
+            return db._analyze_document(content)
+
+        # 覆盖 doc1、添加 doc6 之后失败
+        with self.assertRaises(RuntimeError):
+            db.sqlite_store.add_documents([("doc1", "replaced content"), ("doc6", "new document"),
+                                           ("doc7", "fails")], analyze)
+        self.assertSameIndex(db, self.memory)
+        self.close(db)
+        self.assertSameIndex(self.open(), self.memory)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+"""
+有序词典与 k-gram 索引单元测试
+"""
+
+import unittest
+from term_dictionary import SortedTermDictionary, KGramIndex, wildcard_to_regex
+
+
+class TestSortedTermDictionary(unittest.TestCase):
+    """前缀编码有序词典测试类"""
+
+    def setUp(self):
+        """每个测试前的准备工作"""
+        self.terms = ["petrol", "petroleum", "petrobras", "pet", "port",
+                      "export", "import", "report", "oil", "zinc"]
+        self.dictionary = SortedTermDictionary(self.terms, block_size=4)
+
+    def test_iteration_sorted(self):
+        """测试遍历结果有序且完整"""
+        self.assertEqual(list(self.dictionary), sorted(self.terms))
+        self.assertEqual(len(self.dictionary), len(self.terms))
+
+    def test_contains(self):
+        """测试成员判断"""
+        self.assertIn("petroleum", self.dictionary)
+        self.assertNotIn("petro", self.dictionary)
+        self.assertNotIn("aaa", self.dictionary)
+
+    def test_prefix_terms(self):
+        """测试前缀范围查找"""
+        self.assertEqual(self.dictionary.prefix_terms("petro"),
+                         ["petrobras", "petrol", "petroleum"])
+        self.assertEqual(self.dictionary.prefix_terms("pet"),
+                         ["pet", "petrobras", "petrol", "petroleum"])
+        self.assertEqual(self.dictionary.prefix_terms("q"), [])
+
+    def test_term_at(self):
+        """测试按序号取词项"""
+        for position, term in enumerate(sorted(self.terms)):
+            self.assertEqual(self.dictionary.term_at(position), term)
+
+
+class TestKGramIndex(unittest.TestCase):
+    """k-gram 索引测试类"""
+
+    def test_infix_candidates(self):
+        """测试中缀通配符候选集"""
+        kgrams = KGramIndex(["export", "import", "report", "portal", "oil"])
+        candidates = kgrams.candidates("*port*")
+        self.assertEqual(candidates, {"export", "import", "report", "portal"})
+
+    def test_suffix_candidates(self):
+        """测试后缀通配符候选集需要再经正则校验"""
+        kgrams = KGramIndex(["export", "import", "portal"])
+        regex = wildcard_to_regex("*port")
+        matches = {t for t in kgrams.candidates("*port") if regex.match(t)}
+        self.assertEqual(matches, {"export", "import"})
+
+    def test_no_fixed_segment(self):
+        """测试模式中没有足够长的固定片段"""
+        kgrams = KGramIndex(["oil"])
+        self.assertIsNone(kgrams.candidates("*o*"))
+
+
+if __name__ == "__main__":
+    unittest.main()
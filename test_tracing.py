@@ -0,0 +1,94 @@
+"""
+查询追踪单元测试
+"""
+
+import os
+import json
+import tempfile
+import unittest
+from inverted_index import InvertedIndex
+from tracing import Tracer, RingBufferSink, JsonLinesSink, PrometheusSink
+
+
+class TestQueryTracing(unittest.TestCase):
+    """查询追踪测试类"""
+
+    def setUp(self):
+        """每个测试前的准备工作"""
+        self.ring = RingBufferSink(capacity=5)
+        self.index = InvertedIndex(tracer=Tracer([self.ring]))
+        self.index.add_document("doc1", "oil prices rose sharply")
+        self.index.add_document("doc2", "oil prices fell")
+        self.index.add_document("doc3", "gold prices rose")
+
+    def test_disabled_by_default(self):
+        """测试默认不追踪"""
+        self.assertIsNone(InvertedIndex().tracer)
+
+    def test_and_trace(self):
+        """测试AND查询记录阶段耗时和计数器"""
+        self.assertEqual(self.index.search_and(["prices", "oil"]), {"doc1", "doc2"})
+        trace = self.ring.traces[-1]
+        self.assertEqual(trace.query_type, 'and')
+        self.assertEqual(set(trace.stages), {'preprocess', 'fetch', 'intersect'})
+        self.assertEqual(trace.counters['candidates'], 2)
+        self.assertEqual(trace.counters['postings_total'], 5)
+        self.assertEqual(trace.result_count, 2)
+        self.assertGreaterEqual(trace.total_ns, sum(trace.stages.values()))
+
+    def test_phrase_trace(self):
+        """测试短语查询记录候选文档和位置检查"""
+        self.index.search_phrase("prices rose")
+        trace = self.ring.traces[-1]
+        self.assertEqual(trace.query_type, 'phrase')
+        self.assertEqual(trace.counters, {'candidates': 3, 'start_positions': 3})
+        self.assertEqual(trace.result_count, 2)
+
+    def test_nested_queries_single_trace(self):
+        """测试NOT、通配符和模糊查询各只产生一条记录"""
+        self.index.search_not(["prices"], ["gold"])
+        self.index.search_wildcard("pri*")
+        self.index.search_fuzzy("prises")
+        self.index.search_ranked("oil prices")
+        self.assertEqual([trace.query_type for trace in self.ring.traces],
+                         ['not', 'wildcard', 'fuzzy', 'ranked'])
+        self.assertEqual(self.ring.traces[0].counters['postings_scanned'], 1)
+        self.assertEqual(self.ring.traces[1].counters['expansions'], 1)
+
+    def test_ring_buffer_capacity(self):
+        """测试环形缓冲区只保留最近的记录"""
+        for _ in range(8):
+            self.index.search("oil")
+        self.assertEqual(len(self.ring.traces), 5)
+        self.assertEqual(len(self.ring.slowest(2)), 2)
+
+    def test_json_lines_sink(self):
+        """测试 JSON Lines 输出"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'traces.jsonl')
+            sink = JsonLinesSink(path)
+            self.index.tracer.sinks.append(sink)
+            self.index.search_or(["oil", "gold"])
+            self.index.search("prices")
+            sink.close()
+            with open(path, encoding='utf-8') as f:
+                records = [json.loads(line) for line in f]
+        self.assertEqual([record['type'] for record in records], ['or', 'term'])
+        self.assertEqual(records[0]['counters']['postings_scanned'], 3)
+        self.assertEqual(records[0]['results'], 3)
+
+    def test_prometheus_sink(self):
+        """测试 Prometheus 文本格式输出"""
+        sink = PrometheusSink()
+        self.index.tracer.sinks.append(sink)
+        self.index.search_and(["oil", "prices"])
+        self.index.search_and(["gold"])
+        text = sink.render()
+        self.assertIn('inverted_index_queries_total{type="and"} 2', text)
+        self.assertIn('inverted_index_query_work_total{type="and",counter="candidates"} 3', text)
+        self.assertIn('inverted_index_query_duration_seconds_bucket{type="and",le="+Inf"} 2', text)
+        self.assertIn('# TYPE inverted_index_query_duration_seconds histogram', text)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+"""
+稠密向量索引单元测试（需要 NumPy，没有时跳过）
+"""
+
+import shutil
+import tempfile
+import unittest
+from inverted_index import InvertedIndex
+from vector_index import np, VectorIndex, hybrid_search, recall_at_k
+
+
+DOCS = {
+    "oil1": "crude oil prices rose as opec cut crude output",
+    "oil2": "crude oil exports fell and petroleum stocks rose",
+    "oil3": "petroleum refinery output and crude oil supply",
+    "oil4": "opec petroleum ministers discuss crude oil prices",
+    "oil5": "oil tanker shipments to the gulf",
+    "grain1": "wheat exports and corn harvest estimates",
+    "grain2": "grain traders expect wheat prices to fall",
+    "grain3": "corn and wheat crop forecasts from the farm agency",
+    "bank1": "central bank raises interest rates",
+    "bank2": "bank lending and interest rates in the money market",
+}
+
+
+@unittest.skipIf(np is None, "需要 NumPy")
+class TestVectorIndex(unittest.TestCase):
+    """向量索引测试类"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.index = InvertedIndex()
+        cls.index.build_from_documents(DOCS)
+        cls.vectors = VectorIndex.build(cls.index, dim=4, method='lsi', nlist=3)
+
+    def test_build(self):
+        """测试向量归一化、按簇连续存放"""
+        vectors = self.vectors
+        self.assertEqual(len(vectors), len(DOCS))
+        self.assertEqual(vectors.vectors.dtype, np.float32)
+        self.assertTrue(np.allclose(np.linalg.norm(vectors.vectors, axis=1), 1, atol=1e-5))
+        self.assertEqual(int(vectors.list_ptr[-1]), len(DOCS))
+        self.assertEqual(sorted(vectors.doc_ids), sorted(DOCS))
+
+    def test_synonyms(self):
+        """测试 LSI 检索找到不含查询词但含共现词的文档"""
+        results = [doc_id for doc_id, _ in self.vectors.search(["petroleum"], k=5, nprobe=None)]
+        self.assertIn("oil5", results)
+        self.assertFalse(any(doc_id.startswith("bank") for doc_id in results))
+        self.assertNotIn("oil5", self.index.search_or(["petroleum"]))
+
+    def test_ivf_recall(self):
+        """测试扫描全部簇时与精确检索一致，只扫描部分簇时召回率不超过 1"""
+        vector = self.vectors.embed(["wheat", "prices"])
+        exact = self.vectors.search_vector(vector, 3, None)
+        self.assertEqual(self.vectors.search_vector(vector, 3, len(self.vectors.centroids)), exact)
+        self.assertEqual(recall_at_k(exact, exact), 1.0)
+        self.assertLessEqual(recall_at_k(self.vectors.search_vector(vector, 3, 1), exact), 1.0)
+        self.assertEqual(self.vectors.search(["unknownterm"]), [])
+
+    def test_save_and_load(self):
+        """测试保存后以内存映射载入，检索结果相同"""
+        temp_dir = tempfile.mkdtemp()
+        try:
+            self.vectors.save(temp_dir)
+            loaded = VectorIndex.load(temp_dir)
+            self.assertIsInstance(loaded.vectors, np.memmap)
+            self.assertEqual(loaded.search(["interest", "rates"], 3, None),
+                             self.vectors.search(["interest", "rates"], 3, None))
+        finally:
+            shutil.rmtree(temp_dir)
+
+    def test_hybrid(self):
+        """测试 alpha=1 时与 BM25 顺序一致，融合结果不含已删除的文档"""
+        bm25 = [doc_id for doc_id, _ in self.index.search_ranked("crude oil", 5)]
+        self.assertEqual([doc_id for doc_id, _ in hybrid_search(self.index, self.vectors, "crude oil", 5, alpha=1.0)],
+                         bm25)
+        fused = hybrid_search(self.index, self.vectors, "petroleum", 5, alpha=0.5)
+        self.assertEqual(fused[0][0][:3], "oil")
+
+        index = InvertedIndex()
+        index.build_from_documents(DOCS)
+        vectors = VectorIndex.build(index, dim=4, method='random', nlist=2)
+        index.delete_document("oil1")
+        self.assertNotIn("oil1", [doc_id for doc_id, _ in hybrid_search(index, vectors, "crude oil", 10)])
+
+    def test_invalid_method(self):
+        """测试不支持的投影方法和扫描簇数"""
+        with self.assertRaises(ValueError):
+            VectorIndex.build(self.index, method='pca')
+        with self.assertRaises(ValueError):
+            self.vectors.search(["crude"], nprobe=0)
+
+    def test_zero_vectors(self):
+        """测试空索引、单文档索引和所有词项 idf 为 0 时只建立一个零质心"""
+        for docs in ({}, {"oil1": "crude oil"}, {"oil1": "crude oil", "oil2": "oil crude"}):
+            index = InvertedIndex()
+            index.build_from_documents(docs)
+            for method in ('lsi', 'random'):
+                vectors = VectorIndex.build(index, dim=4, method=method)
+                self.assertEqual(len(vectors), len(docs))
+                self.assertEqual(len(vectors.centroids), 1)
+                self.assertEqual(vectors.search(["crude"]), [])
+                self.assertEqual(vectors.search(["crude"], nprobe=None), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
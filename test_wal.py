@@ -0,0 +1,185 @@
+"""
+预写日志单元测试
+"""
+
+import os
+import tempfile
+import time
+import unittest
+from dedup import NearDuplicateDetector
+from wal import WriteAheadLog, atomic_write
+from inverted_index import InvertedIndex
+
+
+class TestWriteAheadLog(unittest.TestCase):
+    """预写日志测试类"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "index.wal")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_append_and_read(self):
+        """测试追加的记录按 LSN 顺序读回"""
+        wal = WriteAheadLog(self.path)
+        self.assertEqual(wal.append('add', doc_id="doc1", content="oil"), 1)
+        self.assertEqual(wal.append('delete', doc_id="doc1"), 2)
+        wal.close()
+        reopened = WriteAheadLog(self.path)
+        self.assertEqual(reopened.last_lsn, 2)
+        self.assertEqual([(r['lsn'], r['op']) for r in reopened.records()], [(1, 'add'), (2, 'delete')])
+        self.assertEqual([r['lsn'] for r in reopened.records(after_lsn=1)], [2])
+        reopened.close()
+
+    def test_torn_tail_is_truncated(self):
+        """测试写到一半的尾部记录在打开时被截掉"""
+        wal = WriteAheadLog(self.path)
+        wal.append('add', doc_id="doc1", content="oil")
+        wal.append('add', doc_id="doc2", content="gas")
+        wal.close()
+        size = os.path.getsize(self.path)
+        with open(self.path, 'r+b') as f:
+            f.truncate(size - 3)
+        wal = WriteAheadLog(self.path)
+        self.assertEqual([r['doc_id'] for r in wal.records()], ["doc1"])
+        # 新记录接在最后一条有效记录之后
+        self.assertEqual(wal.append('add', doc_id="doc3", content="coal"), 2)
+        wal.close()
+        self.assertEqual([r['doc_id'] for r in WriteAheadLog(self.path).records()], ["doc1", "doc3"])
+
+    def test_corrupt_record_stops_replay(self):
+        """测试校验和不符的记录及其后的记录被丢弃"""
+        wal = WriteAheadLog(self.path)
+        wal.append('add', doc_id="doc1", content="oil")
+        wal.close()
+        with open(self.path, 'r+b') as f:
+            f.seek(-2, os.SEEK_END)
+            f.write(b'XX')
+        self.assertEqual(list(WriteAheadLog(self.path).records()), [])
+
+    def test_sync_batching(self):
+        """测试每 sync_every 条记录 fsync 一次"""
+        wal = WriteAheadLog(self.path, sync_every=4, sync_interval=3600)
+        for i in range(10):
+            wal.append('add', doc_id=f"doc{i}", content="text")
+        self.assertEqual(wal.syncs, 2)
+        wal.close()
+        self.assertEqual(wal.syncs, 3)
+
+    def test_idle_records_synced_by_timer(self):
+        """测试写入后没有新记录时，定时器在 sync_interval 内 fsync"""
+        wal = WriteAheadLog(self.path, sync_every=64, sync_interval=0.01)
+        wal.sync()
+        wal.append('add', doc_id="doc1", content="oil")
+        self.assertEqual(wal.syncs, 0)
+        deadline = time.monotonic() + 5
+        while wal.syncs == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(wal.syncs, 1)
+        wal.close()
+
+    def test_reset_keeps_lsn(self):
+        """测试清空日志后 LSN 继续递增"""
+        wal = WriteAheadLog(self.path)
+        wal.append('add', doc_id="doc1", content="oil")
+        wal.reset(1)
+        self.assertEqual(list(wal.records()), [])
+        wal.close()
+        reopened = WriteAheadLog(self.path)
+        self.assertEqual(reopened.append('add', doc_id="doc2", content="gas"), 2)
+        reopened.close()
+
+    def test_atomic_write(self):
+        """测试原子写入替换文件且不留临时文件"""
+        path = os.path.join(self.tmpdir.name, "snapshot.json")
+        atomic_write(path, b"old")
+        atomic_write(path, b"new")
+        with open(path, 'rb') as f:
+            self.assertEqual(f.read(), b"new")
+        self.assertEqual(os.listdir(self.tmpdir.name), ["snapshot.json"])
+
+
+class TestRecovery(unittest.TestCase):
+    """崩溃恢复测试类"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.wal_path = os.path.join(self.tmpdir.name, "index.wal")
+        self.checkpoint = os.path.join(self.tmpdir.name, "index.json")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def recover(self):
+        """模拟重启：新进程打开日志并恢复"""
+        index = InvertedIndex(wal=WriteAheadLog(self.wal_path))
+        replayed = index.recover(self.checkpoint)
+        return index, replayed
+
+    def test_replay_without_checkpoint(self):
+        """测试没有检查点时重放全部日志"""
+        index = InvertedIndex(wal=WriteAheadLog(self.wal_path))
+        index.add_document("doc1", "oil prices rise")
+        index.add_document("doc2", "gas prices fall")
+        index.delete_document("doc1")
+        recovered, replayed = self.recover()
+        self.assertEqual(replayed, 3)
+        self.assertEqual(recovered.documents, {"doc2": "gas prices fall"})
+        self.assertEqual(recovered.search_ranked("prices"), index.search_ranked("prices"))
+
+    def test_replay_after_checkpoint(self):
+        """测试只重放检查点之后的操作"""
+        index = InvertedIndex(wal=WriteAheadLog(self.wal_path))
+        index.add_document("doc1", "oil prices rise")
+        self.assertEqual(index.checkpoint(self.checkpoint), 1)
+        index.add_document("doc2", "gas prices fall")
+        recovered, replayed = self.recover()
+        self.assertEqual(replayed, 1)
+        self.assertEqual(set(recovered.documents), {"doc1", "doc2"})
+        self.assertEqual(recovered.wal_lsn, 1)
+        # 恢复后的索引继续写日志
+        recovered.add_document("doc3", "coal")
+        again, replayed = self.recover()
+        self.assertEqual(replayed, 2)
+        self.assertEqual(set(again.documents), {"doc1", "doc2", "doc3"})
+
+    def test_crash_before_log_reset(self):
+        """测试检查点写完、日志未清空时崩溃，已包含的记录不会重复应用"""
+        index = InvertedIndex(wal=WriteAheadLog(self.wal_path))
+        index.add_document("doc1", "oil prices rise")
+        index.add_document("doc2", "gas prices fall")
+        index._write_snapshot(self.checkpoint, wal_lsn=index.wal.last_lsn)
+        recovered, replayed = self.recover()
+        self.assertEqual(replayed, 0)
+        self.assertEqual(recovered.search("prices"), index.search("prices"))
+
+    def test_fielded_documents(self):
+        """测试多字段文档的日志重放"""
+        index = InvertedIndex(field_options={'title': 'positions'}, wal=WriteAheadLog(self.wal_path))
+        index.add_document("doc1", {'title': "oil prices", 'body': "opec meeting"})
+        recovered = InvertedIndex(field_options={'title': 'positions'}, wal=WriteAheadLog(self.wal_path))
+        recovered.recover(self.checkpoint)
+        self.assertEqual(recovered.search("title:oil"), {"doc1": [0]})
+
+    def test_dedup_state_in_checkpoint(self):
+        """测试近重复检测的签名随检查点保存，恢复后仍能识别检查点之前文档的重复"""
+        text = "opec oil ministers agreed to cut crude output by ten percent next month"
+        index = InvertedIndex(deduplicator=NearDuplicateDetector(mode='skip'), wal=WriteAheadLog(self.wal_path))
+        index.add_document("doc1", text)
+        index.checkpoint(self.checkpoint)
+        recovered = InvertedIndex(deduplicator=NearDuplicateDetector(mode='skip'), wal=WriteAheadLog(self.wal_path))
+        recovered.recover(self.checkpoint)
+        recovered.add_document("doc2", text + " again")
+        self.assertEqual(set(recovered.documents), {"doc1"})
+        self.assertEqual(recovered.deduplicator.duplicates_found, 1)
+
+    def test_requires_wal(self):
+        """测试未配置日志时不能写检查点"""
+        with self.assertRaises(ValueError):
+            InvertedIndex().checkpoint(self.checkpoint)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,189 @@
+"""
+查询追踪
+为每次查询记录各阶段耗时（预处理、获取倒排列表、求交、位置检查……）和计数器
+（扫描的倒排项数、候选文档数、位置比较次数），并输出到可插拔的接收端：
+JSON Lines 文件、内存环形缓冲区或 Prometheus 文本格式
+"""
+
+import json
+import time
+from collections import defaultdict, deque
+from typing import Dict, List
+
+
+class QueryTrace:
+    """
+    单次查询的追踪记录
+
+    阶段耗时采用“打点”方式：mark(stage) 把距上一次打点经过的时间计入该阶段，
+    热路径上只需一次 perf_counter_ns 调用，无需上下文管理器
+    """
+
+    __slots__ = ('query_type', 'query', 'stages', 'counters', 'result_count',
+                 'started_ns', 'total_ns', 'timestamp', '_last_ns')
+
+    def __init__(self, query_type: str, query):
+        self.query_type = query_type
+        self.query = query
+        self.stages: Dict[str, int] = {}
+        self.counters: Dict[str, int] = {}
+        self.result_count = None
+        self.total_ns = None
+        self.timestamp = time.time()
+        self.started_ns = self._last_ns = time.perf_counter_ns()
+
+    def mark(self, stage: str):
+        """结束当前阶段：把距上一次打点的时间计入 stage"""
+        now = time.perf_counter_ns()
+        self.stages[stage] = self.stages.get(stage, 0) + now - self._last_ns
+        self._last_ns = now
+
+    def count(self, name: str, value: int = 1):
+        """累加计数器"""
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def finish(self, result_count: int = None):
+        """结束追踪，记录总耗时和结果数"""
+        self.total_ns = time.perf_counter_ns() - self.started_ns
+        self.result_count = result_count
+
+    def to_dict(self) -> Dict:
+        """转换为可序列化为 JSON 的字典"""
+        return {
+            'timestamp': self.timestamp,
+            'type': self.query_type,
+            'query': self.query,
+            'total_ns': self.total_ns,
+            'stages_ns': dict(self.stages),
+            'counters': dict(self.counters),
+            'results': self.result_count,
+        }
+
+
+class JsonLinesSink:
+    """把每条追踪记录作为一行 JSON 追加写入文件"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def emit(self, trace: QueryTrace):
+        self._file.write(json.dumps(trace.to_dict(), ensure_ascii=False) + '\n')
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class RingBufferSink:
+    """在内存中保留最近 capacity 条追踪记录"""
+
+    def __init__(self, capacity: int = 1000):
+        self.traces = deque(maxlen=capacity)
+
+    def emit(self, trace: QueryTrace):
+        self.traces.append(trace)
+
+    def slowest(self, n: int = 10) -> List[QueryTrace]:
+        """返回缓冲区中最慢的 n 条记录"""
+        return sorted(self.traces, key=lambda trace: trace.total_ns, reverse=True)[:n]
+
+
+class PrometheusSink:
+    """
+    按查询类型聚合追踪记录，并以 Prometheus 文本格式导出
+
+    导出查询总数、结果数、各阶段累计耗时、各计数器累计值和总耗时直方图
+    """
+
+    # 直方图桶上界（秒）
+    BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0)
+
+    def __init__(self, namespace: str = 'inverted_index'):
+        self.namespace = namespace
+        self.queries = defaultdict(int)
+        self.results = defaultdict(int)
+        self.stage_ns = defaultdict(int)
+        self.counters = defaultdict(int)
+        self.duration_ns = defaultdict(int)
+        self.buckets = defaultdict(lambda: [0] * len(self.BUCKETS))
+
+    def emit(self, trace: QueryTrace):
+        kind = trace.query_type
+        self.queries[kind] += 1
+        self.results[kind] += trace.result_count or 0
+        self.duration_ns[kind] += trace.total_ns
+        for stage, elapsed in trace.stages.items():
+            self.stage_ns[kind, stage] += elapsed
+        for name, value in trace.counters.items():
+            self.counters[kind, name] += value
+        seconds = trace.total_ns / 1e9
+        counts = self.buckets[kind]
+        for i, bound in enumerate(self.BUCKETS):
+            if seconds <= bound:
+                counts[i] += 1
+
+    def render(self) -> str:
+        """生成 Prometheus 文本格式"""
+        ns = self.namespace
+        lines = [f'# HELP {ns}_queries_total Queries executed',
+                 f'# TYPE {ns}_queries_total counter']
+        lines += [f'{ns}_queries_total{{type="{kind}"}} {count}' for kind, count in sorted(self.queries.items())]
+
+        lines += [f'# HELP {ns}_query_results_total Documents returned',
+                  f'# TYPE {ns}_query_results_total counter']
+        lines += [f'{ns}_query_results_total{{type="{kind}"}} {count}' for kind, count in sorted(self.results.items())]
+
+        lines += [f'# HELP {ns}_query_stage_seconds_total Time spent per query stage',
+                  f'# TYPE {ns}_query_stage_seconds_total counter']
+        lines += [f'{ns}_query_stage_seconds_total{{type="{kind}",stage="{stage}"}} {elapsed / 1e9:.9f}'
+                  for (kind, stage), elapsed in sorted(self.stage_ns.items())]
+
+        lines += [f'# HELP {ns}_query_work_total Work counters (postings scanned, candidates, comparisons)',
+                  f'# TYPE {ns}_query_work_total counter']
+        lines += [f'{ns}_query_work_total{{type="{kind}",counter="{name}"}} {value}'
+                  for (kind, name), value in sorted(self.counters.items())]
+
+        lines += [f'# HELP {ns}_query_duration_seconds Query latency',
+                  f'# TYPE {ns}_query_duration_seconds histogram']
+        for kind in sorted(self.queries):
+            for bound, count in zip(self.BUCKETS, self.buckets[kind]):
+                lines.append(f'{ns}_query_duration_seconds_bucket{{type="{kind}",le="{bound}"}} {count}')
+            lines.append(f'{ns}_query_duration_seconds_bucket{{type="{kind}",le="+Inf"}} {self.queries[kind]}')
+            lines.append(f'{ns}_query_duration_seconds_sum{{type="{kind}"}} {self.duration_ns[kind] / 1e9:.9f}')
+            lines.append(f'{ns}_query_duration_seconds_count{{type="{kind}"}} {self.queries[kind]}')
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path: str):
+        """把当前指标写入文件（供 node_exporter textfile collector 读取）"""
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(self.render())
+
+
+class Tracer:
+    """
+    查询追踪器
+
+    挂到 InvertedIndex.tracer 上即开启追踪；为 None 时查询方法只多一次属性判断
+    """
+
+    def __init__(self, sinks: List = None):
+        """
+        初始化追踪器
+
+        Args:
+            sinks: 接收端列表，每个接收端需实现 emit(trace)
+        """
+        self.sinks = list(sinks or [])
+
+    def start(self, query_type: str, query) -> QueryTrace:
+        """开始一次查询的追踪"""
+        return QueryTrace(query_type, query)
+
+    def finish(self, trace: QueryTrace, result_count: int = None):
+        """结束追踪并发送到所有接收端"""
+        trace.finish(result_count)
+        for sink in self.sinks:
+            sink.emit(trace)
@@ -0,0 +1,462 @@
+"""
+稠密向量索引（可选功能，需要 NumPy）
+关键词查询只匹配查询中出现的词项：查询 "crude" 找不到只写 "oil" 的文档。
+这里把文档的 TF-IDF 向量投影到几百维的稠密向量，按余弦相似度检索，
+再与 BM25 得分融合（混合检索）。
+
+投影方法：
+    lsi     截断 SVD（潜在语义索引）：随机化 SVD 求 TF-IDF 矩阵的前 dim 个
+            奇异向量；经常共现的词项投影到相近的方向，可以匹配同义词
+    random  稀疏随机投影（Achlioptas）：每个词项一个随机的 ±1/0 向量，
+            近似保持 TF-IDF 余弦，不需要训练，但不能匹配同义词
+
+文档向量以 float32 保存为 .npy 文件，载入时内存映射。近似最近邻检索使用
+IVF：k-means 把文档向量分成 nlist 个簇，向量按簇连续存放；查询只扫描质心
+最相近的 nprobe 个簇。向量索引是建立时的快照，文档变化后需要重建。
+
+    python vector_index.py --index output/reuters.idx --method lsi --dim 128
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import heapq
+import argparse
+from array import array
+from typing import Dict, List, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # NumPy 是可选依赖，没有时只有向量索引不可用
+    np = None
+
+VECTOR_METHODS = ('lsi', 'random')
+# 稀疏矩阵乘法每批处理的非零元数：临时数组能放进 CPU 缓存时最快
+CHUNK_NNZ = 1 << 12
+# 计算向量与质心相似度时每批的向量数
+CHUNK_ROWS = 1 << 14
+# k-means 每个簇最多使用的训练向量数
+TRAIN_PER_CLUSTER = 256
+
+
+def require_numpy():
+    """NumPy 不可用时抛出 ImportError"""
+    if np is None:
+        raise ImportError("向量索引需要 NumPy: pip install numpy")
+
+
+def _segment_dot(ptr, cols, data, dense):
+    """
+    稀疏矩阵（压缩行格式）乘稠密矩阵：第 i 行结果为 Σ data[j] * dense[cols[j]]，
+    j ∈ [ptr[i], ptr[i+1])；按非零元分批，用 np.add.reduceat 求各行之和
+    """
+    rows = len(ptr) - 1
+    out = np.zeros((rows, dense.shape[1]), dtype=np.float32)
+    row = 0
+    while row < rows:
+        end = int(np.searchsorted(ptr, ptr[row] + CHUNK_NNZ, side='right')) - 1
+        end = min(max(end, row + 1), rows)
+        lo, hi = ptr[row], ptr[end]
+        if hi > lo:
+            products = data[lo:hi, None] * dense[cols[lo:hi]]
+            starts = ptr[row:end]
+            # reduceat 对空行返回下一个元素而不是 0，只对非空行求和
+            nonempty = starts < ptr[row + 1:end + 1]
+            out[row:end][nonempty] = np.add.reduceat(products, starts[nonempty] - lo, axis=0)
+        row = end
+    return out
+
+
+class TfidfMatrix:
+    """文档-词项 TF-IDF 矩阵，同时保存按文档和按词项两种压缩顺序"""
+
+    def __init__(self, index):
+        """
+        由倒排索引建立，权重为 (1 + log tf) × log(N / df)，每个文档向量归一化
+
+        Args:
+            index: InvertedIndex（内存、磁盘或 SQLite 存储均可）
+        """
+        require_numpy()
+        self.doc_ids = list(index.documents)
+        self.terms = sorted(index.index)
+        ordinal = {doc_id: i for i, doc_id in enumerate(self.doc_ids)}
+        n = len(self.doc_ids)
+        tf_of = index._tf
+
+        term_ptr = array('q', [0])
+        rows = array('i')
+        weights = array('f')
+        idf = array('f')
+        for term in self.terms:
+            postings = index.index[term]
+            term_idf = math.log(n / len(postings))
+            idf.append(term_idf)
+            for doc_id, value in postings.items():
+                rows.append(ordinal[doc_id])
+                weights.append((1 + math.log(tf_of(value))) * term_idf)
+            term_ptr.append(len(rows))
+
+        self.idf = np.frombuffer(idf, dtype=np.float32).copy()
+        # 按词项的顺序：第 t 段是词项 t 的 (文档序号, 权重)
+        self.term_ptr = np.frombuffer(term_ptr, dtype=np.int64)
+        self.term_rows = np.frombuffer(rows, dtype=np.int32)
+        data = np.frombuffer(weights, dtype=np.float32).copy()
+        norms = np.sqrt(np.bincount(self.term_rows, weights=data * data, minlength=n)).astype(np.float32)
+        data /= np.where(norms > 0, norms, 1)[self.term_rows]
+        self.term_data = data
+
+        # 按文档的顺序：第 i 段是文档 i 的 (词项序号, 权重)
+        order = np.argsort(self.term_rows, kind='stable')
+        term_of = np.repeat(np.arange(len(self.terms), dtype=np.int32), np.diff(self.term_ptr))
+        self.doc_cols = term_of[order]
+        self.doc_data = data[order]
+        self.doc_ptr = np.concatenate(([0], np.cumsum(np.bincount(self.term_rows, minlength=n))))
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return len(self.doc_ids), len(self.terms)
+
+    def dot(self, dense):
+        """X @ dense，dense 为 词项数 × l"""
+        return _segment_dot(self.doc_ptr, self.doc_cols, self.doc_data, dense)
+
+    def tdot(self, dense):
+        """X.T @ dense，dense 为 文档数 × l"""
+        return _segment_dot(self.term_ptr, self.term_rows, self.term_data, dense)
+
+
+def lsi_projection(matrix: TfidfMatrix, dim: int, power_iterations: int = 2,
+                   oversample: int = 10, seed: int = 1):
+    """
+    随机化截断 SVD（Halko 等）：返回 TF-IDF 矩阵前 dim 个右奇异向量，词项数 × dim
+
+    文档向量 X V 即 U Σ，查询向量 q V 与之在同一空间中比较
+    """
+    rng = np.random.default_rng(seed)
+    rank = min(dim + oversample, *matrix.shape)
+    sample = matrix.dot(rng.standard_normal((matrix.shape[1], rank)).astype(np.float32))
+    basis, _ = np.linalg.qr(sample)
+    # 幂迭代让奇异值快速衰减的部分占主导，提高前几个奇异向量的精度
+    for _ in range(power_iterations):
+        basis, _ = np.linalg.qr(matrix.tdot(basis))
+        basis, _ = np.linalg.qr(matrix.dot(basis))
+    # B = Q^T X 很小（rank × 词项数），直接求 SVD
+    _, _, vt = np.linalg.svd(matrix.tdot(basis).T, full_matrices=False)
+    return np.ascontiguousarray(vt[:dim].T, dtype=np.float32)
+
+
+def random_projection(num_terms: int, dim: int, seed: int = 1):
+    """稀疏随机投影矩阵（Achlioptas）：元素以 1/6、2/3、1/6 的概率取 +1、0、-1，词项数 × dim"""
+    rng = np.random.default_rng(seed)
+    signs = rng.choice(np.array([1, 0, -1], dtype=np.float32), size=(num_terms, dim), p=[1 / 6, 2 / 3, 1 / 6])
+    return signs * np.float32(math.sqrt(3 / dim))
+
+
+def normalize_rows(vectors):
+    """按行 L2 归一化（原地），零向量保持为零"""
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    vectors /= np.where(norms > 0, norms, 1)
+    return vectors
+
+
+def spherical_kmeans(vectors, nlist: int, iterations: int = 10, seed: int = 1):
+    """
+    球面 k-means：按内积分配，质心归一化
+
+    Returns:
+        (质心 nlist × dim, 每个向量所属的簇)；所有向量均为零向量时（如空索引，
+        或每个词项都出现在所有文档中、idf 均为 0）只有一个零质心
+    """
+    rng = np.random.default_rng(seed)
+    nonzero = np.flatnonzero(np.any(vectors != 0, axis=1))
+    if not len(nonzero):
+        return np.zeros((1, vectors.shape[1]), dtype=vectors.dtype), np.zeros(len(vectors), dtype=np.intp)
+    nlist = max(1, min(nlist, len(nonzero)))
+    train = vectors[rng.choice(nonzero, min(len(nonzero), nlist * TRAIN_PER_CLUSTER), replace=False)]
+    centroids = train[rng.choice(len(train), nlist, replace=False)].copy()
+    for _ in range(iterations):
+        assignment = np.argmax(train @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, train)
+        # 空簇保留原质心
+        filled = np.bincount(assignment, minlength=nlist) > 0
+        centroids[filled] = normalize_rows(sums[filled])
+    assignment = np.concatenate([np.argmax(vectors[start:start + CHUNK_ROWS] @ centroids.T, axis=1)
+                                 for start in range(0, len(vectors), CHUNK_ROWS)])
+    return centroids, assignment
+
+
+class VectorIndex:
+    """文档向量的 IVF 近似最近邻索引"""
+
+    def __init__(self, doc_ids: List[str], vectors, terms: List[str], term_vectors, idf,
+                 centroids, list_ptr, method: str):
+        """
+        Args:
+            doc_ids: 文档ID，与 vectors 的行对应（按簇排列）
+            vectors: 归一化的文档向量，文档数 × dim，float32（可以是内存映射）
+            terms: 词汇表（有序）
+            term_vectors: 词项投影矩阵，词项数 × dim
+            idf: 各词项的 log(N / df)
+            centroids: 簇质心，nlist × dim
+            list_ptr: 第 c 个簇的向量为 vectors[list_ptr[c]:list_ptr[c + 1]]
+            method: 投影方法，见 VECTOR_METHODS
+        """
+        self.doc_ids = doc_ids
+        self.vectors = vectors
+        self.terms = terms
+        self.term_vectors = term_vectors
+        self.idf = idf
+        self.centroids = centroids
+        self.list_ptr = list_ptr
+        self.method = method
+        self._term_ordinals = {term: i for i, term in enumerate(terms)}
+        self._rows = None
+
+    @classmethod
+    def build(cls, index, dim: int = 128, method: str = 'lsi', nlist: int = None,
+              seed: int = 1) -> 'VectorIndex':
+        """
+        由倒排索引建立向量索引
+
+        Args:
+            index: InvertedIndex
+            dim: 向量维数
+            method: 投影方法，见 VECTOR_METHODS
+            nlist: 簇数，默认约为 √文档数
+            seed: 随机种子
+        """
+        require_numpy()
+        if method not in VECTOR_METHODS:
+            raise ValueError(f"不支持的投影方法: {method}，可选 {VECTOR_METHODS}")
+        matrix = TfidfMatrix(index)
+        if method == 'lsi':
+            term_vectors = lsi_projection(matrix, dim, seed=seed)
+        else:
+            term_vectors = random_projection(len(matrix.terms), dim, seed)
+        vectors = normalize_rows(matrix.dot(term_vectors))
+        nlist = nlist or max(1, int(math.sqrt(len(matrix.doc_ids))))
+        centroids, assignment = spherical_kmeans(vectors, nlist, seed=seed)
+        # 同一簇的向量连续存放，查询时每个簇只读一段连续的内存
+        order = np.argsort(assignment, kind='stable')
+        list_ptr = np.concatenate(([0], np.cumsum(np.bincount(assignment, minlength=len(centroids)))))
+        return cls([matrix.doc_ids[i] for i in order], vectors[order], matrix.terms, term_vectors,
+                   matrix.idf, centroids, list_ptr, method)
+
+    def __len__(self) -> int:
+        return len(self.doc_ids)
+
+    @property
+    def dim(self) -> int:
+        return self.vectors.shape[1]
+
+    def embed(self, terms: Sequence[str]):
+        """
+        查询向量：预处理后的查询词项按 (1 + log tf) × idf 加权后投影并归一化；
+        词汇表之外的词项忽略，没有已知词项时返回零向量
+        """
+        counts: Dict[int, int] = {}
+        for term in terms:
+            ordinal = self._term_ordinals.get(term)
+            if ordinal is not None:
+                counts[ordinal] = counts.get(ordinal, 0) + 1
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for ordinal, tf in counts.items():
+            vector += (1 + math.log(tf)) * self.idf[ordinal] * self.term_vectors[ordinal]
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def search_vector(self, vector, k: int = 10, nprobe: int = 8) -> List[Tuple[str, float]]:
+        """
+        按余弦相似度返回前 k 个文档
+
+        Args:
+            vector: 归一化的查询向量
+            k: 返回结果数
+            nprobe: 扫描的簇数（至少为 1）；None 表示扫描全部向量（精确检索）
+
+        Returns:
+            [(文档ID, 相似度)] 列表，按相似度降序
+        """
+        if nprobe is not None and nprobe < 1:
+            raise ValueError(f"nprobe 须至少为 1: {nprobe}")
+        if k <= 0 or not len(self.doc_ids) or not vector.any():
+            return []
+        if nprobe is None or nprobe >= len(self.centroids):
+            rows = np.arange(len(self.doc_ids))
+            scores = self.vectors @ vector
+        else:
+            probes = np.argpartition(-(self.centroids @ vector), nprobe - 1)[:nprobe]
+            rows = np.concatenate([np.arange(self.list_ptr[c], self.list_ptr[c + 1]) for c in probes])
+            scores = np.concatenate([self.vectors[self.list_ptr[c]:self.list_ptr[c + 1]] @ vector
+                                     for c in probes])
+        if len(scores) > k:
+            top = np.argpartition(-scores, k - 1)[:k]
+        else:
+            top = np.arange(len(scores))
+        top = top[np.lexsort((rows[top], -scores[top]))]
+        return [(self.doc_ids[rows[i]], float(scores[i])) for i in top]
+
+    def search(self, terms: Sequence[str], k: int = 10, nprobe: int = 8) -> List[Tuple[str, float]]:
+        """按预处理后的查询词项检索，见 search_vector"""
+        return self.search_vector(self.embed(terms), k, nprobe)
+
+    def similarity(self, vector, doc_ids: Sequence[str]) -> Dict[str, float]:
+        """查询向量与指定文档的余弦相似度（不在向量索引中的文档不返回）"""
+        if self._rows is None:
+            self._rows = {doc_id: row for row, doc_id in enumerate(self.doc_ids)}
+        found = [(doc_id, self._rows[doc_id]) for doc_id in doc_ids if doc_id in self._rows]
+        if not found:
+            return {}
+        scores = self.vectors[[row for _, row in found]] @ vector
+        return {doc_id: float(score) for (doc_id, _), score in zip(found, scores)}
+
+    def save(self, directory: str):
+        """保存到目录：向量和矩阵为 .npy 文件，文档ID、词汇表等为 meta.json"""
+        os.makedirs(directory, exist_ok=True)
+        for name in ('vectors', 'term_vectors', 'idf', 'centroids', 'list_ptr'):
+            np.save(os.path.join(directory, name + '.npy'), getattr(self, name))
+        with open(os.path.join(directory, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump({'method': self.method, 'doc_ids': self.doc_ids, 'terms': self.terms},
+                      f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, directory: str, mmap: bool = True) -> 'VectorIndex':
+        """
+        从目录载入
+
+        Args:
+            directory: save 写入的目录
+            mmap: 是否内存映射文档向量和词项投影矩阵（只读），而不读入内存
+        """
+        require_numpy()
+        with open(os.path.join(directory, 'meta.json'), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        mode = 'r' if mmap else None
+        arrays = {name: np.load(os.path.join(directory, name + '.npy'),
+                                mmap_mode=mode if name in ('vectors', 'term_vectors') else None)
+                  for name in ('vectors', 'term_vectors', 'idf', 'centroids', 'list_ptr')}
+        return cls(meta['doc_ids'], arrays['vectors'], meta['terms'], arrays['term_vectors'],
+                   arrays['idf'], arrays['centroids'], arrays['list_ptr'], meta['method'])
+
+
+def hybrid_search(index, vectors: VectorIndex, query: str, k: int = 10, alpha: float = 0.5,
+                  candidates: int = 100, nprobe: int = 8) -> List[Tuple[str, float]]:
+    """
+    混合检索：融合 BM25 得分和向量相似度
+
+    分别取 BM25 和向量检索的前 candidates 个候选，两种得分各自除以候选中的
+    最大值，按 alpha × BM25 + (1 - alpha) × 相似度 排序。只由 BM25 找到的候选
+    补算相似度；只由向量检索找到的候选不在 BM25 的前 candidates 名中，其
+    BM25 得分记为 0。已从倒排索引中删除的文档不返回。
+
+    Args:
+        index: InvertedIndex
+        vectors: 由该索引建立的 VectorIndex
+        query: 查询文本
+        k: 返回结果数
+        alpha: BM25 的权重，1 为纯关键词检索，0 为纯向量检索
+        candidates: 每种检索取的候选数
+        nprobe: 向量检索扫描的簇数
+
+    Returns:
+        [(文档ID, 融合得分)] 列表，按得分降序
+    """
+    lexical = dict(index.search_ranked(query, candidates)) if alpha > 0 else {}
+    dense = {}
+    if alpha < 1:
+        query_vector = vectors.embed(index._query_terms(query))
+        dense = dict(vectors.search_vector(query_vector, candidates, nprobe))
+        dense.update(vectors.similarity(query_vector, [doc_id for doc_id in lexical if doc_id not in dense]))
+
+    lexical_max = max(lexical.values(), default=0) or 1.0
+    dense_max = max(dense.values(), default=0) or 1.0
+    fused = {}
+    for doc_id in lexical.keys() | dense.keys():
+        if doc_id in index.documents:
+            fused[doc_id] = (alpha * lexical.get(doc_id, 0.0) / lexical_max
+                             + (1 - alpha) * max(dense.get(doc_id, 0.0), 0.0) / dense_max)
+    return heapq.nlargest(k, fused.items(), key=lambda item: (item[1], item[0]))
+
+
+def recall_at_k(approximate: List[Tuple[str, float]], exact: List[Tuple[str, float]]) -> float:
+    """近似结果覆盖精确前 k 名的比例"""
+    if not exact:
+        return 1.0
+    found = {doc_id for doc_id, _ in approximate}
+    return sum(doc_id in found for doc_id, _ in exact) / len(exact)
+
+
+def _latency_ms(function, queries) -> float:
+    start = time.perf_counter()
+    for query in queries:
+        function(query)
+    return (time.perf_counter() - start) / max(len(queries), 1) * 1000
+
+
+def main(argv=None):
+    from benchmark import load_query_log
+    from inverted_index import InvertedIndex
+    from posting_cache import PostingCache, ensure_reuters_disk_index
+
+    parser = argparse.ArgumentParser(description='Build a dense vector index and report recall@k and latency')
+    parser.add_argument('--index', default=os.path.join('output', 'reuters.idx'),
+                        help='Disk index file (built from Reuters if missing)')
+    parser.add_argument('--data-dir', default='data', help='Directory with Reuters SGML files')
+    parser.add_argument('--query-log', default=os.path.join('data', 'reuters_query_log.json'),
+                        help='Query log; its ranked queries are used')
+    parser.add_argument('--method', choices=VECTOR_METHODS, default='lsi', help='Projection method')
+    parser.add_argument('--dim', type=int, default=128, help='Vector dimensions')
+    parser.add_argument('--nlist', type=int, default=None, help='IVF clusters (default: sqrt of documents)')
+    parser.add_argument('--nprobe', default='1,2,4,8,16', help='Comma-separated cluster counts to probe')
+    parser.add_argument('-k', type=int, default=10, help='Results per query')
+    parser.add_argument('--save', metavar='DIR', help='Save the vector index here and reload it memory-mapped')
+    args = parser.parse_args(argv)
+
+    require_numpy()
+    ensure_reuters_disk_index(args.index, args.data_dir)
+    index = InvertedIndex()
+    index.load_disk_index(args.index, cache=PostingCache(64 * 2**20))
+    queries = [query['query'] for query in load_query_log(args.query_log) if query['type'] == 'ranked']
+
+    start = time.perf_counter()
+    vectors = VectorIndex.build(index, args.dim, args.method, args.nlist)
+    print(f"Built {args.method} vectors: {len(vectors)} docs x {vectors.dim} dims, "
+          f"{len(vectors.centroids)} clusters in {time.perf_counter() - start:.1f} s "
+          f"({vectors.vectors.nbytes / 2**20:.1f} MB float32)")
+    if args.save:
+        vectors.save(args.save)
+        vectors = VectorIndex.load(args.save)
+        print(f"Saved to {args.save} and reloaded memory-mapped")
+
+    embedded = [vectors.embed(index._query_terms(query)) for query in queries]
+    exact = [vectors.search_vector(vector, args.k, None) for vector in embedded]
+    print(f"\n{len(queries)} ranked queries, k={args.k}")
+    print(f"{'Search':<16} {'Recall@k':>9} {'ms/query':>9}")
+    print("-" * 36)
+    print(f"{'exact':<16} {1.0:>9.3f} {_latency_ms(lambda v: vectors.search_vector(v, args.k, None), embedded):>9.3f}")
+    for nprobe in (int(count) for count in args.nprobe.split(',')):
+        recall = sum(recall_at_k(vectors.search_vector(vector, args.k, nprobe), truth)
+                     for vector, truth in zip(embedded, exact)) / max(len(queries), 1)
+        latency = _latency_ms(lambda v: vectors.search_vector(v, args.k, nprobe), embedded)
+        print(f"{'IVF nprobe=' + str(nprobe):<16} {recall:>9.3f} {latency:>9.3f}")
+
+    print(f"\n{'Retrieval':<16} {'ms/query':>9} {'Top-k without query terms':>26}")
+    print("-" * 53)
+    for name, alpha in (('BM25', 1.0), ('hybrid 0.5', 0.5), ('vector', 0.0)):
+        results = [hybrid_search(index, vectors, query, args.k, alpha) for query in queries]
+        latency = _latency_ms(lambda q: hybrid_search(index, vectors, q, args.k, alpha), queries)
+        # 结果中不含任何查询词的文档：只有向量检索能找到
+        novel = sum(not any(doc_id in index.index.get(term, ()) for term in index._query_terms(query))
+                    for query, top in zip(queries, results) for doc_id, _ in top)
+        total = sum(len(top) for top in results) or 1
+        print(f"{name:<16} {latency:>9.3f} {novel / total:>25.1%}")
+    index.disk_index.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,200 @@
+"""
+预写日志（write-ahead log）
+把 add_document / delete_document 操作追加写入日志文件，使索引不必每次变更
+都完整保存：崩溃后加载最近的检查点，再重放日志中检查点之后的操作即可恢复。
+
+每条记录为 (载荷字节数, CRC32) 头加 JSON 载荷；载荷带递增的日志序号（LSN）。
+写到一半的尾部记录在打开日志时被识别（长度不足或校验和不符）并截掉。
+fsync 按批进行：每条记录都立即写入操作系统（进程崩溃不丢数据），
+累计 sync_every 条或距上次同步超过 sync_interval 秒才 fsync 一次。写入后
+没有新记录时，由后台定时器在 sync_interval 秒后 fsync，断电时最多丢失
+最近 sync_interval 秒内的记录
+"""
+
+import os
+import json
+import time
+import struct
+import threading
+import zlib
+from typing import Dict, Iterator
+
+# 记录头：载荷字节数、载荷的 CRC32
+_RECORD_HEADER = struct.Struct('<II')
+
+
+def fsync_directory(path: str):
+    """fsync 文件所在目录，使改名或新建文件在断电后仍然有效（不支持的平台上忽略）"""
+    try:
+        fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def atomic_write(path: str, data: bytes):
+    """
+    原子地替换文件内容：先写临时文件并 fsync，再改名覆盖
+
+    进程在任何时刻崩溃，path 要么是旧内容，要么是完整的新内容
+    """
+    temp_path = path + '.tmp'
+    with open(temp_path, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+    fsync_directory(path)
+
+
+class WriteAheadLog:
+    """追加写入的操作日志"""
+
+    def __init__(self, path: str, sync_every: int = 64, sync_interval: float = 0.05):
+        """
+        打开（或创建）日志，截掉写到一半的尾部记录
+
+        Args:
+            path: 日志文件路径
+            sync_every: 每累计多少条记录 fsync 一次；1 表示每条都 fsync，0 表示从不 fsync
+            sync_interval: 记录写入后最迟经过该秒数 fsync：距上次 fsync 已超过该秒数时
+                           写入后立即 fsync，否则由定时器在到期时 fsync
+        """
+        self.path = path
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+        # 最后一条有效记录的 LSN（空日志时为 0）
+        self.last_lsn = 0
+        valid_bytes = 0
+        if os.path.exists(path):
+            for record, end in self._scan():
+                self.last_lsn = record['lsn']
+                valid_bytes = end
+        self._file = open(path, 'ab')
+        if self._file.tell() != valid_bytes:
+            self._file.truncate(valid_bytes)
+            self._file.seek(valid_bytes)
+        self._pending = 0
+        self._last_sync = time.monotonic()
+        # 定时器线程与写入线程共用文件，写入和 fsync 都在锁内进行
+        self._lock = threading.Lock()
+        self._timer = None
+        # 统计
+        self.records_written = 0
+        self.syncs = 0
+
+    def _scan(self) -> Iterator:
+        """顺序读取有效记录，遇到不完整或校验失败的记录即停止；产出 (记录, 记录结束偏移)"""
+        with open(self.path, 'rb') as f:
+            data = f.read()
+        pos = 0
+        while pos + _RECORD_HEADER.size <= len(data):
+            length, checksum = _RECORD_HEADER.unpack_from(data, pos)
+            start = pos + _RECORD_HEADER.size
+            payload = data[start:start + length]
+            if len(payload) < length or zlib.crc32(payload) != checksum:
+                return
+            pos = start + length
+            yield json.loads(payload), pos
+
+    def append(self, op: str, **fields) -> int:
+        """
+        追加一条操作记录
+
+        Args:
+            op: 操作名，如 'add'、'delete'
+            **fields: 操作参数（须可序列化为 JSON）
+
+        Returns:
+            记录的 LSN
+        """
+        with self._lock:
+            self.last_lsn += 1
+            fields['lsn'] = self.last_lsn
+            fields['op'] = op
+            payload = json.dumps(fields, ensure_ascii=False).encode('utf-8')
+            self._file.write(_RECORD_HEADER.pack(len(payload), zlib.crc32(payload)) + payload)
+            self._file.flush()
+            self.records_written += 1
+            self._pending += 1
+            if self.sync_every and (self._pending >= self.sync_every
+                                    or time.monotonic() - self._last_sync >= self.sync_interval):
+                self._sync()
+            elif self.sync_every and self._timer is None:
+                # 之后没有新记录时，由定时器保证这条记录在 sync_interval 内 fsync
+                self._timer = threading.Timer(self.sync_interval, self._timed_sync)
+                self._timer.daemon = True
+                self._timer.start()
+            return self.last_lsn
+
+    def _timed_sync(self):
+        """定时器到期：fsync 尚未同步的记录"""
+        with self._lock:
+            self._timer = None
+            if not self._file.closed:
+                self._sync()
+
+    def _sync(self):
+        """fsync 已写入的记录（调用方持有锁）"""
+        if self._pending:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self.syncs += 1
+            self._pending = 0
+        self._last_sync = time.monotonic()
+
+    def sync(self):
+        """把已写入的记录 fsync 到磁盘"""
+        with self._lock:
+            self._sync()
+
+    def records(self, after_lsn: int = 0) -> Iterator[Dict]:
+        """
+        读取 LSN 大于 after_lsn 的操作记录（跳过检查点标记）
+
+        Args:
+            after_lsn: 检查点已包含的最后一个 LSN
+        """
+        with self._lock:
+            self._file.flush()
+        for record, _ in self._scan():
+            if record['lsn'] > after_lsn and record['op'] != 'checkpoint':
+                yield record
+
+    def reset(self, checkpoint_lsn: int):
+        """
+        检查点写完后清空日志
+
+        新日志以一条检查点标记开头，保持 LSN 连续；新日志原子地替换旧日志，
+        中途崩溃时旧日志仍在，重放时其中不大于 checkpoint_lsn 的记录会被跳过
+
+        Args:
+            checkpoint_lsn: 检查点包含的最后一个 LSN
+        """
+        payload = json.dumps({'lsn': checkpoint_lsn, 'op': 'checkpoint'}).encode('utf-8')
+        with self._lock:
+            self._file.close()
+            atomic_write(self.path, _RECORD_HEADER.pack(len(payload), zlib.crc32(payload)) + payload)
+            self._file = open(self.path, 'ab')
+            self.last_lsn = max(self.last_lsn, checkpoint_lsn)
+            self._pending = 0
+            self._last_sync = time.monotonic()
+
+    def size_bytes(self) -> int:
+        """日志文件的字节数"""
+        return self._file.tell()
+
+    def close(self):
+        """同步并关闭日志"""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._file.closed:
+                self._sync()
+                self._file.close()